@@ -7,7 +7,7 @@
 
 import os
 from dataclasses import dataclass, field
-from typing import Optional, List
+from typing import Dict, List, Optional, Tuple
 from dotenv import load_dotenv
 from pathlib import Path
 
@@ -43,6 +43,19 @@ class VectorStoreConfig:
     chunk_overlap: int = 200
     search_k: int = 4
     search_type: str = "similarity"
+    # 索引类型: flat(精确检索), ivf_flat, ivf_pq, hnsw
+    index_type: str = "flat"
+    nlist: int = 1024
+    nprobe: int = 16
+    pq_m: int = 64
+    pq_nbits: int = 8
+    hnsw_m: int = 32
+    ef_construction: int = 200
+    ef_search: int = 64
+    # 构建后召回率-延迟评估的抽样查询数量，0表示不评估
+    eval_queries: int = 100
+    # 以只读内存映射方式加载索引，多进程共享页缓存
+    mmap_index: bool = False
     
     def __post_init__(self):
         """验证配置"""
@@ -60,6 +73,116 @@ class VectorStoreConfig:
         
         if self.search_type not in ["similarity", "mmr"]:
             raise ValueError("search_type 必须是 'similarity' 或 'mmr'")
+        
+        if self.index_type not in ["flat", "ivf_flat", "ivf_pq", "hnsw"]:
+            raise ValueError("index_type 必须是 'flat'、'ivf_flat'、'ivf_pq' 或 'hnsw'")
+        
+        if self.nlist <= 0 or self.nprobe <= 0:
+            raise ValueError("nlist 和 nprobe 必须大于 0")
+        
+        if self.pq_m <= 0 or not 1 <= self.pq_nbits <= 16:
+            raise ValueError("pq_m 必须大于 0，pq_nbits 必须在 1-16 之间")
+        
+        if self.hnsw_m <= 0 or self.ef_construction <= 0 or self.ef_search <= 0:
+            raise ValueError("hnsw_m、ef_construction 和 ef_search 必须大于 0")
+        
+        if self.eval_queries < 0:
+            raise ValueError("eval_queries 不能为负数")
+
+@dataclass
+class EmbeddingCacheConfig:
+    """向量缓存配置"""
+    enabled: bool = True
+    db_path: str = "./embedding_cache.db"
+    # 缓存向量数据总量上限（MB），超出后淘汰最久未使用的条目
+    max_size_mb: int = 512
+    
+    def __post_init__(self):
+        """验证配置"""
+        if self.max_size_mb <= 0:
+            raise ValueError("max_size_mb 必须大于 0")
+
+@dataclass
+class EmbeddingPipelineConfig:
+    """构建时的嵌入流水线配置"""
+    batch_size: int = 25
+    max_workers: int = 4
+    # 每秒最多发起的嵌入请求数，0表示不限速
+    requests_per_second: float = 10.0
+    max_retries: int = 5
+    retry_base_delay: float = 1.0
+    retry_max_delay: float = 30.0
+    # 保存已完成批次的检查点，中断后可继续
+    checkpoint: bool = True
+    # 读取、分割、嵌入各阶段之间的队列长度（决定构建时的内存峰值）
+    queue_size: int = 64
+    
+    def __post_init__(self):
+        """验证配置"""
+        if self.batch_size <= 0 or self.max_workers <= 0 or self.queue_size <= 0:
+            raise ValueError("batch_size、max_workers 和 queue_size 必须大于 0")
+        
+        if self.requests_per_second < 0:
+            raise ValueError("requests_per_second 不能为负数")
+        
+        if self.max_retries < 0 or self.retry_base_delay < 0 or self.retry_max_delay < 0:
+            raise ValueError("max_retries、retry_base_delay 和 retry_max_delay 不能为负数")
+
+@dataclass
+class AnswerCacheConfig:
+    """问答结果缓存配置"""
+    enabled: bool = True
+    max_entries: int = 1024
+    # 缓存有效期（秒），0表示不过期
+    ttl_seconds: int = 3600
+    # 语义缓存：相近问题（问题向量余弦相似度达到阈值）复用答案，默认关闭
+    semantic_enabled: bool = False
+    # 语义缓存的余弦相似度阈值。与增强知识库的 similarity_threshold（词项Jaccard相似度）不是同一尺度，
+    # 嵌入向量的余弦相似度普遍偏高，阈值过低时不同的问题会拿到其他问题的缓存答案
+    semantic_threshold: float = 0.95
+    
+    def __post_init__(self):
+        """验证配置"""
+        if self.max_entries <= 0:
+            raise ValueError("max_entries 必须大于 0")
+        
+        if self.ttl_seconds < 0:
+            raise ValueError("ttl_seconds 不能为负数")
+        
+        if not 0.0 < self.semantic_threshold <= 1.0:
+            raise ValueError("semantic_threshold 必须在 0.0（不含）到 1.0 之间")
+
+@dataclass
+class BatchConfig:
+    """批量接口配置"""
+    # 单次批量请求的最大条目数
+    max_items: int = 256
+    # 批量问答的默认（也是最大）并发数
+    chat_parallelism: int = 4
+    
+    def __post_init__(self):
+        """验证配置"""
+        if self.max_items <= 0:
+            raise ValueError("max_items 必须大于 0")
+        
+        if self.chat_parallelism <= 0:
+            raise ValueError("chat_parallelism 必须大于 0")
+
+@dataclass
+class RequestBudgetConfig:
+    """请求时间预算配置（按gRPC截止时间为问答各阶段分配时间）"""
+    # 向量计算与检索阶段最多占用剩余时间的比例，超出时中止请求（不再调用LLM）
+    retrieval_fraction: float = 0.3
+    # 剩余时间低于该值（秒）时跳过可选步骤（语义缓存查找、相似问题查找）
+    optional_min_seconds: float = 2.0
+    
+    def __post_init__(self):
+        """验证配置"""
+        if not 0.0 < self.retrieval_fraction <= 1.0:
+            raise ValueError("retrieval_fraction 必须在 0.0 到 1.0 之间（不含0）")
+        
+        if self.optional_min_seconds < 0:
+            raise ValueError("optional_min_seconds 不能为负数")
 
 @dataclass
 class DocumentConfig:
@@ -68,6 +191,10 @@ class DocumentConfig:
     supported_extensions: List[str] = field(default_factory=lambda: [".md", ".txt", ".rst"])
     encoding: str = "utf-8"
     recursive: bool = True
+    # PDF/Word解析进程数，0表示使用CPU核数
+    extract_workers: int = 0
+    # 大PDF按页段并行提取，每段页数
+    pdf_pages_per_task: int = 20
     
     def __post_init__(self):
         """验证配置（仅警告，不抛出异常）"""
@@ -98,18 +225,149 @@ class GrpcConfig:
     max_workers: int = 10
     enable_reflection: bool = False
     enable_health_check: bool = True
+    # 使用grpc.aio异步服务器（max_workers 为阻塞操作线程数），默认使用同步线程池服务器
+    async_mode: bool = False
+    # 工作进程数，大于1时由守护进程启动多个进程以SO_REUSEPORT共享端口
+    processes: int = 1
     
     def __post_init__(self):
         """验证配置"""
         if self.port < 1 or self.port > 65535:
             raise ValueError("gRPC端口号必须在 1-65535 之间")
         
+        if self.processes < 1:
+            raise ValueError("gRPC工作进程数必须大于 0")
+        
         if self.max_workers <= 0:
             raise ValueError("max_workers 必须大于 0")
         
         # 验证主机地址格式
         if not self.host:
             raise ValueError("gRPC主机地址不能为空")
+
+@dataclass
+class AdmissionConfig:
+    """gRPC准入控制配置（按RPC方法限制并发与排队）"""
+    enabled: bool = True
+    # 每个方法的默认最大并发数，0表示不限制（此时忽略排队数）
+    max_concurrency: int = 16
+    # 每个方法的默认最大排队数，并发与排队均已满时立即以 RESOURCE_EXHAUSTED 拒绝
+    # （仅异步服务器排队；同步服务器排队会占用工作线程，并发已满时立即拒绝）
+    max_queue: int = 32
+    # 排队最长等待时间（秒），0表示仅受请求截止时间限制
+    queue_timeout: float = 30.0
+    # 按方法覆盖的限制，方法名 -> (最大并发数, 最大排队数)
+    method_limits: Dict[str, Tuple[int, int]] = field(default_factory=dict)
+    # 同步服务器为未限制并发的方法（如 HealthCheck）预留的工作线程数
+    reserved_workers: int = 4
+    
+    def __post_init__(self):
+        """验证配置"""
+        if self.max_concurrency < 0 or self.max_queue < 0:
+            raise ValueError("max_concurrency 和 max_queue 不能为负数")
+        
+        if self.reserved_workers < 1:
+            raise ValueError("reserved_workers 必须大于0")
+        
+        if self.queue_timeout < 0:
+            raise ValueError("queue_timeout 不能为负数")
+        
+        for method, (concurrency, queue) in self.method_limits.items():
+            if concurrency < 0 or queue < 0:
+                raise ValueError(f"方法 {method} 的并发数和排队数不能为负数")
+    
+    @staticmethod
+    def parse_method_limits(value: str) -> Dict[str, Tuple[int, int]]:
+        """解析 "Chat=8:16,BatchChat=2:4" 形式的方法限制"""
+        limits = {}
+        for item in filter(None, (part.strip() for part in value.split(','))):
+            try:
+                method, limit = item.split('=')
+                concurrency, queue = limit.split(':')
+                limits[method.strip()] = (int(concurrency), int(queue))
+            except ValueError:
+                raise ValueError(f"无效的方法限制: {item}，格式应为 方法名=并发数:排队数")
+        return limits
+    
+    def limits_for(self, method: str) -> Tuple[int, int]:
+        """获取方法的 (最大并发数, 最大排队数)"""
+        return self.method_limits.get(method, (self.max_concurrency, self.max_queue))
+
+@dataclass
+class MetricsConfig:
+    """指标端点配置（Prometheus文本格式）"""
+    enabled: bool = True
+    host: str = "127.0.0.1"
+    # 多进程模式下第 i 个工作进程监听 port + i
+    port: int = 9095
+    
+    def __post_init__(self):
+        """验证配置"""
+        if self.port < 0 or self.port > 65535:
+            raise ValueError("指标端口号必须在 0-65535 之间")
+
+@dataclass
+class TracingConfig:
+    """请求追踪配置（请求ID、慢请求日志与追踪数据导出）"""
+    enabled: bool = True
+    # 慢请求阈值（秒），超过时附带阶段耗时记录日志，0表示不记录
+    slow_request_seconds: float = 2.0
+    # 普通请求的追踪导出采样率（0-1），慢请求与失败请求总是导出
+    sample_rate: float = 0.01
+    # OpenTelemetry兼容的JSON追踪数据文件（OTLP/JSON，每行一条），为空表示不导出
+    spans_path: str = "./traces/spans.jsonl"
+    service_name: str = "kdb-grpc"
+    
+    def __post_init__(self):
+        """验证配置"""
+        if self.slow_request_seconds < 0:
+            raise ValueError("slow_request_seconds 不能为负数")
+        
+        if not 0 <= self.sample_rate <= 1:
+            raise ValueError("sample_rate 必须在 0-1 之间")
+
+@dataclass
+class FeedbackConfig:
+    """反馈学习配置"""
+    # 相似问题查找方式：keyword（词项Jaccard相似度，倒排索引）或 embedding（问题向量k近邻）
+    similarity_mode: str = "keyword"
+    # embedding 模式下的近邻数量
+    similar_top_k: int = 5
+    # embedding 模式下的余弦相似度阈值，0表示沿用知识库的相似问题阈值
+    embedding_threshold: float = 0.0
+    # 反馈数据库（SQLite，WAL模式）：写锁等待时间（秒）、每个连接的页缓存与内存映射大小（MB）
+    db_busy_timeout: float = 30.0
+    db_cache_size_mb: int = 8
+    db_mmap_size_mb: int = 64
+    # 异步批量写入反馈（gRPC服务提交反馈即返回ID）：每批上限、最长等待时间（秒）与排队上限
+    write_behind: bool = True
+    write_batch_size: int = 256
+    write_flush_interval: float = 0.2
+    write_max_pending: int = 10000
+    
+    def __post_init__(self):
+        """验证配置"""
+        if self.similarity_mode not in ("keyword", "embedding"):
+            raise ValueError("similarity_mode 必须是 keyword 或 embedding")
+        
+        if self.similar_top_k < 1:
+            raise ValueError("similar_top_k 必须大于0")
+        
+        if not 0 <= self.embedding_threshold <= 1:
+            raise ValueError("embedding_threshold 必须在 0-1 之间")
+        
+        if self.db_busy_timeout < 0:
+            raise ValueError("db_busy_timeout 不能为负数")
+        
+        if self.db_cache_size_mb < 0 or self.db_mmap_size_mb < 0:
+            raise ValueError("db_cache_size_mb 与 db_mmap_size_mb 不能为负数")
+        
+        if self.write_batch_size < 1 or self.write_max_pending < 1:
+            raise ValueError("write_batch_size 与 write_max_pending 必须大于0")
+        
+        if self.write_flush_interval < 0:
+            raise ValueError("write_flush_interval 不能为负数")
+
 @dataclass
 class GrpcProxyConfig:
     """gRPC代理配置"""
@@ -171,14 +429,66 @@ class Config:
                 chunk_size=int(os.getenv('CHUNK_SIZE', '1000')),
                 chunk_overlap=int(os.getenv('CHUNK_OVERLAP', '200')),
                 search_k=int(os.getenv('SEARCH_K', '4')),
-                search_type=os.getenv('SEARCH_TYPE', 'similarity')
+                search_type=os.getenv('SEARCH_TYPE', 'similarity'),
+                index_type=os.getenv('VECTOR_INDEX_TYPE', 'flat'),
+                nlist=int(os.getenv('VECTOR_INDEX_NLIST', '1024')),
+                nprobe=int(os.getenv('VECTOR_INDEX_NPROBE', '16')),
+                pq_m=int(os.getenv('VECTOR_INDEX_PQ_M', '64')),
+                pq_nbits=int(os.getenv('VECTOR_INDEX_PQ_NBITS', '8')),
+                hnsw_m=int(os.getenv('VECTOR_INDEX_HNSW_M', '32')),
+                ef_construction=int(os.getenv('VECTOR_INDEX_EF_CONSTRUCTION', '200')),
+                ef_search=int(os.getenv('VECTOR_INDEX_EF_SEARCH', '64')),
+                eval_queries=int(os.getenv('VECTOR_INDEX_EVAL_QUERIES', '100')),
+                mmap_index=os.getenv('VECTOR_STORE_MMAP', 'false').lower() == 'true'
+            )
+            
+            # 向量缓存配置
+            self.embedding_cache = EmbeddingCacheConfig(
+                enabled=os.getenv('EMBEDDING_CACHE_ENABLED', 'true').lower() == 'true',
+                db_path=os.getenv('EMBEDDING_CACHE_PATH', './embedding_cache.db'),
+                max_size_mb=int(os.getenv('EMBEDDING_CACHE_MAX_MB', '512'))
+            )
+            
+            # 嵌入流水线配置
+            self.embedding_pipeline = EmbeddingPipelineConfig(
+                batch_size=int(os.getenv('EMBEDDING_BATCH_SIZE', '25')),
+                max_workers=int(os.getenv('EMBEDDING_MAX_WORKERS', '4')),
+                requests_per_second=float(os.getenv('EMBEDDING_RATE_LIMIT', '10')),
+                max_retries=int(os.getenv('EMBEDDING_MAX_RETRIES', '5')),
+                retry_base_delay=float(os.getenv('EMBEDDING_RETRY_BASE_DELAY', '1.0')),
+                retry_max_delay=float(os.getenv('EMBEDDING_RETRY_MAX_DELAY', '30.0')),
+                checkpoint=os.getenv('EMBEDDING_CHECKPOINT', 'true').lower() == 'true',
+                queue_size=int(os.getenv('BUILD_QUEUE_SIZE', '64'))
+            )
+            
+            # 问答缓存配置
+            self.answer_cache = AnswerCacheConfig(
+                enabled=os.getenv('ANSWER_CACHE_ENABLED', 'true').lower() == 'true',
+                max_entries=int(os.getenv('ANSWER_CACHE_MAX_ENTRIES', '1024')),
+                ttl_seconds=int(os.getenv('ANSWER_CACHE_TTL', '3600')),
+                semantic_enabled=os.getenv('SEMANTIC_CACHE_ENABLED', 'false').lower() == 'true',
+                semantic_threshold=float(os.getenv('SEMANTIC_CACHE_THRESHOLD', '0.95'))
+            )
+            
+            # 批量接口配置
+            self.batch = BatchConfig(
+                max_items=int(os.getenv('BATCH_MAX_ITEMS', '256')),
+                chat_parallelism=int(os.getenv('BATCH_CHAT_PARALLELISM', '4'))
+            )
+            
+            # 请求时间预算配置
+            self.request_budget = RequestBudgetConfig(
+                retrieval_fraction=float(os.getenv('REQUEST_RETRIEVAL_BUDGET', '0.3')),
+                optional_min_seconds=float(os.getenv('REQUEST_OPTIONAL_MIN_SECONDS', '2'))
             )
             
             # 文档配置
             self.document = DocumentConfig(
                 docs_path=os.getenv('DOCS_PATH', './docs'),
                 encoding=os.getenv('DOCS_ENCODING', 'utf-8'),
-                recursive=os.getenv('DOCS_RECURSIVE', 'true').lower() == 'true'
+                recursive=os.getenv('DOCS_RECURSIVE', 'true').lower() == 'true',
+                extract_workers=int(os.getenv('DOCS_EXTRACT_WORKERS', '0')),
+                pdf_pages_per_task=int(os.getenv('DOCS_PDF_PAGES_PER_TASK', '20'))
             )
             
             # Streamlit配置
@@ -194,7 +504,43 @@ class Config:
                 port=int(os.getenv('GRPC_PORT', '50051')),
                 max_workers=int(os.getenv('GRPC_MAX_WORKERS', '10')),
                 enable_reflection=os.getenv('GRPC_ENABLE_REFLECTION', 'false').lower() == 'true',
-                enable_health_check=os.getenv('GRPC_ENABLE_HEALTH_CHECK', 'true').lower() == 'true'
+                enable_health_check=os.getenv('GRPC_ENABLE_HEALTH_CHECK', 'true').lower() == 'true',
+                async_mode=os.getenv('GRPC_ASYNC', 'false').lower() == 'true',
+                processes=int(os.getenv('GRPC_PROCESSES', '1'))
+            )
+            self.admission = AdmissionConfig(
+                enabled=os.getenv('ADMISSION_ENABLED', 'true').lower() == 'true',
+                max_concurrency=int(os.getenv('ADMISSION_MAX_CONCURRENCY', '16')),
+                max_queue=int(os.getenv('ADMISSION_MAX_QUEUE', '32')),
+                queue_timeout=float(os.getenv('ADMISSION_QUEUE_TIMEOUT', '30')),
+                method_limits=AdmissionConfig.parse_method_limits(
+                    os.getenv('ADMISSION_METHOD_LIMITS', 'BatchChat=2:4,HealthCheck=0:0')
+                ),
+                reserved_workers=int(os.getenv('ADMISSION_RESERVED_WORKERS', '4'))
+            )
+            self.metrics = MetricsConfig(
+                enabled=os.getenv('METRICS_ENABLED', 'true').lower() == 'true',
+                host=os.getenv('METRICS_HOST', '127.0.0.1'),
+                port=int(os.getenv('METRICS_PORT', '9095'))
+            )
+            self.tracing = TracingConfig(
+                enabled=os.getenv('TRACING_ENABLED', 'true').lower() == 'true',
+                slow_request_seconds=float(os.getenv('SLOW_REQUEST_SECONDS', '2')),
+                sample_rate=float(os.getenv('TRACE_SAMPLE_RATE', '0.01')),
+                spans_path=os.getenv('TRACE_SPANS_PATH', './traces/spans.jsonl'),
+                service_name=os.getenv('TRACE_SERVICE_NAME', 'kdb-grpc')
+            )
+            self.feedback = FeedbackConfig(
+                similarity_mode=os.getenv('FEEDBACK_SIMILARITY_MODE', 'keyword').lower(),
+                similar_top_k=int(os.getenv('FEEDBACK_SIMILAR_TOP_K', '5')),
+                embedding_threshold=float(os.getenv('FEEDBACK_EMBEDDING_THRESHOLD', '0')),
+                db_busy_timeout=float(os.getenv('FEEDBACK_DB_BUSY_TIMEOUT', '30')),
+                db_cache_size_mb=int(os.getenv('FEEDBACK_DB_CACHE_SIZE_MB', '8')),
+                db_mmap_size_mb=int(os.getenv('FEEDBACK_DB_MMAP_SIZE_MB', '64')),
+                write_behind=os.getenv('FEEDBACK_WRITE_BEHIND', 'true').lower() == 'true',
+                write_batch_size=int(os.getenv('FEEDBACK_WRITE_BATCH_SIZE', '256')),
+                write_flush_interval=float(os.getenv('FEEDBACK_WRITE_FLUSH_INTERVAL', '0.2')),
+                write_max_pending=int(os.getenv('FEEDBACK_WRITE_MAX_PENDING', '10000'))
             )
             self.grpc_proxy = GrpcProxyConfig(
                 host=os.getenv('GRPC_PROXY_HOST', '0.0.0.0'),
@@ -261,6 +607,7 @@ class Config:
 - 向量存储: {self.vector_store.store_path}
 - 分块大小: {self.vector_store.chunk_size}
 - 搜索数量: {self.vector_store.search_k}
+- 索引类型: {self.vector_store.index_type}
 - gRPC服务: {self.grpc.host}:{self.grpc.port}
 - gRPC工作线程: {self.grpc.max_workers}
 - 日志级别: {self.logging.level}"""
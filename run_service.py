@@ -57,11 +57,13 @@ def check_api_key():
         print(f"❌ 配置检查失败: {e}")
         return False
 
-def start_rpc_server(host='0.0.0.0', port=50051, workers=10):
+def start_rpc_server(host='0.0.0.0', port=50051, workers=10, async_mode=True, processes=1):
     """启动RPC服务器"""
     print("\n🚀 启动知识库gRPC服务器...")
     print(f"🌐 监听地址: {host}:{port}")
     print(f"🔧 工作线程: {workers}")
+    print(f"⚙️ 服务器模式: {'异步' if async_mode else '同步'}")
+    print(f"🧩 工作进程: {processes}")
     print("\n" + "="*60)
     print("🧠 智能知识库RPC服务")
     print("="*60)
@@ -75,11 +77,16 @@ def start_rpc_server(host='0.0.0.0', port=50051, workers=10):
     print("="*60 + "\n")
     
     try:
-        # 导入并启动服务器
-        from src.rpc.grpc_server import serve
-        
-        # 启动服务器（在当前线程中）
-        serve(port=port, max_workers=workers)
+        if processes > 1:
+            # 多进程模式：守护进程启动并监控工作进程
+            from src.rpc.supervisor import serve_multiprocess
+            serve_multiprocess(processes, port=port, max_workers=workers, async_mode=async_mode)
+        else:
+            # 导入并启动服务器
+            from src.rpc.grpc_server import serve
+            
+            # 启动服务器（在当前线程中）
+            serve(port=port, max_workers=workers, async_mode=async_mode)
         return True
     except ImportError as e:
         print(f"❌ 导入模块失败: {e}")
@@ -189,6 +196,8 @@ def main():
     parser.add_argument('--rpc-port', type=int, default=config.grpc.port, help='RPC服务端口 (默认: 50051)')
     parser.add_argument('--rpc-workers', type=int, default=config.grpc.max_workers, help='RPC服务工作线程数 (默认: 10)')
     parser.add_argument('--rpc-host', default=config.grpc.host, help='RPC服务监听地址 (默认: 0.0.0.0)')
+    parser.add_argument('--rpc-async', action='store_true', help='使用grpc.aio异步RPC服务器 (默认使用同步线程池服务器)')
+    parser.add_argument('--rpc-processes', type=int, default=config.grpc.processes, help='RPC服务工作进程数 (默认: 1)')
     parser.add_argument('--web-ui', action='store_true', help='启动Web UI界面')
     parser.add_argument('--enhanced', action='store_true', help='使用增强版Web UI')
     parser.add_argument('--web-port', type=int, default=config.streamlit.port, help='Web UI端口 (默认: 8501)')
@@ -207,7 +216,8 @@ def main():
     # 启动RPC服务器
     rpc_server_thread = threading.Thread(
         target=start_rpc_server,
-        args=(args.rpc_host, args.rpc_port, args.rpc_workers),
+        args=(args.rpc_host, args.rpc_port, args.rpc_workers, config.grpc.async_mode or args.rpc_async,
+              args.rpc_processes),
         daemon=True
     )
     rpc_server_thread.start()
@@ -0,0 +1,267 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+答案缓存模块
+精确缓存以 (规范化问题, 向量存储版本, 提示词版本) 为键缓存完整问答结果，
+语义缓存按问题向量的余弦相似度复用相近问题的答案；
+均支持TTL过期与LRU淘汰，问题被纠正或索引重建时失效
+"""
+
+import copy
+import time
+import hashlib
+import logging
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+import numpy as np
+import faiss
+
+from src.app.embedding_cache import normalize_text
+
+# 配置日志
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+
+def question_hash(question: str) -> str:
+    """规范化问题的哈希（同一问题的不同写法得到相同哈希）"""
+    return hashlib.sha256(normalize_text(question).encode("utf-8")).hexdigest()
+
+
+class AnswerCache:
+    """线程安全的精确匹配答案缓存"""
+
+    def __init__(self, max_entries: int = 1024, ttl_seconds: float = 3600):
+        """
+        初始化答案缓存
+
+        Args:
+            max_entries: 最大条目数，超出后淘汰最久未使用的条目
+            ttl_seconds: 条目有效期（秒），<=0 表示不过期
+        """
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()
+        # 问题哈希 -> 缓存键，用于按问题失效
+        self._keys_by_question: Dict[str, Set[str]] = {}
+        self._lock = threading.Lock()
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    @staticmethod
+    def make_key(question: str, *versions: Any) -> str:
+        """生成缓存键"""
+        raw = "\0".join([question_hash(question)] + [str(v) for v in versions])
+        return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """读取缓存，过期或不存在时返回None"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+
+            q_hash, expires_at, value = entry
+            if expires_at and expires_at < time.monotonic():
+                self._remove(key, q_hash)
+                self.misses += 1
+                return None
+
+            self._entries.move_to_end(key)
+            self.hits += 1
+        return copy.deepcopy(value)
+
+    def put(self, key: str, question: str, value: Dict[str, Any]):
+        """写入缓存"""
+        q_hash = question_hash(question)
+        expires_at = time.monotonic() + self.ttl_seconds if self.ttl_seconds > 0 else 0
+        value = copy.deepcopy(value)
+
+        with self._lock:
+            self._entries[key] = (q_hash, expires_at, value)
+            self._entries.move_to_end(key)
+            self._keys_by_question.setdefault(q_hash, set()).add(key)
+
+            while len(self._entries) > self.max_entries:
+                old_key, (old_hash, _, _) = next(iter(self._entries.items()))
+                self._remove(old_key, old_hash)
+                self.evictions += 1
+
+    def _remove(self, key: str, q_hash: str):
+        """删除条目（调用方持有锁）"""
+        self._entries.pop(key, None)
+        keys = self._keys_by_question.get(q_hash)
+        if keys is not None:
+            keys.discard(key)
+            if not keys:
+                del self._keys_by_question[q_hash]
+
+    def invalidate_question(self, question: str) -> int:
+        """使某个问题的全部缓存失效，返回删除的条目数"""
+        q_hash = question_hash(question)
+        with self._lock:
+            keys = self._keys_by_question.pop(q_hash, set())
+            for key in keys:
+                self._entries.pop(key, None)
+            self.invalidations += len(keys)
+        if keys:
+            logger.info(f"问题答案已更新，清除 {len(keys)} 条缓存")
+        return len(keys)
+
+    def clear(self):
+        """清空缓存（索引重建后调用）"""
+        with self._lock:
+            self.invalidations += len(self._entries)
+            self._entries.clear()
+            self._keys_by_question.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        """缓存统计信息"""
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "size": len(self._entries),
+                "max_entries": self.max_entries,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / total if total else 0.0,
+                "evictions": self.evictions,
+                "invalidations": self.invalidations
+            }
+
+
+class SemanticAnswerCache:
+    """
+    语义答案缓存
+
+    以问题向量（归一化后内积即余弦相似度）建立小型FAISS索引，
+    新问题与已缓存问题足够相似时直接复用其答案与来源文档
+    """
+
+    def __init__(self, max_entries: int = 1024, ttl_seconds: float = 3600, search_k: int = 4):
+        """
+        初始化语义缓存
+
+        Args:
+            max_entries: 最大条目数，超出后淘汰最久未使用的条目
+            ttl_seconds: 条目有效期（秒），<=0 表示不过期
+            search_k: 每次检索的候选数量（跳过过期或版本不符的条目）
+        """
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.search_k = search_k
+        self._index = None
+        # 条目ID -> (问题哈希, 问题, 版本, 过期时间, 结果)，顺序即LRU顺序
+        self._entries: "OrderedDict[int, tuple]" = OrderedDict()
+        self._next_id = 0
+        self._lock = threading.Lock()
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @staticmethod
+    def _normalize(embedding) -> np.ndarray:
+        vector = np.asarray(embedding, dtype=np.float32).reshape(1, -1)
+        faiss.normalize_L2(vector)
+        return vector
+
+    def lookup(self, embedding, version: Any, threshold: float) -> Optional[Tuple[str, float, Dict[str, Any]]]:
+        """
+        查找相似问题的缓存结果
+
+        Args:
+            embedding: 问题向量
+            version: 当前版本（向量存储、提示词等），版本不同的条目不复用
+            threshold: 余弦相似度阈值
+
+        Returns:
+            (缓存的问题, 相似度, 结果)，未命中时返回None
+        """
+        vector = self._normalize(embedding)
+        with self._lock:
+            if self._index is None or self._index.ntotal == 0:
+                self.misses += 1
+                return None
+
+            similarities, ids = self._index.search(vector, min(self.search_k, self._index.ntotal))
+            now = time.monotonic()
+            for similarity, entry_id in zip(similarities[0], ids[0]):
+                if entry_id < 0 or similarity < threshold:
+                    break
+                entry = self._entries.get(int(entry_id))
+                if entry is None:
+                    continue
+                _, cached_question, entry_version, expires_at, value = entry
+                if expires_at and expires_at < now:
+                    self._remove([int(entry_id)])
+                    continue
+                if entry_version != version:
+                    continue
+
+                self._entries.move_to_end(int(entry_id))
+                self.hits += 1
+                return cached_question, float(similarity), copy.deepcopy(value)
+
+            self.misses += 1
+            return None
+
+    def put(self, question: str, embedding, version: Any, value: Dict[str, Any]):
+        """写入缓存"""
+        vector = self._normalize(embedding)
+        expires_at = time.monotonic() + self.ttl_seconds if self.ttl_seconds > 0 else 0
+        value = copy.deepcopy(value)
+
+        with self._lock:
+            if self._index is None:
+                self._index = faiss.IndexIDMap2(faiss.IndexFlatIP(vector.shape[1]))
+
+            entry_id = self._next_id
+            self._next_id += 1
+            self._index.add_with_ids(vector, np.array([entry_id], dtype=np.int64))
+            self._entries[entry_id] = (question_hash(question), question, version, expires_at, value)
+
+            if len(self._entries) > self.max_entries:
+                overflow = list(self._entries)[:len(self._entries) - self.max_entries]
+                self._remove(overflow)
+                self.evictions += len(overflow)
+
+    def _remove(self, entry_ids: List[int]):
+        """删除条目（调用方持有锁）"""
+        for entry_id in entry_ids:
+            self._entries.pop(entry_id, None)
+        self._index.remove_ids(np.array(entry_ids, dtype=np.int64))
+
+    def invalidate_question(self, question: str) -> int:
+        """使某个问题的缓存失效，返回删除的条目数"""
+        q_hash = question_hash(question)
+        with self._lock:
+            entry_ids = [entry_id for entry_id, entry in self._entries.items() if entry[0] == q_hash]
+            if entry_ids:
+                self._remove(entry_ids)
+        return len(entry_ids)
+
+    def clear(self):
+        """清空缓存"""
+        with self._lock:
+            self._entries.clear()
+            self._index = None
+
+    def stats(self) -> Dict[str, Any]:
+        """缓存统计信息"""
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "size": len(self._entries),
+                "max_entries": self.max_entries,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / total if total else 0.0,
+                "evictions": self.evictions
+            }
@@ -2,10 +2,6 @@ import streamlit as st
 import os
 import sys
 from pathlib import Path
-import io
-from docx import Document
-import PyPDF2
-import pdfplumber
 
 # 添加项目根目录到Python路径以导入config模块
 project_root = Path(__file__).parent.parent.parent
@@ -21,6 +17,7 @@ from config.config import get_config, reload_config
 import dashscope
 from knowledge_base import KnowledgeBase
 from build_knowledge_base import KnowledgeBaseBuilder
+from document_extraction import get_extractor
 
 # 页面配置
 st.set_page_config(
@@ -312,50 +309,22 @@ def main():
                 except Exception as e:
                     st.error(f"搜索时发生错误: {str(e)}")
 
-def extract_text_from_file(uploaded_file):
-    """从不同格式的文件中提取文本内容"""
-    file_extension = uploaded_file.name.split('.')[-1].lower()
-    
-    try:
-        if file_extension in ['md', 'txt']:
-            # 处理文本文件
-            return uploaded_file.read().decode('utf-8')
-        
-        elif file_extension == 'pdf':
-            # 处理PDF文件
-            pdf_reader = PyPDF2.PdfReader(io.BytesIO(uploaded_file.read()))
-            text = ""
-            for page in pdf_reader.pages:
-                text += page.extract_text() + "\n"
-            return text
-        
-        elif file_extension in ['doc', 'docx']:
-            # 处理Word文档
-            doc = Document(io.BytesIO(uploaded_file.read()))
-            text = ""
-            for paragraph in doc.paragraphs:
-                text += paragraph.text + "\n"
-            return text
-        
-        else:
-            raise ValueError(f"不支持的文件格式: {file_extension}")
-            
-    except Exception as e:
-        raise Exception(f"提取文本失败: {str(e)}")
-
 def upload_documents_advanced(uploaded_files, config):
     """上传并处理多种格式的文档到docs目录"""
     try:
         docs_path = Path(config.document.docs_path)
         docs_path.mkdir(parents=True, exist_ok=True)
         
-        for uploaded_file in uploaded_files:
+        # 所有文件一起提交到解析进程池，并行提取文本
+        extracted = get_extractor().extract_many((f.name, f.read()) for f in uploaded_files)
+        
+        for filename, text_content in extracted:
             try:
-                # 提取文本内容
-                text_content = extract_text_from_file(uploaded_file)
+                if isinstance(text_content, Exception):
+                    raise text_content
                 
                 # 生成markdown文件名
-                base_name = uploaded_file.name.rsplit('.', 1)[0]
+                base_name = filename.rsplit('.', 1)[0]
                 md_filename = f"{base_name}.md"
                 file_path = docs_path / md_filename
                 
@@ -370,10 +339,10 @@ def upload_documents_advanced(uploaded_files, config):
                 with open(file_path, 'w', encoding='utf-8') as f:
                     f.write(markdown_content)
                 
-                st.success(f"✅ {uploaded_file.name} 已转换并保存为 {md_filename}")
+                st.success(f"✅ {filename} 已转换并保存为 {md_filename}")
                 
             except Exception as e:
-                st.error(f"处理文件 {uploaded_file.name} 时发生错误: {str(e)}")
+                st.error(f"处理文件 {filename} 时发生错误: {str(e)}")
                 continue
         
         return True
@@ -0,0 +1,233 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+异步知识库
+为增强知识库提供asyncio接口：LLM调用使用DashScope原生异步接口，
+检索、向量计算与SQLite读写在有界线程池中执行，等待中的请求只占用协程。
+请求被取消（协程被取消）或超出截止时间时，进行中的LLM调用随之中止
+"""
+
+import sys
+import asyncio
+import logging
+import functools
+import contextvars
+from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, List, Optional
+
+from dashscope import AioGeneration
+from langchain_community.llms import Tongyi
+
+# 添加项目根目录到Python路径
+project_root = Path(__file__).parent.parent.parent
+if str(project_root) not in sys.path:
+    sys.path.insert(0, str(project_root))
+
+from src.app.enhanced_knowledge_base import EnhancedKnowledgeBase
+from src.app.deadline import Deadline, DeadlineExceeded, RequestCancelled
+from src.app.metrics import observe_stage
+
+# 配置日志
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+
+class AsyncKnowledgeBase:
+    """增强知识库的异步包装"""
+
+    def __init__(self, knowledge_base: EnhancedKnowledgeBase, max_blocking_workers: int = 10):
+        """
+        初始化异步知识库
+
+        Args:
+            knowledge_base: 增强知识库实例
+            max_blocking_workers: 执行检索、向量计算与数据库操作的线程数
+        """
+        self.kb = knowledge_base
+        self.max_blocking_workers = max_blocking_workers
+        self._executor = ThreadPoolExecutor(max_workers=max_blocking_workers, thread_name_prefix="kb-blocking")
+
+    async def run_blocking(self, func: Callable, *args, **kwargs) -> Any:
+        """在阻塞操作线程池中执行同步函数"""
+        loop = asyncio.get_running_loop()
+        # 复制上下文，线程池中记录的阶段耗时归入当前请求
+        context = contextvars.copy_context()
+        return await loop.run_in_executor(self._executor, functools.partial(context.run, func, *args, **kwargs))
+
+    def shutdown(self):
+        """关闭线程池"""
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+    @staticmethod
+    async def _within(deadline: Deadline, stage: str, awaitable: Awaitable, fraction: float = 1.0) -> Any:
+        """在阶段预算内等待，超出预算时抛出 DeadlineExceeded（线程池中的同步操作不再等待）"""
+        try:
+            deadline.check(stage)
+        except BaseException:
+            if asyncio.iscoroutine(awaitable):
+                awaitable.close()
+            raise
+        budget = deadline.budget(fraction)
+        try:
+            return await asyncio.wait_for(awaitable, budget)
+        except asyncio.TimeoutError:
+            raise DeadlineExceeded(f"{stage}超出时间预算 {budget:.2f}秒")
+
+    async def _stream_within(self, deadline: Deadline, prompt: str) -> AsyncIterator[str]:
+        """流式调用LLM，截止时间到期时取消进行中的调用"""
+        chunks = self.astream_llm(prompt)
+        try:
+            while True:
+                try:
+                    text = await self._within(deadline, "答案生成", chunks.__anext__())
+                except StopAsyncIteration:
+                    return
+                yield text
+        finally:
+            await chunks.aclose()
+
+    async def astream_llm(self, prompt: str) -> AsyncIterator[str]:
+        """
+        流式调用LLM
+
+        通义千问使用DashScope原生异步接口（不占用线程），
+        其他LLM回退到LangChain的 astream
+        """
+        llm = self.kb.llm
+        if not isinstance(llm, Tongyi):
+            async for text in llm.astream(prompt):
+                if text:
+                    yield text
+            return
+
+        # 与 Tongyi.stream 使用相同的调用参数（模型、采样参数、增量输出）
+        params = llm._invocation_params(stop=None, stream=True)
+        responses = await AioGeneration.call(prompt=prompt, **params)
+        async for response in responses:
+            if response.status_code != 200:
+                raise RuntimeError(f"LLM调用失败: {response.code} {response.message}")
+            text = response.output["text"]
+            if text:
+                yield text
+
+    async def ask_question_with_feedback_stream(self, question: str, use_feedback: bool = True,
+                                                deadline: Optional[Deadline] = None) -> AsyncIterator[Dict[str, Any]]:
+        """
+        异步流式问答，事件、缓存与截止时间处理同 EnhancedKnowledgeBase.ask_question_with_feedback_stream
+
+        Args:
+            question: 用户问题
+            use_feedback: 是否使用反馈优化答案
+            deadline: 请求截止时间；取消由协程取消传递
+
+        Yields:
+            sources / delta / final 事件
+        """
+        kb = self.kb
+        if not kb.qa_chain:
+            raise ValueError("QA链未初始化，请先调用load_vector_store()")
+        deadline = deadline or Deadline()
+        deadline.check("问答")
+
+        with observe_stage("ask", "total"):
+            async for event in self._answer_events(question, use_feedback, deadline):
+                yield event
+
+    async def _answer_events(self, question: str, use_feedback: bool, deadline: Deadline) -> AsyncIterator[Dict[str, Any]]:
+        """异步问答主流程，对应 EnhancedKnowledgeBase._answer_events"""
+        kb = self.kb
+        retrieval_fraction = kb.config.request_budget.retrieval_fraction
+
+        cache_key, cached = kb._cached_answer(question, use_feedback)
+        if cached is not None:
+            for event in kb._replay_events(cached):
+                yield event
+            yield {"type": "final", "response": cached}
+            return
+
+        response, embedding = None, None
+        if kb.semantic_cache and kb._allows_optional(deadline, "语义缓存查找"):
+            try:
+                with observe_stage("ask", "semantic_embedding"):
+                    embedding = await self._within(
+                        deadline, "向量计算", self.run_blocking(kb.embeddings.embed_query, question), retrieval_fraction
+                    )
+                with observe_stage("ask", "semantic_cache"):
+                    response = kb._semantic_hit(question, embedding)
+            except (DeadlineExceeded, RequestCancelled):
+                raise
+            except Exception as e:
+                logger.warning(f"计算问题向量失败，跳过语义缓存: {e}")
+
+        if response is not None:
+            for event in kb._replay_events(response):
+                yield event
+        else:
+            logger.info(f"异步处理问题: {question}")
+            docs = await self._within(
+                deadline, "检索", self.run_blocking(kb.retrieve, question), retrieval_fraction
+            )
+            source_documents = kb.format_source_documents(docs)
+            yield {"type": "sources", "source_documents": source_documents}
+
+            parts: List[str] = []
+            with observe_stage("ask", "llm_generation"):
+                async for text in self._stream_within(deadline, kb.build_prompt(question, docs)):
+                    parts.append(text)
+                    yield {"type": "delta", "text": text}
+
+            response = kb._base_response(question, "".join(parts), source_documents)
+            if embedding is not None:
+                kb.semantic_cache.put(question, embedding, kb._semantic_version, response)
+
+        response = await self.run_blocking(kb._apply_feedback, question, response, use_feedback, deadline)
+        if cache_key:
+            kb.answer_cache.put(cache_key, question, response)
+        yield {"type": "final", "response": response}
+
+    async def ask_question_with_feedback(self, question: str, use_feedback: bool = True,
+                                         deadline: Optional[Deadline] = None) -> Dict[str, Any]:
+        """异步问答，返回值同 EnhancedKnowledgeBase.ask_question_with_feedback（相同问题的并发请求合并）"""
+        deadline = deadline or Deadline()
+        try:
+            response = await self.kb.single_flight.do_async(
+                self.kb._request_key(question, use_feedback),
+                lambda: self._ask(question, use_feedback, deadline)
+            )
+        except DeadlineExceeded:
+            # 合并到的请求因其发起者超时而中止，自身仍有时间时单独执行
+            deadline.check("问答")
+            response = await self._ask(question, use_feedback, deadline)
+        if response["question"] != question:
+            response["question"] = question
+        return response
+
+    async def _ask(self, question: str, use_feedback: bool, deadline: Deadline) -> Dict[str, Any]:
+        async for event in self.ask_question_with_feedback_stream(question, use_feedback, deadline):
+            if event["type"] == "final":
+                return event["response"]
+
+    async def search_documents_batch(self, queries: List[str], k: int = None) -> List[List[Dict[str, Any]]]:
+        """异步批量搜索文档"""
+        return await self.run_blocking(self.kb.search_documents_batch, queries, k)
+
+    async def ask_questions_batch(self, questions: List[str], use_feedback: bool = True,
+                                  max_parallelism: int = None, deadline: Optional[Deadline] = None) -> List[Any]:
+        """
+        异步批量问答，返回值同 EnhancedKnowledgeBase.ask_questions_batch
+
+        并发上限由信号量控制，单个问题失败时对应位置为异常对象
+        """
+        await self.run_blocking(self.kb.prefetch_query_embeddings, questions)
+        semaphore = asyncio.Semaphore(max_parallelism or self.kb.config.batch.chat_parallelism)
+
+        async def ask(question):
+            async with semaphore:
+                try:
+                    return await self.ask_question_with_feedback(question, use_feedback, deadline)
+                except Exception as e:
+                    logger.warning(f"批量问答中的问题处理失败: {question[:50]}: {e}")
+                    return e
+
+        return await asyncio.gather(*[ask(question) for question in questions])
@@ -1,20 +1,31 @@
 import os
 import sys
+import json
+import time
+import shutil
 import logging
+import argparse
 from pathlib import Path
-from typing import List, Dict, Any
+from collections import deque
+from typing import Iterable, Iterator, List, Dict, Any, Optional, Tuple
 
 # 添加项目根目录到Python路径以导入config模块
 project_root = Path(__file__).parent.parent.parent
 if str(project_root) not in sys.path:
     sys.path.insert(0, str(project_root))
 
-from langchain_community.document_loaders import DirectoryLoader, TextLoader
 from langchain.text_splitter import RecursiveCharacterTextSplitter
-from langchain_community.embeddings import DashScopeEmbeddings
-from langchain_community.vectorstores import FAISS
 from langchain.schema import Document
 from config.config import get_config
+from src.app.vector_index import StreamingIndexBuilder, evaluate_index, remove_vectors
+from src.app.embedding_cache import create_embeddings
+from src.app.embedding_pipeline import EmbeddingPipeline
+from src.app.ingestion import bounded, discover_files
+from src.app.document_extraction import document_type, get_extractor
+from src.app.chunk_store import CHUNK_STORE_FILE, ChunkStore
+from src.app.build_manifest import BuildManifest, content_hash, file_hash
+import numpy as np
+import faiss
 import dashscope
 
 # 配置日志
@@ -35,10 +46,14 @@ class KnowledgeBaseBuilder:
         # 设置DashScope API密钥
         dashscope.api_key = self.config.dashscope.api_key
         
-        # 使用通义千问的embeddings
-        self.embeddings = DashScopeEmbeddings(
-            model=self.config.dashscope.embedding_model,
-            dashscope_api_key=self.config.dashscope.api_key
+        # 使用通义千问的embeddings（带持久化向量缓存）
+        self.embeddings = create_embeddings(self.config)
+        
+        # 批量并发嵌入，检查点保存在向量存储目录同级
+        self.embedding_pipeline = EmbeddingPipeline.from_config(
+            self.embeddings,
+            self.config.embedding_pipeline,
+            checkpoint_dir=self.vector_store_path.with_name(f".{self.vector_store_path.name}.embed-checkpoint")
         )
         
         self.text_splitter = RecursiveCharacterTextSplitter(
@@ -47,78 +62,358 @@ class KnowledgeBaseBuilder:
             length_function=len,
         )
         
-    def load_documents(self) -> List[Document]:
-        """加载docs目录下的所有markdown文档"""
-        logger.info(f"开始加载文档，路径: {self.docs_path}")
+        # 文档文本提取（与上传界面共用）
+        self.extractor = get_extractor()
         
-        # 使用DirectoryLoader加载markdown文件
-        loader = DirectoryLoader(
-            str(self.docs_path),
-            glob="**/*.md",
-            loader_cls=TextLoader,
-            loader_kwargs={'encoding': 'utf-8'}
-        )
+        # 最近一次构建的召回率-延迟报告
+        self.index_report = None
         
-        documents = loader.load()
-        logger.info(f"成功加载 {len(documents)} 个文档")
+        # 文件指纹 {相对路径: {"hash": 字节哈希, "size": 字节数, "mtime_ns": 修改时间}}
+        self.file_info = {}
+        
+    def discover_files(self) -> List[Path]:
+        """发现阶段：查找docs目录下的所有markdown文件"""
+        paths = discover_files(self.docs_path, "*.md", self.config.document.recursive)
+        logger.info(f"发现 {len(paths)} 个文档，路径: {self.docs_path}")
+        return paths
+    
+    def _source(self, path: Path) -> str:
+        """文件相对路径（作为source元数据）"""
+        return str(path.relative_to(self.docs_path))
+    
+    @staticmethod
+    def _fingerprint(path: Path, previous: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """文件指纹：原始字节的哈希；大小与修改时间与上次构建记录相同时沿用记录的哈希，不读取文件"""
+        stat = path.stat()
+        if previous and previous.get("size") == stat.st_size and previous.get("mtime_ns") == stat.st_mtime_ns:
+            digest = previous["hash"]
+        else:
+            digest = file_hash(path)
+        return {"hash": digest, "size": stat.st_size, "mtime_ns": stat.st_mtime_ns}
+    
+    def read_documents(self, paths: Iterable[Path]) -> Iterator[Document]:
+        """读取阶段：逐个提取文件文本（未扫描过的文件同时记录指纹）"""
+        for path in paths:
+            source = self._source(path)
+            if source not in self.file_info:
+                self.file_info[source] = self._fingerprint(path)
+            text = self.extractor.extract(path.name, str(path))
+            yield Document(page_content=text, metadata={'source': source, 'type': document_type(path)})
+    
+    def scan_files(self, paths: Iterable[Path], manifest: Optional[BuildManifest] = None) -> Dict[str, str]:
+        """
+        计算全部文件的字节哈希（只读取原始字节，不提取文本）
         
-        # 为每个文档添加元数据
+        Args:
+            paths: 文档路径
+            manifest: 上次构建的清单，大小与修改时间未变的文件沿用其中的哈希
+        
+        Returns:
+            {相对路径: 文件哈希}
+        """
+        for path in paths:
+            source = self._source(path)
+            previous = manifest.files.get(source) if manifest else None
+            self.file_info[source] = self._fingerprint(path, previous)
+        return {source: info["hash"] for source, info in self.file_info.items()}
+    
+    def split_documents(self, documents: Iterable[Document]) -> Iterator[Tuple[Document, List[Document]]]:
+        """分割阶段：逐个文档分割成文本块"""
         for doc in documents:
-            # 获取相对路径作为source
-            relative_path = Path(doc.metadata['source']).relative_to(self.docs_path)
-            doc.metadata['source'] = str(relative_path)
-            doc.metadata['type'] = 'markdown'
-            
-        return documents
+            yield doc, self.text_splitter.split_documents([doc])
     
-    def split_documents(self, documents: List[Document]) -> List[Document]:
-        """将文档分割成小块"""
-        logger.info("开始分割文档")
+    def _stream(self, paths: List[Path]) -> Iterator[Tuple[Document, List[Document]]]:
+        """读取与分割分别在后台线程执行，阶段之间使用有界队列"""
+        queue_size = self.config.embedding_pipeline.queue_size
+        documents = bounded(self.read_documents(paths), queue_size, "kb-read")
+        return bounded(self.split_documents(documents), queue_size, "kb-split")
+    
+    def _embed_chunks(self, rows: Iterable[Tuple[int, Document]]) -> Iterator[Tuple[List[int], List[Document], np.ndarray]]:
+        """
+        嵌入阶段：按批次嵌入文本块
+        
+        Args:
+            rows: (行号, 文本块) 序列
+        
+        Yields:
+            (行号列表, 文本块列表, 向量矩阵)，顺序与输入一致
+        """
+        pending = deque()
+        batch_size = self.embedding_pipeline.batch_size
         
-        texts = self.text_splitter.split_documents(documents)
-        logger.info(f"文档分割完成，共生成 {len(texts)} 个文本块")
+        def batches():
+            row_ids, docs = [], []
+            for row_id, doc in rows:
+                row_ids.append(row_id)
+                docs.append(doc)
+                if len(docs) >= batch_size:
+                    pending.append((row_ids, docs))
+                    yield [d.page_content for d in docs]
+                    row_ids, docs = [], []
+            if docs:
+                pending.append((row_ids, docs))
+                yield [d.page_content for d in docs]
         
-        return texts
+        for vectors in self.embedding_pipeline.embed_stream(batches()):
+            row_ids, docs = pending.popleft()
+            yield row_ids, docs, vectors
     
-    def create_vector_store(self, texts: List[Document]) -> FAISS:
-        """创建向量存储"""
-        logger.info("开始创建向量存储")
+    def _build_settings(self) -> Dict[str, Any]:
+        """影响向量结果的构建参数，变化时需要全量重建"""
+        vector_config = self.config.vector_store
+        return {
+            "embedding_model": self.config.dashscope.embedding_model,
+            "chunk_size": vector_config.chunk_size,
+            "chunk_overlap": vector_config.chunk_overlap,
+            "index_type": vector_config.index_type,
+            "mmap_index": vector_config.mmap_index,
+            "nlist": vector_config.nlist,
+            "pq_m": vector_config.pq_m,
+            "pq_nbits": vector_config.pq_nbits,
+            "hnsw_m": vector_config.hnsw_m
+        }
+    
+    def _version_prefix(self) -> str:
+        return f".{self.vector_store_path.name}.v-"
+    
+    def _staging_path(self) -> Path:
+        """与向量存储同级的新版本目录（构建完成后向量存储路径切换到该目录），保证在同一文件系统内"""
+        return self.vector_store_path.with_name(f"{self._version_prefix()}{time.time_ns()}-{os.getpid()}")
+    
+    def _commit_staging(self, staging_path: Path):
+        """
+        将向量存储切换到新构建的版本目录
         
-        # 创建FAISS向量存储
-        vector_store = FAISS.from_documents(texts, self.embeddings)
+        向量存储路径是指向版本目录的符号链接：新链接先以临时名称创建，再重命名覆盖旧链接，
+        加载方在任何时刻看到的都是完整的旧版本或新版本。上一个版本保留到下次构建，
+        切换时正在加载的进程可以读取完成；更早的版本被删除。
+        """
+        store_path = self.vector_store_path
+        if store_path.is_symlink():
+            previous = Path(os.path.realpath(store_path))
+        elif store_path.exists():
+            # 旧版本的向量存储是普通目录，先移为版本目录（仅这一次切换存在短暂的路径不存在窗口）
+            previous = store_path.with_name(f"{self._version_prefix()}{time.time_ns()}-legacy")
+            os.replace(store_path, previous)
+        else:
+            previous = None
         
-        logger.info("向量存储创建完成")
-        return vector_store
+        temp_link = store_path.with_name(f".{store_path.name}.link-{os.getpid()}")
+        if temp_link.is_symlink():
+            temp_link.unlink()
+        try:
+            os.symlink(staging_path.name, temp_link, target_is_directory=True)
+        except OSError as e:
+            # 不支持符号链接（如未授权的Windows）时退回目录重命名，切换期间路径短暂不存在
+            logger.warning(f"无法创建符号链接，改为重命名目录: {e}")
+            os.replace(staging_path, store_path)
+            if previous is not None:
+                shutil.rmtree(previous, ignore_errors=True)
+            return
+        os.replace(temp_link, store_path)
+        
+        for old in store_path.parent.glob(f"{self._version_prefix()}*"):
+            if old not in (staging_path, previous) and old.is_dir():
+                shutil.rmtree(old, ignore_errors=True)
     
-    def save_vector_store(self, vector_store: FAISS):
-        """保存向量存储到本地"""
-        logger.info(f"保存向量存储到: {self.vector_store_path}")
+    def _evaluate(self, index: faiss.Index, vectors_path: Path, dim: int):
+        """生成召回率-延迟报告（向量从临时文件内存映射读取）"""
+        vector_config = self.config.vector_store
+        vectors = np.memmap(vectors_path, dtype=np.float32, mode='r').reshape(-1, dim)
+        try:
+            self.index_report = evaluate_index(
+                index, vectors, vector_config.eval_queries, vector_config.search_k
+            )
+        finally:
+            del vectors
+        for point in self.index_report["curve"]:
+            logger.info(f"召回率-延迟: {point}")
+    
+    def build_full(self, paths: List[Path]):
+        """
+        全量构建：流式读取、分割、嵌入并写入索引
+        
+        文本块边嵌入边写入分块存储，向量写入索引后即释放；
+        评估所需的向量暂存在临时文件中，评估完成后删除
+        
+        Args:
+            paths: 全部文档路径
+        """
+        vector_config = self.config.vector_store
+        logger.info(f"开始全量构建，索引类型: {vector_config.index_type}")
         
-        # 确保目录存在
-        self.vector_store_path.mkdir(parents=True, exist_ok=True)
+        self.vector_store_path.parent.mkdir(parents=True, exist_ok=True)
+        staging_path = self._staging_path()
+        if staging_path.exists():
+            shutil.rmtree(staging_path)
+        staging_path.mkdir()
         
-        # 保存向量存储
-        vector_store.save_local(str(self.vector_store_path))
-        logger.info("向量存储保存完成")
+        manifest = BuildManifest(self._build_settings())
+        index_builder = StreamingIndexBuilder(vector_config)
+        vectors_path = staging_path / "vectors.tmp"
+        
+        def rows():
+            """为文本块分配行号并登记到构建清单"""
+            for doc, chunks in self._stream(paths):
+                source = doc.metadata['source']
+                entry = manifest.files[source] = dict(self.file_info[source], chunks=[])
+                for row_id, chunk in zip(manifest.allocate_row_ids(len(chunks)), chunks):
+                    entry["chunks"].append({"row_id": row_id, "hash": content_hash(chunk.page_content)})
+                    yield row_id, chunk
+        
+        try:
+            store = ChunkStore(staging_path / CHUNK_STORE_FILE, read_only=False)
+            try:
+                with open(vectors_path, 'wb') as vectors_file:
+                    for row_ids, docs, vectors in self._embed_chunks(rows()):
+                        index_builder.add(vectors, np.array(row_ids, dtype=np.int64))
+                        store.add_documents(zip(row_ids, docs))
+                        vectors_file.write(np.ascontiguousarray(vectors, dtype=np.float32).tobytes())
+                logger.info(f"分块存储写入完成，共 {store.count()} 个文本块")
+            finally:
+                store.close()
+            
+            index = index_builder.finish()
+            faiss.write_index(index, str(staging_path / "index.faiss"))
+            
+            # 生成召回率-延迟报告
+            if vector_config.eval_queries > 0:
+                self._evaluate(index, vectors_path, index.d)
+                with open(staging_path / "index_report.json", 'w', encoding='utf-8') as f:
+                    json.dump(self.index_report, f, ensure_ascii=False, indent=2)
+            vectors_path.unlink()
+            
+            manifest.save(staging_path)
+            self._commit_staging(staging_path)
+        except Exception:
+            shutil.rmtree(staging_path, ignore_errors=True)
+            raise
+        
+        self.embedding_pipeline.clear_checkpoints()
+        logger.info(f"向量存储保存完成: {self.vector_store_path}")
+    
+    def _can_build_incrementally(self, manifest: Optional[BuildManifest]) -> bool:
+        """判断现有向量存储能否增量更新"""
+        if manifest is None:
+            return False
+        if manifest.settings != self._build_settings():
+            logger.info("构建参数已变化，执行全量构建")
+            return False
+        return (self.vector_store_path / "index.faiss").exists() and \
+            (self.vector_store_path / CHUNK_STORE_FILE).exists()
     
-    def build(self):
-        """构建知识库的完整流程"""
+    def build_incremental(self, manifest: BuildManifest, paths: List[Path]):
+        """
+        增量构建：只嵌入新增或变化的文本块，删除已移除文件的向量
+        
+        Args:
+            manifest: 上次构建的清单
+            paths: 当前全部文档路径
+        """
+        changes = manifest.diff(self.scan_files(paths, manifest))
+        logger.info(
+            f"文件变化: 新增 {len(changes['added'])}，修改 {len(changes['changed'])}，"
+            f"删除 {len(changes['deleted'])}，未变 {len(changes['unchanged'])}"
+        )
+        
+        if not (changes["added"] or changes["changed"] or changes["deleted"]):
+            logger.info("知识库已是最新，无需重建")
+            return
+        
+        # 内容未变的文件只更新大小与修改时间，下次构建不再计算哈希
+        for source in changes["unchanged"]:
+            manifest.files[source].update(self.file_info[source])
+        
+        removed_row_ids = []
+        for source in changes["deleted"]:
+            removed_row_ids.extend(chunk["row_id"] for chunk in manifest.files.pop(source)["chunks"])
+        
+        # 只提取和分割新增、变化的文件
+        updated_sources = set(changes["added"]) | set(changes["changed"])
+        updated_paths = [path for path in paths if self._source(path) in updated_sources]
+        
+        def rows():
+            """沿用内容未变的文本块行号，只产出需要嵌入的新文本块"""
+            for doc, chunks in self._stream(updated_paths):
+                source = doc.metadata['source']
+                reusable = {}
+                for chunk in manifest.files.get(source, {}).get("chunks", []):
+                    reusable.setdefault(chunk["hash"], []).append(chunk["row_id"])
+                
+                entries, new_chunks = [], []
+                for chunk in chunks:
+                    entry = {"row_id": None, "hash": content_hash(chunk.page_content)}
+                    if reusable.get(entry["hash"]):
+                        entry["row_id"] = reusable[entry["hash"]].pop(0)
+                    else:
+                        new_chunks.append((entry, chunk))
+                    entries.append(entry)
+                
+                for (entry, chunk), row_id in zip(new_chunks, manifest.allocate_row_ids(len(new_chunks))):
+                    entry["row_id"] = row_id
+                    yield row_id, chunk
+                
+                removed_row_ids.extend(row_id for row_ids in reusable.values() for row_id in row_ids)
+                manifest.files[source] = dict(self.file_info[source], chunks=entries)
+        
+        # 在新版本目录中更新副本，完成后切换
+        staging_path = self._staging_path()
+        if staging_path.exists():
+            shutil.rmtree(staging_path)
+        shutil.copytree(self.vector_store_path, staging_path)
+        
+        try:
+            index_builder = StreamingIndexBuilder(
+                self.config.vector_store, index=faiss.read_index(str(staging_path / "index.faiss"))
+            )
+            store = ChunkStore(staging_path / CHUNK_STORE_FILE, read_only=False)
+            try:
+                added = 0
+                for row_ids, docs, vectors in self._embed_chunks(rows()):
+                    index_builder.add(vectors, np.array(row_ids, dtype=np.int64))
+                    store.add_documents(zip(row_ids, docs))
+                    added += len(row_ids)
+                
+                logger.info(f"新增 {added} 个文本块，删除 {len(removed_row_ids)} 个文本块")
+                # 删除的都是旧行号，与新分配的行号不冲突
+                index = remove_vectors(
+                    index_builder.finish(), np.array(removed_row_ids, dtype=np.int64), self.config.vector_store
+                )
+                store.delete_rows(removed_row_ids)
+            finally:
+                store.close()
+            faiss.write_index(index, str(staging_path / "index.faiss"))
+            
+            manifest.save(staging_path)
+            self._commit_staging(staging_path)
+        except Exception:
+            shutil.rmtree(staging_path, ignore_errors=True)
+            raise
+        
+        self.embedding_pipeline.clear_checkpoints()
+        logger.info(f"增量更新完成，索引共 {index.ntotal} 个向量")
+    
+    def build(self, incremental: bool = True):
+        """
+        构建知识库的完整流程
+        
+        Args:
+            incremental: 存在可用的构建清单时只处理变化的文件
+        """
         try:
-            # 1. 加载文档
-            documents = self.load_documents()
+            # 1. 发现文档
+            paths = self.discover_files()
             
-            if not documents:
+            if not paths:
                 logger.warning("没有找到任何文档")
                 return
             
-            # 2. 分割文档
-            texts = self.split_documents(documents)
-            
-            # 3. 创建向量存储
-            vector_store = self.create_vector_store(texts)
-            
-            # 4. 保存向量存储
-            self.save_vector_store(vector_store)
+            # 2. 读取 → 分割 → 嵌入 → 写入索引（流式）
+            manifest = BuildManifest.load(self.vector_store_path) if incremental else None
+            if self._can_build_incrementally(manifest):
+                self.build_incremental(manifest, paths)
+            else:
+                self.build_full(paths)
             
             logger.info("知识库构建完成！")
             
@@ -128,6 +423,10 @@ class KnowledgeBaseBuilder:
 
 def main():
     """主函数"""
+    parser = argparse.ArgumentParser(description='构建知识库')
+    parser.add_argument('--full', action='store_true', help='忽略构建清单，全量重建')
+    args = parser.parse_args()
+    
     try:
         # 获取配置并验证
         config = get_config()
@@ -141,7 +440,7 @@ def main():
         builder = KnowledgeBaseBuilder()
         
         # 构建知识库
-        builder.build()
+        builder.build(incremental=not args.full)
         
     except Exception as e:
         logger.error(f"构建知识库失败: {e}")
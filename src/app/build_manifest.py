@@ -0,0 +1,122 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+构建清单模块
+记录每个文件的字节哈希、大小与修改时间及其文本块（行号、哈希），用于增量构建知识库
+"""
+
+import json
+import hashlib
+import logging
+from pathlib import Path
+from datetime import datetime
+from typing import List, Dict, Any, Optional, Union
+
+# 配置日志
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+# 清单文件名（与index.faiss位于同一目录）
+MANIFEST_FILE = "build_manifest.json"
+MANIFEST_VERSION = 1
+
+
+def content_hash(data: Union[str, bytes]) -> str:
+    """计算内容哈希"""
+    if isinstance(data, str):
+        data = data.encode("utf-8")
+    return hashlib.sha256(data).hexdigest()
+
+
+def file_hash(path: Union[str, Path], block_size: int = 1 << 20) -> str:
+    """按块读取文件原始字节计算哈希（不提取文本）"""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(block_size), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+class BuildManifest:
+    """知识库构建清单"""
+
+    def __init__(self, settings: Dict[str, Any], files: Dict[str, Dict[str, Any]] = None,
+                 next_row_id: int = 0, updated_at: str = None):
+        """
+        初始化构建清单
+
+        Args:
+            settings: 影响向量结果的构建参数（模型、分块、索引类型）
+            files: {相对路径: {"hash": 文件字节哈希, "size": 字节数, "mtime_ns": 修改时间,
+                    "chunks": [{"row_id": 行号, "hash": 块哈希}]}}
+            next_row_id: 下一个可分配的行号
+            updated_at: 更新时间
+        """
+        self.settings = settings
+        self.files = files or {}
+        self.next_row_id = next_row_id
+        self.updated_at = updated_at
+
+    @classmethod
+    def load(cls, store_path: Union[str, Path]) -> Optional["BuildManifest"]:
+        """从向量存储目录读取清单，不存在或版本不符时返回None"""
+        manifest_path = Path(store_path) / MANIFEST_FILE
+        if not manifest_path.exists():
+            return None
+
+        try:
+            with open(manifest_path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, ValueError) as e:
+            logger.warning(f"读取构建清单失败: {e}")
+            return None
+
+        if data.get("version") != MANIFEST_VERSION:
+            return None
+
+        return cls(
+            settings=data["settings"],
+            files=data["files"],
+            next_row_id=data["next_row_id"],
+            updated_at=data.get("updated_at")
+        )
+
+    def save(self, store_path: Union[str, Path]):
+        """保存清单到向量存储目录"""
+        self.updated_at = datetime.now().isoformat()
+        with open(Path(store_path) / MANIFEST_FILE, "w", encoding="utf-8") as f:
+            json.dump({
+                "version": MANIFEST_VERSION,
+                "settings": self.settings,
+                "next_row_id": self.next_row_id,
+                "updated_at": self.updated_at,
+                "files": self.files
+            }, f, ensure_ascii=False, indent=2)
+
+    def allocate_row_ids(self, count: int) -> List[int]:
+        """分配新的行号（行号只增不减，删除后不复用）"""
+        row_ids = list(range(self.next_row_id, self.next_row_id + count))
+        self.next_row_id += count
+        return row_ids
+
+    def diff(self, file_hashes: Dict[str, str]) -> Dict[str, List[str]]:
+        """
+        对比当前文件与清单记录
+
+        Args:
+            file_hashes: {相对路径: 文件哈希}
+
+        Returns:
+            {"added": [...], "changed": [...], "deleted": [...], "unchanged": [...]}
+        """
+        result = {"added": [], "changed": [], "deleted": [], "unchanged": []}
+        for source, digest in file_hashes.items():
+            entry = self.files.get(source)
+            if entry is None:
+                result["added"].append(source)
+            elif entry["hash"] != digest:
+                result["changed"].append(source)
+            else:
+                result["unchanged"].append(source)
+        result["deleted"] = [source for source in self.files if source not in file_hashes]
+        return result
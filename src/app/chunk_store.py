@@ -0,0 +1,237 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+分块存储模块
+以FAISS行号为键，将文本块及元数据保存在单个SQLite文件中，
+检索时只按需读取命中的k条记录，替代整体反序列化的index.pkl
+"""
+
+import sys
+import json
+import pickle
+import sqlite3
+import logging
+import argparse
+import threading
+from pathlib import Path
+from collections.abc import Mapping
+from typing import Iterable, Iterator, List, Dict, Optional, Tuple, Union
+
+from langchain_community.docstore.base import Docstore
+from langchain.schema import Document
+
+# 配置日志
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+# 分块存储文件名（与index.faiss位于同一目录）
+CHUNK_STORE_FILE = "chunks.db"
+
+
+class ChunkStore:
+    """基于SQLite的分块存储，键为FAISS行号"""
+
+    def __init__(self, db_path: Union[str, Path], read_only: bool = True):
+        """
+        初始化分块存储
+
+        Args:
+            db_path: chunks.db文件路径
+            read_only: 是否以只读方式打开
+        """
+        self.db_path = Path(db_path)
+        self.read_only = read_only
+        self._local = threading.local()
+        self._count = None
+
+        if read_only and not self.db_path.exists():
+            raise FileNotFoundError(f"分块存储不存在: {self.db_path}")
+
+        if not read_only:
+            with self._connection() as conn:
+                conn.execute("""
+                    CREATE TABLE IF NOT EXISTS chunks (
+                        row_id INTEGER PRIMARY KEY,
+                        content TEXT NOT NULL,
+                        metadata TEXT NOT NULL
+                    )
+                """)
+
+    def _connection(self) -> sqlite3.Connection:
+        """获取当前线程的数据库连接（gRPC工作线程各自持有连接）"""
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            if self.read_only:
+                conn = sqlite3.connect(f"{self.db_path.resolve().as_uri()}?mode=ro", uri=True)
+            else:
+                conn = sqlite3.connect(self.db_path)
+            self._local.conn = conn
+        return conn
+
+    def close(self):
+        """关闭当前线程的数据库连接"""
+        conn = getattr(self._local, "conn", None)
+        if conn is not None:
+            conn.close()
+            self._local.conn = None
+
+    def add_documents(self, rows: Iterable[Tuple[int, Document]]):
+        """
+        批量写入文本块
+
+        Args:
+            rows: (行号, 文档) 序列
+        """
+        with self._connection() as conn:
+            conn.executemany(
+                "INSERT OR REPLACE INTO chunks (row_id, content, metadata) VALUES (?, ?, ?)",
+                (
+                    (int(row_id), doc.page_content, json.dumps(doc.metadata, ensure_ascii=False))
+                    for row_id, doc in rows
+                )
+            )
+        self._count = None
+
+    def delete_rows(self, row_ids: Iterable[int]):
+        """删除指定行号的文本块"""
+        with self._connection() as conn:
+            conn.executemany("DELETE FROM chunks WHERE row_id = ?", ((int(r),) for r in row_ids))
+        self._count = None
+
+    def get(self, row_id: int) -> Optional[Document]:
+        """按行号读取单个文本块"""
+        row = self._connection().execute(
+            "SELECT content, metadata FROM chunks WHERE row_id = ?", (int(row_id),)
+        ).fetchone()
+        if row is None:
+            return None
+        return Document(page_content=row[0], metadata=json.loads(row[1]))
+
+    def get_many(self, row_ids: List[int]) -> Dict[int, Document]:
+        """按行号批量读取文本块"""
+        if not row_ids:
+            return {}
+        placeholders = ",".join("?" * len(row_ids))
+        rows = self._connection().execute(
+            f"SELECT row_id, content, metadata FROM chunks WHERE row_id IN ({placeholders})",
+            [int(r) for r in row_ids]
+        ).fetchall()
+        return {
+            row_id: Document(page_content=content, metadata=json.loads(metadata))
+            for row_id, content, metadata in rows
+        }
+
+    def row_ids(self) -> Iterator[int]:
+        """按顺序遍历所有行号"""
+        cursor = self._connection().execute("SELECT row_id FROM chunks ORDER BY row_id")
+        for (row_id,) in cursor:
+            yield row_id
+
+    def count(self) -> int:
+        """文本块数量"""
+        if self._count is None:
+            self._count = self._connection().execute("SELECT COUNT(*) FROM chunks").fetchone()[0]
+        return self._count
+
+
+class ChunkDocstore(Docstore):
+    """LangChain Docstore适配器，文档ID即为FAISS行号的字符串形式"""
+
+    def __init__(self, store: ChunkStore):
+        self.store = store
+
+    def search(self, search: str) -> Union[str, Document]:
+        """按文档ID读取文本块"""
+        doc = self.store.get(int(search))
+        if doc is None:
+            return f"ID {search} not found."
+        return doc
+
+
+class RowIdMapping(Mapping):
+    """
+    惰性的 index_to_docstore_id 映射
+
+    行号与文档ID一一对应，无需在内存中保存整张映射表
+    """
+
+    def __init__(self, store: ChunkStore):
+        self.store = store
+
+    def __getitem__(self, row_id) -> str:
+        return str(int(row_id))
+
+    def __contains__(self, row_id) -> bool:
+        return self.store.get(int(row_id)) is not None
+
+    def __iter__(self) -> Iterator[int]:
+        return self.store.row_ids()
+
+    def __len__(self) -> int:
+        return self.store.count()
+
+
+def write_chunk_store(db_path: Union[str, Path], rows: Iterable[Tuple[int, Document]]) -> int:
+    """
+    创建新的分块存储文件
+
+    Args:
+        db_path: chunks.db文件路径（已存在则覆盖）
+        rows: (行号, 文档) 序列
+
+    Returns:
+        写入的文本块数量
+    """
+    db_path = Path(db_path)
+    if db_path.exists():
+        db_path.unlink()
+
+    store = ChunkStore(db_path, read_only=False)
+    try:
+        store.add_documents(rows)
+        return store.count()
+    finally:
+        store.close()
+
+
+def migrate_pickle_docstore(store_path: Union[str, Path]) -> int:
+    """
+    将旧版 index.pkl 迁移为 chunks.db
+
+    Args:
+        store_path: 向量存储目录
+
+    Returns:
+        迁移的文本块数量
+    """
+    store_path = Path(store_path)
+    pickle_path = store_path / "index.pkl"
+    if not pickle_path.exists():
+        raise FileNotFoundError(f"旧版文档存储不存在: {pickle_path}")
+
+    with open(pickle_path, "rb") as f:
+        docstore, index_to_docstore_id = pickle.load(f)
+
+    count = write_chunk_store(
+        store_path / CHUNK_STORE_FILE,
+        ((row_id, docstore.search(doc_id)) for row_id, doc_id in index_to_docstore_id.items())
+    )
+    logger.info(f"已迁移 {count} 个文本块到 {store_path / CHUNK_STORE_FILE}，可删除 {pickle_path}")
+    return count
+
+
+def main():
+    """命令行入口：迁移旧版向量存储"""
+    parser = argparse.ArgumentParser(description='将 index.pkl 迁移为 chunks.db')
+    parser.add_argument('store_path', help='向量存储目录')
+    args = parser.parse_args()
+
+    try:
+        migrate_pickle_docstore(args.store_path)
+    except Exception as e:
+        logger.error(f"迁移失败: {e}")
+        return 1
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
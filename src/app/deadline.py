@@ -0,0 +1,100 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+请求截止时间与取消
+将gRPC请求的剩余时间与取消状态传入问答流程：各阶段按比例分配时间预算，
+截止时间已过或客户端已取消时中止后续检索与LLM调用，时间不足或已有阶段超出预算时跳过可选步骤
+"""
+
+import time
+import logging
+from contextlib import contextmanager
+from typing import Callable, Iterator, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class DeadlineExceeded(TimeoutError):
+    """请求截止时间已过，或异步等待的阶段超出时间预算"""
+
+
+class RequestCancelled(Exception):
+    """请求已被客户端取消"""
+
+
+class Deadline:
+    """请求的截止时间与取消状态"""
+
+    def __init__(self, timeout: Optional[float] = None, is_cancelled: Optional[Callable[[], bool]] = None):
+        """
+        初始化截止时间
+
+        Args:
+            timeout: 剩余时间（秒），None表示不限时
+            is_cancelled: 返回请求是否已取消的函数
+        """
+        self.expires_at = time.monotonic() + timeout if timeout is not None else None
+        self._is_cancelled = is_cancelled
+        # 已完成的阶段超出其时间预算时记录，之后只跳过可选步骤
+        self.over_budget = False
+
+    @classmethod
+    def from_grpc_context(cls, context) -> "Deadline":
+        """根据gRPC上下文（同步或grpc.aio）创建"""
+        if hasattr(context, "is_active"):
+            is_cancelled = lambda: not context.is_active()
+        else:
+            is_cancelled = context.cancelled
+        return cls(context.time_remaining(), is_cancelled)
+
+    @property
+    def bounded(self) -> bool:
+        """是否有截止时间或可被取消"""
+        return self.expires_at is not None or self._is_cancelled is not None
+
+    def remaining(self) -> Optional[float]:
+        """剩余时间（秒），不限时返回None"""
+        if self.expires_at is None:
+            return None
+        return self.expires_at - time.monotonic()
+
+    def cancelled(self) -> bool:
+        """请求是否已取消"""
+        return self._is_cancelled is not None and self._is_cancelled()
+
+    def check(self, stage: str):
+        """已取消或已超时则抛出异常"""
+        if self.cancelled():
+            raise RequestCancelled(f"请求已取消，中止{stage}")
+        remaining = self.remaining()
+        if remaining is not None and remaining <= 0:
+            raise DeadlineExceeded(f"请求截止时间已过，中止{stage}")
+
+    def budget(self, fraction: float = 1.0) -> Optional[float]:
+        """按剩余时间的比例分配的阶段预算（秒），不限时返回None"""
+        remaining = self.remaining()
+        return None if remaining is None else max(0.0, remaining * fraction)
+
+    def allows(self, seconds: float) -> bool:
+        """剩余时间是否足够执行耗时约 seconds 的可选步骤（已有阶段超出预算时不再执行）"""
+        remaining = self.remaining()
+        return not self.cancelled() and not self.over_budget and (remaining is None or remaining >= seconds)
+
+    @contextmanager
+    def stage(self, name: str, fraction: float = 1.0) -> Iterator[Optional[float]]:
+        """
+        执行一个阶段：开始与结束时检查整体截止时间。同步代码无法中断阶段本身，
+        阶段结束时其结果已经可用，因此超出预算只记录下来用于跳过后续可选步骤，不中止请求
+
+        Yields:
+            阶段预算（秒）
+        """
+        self.check(name)
+        budget = self.budget(fraction)
+        start = time.monotonic()
+        yield budget
+        elapsed = time.monotonic() - start
+        if budget is not None and elapsed > budget:
+            self.over_budget = True
+            logger.info(f"{name}耗时 {elapsed:.2f}秒，超出时间预算 {budget:.2f}秒，跳过后续可选步骤")
+        self.check(name)
@@ -0,0 +1,266 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+文档文本提取模块
+供Streamlit界面与知识库构建器共用：PDF/Word在进程池中解析（调用方线程不解析文档），
+页数较多的PDF按页段拆分并行提取，文本以列表拼接避免重复字符串相加
+"""
+
+import io
+import os
+import sys
+import atexit
+import logging
+import tempfile
+import threading
+from pathlib import Path
+from concurrent.futures import Future, ProcessPoolExecutor
+from typing import Iterable, Iterator, List, Optional, Tuple, Union
+
+# 添加项目根目录到Python路径以导入config模块
+project_root = Path(__file__).parent.parent.parent
+if str(project_root) not in sys.path:
+    sys.path.insert(0, str(project_root))
+
+from config.config import get_config
+
+# 配置日志
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+# 支持的文件扩展名及对应的文档类型
+DOCUMENT_TYPES = {
+    "md": "markdown",
+    "txt": "text",
+    "rst": "text",
+    "pdf": "pdf",
+    "doc": "word",
+    "docx": "word",
+}
+
+# 在当前进程直接处理的纯文本格式
+TEXT_EXTENSIONS = {"md", "txt", "rst"}
+
+
+def file_extension(filename: Union[str, Path]) -> str:
+    """获取小写扩展名（不含点）"""
+    return Path(str(filename)).suffix.lstrip(".").lower()
+
+
+def document_type(filename: Union[str, Path]) -> str:
+    """根据扩展名获取文档类型"""
+    extension = file_extension(filename)
+    if extension not in DOCUMENT_TYPES:
+        raise ValueError(f"不支持的文件格式: {extension}")
+    return DOCUMENT_TYPES[extension]
+
+
+def _open_source(source: Union[str, bytes]):
+    """source 为文件路径或文件内容"""
+    return io.BytesIO(source) if isinstance(source, bytes) else open(source, "rb")
+
+
+def _extract_pdf_head(source: Union[str, bytes], pages_per_task: int) -> Tuple[int, List[str]]:
+    """统计PDF页数并提取第一个页段的文本（在工作进程中执行）"""
+    import PyPDF2
+
+    with _open_source(source) as f:
+        pages = PyPDF2.PdfReader(f).pages
+        return len(pages), [pages[i].extract_text() or "" for i in range(min(pages_per_task, len(pages)))]
+
+
+def _extract_pdf_pages(source: Union[str, bytes], start: int = 0, end: Optional[int] = None) -> List[str]:
+    """提取PDF指定页段的文本（在工作进程中执行）"""
+    import PyPDF2
+
+    with _open_source(source) as f:
+        pages = PyPDF2.PdfReader(f).pages
+        end = len(pages) if end is None else min(end, len(pages))
+        return [pages[i].extract_text() or "" for i in range(start, end)]
+
+
+def _extract_docx(source: Union[str, bytes]) -> List[str]:
+    """提取Word文档各段落文本（在工作进程中执行）"""
+    from docx import Document as DocxDocument
+
+    with _open_source(source) as f:
+        return [paragraph.text for paragraph in DocxDocument(f).paragraphs]
+
+
+def _join_lines(parts: Iterable[str]) -> str:
+    """每部分之后追加换行，一次性拼接"""
+    return "".join(f"{part}\n" for part in parts)
+
+
+class DocumentExtractor:
+    """基于进程池的文档文本提取器"""
+
+    def __init__(self, max_workers: Optional[int] = None, pdf_pages_per_task: int = 20,
+                 encoding: str = "utf-8"):
+        """
+        初始化提取器
+
+        Args:
+            max_workers: 进程池大小，默认为CPU核数
+            pdf_pages_per_task: PDF每个并行任务处理的页数
+            encoding: 纯文本文件编码
+        """
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self.pdf_pages_per_task = max(1, pdf_pages_per_task)
+        self.encoding = encoding
+        self._executor = None
+        self._lock = threading.Lock()
+
+    @property
+    def executor(self) -> ProcessPoolExecutor:
+        """按需创建进程池"""
+        with self._lock:
+            if self._executor is None:
+                self._executor = ProcessPoolExecutor(max_workers=self.max_workers)
+            return self._executor
+
+    def shutdown(self):
+        """关闭进程池"""
+        with self._lock:
+            if self._executor is not None:
+                self._executor.shutdown(cancel_futures=True)
+                self._executor = None
+
+    def _submit(self, filename: str, source: Union[str, bytes]) -> List[Future]:
+        """
+        提交提取任务（PDF只提交统计页数与提取第一个页段的任务）
+
+        Returns:
+            按顺序拼接的任务列表
+        """
+        extension = file_extension(filename)
+        document_type(filename)
+
+        if extension in TEXT_EXTENSIONS:
+            future = Future()
+            try:
+                if isinstance(source, bytes):
+                    future.set_result([source.decode(self.encoding)])
+                else:
+                    with open(source, "r", encoding=self.encoding) as f:
+                        future.set_result([f.read()])
+            except Exception as e:
+                future.set_exception(e)
+            return [future]
+
+        if extension in ("doc", "docx"):
+            return [self.executor.submit(_extract_docx, source)]
+
+        return [self.executor.submit(_extract_pdf_head, source, self.pdf_pages_per_task)]
+
+    def _submit_remaining_pages(self, source: Union[str, bytes], head: Future) -> Tuple[List[Future], Optional[str]]:
+        """
+        按工作进程统计的页数提交PDF其余页段（只等待第一个任务，不在当前线程解析）
+
+        Returns:
+            (其余页段的任务列表, 需要在完成后删除的临时文件)
+        """
+        page_count, _ = head.result()
+        starts = range(self.pdf_pages_per_task, page_count, self.pdf_pages_per_task)
+        spilled = None
+        if isinstance(source, bytes) and starts:
+            # 大文件只向各工作进程传递路径，避免每个页段都复制一份内容
+            with tempfile.NamedTemporaryFile(suffix=".pdf", delete=False) as f:
+                f.write(source)
+            source = spilled = f.name
+        futures = [
+            self.executor.submit(_extract_pdf_pages, source, start, start + self.pdf_pages_per_task)
+            for start in starts
+        ]
+        return futures, spilled
+
+    def _collect(self, filename: str, futures: List[Future]) -> str:
+        extension = file_extension(filename)
+        if extension == "pdf":
+            head, rest = futures[0], futures[1:]
+            return _join_lines(head.result()[1] + [part for future in rest for part in future.result()])
+        parts = [part for future in futures for part in future.result()]
+        if extension in TEXT_EXTENSIONS:
+            return parts[0]
+        return _join_lines(parts)
+
+    def extract(self, filename: str, source: Union[str, bytes]) -> str:
+        """
+        提取单个文件的文本
+
+        Args:
+            filename: 文件名（用于判断格式）
+            source: 文件路径或文件内容
+
+        Returns:
+            文本内容
+        """
+        _, result = next(self.extract_many([(filename, source)]))
+        if isinstance(result, Exception):
+            raise result
+        return result
+
+    def extract_many(self, files: Iterable[Tuple[str, Union[str, bytes]]]) -> Iterator[Tuple[str, Union[str, Exception]]]:
+        """
+        并行提取多个文件
+
+        所有文件先提交到进程池（PDF的其余页段在各自页数统计完成后提交）再按输入顺序收集结果，
+        单个文件失败不影响其他文件（失败时产出原始异常对象）
+
+        Args:
+            files: (文件名, 文件路径或内容) 序列
+
+        Yields:
+            (文件名, 文本或异常)
+        """
+        submitted = []
+        spilled = []
+        try:
+            for filename, source in files:
+                try:
+                    submitted.append([filename, source, self._submit(filename, source), None])
+                except Exception as e:
+                    submitted.append([filename, source, [], e])
+
+            for entry in submitted:
+                filename, source, futures, error = entry
+                if error is None and file_extension(filename) == "pdf":
+                    try:
+                        rest, temp_path = self._submit_remaining_pages(source, futures[0])
+                    except Exception as e:
+                        entry[3] = e
+                        continue
+                    if temp_path:
+                        spilled.append(temp_path)
+                    futures.extend(rest)
+
+            for filename, _, futures, error in submitted:
+                if error is None:
+                    try:
+                        yield filename, self._collect(filename, futures)
+                        continue
+                    except Exception as e:
+                        error = e
+                yield filename, error
+        finally:
+            for path in spilled:
+                Path(path).unlink(missing_ok=True)
+
+
+_extractor = None
+_extractor_lock = threading.Lock()
+
+
+def get_extractor() -> DocumentExtractor:
+    """获取共享的提取器实例（进程池在首次使用时创建，退出时关闭）"""
+    global _extractor
+    with _extractor_lock:
+        if _extractor is None:
+            document_config = get_config().document
+            _extractor = DocumentExtractor(
+                max_workers=document_config.extract_workers or None,
+                pdf_pages_per_task=document_config.pdf_pages_per_task,
+                encoding=document_config.encoding
+            )
+            atexit.register(_extractor.shutdown)
+        return _extractor
@@ -0,0 +1,307 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+向量缓存模块
+以 (模型, 文本类型, 规范化文本哈希) 为键，将float32向量持久化到SQLite，
+构建流程与查询流程共用，按容量上限淘汰最久未使用的条目。
+命中时的最近使用时间先记录在内存中，累积到一定数量或间隔后批量写回，读取不占用写锁
+"""
+
+import re
+import time
+import sqlite3
+import hashlib
+import logging
+import threading
+import unicodedata
+from pathlib import Path
+from typing import List, Dict, Union
+
+import numpy as np
+from langchain_core.embeddings import Embeddings
+from langchain_community.embeddings import DashScopeEmbeddings
+from langchain_community.embeddings.dashscope import embed_with_retry
+
+# 配置日志
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+_WHITESPACE = re.compile(r"\s+")
+
+# 最近使用时间的写回条件：累积的条目数或距上次写回的秒数（进程退出时未写回的部分丢失，只影响淘汰顺序）
+USAGE_FLUSH_SIZE = 1024
+USAGE_FLUSH_INTERVAL = 60.0
+
+
+def normalize_text(text: str) -> str:
+    """规范化文本：统一Unicode形式并合并空白"""
+    return _WHITESPACE.sub(" ", unicodedata.normalize("NFKC", text)).strip()
+
+
+def cache_key(model: str, text_type: str, text: str) -> str:
+    """计算缓存键"""
+    raw = f"{model}\0{text_type}\0{normalize_text(text)}"
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+class EmbeddingCache:
+    """基于SQLite的向量缓存"""
+
+    def __init__(self, db_path: Union[str, Path] = "./embedding_cache.db", max_size_mb: int = 512):
+        """
+        初始化向量缓存
+
+        Args:
+            db_path: 缓存文件路径
+            max_size_mb: 向量数据总量上限（MB），超出后按最近使用时间淘汰
+        """
+        self.db_path = Path(db_path)
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self.max_bytes = max_size_mb * 1024 * 1024
+        self._local = threading.local()
+        self._lock = threading.Lock()
+
+        self.hits = 0
+        self.misses = 0
+        # 尚未写回的最近使用时间 {键: 时间戳}
+        self._usage: Dict[str, float] = {}
+        self._usage_flushed_at = time.monotonic()
+
+        conn = self._connection()
+        with conn:
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS embeddings (
+                    key TEXT PRIMARY KEY,
+                    dim INTEGER NOT NULL,
+                    vector BLOB NOT NULL,
+                    last_used REAL NOT NULL
+                )
+            """)
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_embeddings_last_used ON embeddings(last_used)")
+        self._total_bytes = self._measure_bytes()
+
+    def _connection(self) -> sqlite3.Connection:
+        """获取当前线程的数据库连接"""
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.db_path, timeout=30)
+            # 构建进程与服务进程可能同时读写
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def _measure_bytes(self) -> int:
+        """统计当前向量数据总量"""
+        return self._connection().execute(
+            "SELECT COALESCE(SUM(LENGTH(vector)), 0) FROM embeddings"
+        ).fetchone()[0]
+
+    def get_many(self, keys: List[str]) -> Dict[str, np.ndarray]:
+        """批量读取向量，命中条目的最近使用时间记录在内存中，按批写回"""
+        if not keys:
+            return {}
+
+        conn = self._connection()
+        found = {}
+        # SQLite单条语句的参数数量有限，分批查询
+        for start in range(0, len(keys), 500):
+            batch = keys[start:start + 500]
+            placeholders = ",".join("?" * len(batch))
+            rows = conn.execute(
+                f"SELECT key, vector FROM embeddings WHERE key IN ({placeholders})", batch
+            ).fetchall()
+            for key, blob in rows:
+                found[key] = np.frombuffer(blob, dtype=np.float32)
+
+        now = time.time()
+        with self._lock:
+            self.hits += len(found)
+            self.misses += len(keys) - len(found)
+            self._usage.update((key, now) for key in found)
+            due = len(self._usage) >= USAGE_FLUSH_SIZE or \
+                (self._usage and time.monotonic() - self._usage_flushed_at >= USAGE_FLUSH_INTERVAL)
+        if due:
+            self.flush_usage()
+        return found
+
+    def _take_usage(self) -> List[tuple]:
+        with self._lock:
+            usage, self._usage = self._usage, {}
+            self._usage_flushed_at = time.monotonic()
+        return [(last_used, key) for key, last_used in usage.items()]
+
+    def flush_usage(self):
+        """将内存中记录的最近使用时间写回数据库"""
+        rows = self._take_usage()
+        if rows:
+            conn = self._connection()
+            with conn:
+                conn.executemany("UPDATE embeddings SET last_used = MAX(last_used, ?) WHERE key = ?", rows)
+
+    def put_many(self, items: Dict[str, List[float]]):
+        """批量写入向量"""
+        if not items:
+            return
+
+        now = time.time()
+        rows = []
+        added_bytes = 0
+        for key, vector in items.items():
+            blob = np.asarray(vector, dtype=np.float32).tobytes()
+            added_bytes += len(blob)
+            rows.append((key, len(blob) // 4, blob, now))
+
+        conn = self._connection()
+        keys = list(items)
+        usage = self._take_usage()
+        with conn:
+            # 写入时顺带写回累积的最近使用时间
+            conn.executemany("UPDATE embeddings SET last_used = MAX(last_used, ?) WHERE key = ?", usage)
+            # 被替换的已有条目不增加总量，只计入大小差
+            for i in range(0, len(keys), 500):
+                chunk = keys[i:i + 500]
+                added_bytes -= conn.execute(
+                    f"SELECT COALESCE(SUM(LENGTH(vector)), 0) FROM embeddings "
+                    f"WHERE key IN ({','.join('?' for _ in chunk)})",
+                    chunk
+                ).fetchone()[0]
+            conn.executemany(
+                "INSERT OR REPLACE INTO embeddings (key, dim, vector, last_used) VALUES (?, ?, ?, ?)",
+                rows
+            )
+
+        with self._lock:
+            self._total_bytes += added_bytes
+            over_limit = self._total_bytes > self.max_bytes
+        if over_limit:
+            self._evict()
+
+    def _evict(self):
+        """淘汰最久未使用的条目，直到总量降到上限的90%"""
+        self.flush_usage()
+        conn = self._connection()
+        with self._lock:
+            total = self._measure_bytes()
+            target = int(self.max_bytes * 0.9)
+            if total <= self.max_bytes:
+                self._total_bytes = total
+                return
+
+            removed = 0
+            cursor = conn.execute("SELECT key, LENGTH(vector) FROM embeddings ORDER BY last_used")
+            evict_keys = []
+            for key, size in cursor:
+                if total - removed <= target:
+                    break
+                evict_keys.append((key,))
+                removed += size
+
+            with conn:
+                conn.executemany("DELETE FROM embeddings WHERE key = ?", evict_keys)
+            self._total_bytes = total - removed
+
+        logger.info(f"向量缓存淘汰 {len(evict_keys)} 条，当前 {self._total_bytes / 1024 / 1024:.1f}MB")
+
+    def stats(self) -> Dict[str, float]:
+        """缓存统计信息"""
+        total = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / total if total else 0.0,
+            "size_mb": self._total_bytes / 1024 / 1024,
+            "max_size_mb": self.max_bytes / 1024 / 1024
+        }
+
+
+class CachedEmbeddings(Embeddings):
+    """带持久化缓存的Embeddings包装，未命中的文本才调用底层模型"""
+
+    def __init__(self, embeddings: Embeddings, cache: EmbeddingCache, model: str):
+        """
+        Args:
+            embeddings: 底层Embeddings实现
+            cache: 向量缓存
+            model: 模型名称（参与缓存键计算）
+        """
+        self.embeddings = embeddings
+        self.cache = cache
+        self.model = model
+
+    def _embed(self, texts: List[str], text_type: str) -> List[List[float]]:
+        keys = [cache_key(self.model, text_type, text) for text in texts]
+        cached = self.cache.get_many(list(dict.fromkeys(keys)))
+
+        # 同一批次内的重复文本只计算一次
+        missing = {}
+        for key, text in zip(keys, texts):
+            if key not in cached and key not in missing:
+                missing[key] = text
+
+        if missing:
+            if text_type == "query":
+                vectors = embed_queries(self.embeddings, list(missing.values()))
+            else:
+                vectors = self.embeddings.embed_documents(list(missing.values()))
+            computed = dict(zip(missing.keys(), vectors))
+            self.cache.put_many(computed)
+            cached.update({key: np.asarray(v, dtype=np.float32) for key, v in computed.items()})
+
+        return [cached[key].tolist() for key in keys]
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        """嵌入文档文本"""
+        return self._embed(texts, "document")
+
+    def embed_query(self, text: str) -> List[float]:
+        """嵌入查询文本"""
+        return self._embed([text], "query")[0]
+
+    def embed_queries(self, texts: List[str]) -> List[List[float]]:
+        """批量嵌入查询文本"""
+        return self._embed(texts, "query")
+
+
+def embed_queries(embeddings: Embeddings, texts: List[str]) -> List[List[float]]:
+    """
+    批量嵌入查询文本
+
+    LangChain的Embeddings接口只有单条的 embed_query；DashScope按查询类型
+    批量请求（每次请求的条数由模型决定），其他实现逐条调用
+
+    Args:
+        embeddings: Embeddings实例
+        texts: 查询文本列表
+
+    Returns:
+        与输入顺序一致的向量列表
+    """
+    if isinstance(embeddings, CachedEmbeddings):
+        return embeddings.embed_queries(texts)
+    if isinstance(embeddings, DashScopeEmbeddings):
+        results = embed_with_retry(embeddings, input=list(texts), text_type="query", model=embeddings.model)
+        return [item["embedding"] for item in results]
+    return [embeddings.embed_query(text) for text in texts]
+
+
+def create_embeddings(config) -> Embeddings:
+    """
+    按配置创建Embeddings实例（构建流程与查询流程共用）
+
+    Args:
+        config: 全局配置
+
+    Returns:
+        Embeddings实例，启用缓存时为CachedEmbeddings
+    """
+    embeddings = DashScopeEmbeddings(
+        model=config.dashscope.embedding_model,
+        dashscope_api_key=config.dashscope.api_key
+    )
+
+    if not config.embedding_cache.enabled:
+        return embeddings
+
+    cache = EmbeddingCache(config.embedding_cache.db_path, config.embedding_cache.max_size_mb)
+    return CachedEmbeddings(embeddings, cache, config.dashscope.embedding_model)
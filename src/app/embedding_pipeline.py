@@ -0,0 +1,211 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+嵌入流水线模块
+按批次并发调用嵌入接口，令牌桶限速、指数退避重试，
+已完成的批次写入检查点，构建中断后可从断点继续
+"""
+
+import os
+import time
+import random
+import shutil
+import hashlib
+import logging
+import threading
+from pathlib import Path
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Iterable, Iterator, List, Optional, Union
+
+import numpy as np
+from langchain_core.embeddings import Embeddings
+
+# 配置日志
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+
+class TokenBucket:
+    """令牌桶限速器（线程安全）"""
+
+    def __init__(self, rate: float, capacity: Optional[float] = None):
+        """
+        Args:
+            rate: 每秒补充的令牌数，<=0 表示不限速
+            capacity: 桶容量（允许的突发量），默认等于rate
+        """
+        self.rate = rate
+        self.capacity = capacity if capacity is not None else max(rate, 1.0)
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self, tokens: float = 1.0):
+        """取出令牌，不足时阻塞等待"""
+        if self.rate <= 0:
+            return
+
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= tokens:
+                    self._tokens -= tokens
+                    return
+                wait = (tokens - self._tokens) / self.rate
+            time.sleep(wait)
+
+
+class EmbeddingPipeline:
+    """批量、并发、限速的文档嵌入流水线"""
+
+    def __init__(self, embeddings: Embeddings, batch_size: int = 25, max_workers: int = 4,
+                 requests_per_second: float = 10.0, max_retries: int = 5,
+                 retry_base_delay: float = 1.0, retry_max_delay: float = 30.0,
+                 checkpoint_dir: Optional[Union[str, Path]] = None):
+        """
+        初始化嵌入流水线
+
+        Args:
+            embeddings: Embeddings实例
+            batch_size: 每次请求的文本块数量
+            max_workers: 并发请求数
+            requests_per_second: 每秒最多发起的请求数，<=0 表示不限速
+            max_retries: 单个批次失败后的最大重试次数
+            retry_base_delay: 首次重试等待秒数，之后按指数增长
+            retry_max_delay: 重试等待上限秒数
+            checkpoint_dir: 检查点目录，为None时不保存检查点
+        """
+        self.embeddings = embeddings
+        self.batch_size = batch_size
+        self.max_workers = max_workers
+        self.rate_limiter = TokenBucket(requests_per_second)
+        self.max_retries = max_retries
+        self.retry_base_delay = retry_base_delay
+        self.retry_max_delay = retry_max_delay
+        self.checkpoint_dir = Path(checkpoint_dir) if checkpoint_dir else None
+
+    @classmethod
+    def from_config(cls, embeddings: Embeddings, pipeline_config,
+                    checkpoint_dir: Optional[Union[str, Path]] = None) -> "EmbeddingPipeline":
+        """按 EmbeddingPipelineConfig 创建流水线"""
+        return cls(
+            embeddings,
+            batch_size=pipeline_config.batch_size,
+            max_workers=pipeline_config.max_workers,
+            requests_per_second=pipeline_config.requests_per_second,
+            max_retries=pipeline_config.max_retries,
+            retry_base_delay=pipeline_config.retry_base_delay,
+            retry_max_delay=pipeline_config.retry_max_delay,
+            checkpoint_dir=checkpoint_dir if pipeline_config.checkpoint else None
+        )
+
+    def _checkpoint_path(self, batch: List[str]) -> Optional[Path]:
+        """按批次内容计算检查点文件路径，文本或顺序变化后不会误用旧结果"""
+        if self.checkpoint_dir is None:
+            return None
+        digest = hashlib.sha256("\0".join(batch).encode("utf-8")).hexdigest()
+        return self.checkpoint_dir / f"{digest}.npy"
+
+    def _load_checkpoint(self, batch: List[str]) -> Optional[np.ndarray]:
+        path = self._checkpoint_path(batch)
+        if path is None or not path.exists():
+            return None
+        try:
+            vectors = np.load(path)
+        except (OSError, ValueError):
+            return None
+        return vectors if len(vectors) == len(batch) else None
+
+    def _save_checkpoint(self, batch: List[str], vectors: np.ndarray):
+        path = self._checkpoint_path(batch)
+        if path is None:
+            return
+        # 先写临时文件再重命名，避免中断时留下不完整的检查点
+        tmp_path = path.with_name(f"{path.stem}.{threading.get_ident()}.tmp.npy")
+        np.save(tmp_path, vectors)
+        os.replace(tmp_path, path)
+
+    def clear_checkpoints(self):
+        """构建成功后删除检查点"""
+        if self.checkpoint_dir is not None and self.checkpoint_dir.exists():
+            shutil.rmtree(self.checkpoint_dir)
+
+    def _embed_batch(self, batch: List[str]) -> np.ndarray:
+        """嵌入单个批次，失败时指数退避重试"""
+        attempt = 0
+        while True:
+            self.rate_limiter.acquire()
+            try:
+                return np.array(self.embeddings.embed_documents(batch), dtype=np.float32)
+            except Exception as e:
+                attempt += 1
+                if attempt > self.max_retries:
+                    raise
+                delay = min(self.retry_max_delay, self.retry_base_delay * 2 ** (attempt - 1))
+                # 加入随机抖动，避免并发请求同时重试
+                delay *= random.uniform(0.5, 1.0)
+                logger.warning(f"嵌入请求失败（第 {attempt} 次重试，{delay:.1f}s 后）: {e}")
+                time.sleep(delay)
+
+    def _embed_or_resume(self, batch: List[str]) -> np.ndarray:
+        """优先使用检查点，否则嵌入并写入检查点"""
+        vectors = self._load_checkpoint(batch)
+        if vectors is None:
+            vectors = self._embed_batch(batch)
+            self._save_checkpoint(batch, vectors)
+        return vectors
+
+    def embed_stream(self, batches: Iterable[List[str]]) -> Iterator[np.ndarray]:
+        """
+        流式嵌入：按输入顺序逐批产出向量
+
+        批次按需从batches中读取，在途批次最多为 max_workers 的两倍，
+        上游读取与下游写入索引可以与嵌入请求同时进行
+
+        Args:
+            batches: 文本批次序列（可以是生成器）
+
+        Yields:
+            每个批次对应的向量矩阵
+        """
+        if self.checkpoint_dir is not None:
+            self.checkpoint_dir.mkdir(parents=True, exist_ok=True)
+
+        in_flight = deque()
+        done = 0
+        start = last_report = time.time()
+
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            try:
+                batches = iter(batches)
+                exhausted = False
+                while True:
+                    while not exhausted and len(in_flight) < self.max_workers * 2:
+                        batch = next(batches, None)
+                        if batch is None:
+                            exhausted = True
+                        else:
+                            in_flight.append((len(batch), executor.submit(self._embed_or_resume, batch)))
+                    if not in_flight:
+                        break
+
+                    size, future = in_flight.popleft()
+                    vectors = future.result()
+                    done += size
+
+                    now = time.time()
+                    if now - last_report >= 5:
+                        last_report = now
+                        logger.info(f"嵌入进度: {done} 个文本块，{done / (now - start):.1f} 块/秒")
+                    yield vectors
+            finally:
+                # 下游提前结束或出错时放弃尚未开始的批次
+                for _, future in in_flight:
+                    future.cancel()
+
+        if done:
+            elapsed = time.time() - start
+            logger.info(f"嵌入完成: {done} 个文本块，耗时 {elapsed:.1f}s，{done / max(elapsed, 1e-9):.1f} 块/秒")
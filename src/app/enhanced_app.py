@@ -2,10 +2,6 @@ import streamlit as st
 import os
 import sys
 from pathlib import Path
-import io
-from docx import Document
-import PyPDF2
-import pdfplumber
 import json
 from datetime import datetime
 
@@ -24,6 +20,7 @@ import dashscope
 # 修改为绝对导入路径
 from src.app.enhanced_knowledge_base import EnhancedKnowledgeBase
 from src.app.build_knowledge_base import KnowledgeBaseBuilder
+from src.app.document_extraction import get_extractor
 from src.app.feedback_system import FeedbackRecord
 
 # 页面配置
@@ -225,40 +222,20 @@ def render_answer_with_feedback_info(result):
                 st.write(f"**参考答案**: {sq['improved_answer'][:200]}...")
                 st.divider()
 
-def extract_text_from_file(uploaded_file):
-    """从不同格式的文件中提取文本内容"""
-    file_extension = uploaded_file.name.split('.')[-1].lower()
-    
-    try:
-        if file_extension in ['md', 'txt']:
-            return uploaded_file.read().decode('utf-8')
-        elif file_extension == 'pdf':
-            pdf_reader = PyPDF2.PdfReader(io.BytesIO(uploaded_file.read()))
-            text = ""
-            for page in pdf_reader.pages:
-                text += page.extract_text() + "\n"
-            return text
-        elif file_extension in ['doc', 'docx']:
-            doc = Document(io.BytesIO(uploaded_file.read()))
-            text = ""
-            for paragraph in doc.paragraphs:
-                text += paragraph.text + "\n"
-            return text
-        else:
-            raise ValueError(f"不支持的文件格式: {file_extension}")
-    except Exception as e:
-        raise Exception(f"提取文本失败: {str(e)}")
-
 def upload_documents_advanced(uploaded_files, config):
     """上传并处理多种格式的文档到docs目录"""
     try:
         docs_path = Path(config.document.docs_path)
         docs_path.mkdir(parents=True, exist_ok=True)
         
-        for uploaded_file in uploaded_files:
+        # 所有文件一起提交到解析进程池，并行提取文本
+        extracted = get_extractor().extract_many((f.name, f.read()) for f in uploaded_files)
+        
+        for filename, text_content in extracted:
             try:
-                text_content = extract_text_from_file(uploaded_file)
-                base_name = uploaded_file.name.rsplit('.', 1)[0]
+                if isinstance(text_content, Exception):
+                    raise text_content
+                base_name = filename.rsplit('.', 1)[0]
                 md_filename = f"{base_name}.md"
                 file_path = docs_path / md_filename
                 
@@ -270,10 +247,10 @@ def upload_documents_advanced(uploaded_files, config):
                 with open(file_path, 'w', encoding='utf-8') as f:
                     f.write(markdown_content)
                 
-                st.success(f"✅ {uploaded_file.name} 已转换并保存为 {md_filename}")
+                st.success(f"✅ {filename} 已转换并保存为 {md_filename}")
                 
             except Exception as e:
-                st.error(f"处理文件 {uploaded_file.name} 时发生错误: {str(e)}")
+                st.error(f"处理文件 {filename} 时发生错误: {str(e)}")
                 continue
         
         return True
@@ -573,6 +550,13 @@ def main():
                     # 创建简单的进度条显示
                     st.progress(satisfaction_rate / 100)
                     st.write(f"满意度: {satisfaction_rate:.1f}%")
+                    
+                    # 最近7天满意度趋势
+                    trend = st.session_state.enhanced_kb.get_satisfaction_trend(days=7)
+                    if len(trend) > 1:
+                        st.line_chart(
+                            {item["period"]: item["satisfaction_rate"] for item in trend}
+                        )
                 
                 # 系统配置
                 st.subheader("⚙️ 系统配置")
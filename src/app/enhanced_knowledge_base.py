@@ -8,8 +8,10 @@
 import os
 import sys
 import logging
+import contextvars
 from pathlib import Path
-from typing import List, Dict, Any, Optional, Tuple
+from concurrent.futures import ThreadPoolExecutor
+from typing import Iterator, List, Dict, Any, Optional, Tuple
 
 # 添加项目根目录到Python路径
 project_root = Path(__file__).parent.parent.parent
@@ -19,6 +21,11 @@ if str(project_root) not in sys.path:
 # 修改相对导入为绝对导入
 from src.app.knowledge_base import KnowledgeBase
 from src.app.feedback_system import FeedbackLearningSystem, FeedbackRecord
+from src.app.answer_cache import AnswerCache, SemanticAnswerCache
+from src.app.single_flight import SingleFlight
+from src.app.deadline import Deadline, DeadlineExceeded, RequestCancelled
+from src.app.metrics import MetricFamily, observe_stage
+from src.app.embedding_cache import CachedEmbeddings, embed_queries
 from config.config import get_config
 
 # 配置日志
@@ -28,61 +35,250 @@ logger = logging.getLogger(__name__)
 class EnhancedKnowledgeBase(KnowledgeBase):
     """增强的知识库，集成反馈学习功能"""
     
-    def __init__(self, vector_store_path: str = None, feedback_db_path: str = None):
+    def __init__(self, vector_store_path: str = None, feedback_db_path: str = None,
+                 llm=None, feedback_system: FeedbackLearningSystem = None):
         """
         初始化增强知识库
         
         Args:
             vector_store_path: 向量存储路径
             feedback_db_path: 反馈数据库路径
+            llm: 共享的LLM客户端，默认按配置创建
+            feedback_system: 共享的反馈学习系统，默认按 feedback_db_path 创建
         """
-        super().__init__(vector_store_path)
+        super().__init__(vector_store_path, llm=llm)
         
         # 初始化反馈学习系统
-        self.feedback_db_path = feedback_db_path or "./feedback.db"
-        self.feedback_system = FeedbackLearningSystem(self.feedback_db_path)
+        if feedback_system is not None:
+            self.feedback_system = feedback_system
+            self.feedback_db_path = str(feedback_system.db.db_path)
+        else:
+            self.feedback_db_path = feedback_db_path or "./feedback.db"
+            self.feedback_system = FeedbackLearningSystem(self.feedback_db_path)
+        # 纠正性反馈写入后清除该问题的答案缓存（异步写入时在写入后清除，避免期间重新缓存旧答案）
+        self.feedback_system.add_committed_listener(self._on_feedback_committed)
+        feedback_config = self.config.feedback
+        if feedback_config.similarity_mode == "embedding" and self.feedback_system.db.question_vectors is None:
+            self.feedback_system.enable_embedding_similarity(
+                self.embeddings, feedback_config.similar_top_k, feedback_config.embedding_threshold
+            )
         
         # 配置参数
         self.enable_feedback_learning = True
         self.confidence_threshold = 0.7
         self.similarity_threshold = 0.8
         
+        # 问答结果缓存
+        cache_config = self.config.answer_cache
+        self.answer_cache = AnswerCache(cache_config.max_entries, cache_config.ttl_seconds) \
+            if cache_config.enabled else None
+        # 语义缓存：相近问题复用检索与生成结果（反馈优化仍按新问题单独应用）
+        self.semantic_cache = SemanticAnswerCache(cache_config.max_entries, cache_config.ttl_seconds) \
+            if cache_config.semantic_enabled else None
+        # 相同问题的并发请求合并为一次计算
+        self.single_flight = SingleFlight()
+        
         logger.info("增强知识库初始化完成")
     
-    def ask_question_with_feedback(self, question: str, use_feedback: bool = True) -> Dict[str, Any]:
+    def load_vector_store(self):
+        """加载本地向量存储（索引重建后重新加载时清空答案缓存）"""
+        super().load_vector_store()
+        if self.answer_cache:
+            self.answer_cache.clear()
+        if self.semantic_cache:
+            self.semantic_cache.clear()
+    
+    @property
+    def semantic_threshold(self) -> float:
+        """语义缓存的余弦相似度阈值（与词项相似度的 similarity_threshold 尺度不同，单独配置）"""
+        return self.config.answer_cache.semantic_threshold
+    
+    def ask_question_with_feedback(self, question: str, use_feedback: bool = True,
+                                   deadline: Optional[Deadline] = None) -> Dict[str, Any]:
         """
         基于知识库回答问题，并考虑用户反馈
         
+        相同问题（规范化后）在同一索引版本和提示词版本下直接返回缓存结果；
+        与已回答问题的余弦相似度达到阈值时复用其答案与来源文档，跳过LLM调用
+        
         Args:
             question: 用户问题
             use_feedback: 是否使用反馈优化答案
+            deadline: 请求截止时间与取消状态，超时或取消时抛出 DeadlineExceeded / RequestCancelled，
+                剩余时间不足时跳过语义缓存与相似问题查找
             
         Returns:
             包含答案、来源文档、反馈信息的字典
         """
+        deadline = deadline or Deadline()
+        try:
+            response = self.single_flight.do(
+                self._request_key(question, use_feedback),
+                lambda: self._ask(question, use_feedback, deadline),
+                deadline
+            )
+        except (DeadlineExceeded, RequestCancelled):
+            # 合并到的请求因其发起者超时或取消而中止，自身仍有时间时单独执行（自身超时或取消时再次抛出）
+            deadline.check("问答")
+            response = self._ask(question, use_feedback, deadline)
+        if response["question"] != question:
+            # 合并到其他写法相同问题的请求
+            response["question"] = question
+        return response
+    
+    def _ask(self, question: str, use_feedback: bool, deadline: Deadline) -> Dict[str, Any]:
+        for event in self._answer_events(question, use_feedback, stream=False, deadline=deadline):
+            pass
+        return event["response"]
+    
+    def _request_key(self, question: str, use_feedback: bool) -> str:
+        """问答请求键（规范化问题、索引版本、提示词版本与反馈选项），用于缓存与请求合并"""
+        return AnswerCache.make_key(
+            question, self.store_version, self.prompt_version,
+            use_feedback and self.enable_feedback_learning
+        )
+    
+    def ask_question_with_feedback_stream(self, question: str, use_feedback: bool = True,
+                                          deadline: Optional[Deadline] = None) -> Iterator[Dict[str, Any]]:
+        """
+        流式回答问题，缓存与截止时间处理同 ask_question_with_feedback
+        
+        Args:
+            question: 用户问题
+            use_feedback: 是否使用反馈优化答案
+            deadline: 请求截止时间与取消状态
+            
+        Yields:
+            {"type": "sources", "source_documents": [...]}，随后若干
+            {"type": "delta", "text": ...}（原始答案片段），最后
+            {"type": "final", "response": {...}}（含最终答案与反馈信息）；
+            命中缓存时原始答案作为单个片段产出
+        """
+        return self._answer_events(question, use_feedback, stream=True, deadline=deadline or Deadline())
+    
+    def _answer_events(self, question: str, use_feedback: bool, stream: bool,
+                       deadline: Deadline) -> Iterator[Dict[str, Any]]:
+        """问答主流程：缓存查找、生成答案、反馈优化与缓存写入"""
         if not self.qa_chain:
             raise ValueError("QA链未初始化，请先调用load_vector_store()")
+        deadline.check("问答")
+        
+        with observe_stage("ask", "total"):
+            cache_key, cached = self._cached_answer(question, use_feedback)
+            if cached is not None:
+                yield from self._replay_events(cached)
+                yield {"type": "final", "response": cached}
+                return
+            
+            response = yield from self._semantic_lookup_or_generate(question, stream, deadline)
+            response = self._apply_feedback(question, response, use_feedback, deadline)
+            
+            if cache_key:
+                self.answer_cache.put(cache_key, question, response)
+            yield {"type": "final", "response": response}
+    
+    def _cached_answer(self, question: str, use_feedback: bool) -> Tuple[Optional[str], Optional[Dict[str, Any]]]:
+        """查找精确缓存，返回 (缓存键, 缓存结果)；未启用缓存时缓存键为None"""
+        if not self.answer_cache:
+            return None, None
+        
+        cache_key = self._request_key(question, use_feedback)
+        with observe_stage("ask", "answer_cache"):
+            cached = self.answer_cache.get(cache_key)
+        if cached is not None:
+            logger.info(f"命中答案缓存: {question}")
+            cached["question"] = question
+        return cache_key, cached
+    
+    @property
+    def _semantic_version(self) -> Tuple[Any, Any]:
+        """语义缓存条目的版本（索引版本与提示词版本）"""
+        return self.store_version, self.prompt_version
+    
+    def _semantic_hit(self, question: str, embedding: List[float]) -> Optional[Dict[str, Any]]:
+        """查找语义缓存，命中时返回标注了来源问题的结果"""
+        hit = self.semantic_cache.lookup(embedding, self._semantic_version, self.semantic_threshold)
+        if hit is None:
+            return None
+        
+        cached_question, similarity, response = hit
+        logger.info(f"命中语义缓存: {question} ≈ {cached_question} (相似度 {similarity:.3f})")
+        response["question"] = question
+        response["semantic_cache"] = {"question": cached_question, "similarity": similarity}
+        return response
+    
+    @staticmethod
+    def _replay_events(response: Dict[str, Any]) -> Iterator[Dict[str, Any]]:
+        """将已有结果转换为来源文档与单个答案片段事件"""
+        yield {"type": "sources", "source_documents": response["source_documents"]}
+        yield {"type": "delta", "text": response["original_answer"]}
+    
+    def _semantic_lookup_or_generate(self, question: str, stream: bool, deadline: Deadline):
+        """先查语义缓存，未命中时生成答案并写入语义缓存（生成器，返回结果字典）"""
+        if not self.semantic_cache or not self._allows_optional(deadline, "语义缓存查找"):
+            return (yield from self._generate_events(question, stream, deadline))
         
-        logger.info(f"处理问题: {question}")
+        try:
+            # 查询向量经嵌入缓存复用，随后的检索不会重复调用嵌入接口
+            with deadline.stage("向量计算", self.config.request_budget.retrieval_fraction), \
+                    observe_stage("ask", "semantic_embedding"):
+                embedding = self.embeddings.embed_query(question)
+        except (DeadlineExceeded, RequestCancelled):
+            raise
+        except Exception as e:
+            logger.warning(f"计算问题向量失败，跳过语义缓存: {e}")
+            return (yield from self._generate_events(question, stream, deadline))
+        
+        with observe_stage("ask", "semantic_cache"):
+            response = self._semantic_hit(question, embedding)
+        if response is not None:
+            yield from self._replay_events(response)
+            return response
         
-        # 获取原始答案
-        original_result = self.qa_chain({"query": question})
-        original_answer = original_result["result"]
-        source_documents = original_result["source_documents"]
+        response = yield from self._generate_events(question, stream, deadline)
+        self.semantic_cache.put(question, embedding, self._semantic_version, response)
+        return response
+    
+    def _generate_events(self, question: str, stream: bool, deadline: Deadline):
+        """
+        生成原始答案，流式时逐段产出（生成器，返回结果字典）
         
-        # 准备返回结果
-        response = {
+        有截止时间或可取消的请求即使不需要流式输出也以流式调用LLM，以便中途中止
+        """
+        if not stream and not deadline.bounded:
+            response = self._generate_answer(question)
+            yield from self._replay_events(response)
+            return response
+        
+        source_documents, parts = [], []
+        for event in self.ask_question_stream(question, deadline):
+            if event["type"] == "sources":
+                source_documents = event["source_documents"]
+            else:
+                parts.append(event["text"])
+            yield event
+        return self._base_response(question, "".join(parts), source_documents)
+    
+    def _generate_answer(self, question: str) -> Dict[str, Any]:
+        """执行检索并生成原始答案"""
+        logger.info(f"处理问题: {question}")
+        
+        # 获取原始答案（检索与生成在QA链内完成，整体计时）
+        with observe_stage("ask", "qa_chain"):
+            original_result = self.qa_chain({"query": question})
+        return self._base_response(
+            question, original_result["result"],
+            self.format_source_documents(original_result["source_documents"])
+        )
+    
+    @staticmethod
+    def _base_response(question: str, original_answer: str, source_documents: List[Dict]) -> Dict[str, Any]:
+        """构造尚未应用反馈优化的结果"""
+        return {
             "question": question,
             "original_answer": original_answer,
             "final_answer": original_answer,
-            "source_documents": [
-                {
-                    "content": doc.page_content,
-                    "source": doc.metadata.get("source", "未知"),
-                    "metadata": doc.metadata
-                }
-                for doc in source_documents
-            ],
+            "source_documents": source_documents,
             "feedback_info": {
                 "is_improved": False,
                 "confidence_score": 0.0,
@@ -90,13 +286,26 @@ class EnhancedKnowledgeBase(KnowledgeBase):
                 "similar_questions": []
             }
         }
+    
+    def _allows_optional(self, deadline: Deadline, step: str) -> bool:
+        """剩余时间是否足够执行可选步骤"""
+        if deadline.allows(self.config.request_budget.optional_min_seconds):
+            return True
+        logger.info(f"剩余时间不足，跳过{step}")
+        return False
+    
+    def _apply_feedback(self, question: str, response: Dict[str, Any], use_feedback: bool,
+                        deadline: Optional[Deadline] = None) -> Dict[str, Any]:
+        """根据用户反馈优化答案（剩余时间不足时跳过相似问题查找）"""
+        original_answer = response["original_answer"]
         
         # 如果启用反馈学习，尝试获取优化答案
         if use_feedback and self.enable_feedback_learning:
             try:
-                optimized_answer, feedback_meta = self.feedback_system.get_optimized_answer(
-                    question, original_answer
-                )
+                with observe_stage("ask", "feedback_lookup"):
+                    optimized_answer, feedback_meta = self.feedback_system.get_optimized_answer(
+                        question, original_answer
+                    )
                 
                 if feedback_meta["is_improved"]:
                     response["final_answer"] = optimized_answer
@@ -104,10 +313,12 @@ class EnhancedKnowledgeBase(KnowledgeBase):
                     logger.info(f"使用优化答案，置信度: {feedback_meta['confidence_score']:.2f}")
                 
                 # 获取相似问题的反馈
-                similar_questions = self.feedback_system.get_similar_questions_feedback(
-                    question, self.similarity_threshold
-                )
-                response["feedback_info"]["similar_questions"] = similar_questions[:3]  # 最多3个
+                if self._allows_optional(deadline or Deadline(), "相似问题查找"):
+                    with observe_stage("ask", "similar_questions"):
+                        similar_questions = self.feedback_system.get_similar_questions_feedback(
+                            question, self.similarity_threshold
+                        )
+                    response["feedback_info"]["similar_questions"] = similar_questions[:3]  # 最多3个
                 
             except Exception as e:
                 logger.warning(f"获取反馈优化答案失败: {e}")
@@ -142,12 +353,22 @@ class EnhancedKnowledgeBase(KnowledgeBase):
             )
             
             logger.info(f"收集到用户反馈: {feedback_type}, ID: {feedback_id}")
+            
             return feedback_id
             
         except Exception as e:
             logger.error(f"收集反馈失败: {e}")
             raise
     
+    def _on_feedback_committed(self, records: List[FeedbackRecord]):
+        """纠正后的答案需要立即生效：清除对应问题的答案缓存"""
+        for record in records:
+            if record.user_feedback == "corrected":
+                if self.answer_cache:
+                    self.answer_cache.invalidate_question(record.question)
+                if self.semantic_cache:
+                    self.semantic_cache.invalidate_question(record.question)
+    
     def get_feedback_history(self, question: str) -> List[FeedbackRecord]:
         """
         获取问题的反馈历史
@@ -169,6 +390,19 @@ class EnhancedKnowledgeBase(KnowledgeBase):
         """
         return self.feedback_system.get_system_stats()
     
+    def get_satisfaction_trend(self, days: int = 7, period: str = "day") -> List[Dict[str, Any]]:
+        """
+        获取满意度趋势
+        
+        Args:
+            days: 最近天数（含今天）
+            period: 时间段粒度，hour 或 day
+            
+        Returns:
+            按时间段升序排列的 {period, total_feedback, positive_feedback, satisfaction_rate}
+        """
+        return self.feedback_system.get_satisfaction_trend(days, period)
+    
     def get_enhanced_stats(self) -> Dict[str, Any]:
         """
         获取增强知识库的完整统计信息
@@ -186,6 +420,10 @@ class EnhancedKnowledgeBase(KnowledgeBase):
         enhanced_stats = {
             "knowledge_base": base_stats,
             "feedback_system": feedback_stats,
+            "answer_cache": self.answer_cache.stats() if self.answer_cache else None,
+            "single_flight": self.single_flight.stats(),
+            "semantic_cache": dict(self.semantic_cache.stats(), threshold=self.semantic_threshold)
+                              if self.semantic_cache else None,
             "system_config": {
                 "feedback_learning_enabled": self.enable_feedback_learning,
                 "confidence_threshold": self.confidence_threshold,
@@ -196,6 +434,46 @@ class EnhancedKnowledgeBase(KnowledgeBase):
         
         return enhanced_stats
     
+    def collect_metrics(self) -> List[MetricFamily]:
+        """导出缓存命中、请求合并与索引大小指标（注册到指标注册表，导出时计算）"""
+        caches = []
+        if self.answer_cache:
+            caches.append(("answer", self.answer_cache.stats()))
+        if self.semantic_cache:
+            caches.append(("semantic", self.semantic_cache.stats()))
+        if isinstance(self.embeddings, CachedEmbeddings):
+            caches.append(("embedding", self.embeddings.cache.stats()))
+        
+        single_flight = self.single_flight.stats()
+        index = self.vector_store.index if self.vector_store else None
+        return [
+            ("kdb_cache_requests_total", "counter", "缓存查找次数（按缓存与命中结果）", [
+                ({"cache": name, "result": result}, stats[key])
+                for name, stats in caches for result, key in (("hit", "hits"), ("miss", "misses"))
+            ]),
+            ("kdb_cache_entries", "gauge", "缓存条目数", [
+                ({"cache": name}, stats["size"]) for name, stats in caches if "size" in stats
+            ]),
+            ("kdb_single_flight_collapsed_total", "counter", "合并到进行中请求的重复请求数", [
+                ({}, single_flight["collapsed"])
+            ]),
+            ("kdb_index_vectors", "gauge", "向量索引中的向量数", [
+                ({}, index.ntotal if index is not None else 0)
+            ]),
+        ] + self._feedback_queue_metrics()
+    
+    def _feedback_queue_metrics(self) -> List[MetricFamily]:
+        """反馈异步写入队列指标（未启用异步写入时为空）"""
+        write_queue = self.feedback_system.write_queue
+        if write_queue is None:
+            return []
+        stats = write_queue.stats()
+        return [
+            ("kdb_feedback_pending", "gauge", "排队等待写入的反馈数", [({}, stats["pending"])]),
+            ("kdb_feedback_written_total", "counter", "已写入数据库的反馈数", [({}, stats["written"])]),
+            ("kdb_feedback_batches_total", "counter", "反馈批量写入事务数", [({}, stats["batches"])]),
+        ]
+    
     def search_documents(self, query: str, k: int = None) -> List[Dict[str, Any]]:
         """
         搜索文档（重写父类方法以添加反馈信息）
@@ -207,15 +485,74 @@ class EnhancedKnowledgeBase(KnowledgeBase):
         Returns:
             搜索结果列表
         """
+        return self.single_flight.do(
+            self._search_key(query, k),
+            lambda: self._search_documents(query, k)
+        )
+    
+    def _search_key(self, query: str, k: Optional[int]) -> str:
+        """搜索请求键"""
+        return AnswerCache.make_key(query, "search", k or self.config.vector_store.search_k, self.store_version)
+    
+    def _search_documents(self, query: str, k: int = None) -> List[Dict[str, Any]]:
         # 调用父类的搜索方法
-        base_results = super().search_documents(query, k)
-        
-        # 为结果添加评分信息（转换similarity_score为score）
-        for result in base_results:
+        with observe_stage("search", "total"):
+            return self._add_scores(super().search_documents(query, k))
+    
+    @staticmethod
+    def _add_scores(results: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """为结果添加评分信息（转换similarity_score为score）"""
+        for result in results:
             if 'similarity_score' in result:
                 result['score'] = 1.0 - result['similarity_score']  # 转换为相似度评分
+        return results
+    
+    def search_documents_batch(self, queries: List[str], k: int = None) -> List[List[Dict[str, Any]]]:
+        """批量搜索文档（结果格式同 search_documents）"""
+        return [self._add_scores(results) for results in super().search_documents_batch(queries, k)]
+    
+    def prefetch_query_embeddings(self, questions: List[str]):
+        """
+        一次批量计算问题向量并写入嵌入缓存，
+        之后逐个问答时的检索直接命中缓存（未启用嵌入缓存时不做处理）
+        """
+        if not isinstance(self.embeddings, CachedEmbeddings):
+            return
+        try:
+            embed_queries(self.embeddings, list(dict.fromkeys(questions)))
+        except Exception as e:
+            logger.warning(f"批量计算问题向量失败，改为逐个计算: {e}")
+    
+    def ask_questions_batch(self, questions: List[str], use_feedback: bool = True,
+                            max_parallelism: int = None, deadline: Optional[Deadline] = None) -> List[Any]:
+        """
+        批量问答
         
-        return base_results
+        问题向量一次批量计算，答案按并发上限并行生成，单个问题失败不影响其他问题
+        
+        Args:
+            questions: 问题列表
+            use_feedback: 是否使用反馈优化答案
+            max_parallelism: 最大并发数，默认读取配置 BATCH_CHAT_PARALLELISM
+            deadline: 整批请求共享的截止时间与取消状态
+            
+        Returns:
+            与问题顺序一致的列表，每项为结果字典（格式同 ask_question_with_feedback）或异常对象
+        """
+        self.prefetch_query_embeddings(questions)
+        
+        def ask(question):
+            try:
+                return self.ask_question_with_feedback(question, use_feedback, deadline)
+            except Exception as e:
+                logger.warning(f"批量问答中的问题处理失败: {question[:50]}: {e}")
+                return e
+        
+        parallelism = max_parallelism or self.config.batch.chat_parallelism
+        # 每个问题在调用方上下文的副本中执行，阶段耗时归入当前请求
+        contexts = [contextvars.copy_context() for _ in questions]
+        with ThreadPoolExecutor(max_workers=max(1, min(parallelism, len(questions) or 1))) as executor:
+            return list(executor.map(lambda context, question: context.run(ask, question), contexts, questions))
     
     def search_with_feedback_context(self, query: str, k: int = None) -> List[Dict[str, Any]]:
         """
@@ -231,19 +568,19 @@ class EnhancedKnowledgeBase(KnowledgeBase):
         # 获取基础搜索结果
         base_results = self.search_documents(query, k)
         
+        # 检查是否有相关的反馈改进（与具体结果无关，只查找一次）
+        try:
+            similar_feedback = self.feedback_system.get_similar_questions_feedback(
+                query, self.similarity_threshold
+            )
+        except:
+            similar_feedback = []
+        
         # 为每个结果添加反馈上下文
         enhanced_results = []
         for result in base_results:
             enhanced_result = result.copy()
             
-            # 检查是否有相关的反馈改进
-            try:
-                similar_feedback = self.feedback_system.get_similar_questions_feedback(
-                    query, self.similarity_threshold
-                )
-            except:
-                similar_feedback = []
-            
             enhanced_result["feedback_context"] = {
                 "has_similar_feedback": len(similar_feedback) > 0,
                 "similar_questions_count": len(similar_feedback),
@@ -303,6 +640,10 @@ class EnhancedKnowledgeBase(KnowledgeBase):
             confidence_threshold: 置信度阈值
             similarity_threshold: 相似度阈值
         """
+        # 设置变化会影响反馈优化结果
+        if self.answer_cache:
+            self.answer_cache.clear()
+        
         if enable_feedback is not None:
             self.enable_feedback_learning = enable_feedback
             logger.info(f"反馈学习已{'启用' if enable_feedback else '禁用'}")
@@ -0,0 +1,187 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+反馈异步写入队列（write-behind）
+提交时立即分配反馈ID并返回，后台线程按数量或时间将排队的反馈合并为一个事务写入，
+关闭时（服务停止或进程退出）写完全部排队的反馈
+"""
+
+import json
+import time
+import atexit
+import logging
+import threading
+from dataclasses import asdict
+from typing import Callable, List, Optional
+
+logger = logging.getLogger(__name__)
+
+# 批量写入的重试次数，仍失败时改为逐条写入，只丢弃写入失败的反馈（逐条记录日志）
+MAX_WRITE_ATTEMPTS = 3
+
+
+class FeedbackWriteQueue:
+    """反馈异步写入队列"""
+
+    def __init__(self, db, batch_size: int = 256, flush_interval: float = 0.2,
+                 max_pending: int = 10000, on_flushed: Optional[Callable[[List], None]] = None):
+        """
+        初始化写入队列并启动后台写入线程
+
+        Args:
+            db: 反馈数据库（FeedbackDatabase）
+            batch_size: 每个事务最多写入的反馈数，排队数达到时立即写入
+            flush_interval: 最早排队的反馈最多等待的时间（秒）
+            max_pending: 排队上限，达到时提交方等待写入（背压）
+            on_flushed: 每批提交成功后的回调，参数为该批反馈记录
+        """
+        self.db = db
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.max_pending = max_pending
+        self.on_flushed = on_flushed
+
+        self._pending: List = []
+        self._first_at = 0.0
+        self._ids = iter(())
+        self._cond = threading.Condition()
+        self._closed = False
+        self._flush_requested = False
+        self._submitted = 0
+        self._written = 0
+        self._dropped = 0
+        self.batches = 0
+
+        self._thread = threading.Thread(target=self._run, name="feedback-writer", daemon=True)
+        self._thread.start()
+        atexit.register(self.close)
+
+    def submit(self, feedback) -> int:
+        """
+        排队写入一条反馈
+
+        Returns:
+            分配的反馈ID（写入后即为该记录的ID）
+        """
+        with self._cond:
+            while len(self._pending) >= self.max_pending and not self._closed:
+                self._cond.wait()
+            if self._closed:
+                raise RuntimeError("反馈写入队列已关闭")
+            feedback.id = self._next_id()
+            if not self._pending:
+                self._first_at = time.monotonic()
+            self._pending.append(feedback)
+            self._submitted += 1
+            if len(self._pending) >= self.batch_size:
+                self._cond.notify_all()
+            return feedback.id
+
+    def _next_id(self) -> int:
+        """从预留的ID段中取下一个ID，用完时再向数据库预留一段（多进程共用数据库时不冲突）"""
+        feedback_id = next(self._ids, None)
+        if feedback_id is None:
+            self._ids = iter(self.db.reserve_feedback_ids(self.batch_size))
+            feedback_id = next(self._ids)
+        return feedback_id
+
+    def _run(self):
+        """后台写入循环"""
+        attempts = 0
+        while True:
+            with self._cond:
+                while not self._pending and not self._closed:
+                    self._cond.wait()
+                if not self._pending:
+                    return
+                while (len(self._pending) < self.batch_size and not self._closed
+                       and not self._flush_requested):
+                    remaining = self._first_at + self.flush_interval - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    self._cond.wait(remaining)
+                batch = self._pending[:self.batch_size]
+
+            try:
+                self.db.add_feedback_batch(batch)
+            except Exception as e:
+                attempts += 1
+                if attempts < MAX_WRITE_ATTEMPTS:
+                    logger.error(f"反馈批量写入失败（第 {attempts} 次），稍后重试: {e}")
+                    time.sleep(min(self.flush_interval * attempts, 5.0))
+                    continue
+                logger.error(f"反馈批量写入失败 {attempts} 次，改为逐条写入: {e}")
+                written = self._write_each(batch)
+            else:
+                written = batch
+
+            attempts = 0
+            self._finish(batch, len(written))
+            if written and self.on_flushed:
+                try:
+                    self.on_flushed(written)
+                except Exception as e:
+                    logger.warning(f"反馈写入回调失败: {e}")
+
+    def _write_each(self, batch: List) -> List:
+        """逐条写入一批反馈，丢弃写入失败的反馈（日志中保留完整记录），返回写入成功的反馈"""
+        written = []
+        for feedback in batch:
+            try:
+                self.db.add_feedback_batch([feedback])
+            except Exception as e:
+                record = json.dumps(asdict(feedback), ensure_ascii=False)
+                logger.error(f"反馈写入失败，丢弃反馈 {feedback.id}: {e}; 记录: {record}")
+            else:
+                written.append(feedback)
+        return written
+
+    def _finish(self, batch: List, written: int):
+        """从队列中移除已处理的一批反馈（其中 written 条已写入，其余已丢弃）并唤醒等待者"""
+        with self._cond:
+            # 剩余的反馈沿用原计时（已等待过一轮，下一轮立即写入）
+            del self._pending[:len(batch)]
+            self._written += written
+            self._dropped += len(batch) - written
+            if written:
+                self.batches += 1
+            if not self._pending:
+                self._flush_requested = False
+            self._cond.notify_all()
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """
+        立即写入目前排队的全部反馈并等待完成
+
+        Returns:
+            是否在超时前完成
+        """
+        with self._cond:
+            target = self._submitted
+            self._flush_requested = True
+            self._cond.notify_all()
+            return self._cond.wait_for(lambda: self._written + self._dropped >= target, timeout)
+
+    def close(self, timeout: Optional[float] = None):
+        """停止接收新反馈，写完排队的反馈后停止后台线程"""
+        with self._cond:
+            if self._closed:
+                return
+            self._closed = True
+            pending = len(self._pending)
+            self._cond.notify_all()
+        atexit.unregister(self.close)
+        self._thread.join(timeout)
+        if pending:
+            logger.info(f"反馈写入队列已关闭，关闭前写入 {pending} 条排队反馈")
+
+    def stats(self) -> dict:
+        """写入统计"""
+        with self._cond:
+            return {
+                "pending": len(self._pending),
+                "written": self._written,
+                "dropped": self._dropped,
+                "batches": self.batches,
+                "avg_batch_size": self._written / self.batches if self.batches else 0.0
+            }
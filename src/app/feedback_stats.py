@@ -0,0 +1,162 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+反馈统计汇总表
+反馈与改进答案的计数由触发器在写入事务内增量维护（其他进程或工具直接写库同样生效），
+统计查询只读取几行汇总数据，耗时与反馈表规模无关；按小时汇总的各类反馈数用于满意度趋势。
+汇总表首次建立时由原始数据补建，另提供一次 GROUP BY 重新统计用于校验与修复。
+"""
+
+import sqlite3
+import logging
+from datetime import datetime
+from typing import Any, Dict, List
+
+logger = logging.getLogger(__name__)
+
+# 汇总时间粒度：小时（ISO时间戳前13位，如 2024-01-01T08）；按天汇总时取前10位
+HOUR_BUCKET = "substr({}.timestamp, 1, 13)"
+TREND_PERIODS = {"hour": 13, "day": 10}
+
+_TRIGGERS = [
+    f"""
+    CREATE TRIGGER IF NOT EXISTS trg_feedback_stats_insert AFTER INSERT ON feedback BEGIN
+        INSERT INTO feedback_counters (name, value) VALUES ('feedback:' || NEW.user_feedback, 1)
+        ON CONFLICT(name) DO UPDATE SET value = value + 1;
+        INSERT INTO feedback_rollup (bucket, user_feedback, count)
+        VALUES ({HOUR_BUCKET.format("NEW")}, NEW.user_feedback, 1)
+        ON CONFLICT(bucket, user_feedback) DO UPDATE SET count = count + 1;
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS trg_feedback_stats_delete AFTER DELETE ON feedback BEGIN
+        UPDATE feedback_counters SET value = value - 1 WHERE name = 'feedback:' || OLD.user_feedback;
+        UPDATE feedback_rollup SET count = count - 1
+        WHERE bucket = {HOUR_BUCKET.format("OLD")} AND user_feedback = OLD.user_feedback;
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS trg_feedback_stats_update AFTER UPDATE OF user_feedback, timestamp ON feedback
+    BEGIN
+        UPDATE feedback_counters SET value = value - 1 WHERE name = 'feedback:' || OLD.user_feedback;
+        UPDATE feedback_rollup SET count = count - 1
+        WHERE bucket = {HOUR_BUCKET.format("OLD")} AND user_feedback = OLD.user_feedback;
+        INSERT INTO feedback_counters (name, value) VALUES ('feedback:' || NEW.user_feedback, 1)
+        ON CONFLICT(name) DO UPDATE SET value = value + 1;
+        INSERT INTO feedback_rollup (bucket, user_feedback, count)
+        VALUES ({HOUR_BUCKET.format("NEW")}, NEW.user_feedback, 1)
+        ON CONFLICT(bucket, user_feedback) DO UPDATE SET count = count + 1;
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS trg_improvements_stats_insert AFTER INSERT ON answer_improvements BEGIN
+        INSERT INTO feedback_counters (name, value) VALUES ('improved_answers', 1)
+        ON CONFLICT(name) DO UPDATE SET value = value + 1;
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS trg_improvements_stats_delete AFTER DELETE ON answer_improvements BEGIN
+        UPDATE feedback_counters SET value = value - 1 WHERE name = 'improved_answers';
+    END
+    """,
+]
+
+
+def create_tables(conn: sqlite3.Connection):
+    """创建汇总表与维护触发器（在调用方事务内执行，首次建立时由原始数据补建）"""
+    exists = conn.execute(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'feedback_counters'"
+    ).fetchone()
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS feedback_counters (
+            name TEXT PRIMARY KEY,
+            value INTEGER NOT NULL
+        ) WITHOUT ROWID
+    """)
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS feedback_rollup (
+            bucket TEXT NOT NULL,
+            user_feedback TEXT NOT NULL,
+            count INTEGER NOT NULL,
+            PRIMARY KEY (bucket, user_feedback)
+        ) WITHOUT ROWID
+    """)
+    for trigger in _TRIGGERS:
+        conn.execute(trigger)
+    if not exists:
+        rebuild(conn)
+
+
+def recount(conn: sqlite3.Connection) -> Dict[str, int]:
+    """由原始数据重新统计各计数（一次 GROUP BY 查询）"""
+    return dict(conn.execute("""
+        SELECT 'feedback:' || user_feedback, COUNT(*) FROM feedback GROUP BY user_feedback
+        UNION ALL
+        SELECT 'improved_answers', COUNT(*) FROM answer_improvements
+    """).fetchall())
+
+
+def rebuild(conn: sqlite3.Connection) -> Dict[str, int]:
+    """由原始数据重建汇总表（在调用方事务内执行），返回重建后的计数"""
+    counters = recount(conn)
+    conn.execute("DELETE FROM feedback_counters")
+    conn.executemany("INSERT INTO feedback_counters (name, value) VALUES (?, ?)", counters.items())
+    conn.execute("DELETE FROM feedback_rollup")
+    conn.execute(f"""
+        INSERT INTO feedback_rollup (bucket, user_feedback, count)
+        SELECT {HOUR_BUCKET.format("feedback")}, user_feedback, COUNT(*) FROM feedback GROUP BY 1, 2
+    """)
+    if counters:
+        logger.info(f"已重建反馈统计汇总表: {counters}")
+    return counters
+
+
+def read_counters(conn: sqlite3.Connection) -> Dict[str, int]:
+    """读取汇总计数"""
+    return dict(conn.execute("SELECT name, value FROM feedback_counters").fetchall())
+
+
+def summarize(counters: Dict[str, int]) -> Dict[str, Any]:
+    """汇总计数转换为统计信息"""
+    total_feedback = sum(value for name, value in counters.items() if name.startswith("feedback:"))
+    positive_feedback = counters.get("feedback:positive", 0)
+    return {
+        "total_feedback": total_feedback,
+        "positive_feedback": positive_feedback,
+        "negative_feedback": counters.get("feedback:negative", 0),
+        "corrected_feedback": counters.get("feedback:corrected", 0),
+        "improved_answers": counters.get("improved_answers", 0),
+        "satisfaction_rate": positive_feedback / max(1, total_feedback) * 100
+    }
+
+
+def trend(conn: sqlite3.Connection, since: datetime, period: str = "day") -> List[Dict[str, Any]]:
+    """
+    按时间段统计满意度（只读取汇总表）
+
+    Args:
+        conn: 数据库连接
+        since: 起始时间（含）
+        period: 时间段粒度，hour 或 day
+
+    Returns:
+        按时间段升序排列的 {period, total_feedback, positive_feedback, satisfaction_rate}
+    """
+    if period not in TREND_PERIODS:
+        raise ValueError(f"不支持的时间段粒度: {period}")
+    rows = conn.execute(f"""
+        SELECT substr(bucket, 1, {TREND_PERIODS[period]}) AS period,
+               SUM(count), SUM(CASE WHEN user_feedback = 'positive' THEN count ELSE 0 END)
+        FROM feedback_rollup
+        WHERE bucket >= ?
+        GROUP BY period
+        HAVING SUM(count) > 0
+        ORDER BY period
+    """, (since.isoformat()[:TREND_PERIODS[period]],)).fetchall()
+    return [{
+        "period": period_key,
+        "total_feedback": total,
+        "positive_feedback": positive,
+        "satisfaction_rate": positive / total * 100
+    } for period_key, total, positive in rows]
+
@@ -6,15 +6,27 @@
 """
 
 import os
+import sys
 import json
 import sqlite3
 import logging
-from datetime import datetime
+import threading
+from contextlib import contextmanager
+from datetime import datetime, timedelta
 from pathlib import Path
-from typing import List, Dict, Any, Optional, Tuple
+from typing import Callable, List, Dict, Any, Optional, Tuple
 from dataclasses import dataclass, asdict
 import hashlib
 
+# 添加项目根目录到Python路径
+project_root = Path(__file__).parent.parent.parent
+if str(project_root) not in sys.path:
+    sys.path.insert(0, str(project_root))
+
+from config.config import get_config
+from src.app import question_index, feedback_stats
+from src.app.feedback_queue import FeedbackWriteQueue
+
 # 设置日志
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -44,11 +56,79 @@ class FeedbackDatabase:
     def __init__(self, db_path: str = "./feedback.db"):
         self.db_path = Path(db_path)
         self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self.settings = get_config().feedback
+        # 每个线程持有一个连接（WAL模式下读不阻塞写），关闭时统一释放
+        self._local = threading.local()
+        self._connections: List[sqlite3.Connection] = []
+        self._connections_lock = threading.Lock()
+        # 问题向量索引，启用基于嵌入的相似问题查找后设置
+        self.question_vectors = None
         self._init_database()
     
+    def _connection(self) -> sqlite3.Connection:
+        """获取当前线程的数据库连接"""
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            # 自动提交模式：读语句各自读取最新快照，写操作由 _transaction 显式开启事务
+            conn = sqlite3.connect(self.db_path, timeout=self.settings.db_busy_timeout,
+                                   isolation_level=None, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute(f"PRAGMA cache_size=-{self.settings.db_cache_size_mb * 1024}")
+            conn.execute(f"PRAGMA mmap_size={self.settings.db_mmap_size_mb * 1024 * 1024}")
+            self._local.conn = conn
+            with self._connections_lock:
+                self._connections.append(conn)
+        return conn
+    
+    @contextmanager
+    def _transaction(self):
+        """
+        写事务（BEGIN IMMEDIATE）
+        
+        开始时即获取写锁，锁被占用时按 busy timeout 等待，避免读事务升级为写事务时直接失败
+        """
+        conn = self._connection()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            yield conn
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        conn.execute("COMMIT")
+    
+    @contextmanager
+    def _read_transaction(self):
+        """读事务：多条查询读取同一快照（WAL模式下不阻塞写入）"""
+        conn = self._connection()
+        conn.execute("BEGIN")
+        try:
+            yield conn
+        finally:
+            conn.execute("COMMIT")
+    
+    def export_data(self) -> Dict[str, Any]:
+        """读取全部反馈记录与改进答案"""
+        with self._read_transaction() as conn:
+            return {
+                "feedback_records": conn.execute("SELECT * FROM feedback").fetchall(),
+                "improved_answers": conn.execute("SELECT * FROM answer_improvements").fetchall()
+            }
+    
+    def close(self):
+        """关闭所有线程的数据库连接"""
+        with self._connections_lock:
+            connections, self._connections = self._connections, []
+        for conn in connections:
+            try:
+                conn.close()
+            except sqlite3.Error as e:
+                logger.warning(f"关闭反馈数据库连接失败: {e}")
+        self._local = threading.local()
+    
     def _init_database(self):
         """初始化数据库表"""
-        with sqlite3.connect(self.db_path) as conn:
+        with self._transaction() as conn:
             conn.execute("""
                 CREATE TABLE IF NOT EXISTS feedback (
                     id INTEGER PRIMARY KEY AUTOINCREMENT,
@@ -80,135 +160,195 @@ class FeedbackDatabase:
             conn.execute("CREATE INDEX IF NOT EXISTS idx_timestamp ON feedback(timestamp)")
             conn.execute("CREATE INDEX IF NOT EXISTS idx_user_feedback ON feedback(user_feedback)")
             
-            conn.commit()
+            # 相似问题查找使用的倒排索引（已有数据首次打开时补建）
+            question_index.create_tables(conn)
+            question_index.backfill(conn)
+            
+            # 由触发器维护的统计汇总表（首次建立时由已有数据补建）
+            feedback_stats.create_tables(conn)
     
     def add_feedback(self, feedback: FeedbackRecord) -> int:
         """添加反馈记录"""
-        with sqlite3.connect(self.db_path) as conn:
-            cursor = conn.execute("""
-                INSERT INTO feedback (
-                    question, original_answer, user_feedback, corrected_answer,
-                    feedback_text, timestamp, question_hash, source_documents
-                ) VALUES (?, ?, ?, ?, ?, ?, ?, ?)
-            """, (
-                feedback.question,
-                feedback.original_answer,
-                feedback.user_feedback,
-                feedback.corrected_answer,
-                feedback.feedback_text,
-                feedback.timestamp,
-                feedback.question_hash,
-                feedback.source_documents
-            ))
-            feedback_id = cursor.lastrowid
-            conn.commit()
-            
-            # 如果是纠正性反馈，更新改进答案
-            if feedback.user_feedback == "corrected" and feedback.corrected_answer:
-                self._update_improved_answer(feedback)
-            
-            return feedback_id
-    
-    def _update_improved_answer(self, feedback: FeedbackRecord):
-        """更新改进的答案"""
-        with sqlite3.connect(self.db_path) as conn:
-            # 检查是否已存在改进答案
-            existing = conn.execute(
-                "SELECT * FROM answer_improvements WHERE question_hash = ?",
-                (feedback.question_hash,)
-            ).fetchone()
+        return self.add_feedback_batch([feedback])[0]
+    
+    def add_feedback_batch(self, records: List[FeedbackRecord]) -> List[int]:
+        """
+        在一个事务内批量添加反馈记录（反馈、问题索引与改进答案一并写入）
+        
+        Args:
+            records: 反馈记录，id 为空时由数据库分配，否则使用预留的ID
             
-            if existing:
-                # 更新现有记录
-                conn.execute("""
-                    UPDATE answer_improvements 
-                    SET improved_answer = ?, feedback_count = feedback_count + 1,
-                        last_updated = ?, confidence_score = ?
-                    WHERE question_hash = ?
+        Returns:
+            各记录的ID
+        """
+        feedback_ids = []
+        with self._transaction() as conn:
+            for feedback in records:
+                cursor = conn.execute("""
+                    INSERT INTO feedback (
+                        id, question, original_answer, user_feedback, corrected_answer,
+                        feedback_text, timestamp, question_hash, source_documents
+                    ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
                 """, (
+                    feedback.id,
+                    feedback.question,
+                    feedback.original_answer,
+                    feedback.user_feedback,
                     feedback.corrected_answer,
+                    feedback.feedback_text,
                     feedback.timestamp,
-                    min(1.0, existing[4] + 0.2),  # 增加置信度
-                    feedback.question_hash
-                ))
-            else:
-                # 创建新记录
-                conn.execute("""
-                    INSERT INTO answer_improvements (
-                        question_hash, improved_answer, confidence_score,
-                        feedback_count, last_updated
-                    ) VALUES (?, ?, ?, ?, ?)
-                """, (
                     feedback.question_hash,
-                    feedback.corrected_answer,
-                    0.5,  # 初始置信度
-                    1,
-                    feedback.timestamp
+                    feedback.source_documents
                 ))
-            
-            conn.commit()
+                feedback_ids.append(cursor.lastrowid)
+                question_index.add_question(conn, feedback.question, feedback.question_hash)
+                
+                # 如果是纠正性反馈，更新改进答案
+                if feedback.user_feedback == "corrected" and feedback.corrected_answer:
+                    self._update_improved_answer(conn, feedback)
+        
+        # 新的改进答案写入后即嵌入问题，嵌入失败不影响反馈写入（下次写入时补嵌入）
+        if self.question_vectors is not None:
+            try:
+                self.question_vectors.sync(self._connection())
+            except Exception as e:
+                logger.warning(f"反馈问题嵌入失败: {e}")
+        
+        return feedback_ids
+    
+    def reserve_feedback_ids(self, count: int) -> range:
+        """
+        预留一段反馈ID（异步写入时提交即返回ID）
+        
+        推进 AUTOINCREMENT 序列，之后由数据库分配或其他进程预留的ID都不会与之重复
+        """
+        with self._transaction() as conn:
+            row = conn.execute("SELECT seq FROM sqlite_sequence WHERE name = 'feedback'").fetchone()
+            start = (row[0] if row else 0) + 1
+            if row:
+                conn.execute("UPDATE sqlite_sequence SET seq = ? WHERE name = 'feedback'", (start + count - 1,))
+            else:
+                conn.execute("INSERT INTO sqlite_sequence (name, seq) VALUES ('feedback', ?)", (start + count - 1,))
+        return range(start, start + count)
+    
+    def _update_improved_answer(self, conn: sqlite3.Connection, feedback: FeedbackRecord):
+        """更新改进的答案（在调用方事务内执行）"""
+        # 检查是否已存在改进答案
+        existing = conn.execute(
+            "SELECT * FROM answer_improvements WHERE question_hash = ?",
+            (feedback.question_hash,)
+        ).fetchone()
+        
+        if existing:
+            # 更新现有记录
+            conn.execute("""
+                UPDATE answer_improvements 
+                SET improved_answer = ?, feedback_count = feedback_count + 1,
+                    last_updated = ?, confidence_score = ?
+                WHERE question_hash = ?
+            """, (
+                feedback.corrected_answer,
+                feedback.timestamp,
+                min(1.0, existing[4] + 0.2),  # 增加置信度
+                feedback.question_hash
+            ))
+        else:
+            # 创建新记录
+            conn.execute("""
+                INSERT INTO answer_improvements (
+                    question_hash, improved_answer, confidence_score,
+                    feedback_count, last_updated
+                ) VALUES (?, ?, ?, ?, ?)
+            """, (
+                feedback.question_hash,
+                feedback.corrected_answer,
+                0.5,  # 初始置信度
+                1,
+                feedback.timestamp
+            ))
     
     def get_feedback_by_question(self, question: str) -> List[FeedbackRecord]:
         """根据问题获取反馈记录"""
         question_hash = hashlib.md5(question.encode()).hexdigest()
         
-        with sqlite3.connect(self.db_path) as conn:
-            rows = conn.execute(
-                "SELECT * FROM feedback WHERE question_hash = ? ORDER BY timestamp DESC",
-                (question_hash,)
-            ).fetchall()
-            
-            return [self._row_to_feedback(row) for row in rows]
+        rows = self._connection().execute(
+            "SELECT * FROM feedback WHERE question_hash = ? ORDER BY timestamp DESC",
+            (question_hash,)
+        ).fetchall()
+        
+        return [self._row_to_feedback(row) for row in rows]
     
     def get_improved_answer(self, question: str) -> Optional[Dict[str, Any]]:
         """获取改进的答案"""
         question_hash = hashlib.md5(question.encode()).hexdigest()
         
-        with sqlite3.connect(self.db_path) as conn:
-            row = conn.execute(
-                "SELECT * FROM answer_improvements WHERE question_hash = ?",
-                (question_hash,)
-            ).fetchone()
-            
-            if row:
-                return {
-                    "improved_answer": row[2],
-                    "confidence_score": row[3],
-                    "feedback_count": row[4],
-                    "last_updated": row[5]
-                }
-            
-            return None
+        row = self._connection().execute(
+            "SELECT * FROM answer_improvements WHERE question_hash = ?",
+            (question_hash,)
+        ).fetchone()
+        
+        if row:
+            return {
+                "improved_answer": row[2],
+                "confidence_score": row[3],
+                "feedback_count": row[4],
+                "last_updated": row[5]
+            }
+        
+        return None
+    
+    def enable_question_vectors(self, embeddings, save_interval: float = 5.0):
+        """启用基于嵌入的相似问题查找（向量索引保存在数据库旁，尚未索引的已有数据在后台补嵌入）"""
+        from src.app.question_vectors import QuestionVectorIndex
+        self.question_vectors = QuestionVectorIndex(self.db_path, embeddings, save_interval)
+        self.question_vectors.sync_in_background(self._connection)
+    
+    def find_similar_questions(self, question: str, similarity_threshold: float, k: int = 5) -> List[Dict[str, Any]]:
+        """
+        查找有改进答案的相似问题
+        
+        启用向量索引时按问题向量余弦相似度取前 k 个近邻，否则通过倒排索引按词项Jaccard相似度查找
+        """
+        conn = self._connection()
+        if self.question_vectors is not None:
+            return self.question_vectors.search(conn, question, similarity_threshold, k)
+        return question_index.find_similar(conn, question, similarity_threshold)
     
     def get_feedback_stats(self) -> Dict[str, Any]:
-        """获取反馈统计信息"""
-        with sqlite3.connect(self.db_path) as conn:
-            total_feedback = conn.execute("SELECT COUNT(*) FROM feedback").fetchone()[0]
-            
-            positive_feedback = conn.execute(
-                "SELECT COUNT(*) FROM feedback WHERE user_feedback = 'positive'"
-            ).fetchone()[0]
-            
-            negative_feedback = conn.execute(
-                "SELECT COUNT(*) FROM feedback WHERE user_feedback = 'negative'"
-            ).fetchone()[0]
-            
-            corrected_feedback = conn.execute(
-                "SELECT COUNT(*) FROM feedback WHERE user_feedback = 'corrected'"
-            ).fetchone()[0]
-            
-            improved_answers = conn.execute(
-                "SELECT COUNT(*) FROM answer_improvements"
-            ).fetchone()[0]
+        """获取反馈统计信息（读取触发器维护的汇总计数）"""
+        return feedback_stats.summarize(feedback_stats.read_counters(self._connection()))
+    
+    def verify_feedback_stats(self, repair: bool = True) -> bool:
+        """
+        用一次 GROUP BY 重新统计并与汇总计数核对
+        
+        Args:
+            repair: 不一致时是否由原始数据重建汇总表
             
-            return {
-                "total_feedback": total_feedback,
-                "positive_feedback": positive_feedback,
-                "negative_feedback": negative_feedback,
-                "corrected_feedback": corrected_feedback,
-                "improved_answers": improved_answers,
-                "satisfaction_rate": positive_feedback / max(1, total_feedback) * 100
-            }
+        Returns:
+            汇总计数是否与原始数据一致
+        """
+        with self._transaction() as conn:
+            # 计数为0的项（如全部删除后）与不存在等价
+            counters = {name: value for name, value in feedback_stats.read_counters(conn).items() if value}
+            expected = {name: value for name, value in feedback_stats.recount(conn).items() if value}
+            if counters == expected:
+                return True
+            logger.warning(f"反馈统计汇总与原始数据不一致: 汇总 {counters}，实际 {expected}")
+            if repair:
+                feedback_stats.rebuild(conn)
+            return False
+    
+    def get_satisfaction_trend(self, days: int = 7, period: str = "day") -> List[Dict[str, Any]]:
+        """
+        最近若干天的满意度趋势（读取按小时汇总的计数，不扫描反馈表）
+        
+        Args:
+            days: 天数（含今天）
+            period: 时间段粒度，hour 或 day
+        """
+        since = datetime.now().replace(hour=0, minute=0, second=0, microsecond=0) - timedelta(days=days - 1)
+        return feedback_stats.trend(self._connection(), since, period)
     
     def _row_to_feedback(self, row) -> FeedbackRecord:
         """将数据库行转换为FeedbackRecord"""
@@ -227,9 +367,36 @@ class FeedbackDatabase:
 class FeedbackLearningSystem:
     """反馈学习系统主类"""
     
-    def __init__(self, db_path: str = "./feedback.db"):
+    def __init__(self, db_path: str = "./feedback.db", write_behind: bool = False):
+        """
+        初始化反馈学习系统
+        
+        Args:
+            db_path: 反馈数据库路径
+            write_behind: 是否异步批量写入反馈（提交即返回ID，写入在后台按批提交，
+                          排队中的反馈在写入前查询不到，需要时先调用 flush）
+        """
         self.db = FeedbackDatabase(db_path)
         self.confidence_threshold = 0.7  # 使用改进答案的置信度阈值
+        self.similar_top_k = 5
+        self.embedding_threshold = 0.0
+        # 反馈写入数据库后的回调（如清除答案缓存）
+        self._committed_listeners: List[Callable[[List[FeedbackRecord]], None]] = []
+        self.write_queue = None
+        if write_behind:
+            settings = self.db.settings
+            self.write_queue = FeedbackWriteQueue(
+                self.db, settings.write_batch_size, settings.write_flush_interval,
+                settings.write_max_pending, on_flushed=self._notify_committed
+            )
+    
+    def add_committed_listener(self, callback: Callable[[List[FeedbackRecord]], None]):
+        """注册反馈写入数据库后的回调（异步写入时在后台线程按批调用）"""
+        self._committed_listeners.append(callback)
+    
+    def _notify_committed(self, records: List[FeedbackRecord]):
+        for callback in self._committed_listeners:
+            callback(records)
     
     def collect_feedback(self, question: str, original_answer: str, 
                         feedback_type: str, corrected_answer: str = None,
@@ -244,7 +411,11 @@ class FeedbackLearningSystem:
             source_documents=json.dumps(source_documents) if source_documents else None
         )
         
-        feedback_id = self.db.add_feedback(feedback)
+        if self.write_queue is not None:
+            feedback_id = self.write_queue.submit(feedback)
+        else:
+            feedback_id = self.db.add_feedback(feedback)
+            self._notify_committed([feedback])
         logger.info(f"收集到反馈: {feedback_type}, ID: {feedback_id}")
         
         return feedback_id
@@ -267,32 +438,40 @@ class FeedbackLearningSystem:
             "feedback_count": 0
         }
     
-    def get_similar_questions_feedback(self, question: str, similarity_threshold: float = 0.8) -> List[Dict[str, Any]]:
-        """获取相似问题的反馈（简单实现，基于关键词匹配）"""
-        # 这里可以集成更复杂的相似度计算，如使用embedding
-        question_words = set(question.lower().split())
+    def enable_embedding_similarity(self, embeddings, top_k: int = 5, threshold: float = 0.0):
+        """
+        相似问题改为基于嵌入的k近邻查找
         
-        with sqlite3.connect(self.db.db_path) as conn:
-            all_feedback = conn.execute(
-                "SELECT DISTINCT question, question_hash FROM feedback"
-            ).fetchall()
-            
-            similar_feedback = []
-            for q, q_hash in all_feedback:
-                q_words = set(q.lower().split())
-                similarity = len(question_words & q_words) / len(question_words | q_words)
-                
-                if similarity >= similarity_threshold:
-                    improved = self.db.get_improved_answer(q)
-                    if improved:
-                        similar_feedback.append({
-                            "question": q,
-                            "similarity": similarity,
-                            "improved_answer": improved["improved_answer"],
-                            "confidence_score": improved["confidence_score"]
-                        })
-            
-            return sorted(similar_feedback, key=lambda x: x["similarity"], reverse=True)
+        Args:
+            embeddings: 问题嵌入模型
+            top_k: 近邻数量
+            threshold: 余弦相似度阈值，0表示沿用调用方传入的阈值
+        """
+        self.db.enable_question_vectors(embeddings)
+        self.similar_top_k = top_k
+        self.embedding_threshold = threshold
+    
+    def get_similar_questions_feedback(self, question: str, similarity_threshold: float = 0.8) -> List[Dict[str, Any]]:
+        """获取相似问题的反馈（默认基于词项Jaccard相似度，启用嵌入后基于余弦相似度）"""
+        if self.db.question_vectors is not None:
+            return self.db.find_similar_questions(
+                question, self.embedding_threshold or similarity_threshold, self.similar_top_k
+            )
+        return self.db.find_similar_questions(question, similarity_threshold)
+    
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """等待排队的反馈全部写入数据库，返回是否在超时前完成"""
+        if self.write_queue is None:
+            return True
+        return self.write_queue.flush(timeout)
+    
+    def close(self):
+        """写完排队的反馈，保存未写回的问题向量索引并关闭数据库连接"""
+        if self.write_queue is not None:
+            self.write_queue.close()
+        if self.db.question_vectors is not None:
+            self.db.question_vectors.save()
+        self.db.close()
     
     def get_feedback_history(self, question: str) -> List[FeedbackRecord]:
         """获取问题的反馈历史"""
@@ -302,25 +481,22 @@ class FeedbackLearningSystem:
         """获取系统统计信息"""
         return self.db.get_feedback_stats()
     
+    def get_satisfaction_trend(self, days: int = 7, period: str = "day") -> List[Dict[str, Any]]:
+        """获取满意度趋势"""
+        return self.db.get_satisfaction_trend(days, period)
+    
     def export_feedback_data(self, output_path: str) -> bool:
         """导出反馈数据用于进一步分析"""
         try:
-            with sqlite3.connect(self.db.db_path) as conn:
-                # 导出反馈数据
-                feedback_data = conn.execute("SELECT * FROM feedback").fetchall()
-                improved_data = conn.execute("SELECT * FROM answer_improvements").fetchall()
-                
-                export_data = {
-                    "feedback_records": feedback_data,
-                    "improved_answers": improved_data,
-                    "export_timestamp": datetime.now().isoformat()
-                }
-                
-                with open(output_path, 'w', encoding='utf-8') as f:
-                    json.dump(export_data, f, ensure_ascii=False, indent=2)
-                
-                logger.info(f"反馈数据已导出到: {output_path}")
-                return True
+            # 导出反馈数据
+            export_data = self.db.export_data()
+            export_data["export_timestamp"] = datetime.now().isoformat()
+            
+            with open(output_path, 'w', encoding='utf-8') as f:
+                json.dump(export_data, f, ensure_ascii=False, indent=2)
+            
+            logger.info(f"反馈数据已导出到: {output_path}")
+            return True
                 
         except Exception as e:
             logger.error(f"导出反馈数据失败: {e}")
@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+流式导入工具
+构建流程拆分为 发现 → 读取 → 分割 → 嵌入 → 写入索引 多个阶段，
+阶段之间通过有界队列衔接，内存峰值与语料总量无关
+"""
+
+import queue
+import logging
+import threading
+from pathlib import Path
+from typing import Iterable, Iterator, List, TypeVar, Union
+
+# 配置日志
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+_DONE = object()
+
+
+class _Failure:
+    """上游阶段抛出的异常，转交给下游重新抛出"""
+
+    def __init__(self, error: BaseException):
+        self.error = error
+
+
+def bounded(iterable: Iterable[T], maxsize: int, name: str = "ingest-stage") -> Iterator[T]:
+    """
+    在后台线程中消费iterable，通过有界队列把结果交给调用方
+
+    队列满时上游阻塞（背压），上游异常会在下游重新抛出，
+    下游提前结束时上游线程随之退出
+
+    Args:
+        iterable: 上游阶段
+        maxsize: 队列长度
+        name: 线程名
+
+    Yields:
+        上游产出的元素（顺序不变）
+    """
+    items = queue.Queue(maxsize=maxsize)
+    stop = threading.Event()
+
+    def put(item) -> bool:
+        while not stop.is_set():
+            try:
+                items.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def produce():
+        try:
+            for item in iterable:
+                if not put(item):
+                    return
+            put(_DONE)
+        except BaseException as e:
+            put(_Failure(e))
+
+    thread = threading.Thread(target=produce, name=name, daemon=True)
+    thread.start()
+    try:
+        while True:
+            item = items.get()
+            if item is _DONE:
+                return
+            if isinstance(item, _Failure):
+                raise item.error
+            yield item
+    finally:
+        stop.set()
+
+
+def discover_files(docs_path: Union[str, Path], pattern: str = "*.md", recursive: bool = True) -> List[Path]:
+    """
+    查找文档文件（只收集路径，不读取内容）
+
+    Args:
+        docs_path: 文档目录
+        pattern: 文件名匹配模式
+        recursive: 是否包含子目录
+
+    Returns:
+        排序后的文件路径列表
+    """
+    docs_path = Path(docs_path)
+    paths = docs_path.rglob(pattern) if recursive else docs_path.glob(pattern)
+    return sorted(path for path in paths if path.is_file())
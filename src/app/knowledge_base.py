@@ -1,33 +1,54 @@
 import os
 import sys
+import time
+import pickle
+import hashlib
 import logging
+import numpy as np
+import faiss
+from contextlib import closing
 from pathlib import Path
-from typing import List, Dict, Any, Optional
+from typing import Iterator, List, Dict, Any, Optional
 
 # 添加项目根目录到Python路径以导入config模块
 project_root = Path(__file__).parent.parent.parent
 if str(project_root) not in sys.path:
     sys.path.insert(0, str(project_root))
 
-from langchain_community.embeddings import DashScopeEmbeddings
 from langchain_community.vectorstores import FAISS
 from langchain_community.llms import Tongyi
 from langchain.chains import RetrievalQA
 from langchain.prompts import PromptTemplate
+from langchain.schema import Document
+from langchain_core.vectorstores import VectorStoreRetriever
 from config.config import get_config
+from src.app.vector_index import apply_search_params, describe_index, read_index, enable_reconstruct
+from src.app.embedding_cache import CachedEmbeddings, create_embeddings, embed_queries
+from src.app.chunk_store import CHUNK_STORE_FILE, ChunkStore, ChunkDocstore, RowIdMapping
+from src.app.deadline import Deadline
+from src.app.metrics import observe_stage
 import dashscope
 
 # 配置日志
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
+def create_llm(config) -> Tongyi:
+    """按配置创建通义千问LLM客户端"""
+    return Tongyi(
+        temperature=config.dashscope.temperature,
+        max_tokens=config.dashscope.max_tokens,
+        top_p=config.dashscope.top_p
+    )
+
 class KnowledgeBase:
-    def __init__(self, vector_store_path: str = None):
+    def __init__(self, vector_store_path: str = None, llm: Tongyi = None):
         """
         初始化知识库
         
         Args:
             vector_store_path: 向量存储路径
+            llm: 共享的LLM客户端，默认按配置创建
         """
         # 获取配置
         self.config = get_config()
@@ -37,21 +58,17 @@ class KnowledgeBase:
         # 设置DashScope API密钥
         dashscope.api_key = self.config.dashscope.api_key
         
-        # 使用通义千问的embeddings
-        self.embeddings = DashScopeEmbeddings(
-            model=self.config.dashscope.embedding_model,
-            dashscope_api_key=self.config.dashscope.api_key
-        )
+        # 使用通义千问的embeddings（带持久化向量缓存）
+        self.embeddings = create_embeddings(self.config)
         
         # 使用通义千问LLM
-        self.llm = Tongyi(
-            temperature=self.config.dashscope.temperature,
-            max_tokens=self.config.dashscope.max_tokens,
-            top_p=self.config.dashscope.top_p
-        )
+        self.llm = llm if llm is not None else create_llm(self.config)
         
         self.vector_store = None
         self.qa_chain = None
+        self.load_time_ms = None
+        # 当前加载的向量存储版本（索引文件的修改时间与大小）
+        self.store_version = None
         
         # 自定义提示模板
         self.prompt_template = PromptTemplate(
@@ -65,19 +82,57 @@ class KnowledgeBase:
 
 回答："""
         )
+        # 提示词版本，提示词变化后缓存的答案不再复用
+        self.prompt_version = hashlib.sha256(self.prompt_template.template.encode("utf-8")).hexdigest()[:12]
     
     def load_vector_store(self):
         """加载本地向量存储"""
         if not self.vector_store_path.exists():
             raise FileNotFoundError(f"向量存储路径不存在: {self.vector_store_path}")
         
-        logger.info(f"加载向量存储: {self.vector_store_path}")
-        self.vector_store = FAISS.load_local(
-            str(self.vector_store_path), 
-            self.embeddings,
-            allow_dangerous_deserialization=True
+        # 向量存储路径是指向当前版本目录的符号链接，先解析一次，索引与分块存储读取同一版本
+        store_path = self.vector_store_path.resolve()
+        logger.info(f"加载向量存储: {store_path}")
+        start = time.perf_counter()
+        
+        index_path = store_path / "index.faiss"
+        index = read_index(index_path, mmap=self.config.vector_store.mmap_index)
+        index_stat = index_path.stat()
+        self.store_version = f"{index_stat.st_mtime_ns}-{index_stat.st_size}"
+        
+        chunk_store_path = store_path / CHUNK_STORE_FILE
+        if chunk_store_path.exists():
+            # 文本块按需从SQLite读取，常驻内存不随语料增长
+            store = ChunkStore(chunk_store_path)
+            docstore, index_to_docstore_id = ChunkDocstore(store), RowIdMapping(store)
+        else:
+            logger.warning(
+                f"未找到 {CHUNK_STORE_FILE}，使用旧版 index.pkl；"
+                f"可运行 python src/app/chunk_store.py {self.vector_store_path} 进行迁移"
+            )
+            with open(store_path / "index.pkl", "rb") as f:
+                docstore, index_to_docstore_id = pickle.load(f)
+        
+        self.vector_store = FAISS(
+            embedding_function=self.embeddings,
+            index=index,
+            docstore=docstore,
+            index_to_docstore_id=index_to_docstore_id
         )
         
+        # 设置ANN索引的检索参数
+        search_params = apply_search_params(
+            self.vector_store.index,
+            nprobe=self.config.vector_store.nprobe,
+            ef_search=self.config.vector_store.ef_search
+        )
+        if search_params:
+            logger.info(f"索引检索参数: {search_params}")
+        
+        # MMR需要按ID取回向量
+        if self.config.vector_store.search_type == "mmr":
+            enable_reconstruct(self.vector_store.index)
+        
         # 创建QA链
         self.qa_chain = RetrievalQA.from_chain_type(
             llm=self.llm,
@@ -87,7 +142,8 @@ class KnowledgeBase:
             return_source_documents=True
         )
         
-        logger.info("向量存储加载完成")
+        self.load_time_ms = (time.perf_counter() - start) * 1000
+        logger.info(f"向量存储加载完成，耗时 {self.load_time_ms:.1f}ms")
     
     def search_documents(self, query: str, k: int = None) -> List[Dict[str, Any]]:
         """搜索相关文档"""
@@ -97,14 +153,17 @@ class KnowledgeBase:
         k = k or self.config.vector_store.search_k
         logger.info(f"搜索查询: {query}，返回数量: {k}")
         
+        # 分别计时查询向量计算与向量检索
+        with observe_stage("search", "query_embedding"):
+            vector = self.embeddings.embed_query(query)
+        
         # 执行相似性搜索
-        if self.config.vector_store.search_type == "similarity":
-            docs = self.vector_store.similarity_search_with_score(query, k=k)
-        elif self.config.vector_store.search_type == "mmr":
-            docs = self.vector_store.max_marginal_relevance_search(query, k=k)
-            docs = [(doc, 0.0) for doc in docs]  # MMR doesn't return scores
-        else:
-            docs = self.vector_store.similarity_search_with_score(query, k=k)
+        with observe_stage("search", "vector_search"):
+            if self.config.vector_store.search_type == "mmr":
+                docs = self.vector_store.max_marginal_relevance_search_by_vector(vector, k=k)
+                docs = [(doc, 0.0) for doc in docs]  # MMR doesn't return scores
+            else:
+                docs = self.vector_store.similarity_search_with_score_by_vector(vector, k=k)
         
         results = []
         for doc, score in docs:
@@ -117,6 +176,77 @@ class KnowledgeBase:
         logger.info(f"找到 {len(results)} 个相关文档")
         return results
     
+    def search_documents_batch(self, queries: List[str], k: int = None) -> List[List[Dict[str, Any]]]:
+        """
+        批量搜索相关文档
+        
+        所有查询一次批量嵌入，相似性检索以整个查询矩阵执行一次FAISS搜索，
+        文本块一次批量读取
+        
+        Args:
+            queries: 查询列表
+            k: 每个查询返回的数量
+            
+        Returns:
+            与查询顺序一致的结果列表，每项格式同 search_documents
+        """
+        if not self.vector_store:
+            raise ValueError("向量存储未加载，请先调用load_vector_store()")
+        if not queries:
+            return []
+        
+        k = k or self.config.vector_store.search_k
+        logger.info(f"批量搜索 {len(queries)} 个查询，每个返回数量: {k}")
+        
+        with observe_stage("search", "query_embedding"):
+            vectors = np.asarray(embed_queries(self.embeddings, queries), dtype=np.float32)
+        
+        with observe_stage("search", "vector_search"):
+            batches = self._search_by_vectors(vectors, k)
+        
+        return [
+            [
+                {
+                    "content": doc.page_content,
+                    "metadata": doc.metadata,
+                    "similarity_score": score
+                }
+                for doc, score in docs
+            ]
+            for docs in batches
+        ]
+    
+    def _search_by_vectors(self, vectors: np.ndarray, k: int) -> List[List[tuple]]:
+        """以查询矩阵检索，返回每个查询的 (文档, 距离) 列表"""
+        if self.config.vector_store.search_type == "mmr":
+            return [
+                [(doc, 0.0) for doc in self.vector_store.max_marginal_relevance_search_by_vector(vector.tolist(), k=k)]
+                for vector in vectors
+            ]
+        
+        if self.vector_store._normalize_L2:
+            faiss.normalize_L2(vectors)
+        scores, ids = self.vector_store.index.search(vectors, k)
+        documents = self._fetch_documents({int(i) for i in ids.ravel() if i >= 0})
+        return [
+            [(documents[int(i)], float(score)) for score, i in zip(row_scores, row_ids)
+             if i >= 0 and int(i) in documents]
+            for row_scores, row_ids in zip(scores, ids)
+        ]
+    
+    def _fetch_documents(self, ids: set) -> Dict[int, Document]:
+        """按FAISS ID批量读取文本块"""
+        docstore = self.vector_store.docstore
+        if isinstance(docstore, ChunkDocstore):
+            return docstore.store.get_many(sorted(ids))
+        
+        documents = {}
+        for i in ids:
+            doc = docstore.search(self.vector_store.index_to_docstore_id[i])
+            if isinstance(doc, Document):
+                documents[i] = doc
+        return documents
+    
     def ask_question(self, question: str) -> Dict[str, Any]:
         """基于知识库回答问题"""
         if not self.qa_chain:
@@ -143,6 +273,73 @@ class KnowledgeBase:
         
         return response
     
+    def ask_question_stream(self, question: str, deadline: Optional[Deadline] = None) -> Iterator[Dict[str, Any]]:
+        """
+        流式回答问题
+
+        先检索并产出来源文档，再按LLM生成顺序逐段产出答案，
+        提示词与QA链（stuff）一致
+
+        Args:
+            question: 用户问题
+            deadline: 请求截止时间；检索完成时截止时间已过则不再调用LLM，
+                生成期间超时或取消时关闭LLM流（中止进行中的调用）
+
+        Yields:
+            {"type": "sources", "source_documents": [...]}，随后若干
+            {"type": "delta", "text": ...}
+        """
+        if not self.qa_chain:
+            raise ValueError("QA链未初始化，请先调用load_vector_store()")
+        
+        logger.info(f"流式处理问题: {question}")
+        
+        deadline = deadline or Deadline()
+        with deadline.stage("检索", self.config.request_budget.retrieval_fraction):
+            docs = self.retrieve(question)
+        yield {"type": "sources", "source_documents": self.format_source_documents(docs)}
+        
+        with observe_stage("ask", "llm_generation"), closing(self.llm.stream(self.build_prompt(question, docs))) as chunks:
+            for text in chunks:
+                deadline.check("答案生成")
+                if text:
+                    yield {"type": "delta", "text": text}
+    
+    def retrieve(self, question: str) -> List[Document]:
+        """
+        按QA链检索器的配置检索问题的相关文档
+        
+        向量检索器的相似性检索分别计时查询向量计算与向量检索，其他检索器整体计时
+        """
+        retriever = self.qa_chain.retriever
+        if not isinstance(retriever, VectorStoreRetriever) or retriever.search_type != "similarity":
+            with observe_stage("ask", "retrieval"):
+                return retriever.invoke(question)
+        
+        with observe_stage("ask", "query_embedding"):
+            vector = self.embeddings.embed_query(question)
+        with observe_stage("ask", "vector_search"):
+            return retriever.vectorstore.similarity_search_by_vector(vector, **retriever.search_kwargs)
+    
+    def build_prompt(self, question: str, docs: List[Document]) -> str:
+        """按QA链（stuff）的方式拼接上下文生成提示词"""
+        return self.prompt_template.format(
+            context="\n\n".join(doc.page_content for doc in docs),
+            question=question
+        )
+    
+    @staticmethod
+    def format_source_documents(docs: List[Document]) -> List[Dict[str, Any]]:
+        """转换来源文档为字典"""
+        return [
+            {
+                "content": doc.page_content,
+                "source": doc.metadata.get("source", "未知"),
+                "metadata": doc.metadata
+            }
+            for doc in docs
+        ]
+    
     def get_stats(self) -> Dict[str, Any]:
         """获取知识库统计信息"""
         if not self.vector_store:
@@ -155,7 +352,11 @@ class KnowledgeBase:
         return {
             "status": "已加载",
             "document_count": doc_count,
-            "vector_store_path": str(self.vector_store_path)
+            "vector_store_path": str(self.vector_store_path),
+            "index": describe_index(self.vector_store.index),
+            "mmap": self.config.vector_store.mmap_index,
+            "load_time_ms": self.load_time_ms,
+            "embedding_cache": self.embeddings.cache.stats() if isinstance(self.embeddings, CachedEmbeddings) else None
         }
 
 def main():
@@ -0,0 +1,315 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+指标模块
+进程内的计数器、仪表盘与直方图，以Prometheus文本格式导出；
+提供各阶段耗时记录与本地HTTP指标端点（不依赖 prometheus_client）
+"""
+
+import math
+import time
+import logging
+import threading
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+from src.app.tracing import record_stage
+
+logger = logging.getLogger(__name__)
+
+# 耗时直方图的默认分桶（秒），覆盖从缓存命中到LLM长回答
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+# 请求与响应大小直方图的分桶（字节）
+SIZE_BUCKETS = (64, 256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304)
+
+# 指标族：(名称, 类型, 说明, [(标签, 值)])；采样名称带后缀时标签中以 "__name__" 给出完整名称
+MetricFamily = Tuple[str, str, str, List[Tuple[Dict[str, str], float]]]
+
+
+def _format_value(value: float) -> str:
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    return repr(float(value)) if not float(value).is_integer() else str(int(value))
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(labels: Dict[str, str]) -> str:
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{key}="{_escape(value)}"' for key, value in labels.items()) + "}"
+
+
+class _Metric:
+    """带标签的指标基类"""
+
+    type = "untyped"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values: Dict[Tuple[str, ...], object] = {}
+        self._lock = threading.Lock()
+
+    def _key(self, labels: Dict[str, str]) -> Tuple[str, ...]:
+        if set(labels) != set(self.labelnames):
+            raise ValueError(f"指标 {self.name} 的标签应为 {self.labelnames}，实际为 {tuple(labels)}")
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    def _labels(self, key: Tuple[str, ...]) -> Dict[str, str]:
+        return dict(zip(self.labelnames, key))
+
+    def collect(self) -> Iterable[MetricFamily]:
+        with self._lock:
+            samples = [(self._labels(key), value) for key, value in self._values.items()]
+        yield self.name, self.type, self.documentation, samples
+
+    def clear(self):
+        """清空所有采样（测试用）"""
+        with self._lock:
+            self._values.clear()
+
+
+class Counter(_Metric):
+    """只增计数器"""
+
+    type = "counter"
+
+    def inc(self, amount: float = 1.0, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def value(self, **labels) -> float:
+        with self._lock:
+            return self._values.get(self._key(labels), 0.0)
+
+
+class Gauge(Counter):
+    """可增减的仪表盘"""
+
+    type = "gauge"
+
+    def set(self, value: float, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = float(value)
+
+    def dec(self, amount: float = 1.0, **labels):
+        self.inc(-amount, **labels)
+
+
+class Histogram(_Metric):
+    """累积分桶直方图"""
+
+    type = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                 buckets: Sequence[float] = DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets)) + (math.inf,)
+
+    def observe(self, value: float, **labels):
+        key = self._key(labels)
+        with self._lock:
+            counts, total = self._values.get(key, ([0] * len(self.buckets), 0.0))
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    counts[i] += 1
+            self._values[key] = (counts, total + value)
+
+    @contextmanager
+    def time(self, **labels) -> Iterator[None]:
+        """记录代码块耗时（出错时同样记录）"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, **labels)
+
+    def count(self, **labels) -> int:
+        with self._lock:
+            value = self._values.get(self._key(labels))
+        return value[0][-1] if value else 0
+
+    def collect(self) -> Iterable[MetricFamily]:
+        with self._lock:
+            values = [(self._labels(key), list(counts), total) for key, (counts, total) in self._values.items()]
+        samples = []
+        for labels, counts, total in values:
+            for bound, count in zip(self.buckets, counts):
+                samples.append((dict(labels, le=_format_value(bound), __name__=f"{self.name}_bucket"), count))
+            samples.append((dict(labels, __name__=f"{self.name}_sum"), total))
+            samples.append((dict(labels, __name__=f"{self.name}_count"), counts[-1]))
+        yield self.name, self.type, self.documentation, samples
+
+
+class MetricsRegistry:
+    """指标注册表"""
+
+    def __init__(self):
+        self._metrics: List[_Metric] = []
+        self._collectors: List[Callable[[], Iterable[MetricFamily]]] = []
+        self._lock = threading.Lock()
+
+    def register(self, metric: _Metric) -> _Metric:
+        """注册指标"""
+        with self._lock:
+            self._metrics.append(metric)
+        return metric
+
+    def register_collector(self, collector: Callable[[], Iterable[MetricFamily]]):
+        """注册在导出时计算的指标（如缓存命中数、索引大小）"""
+        with self._lock:
+            self._collectors.append(collector)
+
+    def unregister_collector(self, collector: Callable[[], Iterable[MetricFamily]]):
+        """取消注册"""
+        with self._lock:
+            if collector in self._collectors:
+                self._collectors.remove(collector)
+
+    def collect(self) -> Iterable[MetricFamily]:
+        with self._lock:
+            metrics, collectors = list(self._metrics), list(self._collectors)
+        for metric in metrics:
+            yield from metric.collect()
+        for collector in collectors:
+            try:
+                yield from collector()
+            except Exception as e:
+                logger.warning(f"指标采集失败: {e}")
+
+    def render(self) -> str:
+        """以Prometheus文本格式导出"""
+        lines = []
+        for name, metric_type, documentation, samples in self.collect():
+            lines.append(f"# HELP {name} {documentation}")
+            lines.append(f"# TYPE {name} {metric_type}")
+            for labels, value in samples:
+                labels = dict(labels)
+                sample_name = labels.pop("__name__", name)
+                lines.append(f"{sample_name}{_format_labels(labels)} {_format_value(value)}")
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = MetricsRegistry()
+
+STAGE_SECONDS = REGISTRY.register(Histogram(
+    "kdb_stage_duration_seconds",
+    "问答、多轮对话与文档搜索各阶段耗时（秒）",
+    ["operation", "stage"]
+))
+GRPC_IN_FLIGHT = REGISTRY.register(Gauge(
+    "kdb_grpc_requests_in_flight",
+    "正在处理的gRPC请求数",
+    ["method"]
+))
+GRPC_ERRORS = REGISTRY.register(Counter(
+    "kdb_grpc_errors_total",
+    "失败的gRPC请求数（异常、非OK状态码或响应 success=false）",
+    ["method"]
+))
+GRPC_REJECTED = REGISTRY.register(Counter(
+    "kdb_grpc_requests_rejected_total",
+    "准入控制拒绝或丢弃的gRPC请求数",
+    ["method", "reason"]
+))
+GRPC_REQUESTS = REGISTRY.register(Counter(
+    "kdb_grpc_requests_total",
+    "完成的gRPC请求数（按状态码）",
+    ["method", "code"]
+))
+GRPC_REQUEST_SECONDS = REGISTRY.register(Histogram(
+    "kdb_grpc_request_duration_seconds",
+    "gRPC请求处理耗时（秒）",
+    ["method"]
+))
+GRPC_REQUEST_BYTES = REGISTRY.register(Histogram(
+    "kdb_grpc_request_size_bytes",
+    "gRPC请求消息大小（字节）",
+    ["method"],
+    buckets=SIZE_BUCKETS
+))
+GRPC_RESPONSE_BYTES = REGISTRY.register(Histogram(
+    "kdb_grpc_response_size_bytes",
+    "gRPC响应消息大小（字节，流式响应为各消息之和）",
+    ["method"],
+    buckets=SIZE_BUCKETS
+))
+
+
+@contextmanager
+def observe_stage(operation: str, stage: str) -> Iterator[None]:
+    """
+    记录一个阶段的耗时（同时记入当前请求的追踪信息）
+
+    Args:
+        operation: 所属流程（ask / conversation / search）
+        stage: 阶段名称
+    """
+    start_ns = time.time_ns()
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        duration = time.perf_counter() - start
+        STAGE_SECONDS.observe(duration, operation=operation, stage=stage)
+        record_stage(operation, stage, start_ns, duration)
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    registry: MetricsRegistry = REGISTRY
+
+    def do_GET(self):
+        if self.path.split("?")[0] not in ("/metrics", "/"):
+            self.send_error(404)
+            return
+        body = self.registry.render().encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        logger.debug("指标端点: " + format % args)
+
+
+class MetricsServer:
+    """本地HTTP指标端点（后台线程）"""
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 9095, registry: MetricsRegistry = REGISTRY):
+        """
+        初始化指标端点
+
+        Args:
+            host: 监听地址
+            port: 监听端口，0表示随机端口
+            registry: 导出的指标注册表
+        """
+        handler = type("MetricsHandler", (_MetricsHandler,), {"registry": registry})
+        self._server = ThreadingHTTPServer((host, port), handler)
+        self._server.daemon_threads = True
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def port(self) -> int:
+        return self._server.server_address[1]
+
+    def start(self) -> "MetricsServer":
+        """在后台线程中开始服务"""
+        self._thread = threading.Thread(target=self._server.serve_forever, name="metrics-http", daemon=True)
+        self._thread.start()
+        logger.info(f"📈 指标端点: http://{self._server.server_address[0]}:{self.port}/metrics")
+        return self
+
+    def stop(self):
+        """停止服务"""
+        self._server.shutdown()
+        self._server.server_close()
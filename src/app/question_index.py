@@ -0,0 +1,162 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+反馈问题倒排索引
+将反馈中的不同问题切分为词项（英文与数字按词、中文按相邻二字），
+倒排表与文档频率保存在反馈数据库中，随反馈写入在同一事务内增量维护。
+相似问题查找只探查最稀有的若干词项（前缀过滤）并按长度过滤候选，
+词项重叠数、问题文本与改进答案在一次查询中取回，耗时不随反馈表规模线性增长。
+"""
+
+import re
+import math
+import sqlite3
+import logging
+from typing import Any, Dict, Iterable, List, Set
+
+logger = logging.getLogger(__name__)
+
+_CJK = r"\u3400-\u4dbf\u4e00-\u9fff\uf900-\ufaff"
+_TOKEN_PATTERN = re.compile(rf"[{_CJK}]+|[^\W_{_CJK}]+")
+_CJK_PATTERN = re.compile(rf"[{_CJK}]")
+
+
+def tokenize_question(text: str) -> Set[str]:
+    """
+    问题切分为词项集合
+
+    英文与数字按词（小写），中文按相邻二字（单字成段时取单字），忽略标点与空白
+    """
+    tokens = set()
+    for segment in _TOKEN_PATTERN.findall(text.lower()):
+        if _CJK_PATTERN.match(segment) and len(segment) > 1:
+            tokens.update(segment[i:i + 2] for i in range(len(segment) - 1))
+        else:
+            tokens.add(segment)
+    return tokens
+
+
+def create_tables(conn: sqlite3.Connection):
+    """创建倒排索引表"""
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS feedback_questions (
+            question_hash TEXT PRIMARY KEY,
+            question TEXT NOT NULL,
+            term_count INTEGER NOT NULL
+        )
+    """)
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS feedback_question_terms (
+            term TEXT NOT NULL,
+            question_hash TEXT NOT NULL,
+            PRIMARY KEY (term, question_hash)
+        ) WITHOUT ROWID
+    """)
+    conn.execute("""
+        CREATE INDEX IF NOT EXISTS idx_question_terms_hash
+        ON feedback_question_terms(question_hash, term)
+    """)
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS feedback_terms (
+            term TEXT PRIMARY KEY,
+            df INTEGER NOT NULL
+        ) WITHOUT ROWID
+    """)
+
+
+def add_question(conn: sqlite3.Connection, question: str, question_hash: str) -> bool:
+    """
+    将问题加入索引（在调用方事务内执行，已索引的问题跳过）
+
+    Returns:
+        是否为新问题
+    """
+    terms = tokenize_question(question)
+    inserted = conn.execute(
+        "INSERT OR IGNORE INTO feedback_questions (question_hash, question, term_count) VALUES (?, ?, ?)",
+        (question_hash, question, len(terms))
+    ).rowcount
+    if not inserted:
+        return False
+    conn.executemany(
+        "INSERT OR IGNORE INTO feedback_question_terms (term, question_hash) VALUES (?, ?)",
+        [(term, question_hash) for term in terms]
+    )
+    conn.executemany(
+        "INSERT INTO feedback_terms (term, df) VALUES (?, 1) ON CONFLICT(term) DO UPDATE SET df = df + 1",
+        [(term,) for term in terms]
+    )
+    return True
+
+
+def backfill(conn: sqlite3.Connection) -> int:
+    """为建立索引前已有的反馈问题补建索引，返回补建的问题数"""
+    indexed = conn.execute("SELECT COUNT(*) FROM feedback_questions").fetchone()[0]
+    if indexed:
+        return 0
+    rows = conn.execute("SELECT DISTINCT question, question_hash FROM feedback").fetchall()
+    added = sum(add_question(conn, question, question_hash) for question, question_hash in rows)
+    if added:
+        logger.info(f"已为 {added} 个反馈问题建立倒排索引")
+    return added
+
+
+def _placeholders(values: Iterable) -> str:
+    return ",".join("?" for _ in values)
+
+
+def find_similar(conn: sqlite3.Connection, question: str, threshold: float) -> List[Dict[str, Any]]:
+    """
+    查找有改进答案的相似问题
+
+    Jaccard相似度 >= threshold 的问题至少包含查询词项中按文档频率升序的前
+    n - ceil(threshold * n) + 1 个之一，且词项数在 [threshold * n, n / threshold] 内
+
+    Args:
+        conn: 数据库连接
+        question: 查询问题
+        threshold: Jaccard相似度阈值（大于0）
+
+    Returns:
+        按相似度降序排列的 {question, similarity, improved_answer, confidence_score}
+    """
+    terms = sorted(tokenize_question(question))
+    if not terms:
+        return []
+    threshold = max(threshold, 1e-6)
+    n = len(terms)
+
+    df = dict(conn.execute(
+        f"SELECT term, df FROM feedback_terms WHERE term IN ({_placeholders(terms)})", terms
+    ).fetchall())
+    prefix_size = n - math.ceil(threshold * n - 1e-9) + 1
+    prefix = [term for term in sorted(terms, key=lambda t: df.get(t, 0))[:prefix_size] if df.get(term)]
+    if not prefix:
+        return []
+
+    # CROSS JOIN 固定连接顺序：先由稀有词项得到少量候选，再按候选统计重叠词项
+    rows = conn.execute(f"""
+        WITH candidates AS (
+            SELECT DISTINCT question_hash FROM feedback_question_terms
+            WHERE term IN ({_placeholders(prefix)})
+        )
+        SELECT q.question, COUNT(*) AS overlap, q.term_count, a.improved_answer, a.confidence_score
+        FROM candidates c
+        CROSS JOIN feedback_questions q ON q.question_hash = c.question_hash
+        CROSS JOIN answer_improvements a ON a.question_hash = c.question_hash
+        CROSS JOIN feedback_question_terms t ON t.question_hash = c.question_hash
+        WHERE q.term_count BETWEEN ? AND ? AND t.term IN ({_placeholders(terms)})
+        GROUP BY c.question_hash
+    """, [*prefix, math.ceil(threshold * n - 1e-9), math.floor(n / threshold + 1e-9), *terms]).fetchall()
+
+    similar = []
+    for text, overlap, term_count, improved_answer, confidence_score in rows:
+        similarity = overlap / (n + term_count - overlap)
+        if similarity >= threshold:
+            similar.append({
+                "question": text,
+                "similarity": similarity,
+                "improved_answer": improved_answer,
+                "confidence_score": confidence_score
+            })
+    return sorted(similar, key=lambda x: x["similarity"], reverse=True)
@@ -0,0 +1,204 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+反馈问题向量索引
+只索引有改进答案的问题（每个问题只嵌入一次），向量保存在反馈数据库旁的小型FAISS索引中
+（归一化后内积即余弦相似度），向量ID为改进答案表 answer_improvements 的 id。
+相似问题查找为一次只读的k近邻检索，候选问题的文本与改进答案在一次联表查询中取回；
+新的改进答案在写入后嵌入，已有数据在启用时由后台线程补嵌入。
+"""
+
+import os
+import time
+import sqlite3
+import logging
+import threading
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional
+
+import faiss
+import numpy as np
+from langchain_core.embeddings import Embeddings
+
+from src.app.embedding_cache import embed_queries
+
+logger = logging.getLogger(__name__)
+
+INDEX_SUFFIX = ".improved.faiss"
+
+
+class QuestionVectorIndex:
+    """反馈问题向量索引"""
+
+    def __init__(self, db_path: str, embeddings: Embeddings, save_interval: float = 5.0):
+        """
+        初始化向量索引（加载已保存的索引文件）
+
+        Args:
+            db_path: 反馈数据库路径，索引保存为同目录下的 <库名>.improved.faiss
+            embeddings: 问题嵌入模型（与问答流程共用，已缓存的问题向量不再重复请求）
+            save_interval: 新增向量后写回索引文件的最短间隔（秒）
+        """
+        self.db_path = Path(db_path)
+        self.index_path = self.db_path.with_name(self.db_path.stem + INDEX_SUFFIX)
+        self.embeddings = embeddings
+        self.save_interval = save_interval
+        self._index: Optional[faiss.Index] = None
+        self._last_id = 0
+        self._dirty = False
+        self._saved_at = time.monotonic()
+        # _lock 只保护索引本身（嵌入期间不持有，查找不被补嵌入阻塞），_sync_lock 串行化补嵌入
+        self._lock = threading.Lock()
+        self._sync_lock = threading.Lock()
+        self._ready = threading.Event()
+        self._ready.set()
+        self._load()
+
+    def _load(self):
+        if not self.index_path.exists():
+            return
+        try:
+            index = faiss.read_index(str(self.index_path))
+            ids = faiss.vector_to_array(index.id_map)
+        except Exception as e:
+            logger.warning(f"读取反馈问题向量索引失败，将重新构建: {e}")
+            return
+        self._index = index
+        self._last_id = int(ids.max()) if len(ids) else 0
+        logger.info(f"加载反馈问题向量索引: {index.ntotal} 个问题")
+
+    @staticmethod
+    def _normalize(vectors) -> np.ndarray:
+        matrix = np.asarray(vectors, dtype=np.float32)
+        faiss.normalize_L2(matrix)
+        return matrix
+
+    @property
+    def size(self) -> int:
+        """已索引的问题数"""
+        return self._index.ntotal if self._index is not None else 0
+
+    def sync(self, conn: sqlite3.Connection) -> int:
+        """
+        嵌入尚未索引的改进答案问题（本进程或其他进程新写入的改进答案）
+
+        Returns:
+            新增的问题数
+        """
+        with self._sync_lock:
+            max_id = conn.execute("SELECT COALESCE(MAX(id), 0) FROM answer_improvements").fetchone()[0]
+            if max_id < self._last_id:
+                # 数据库已被重建，索引文件与之不符
+                logger.warning("反馈问题向量索引与数据库不一致，重新构建")
+                self._reset()
+            if max_id == self._last_id:
+                return 0
+
+            rows = self._pending_rows(conn)
+            if not rows:
+                return 0
+            vectors = self._normalize(embed_queries(self.embeddings, [question for _, question in rows]))
+            if self._index is not None and self._index.d != vectors.shape[1]:
+                # 已索引的向量不可再用，清空后在本次调用中嵌入全部问题（仍持有 _sync_lock，不能递归调用 sync）
+                logger.warning("嵌入模型维度已变化，重新构建反馈问题向量索引")
+                self._reset()
+                rows = self._pending_rows(conn)
+                vectors = self._normalize(embed_queries(self.embeddings, [question for _, question in rows]))
+
+            with self._lock:
+                if self._index is None:
+                    self._index = faiss.IndexIDMap2(faiss.IndexFlatIP(vectors.shape[1]))
+                self._index.add_with_ids(vectors, np.array([row_id for row_id, _ in rows], dtype=np.int64))
+                self._last_id = rows[-1][0]
+                self._dirty = True
+            if time.monotonic() - self._saved_at >= self.save_interval:
+                self.save()
+            return len(rows)
+
+    def _pending_rows(self, conn: sqlite3.Connection) -> List[tuple]:
+        return conn.execute("""
+            SELECT a.id, q.question
+            FROM answer_improvements a
+            JOIN feedback_questions q ON q.question_hash = a.question_hash
+            WHERE a.id > ? ORDER BY a.id
+        """, (self._last_id,)).fetchall()
+
+    def _reset(self):
+        with self._lock:
+            self._index, self._last_id = None, 0
+
+    def sync_in_background(self, connect: Callable[[], sqlite3.Connection]) -> threading.Thread:
+        """
+        在后台线程补嵌入已有的改进答案问题（启用时调用），补嵌入期间查找只使用已索引的部分
+
+        Args:
+            connect: 返回后台线程所用数据库连接的函数
+        """
+        def run():
+            try:
+                added = self.sync(connect())
+                if added:
+                    logger.info(f"反馈问题向量索引补嵌入 {added} 个问题")
+            except Exception as e:
+                logger.warning(f"反馈问题向量索引补嵌入失败: {e}")
+            finally:
+                self._ready.set()
+
+        self._ready.clear()
+        thread = threading.Thread(target=run, name="question-vectors-sync", daemon=True)
+        thread.start()
+        return thread
+
+    def wait_ready(self, timeout: Optional[float] = None) -> bool:
+        """等待后台补嵌入完成，返回是否在超时前完成"""
+        return self._ready.wait(timeout)
+
+    def search(self, conn: sqlite3.Connection, question: str, threshold: float, k: int = 5) -> List[Dict[str, Any]]:
+        """
+        查找有改进答案的相似问题
+
+        Args:
+            conn: 反馈数据库连接
+            question: 查询问题
+            threshold: 余弦相似度阈值
+            k: 近邻数量
+
+        Returns:
+            按相似度降序排列的 {question, similarity, improved_answer, confidence_score}
+        """
+        if self.size == 0:
+            return []
+        vector = self._normalize(embed_queries(self.embeddings, [question]))
+        with self._lock:
+            if self._index is None or self._index.ntotal == 0:
+                return []
+            similarities, ids = self._index.search(vector, min(k, self._index.ntotal))
+        scores = {int(row_id): float(score) for score, row_id in zip(similarities[0], ids[0])
+                  if row_id >= 0 and score >= threshold}
+        if not scores:
+            return []
+
+        rows = conn.execute(f"""
+            SELECT a.id, q.question, a.improved_answer, a.confidence_score
+            FROM answer_improvements a
+            JOIN feedback_questions q ON q.question_hash = a.question_hash
+            WHERE a.id IN ({",".join("?" for _ in scores)})
+        """, list(scores)).fetchall()
+        similar = [{
+            "question": text,
+            "similarity": scores[row_id],
+            "improved_answer": improved_answer,
+            "confidence_score": confidence_score
+        } for row_id, text, improved_answer, confidence_score in rows]
+        return sorted(similar, key=lambda x: x["similarity"], reverse=True)
+
+    def save(self):
+        """写回索引文件（先写临时文件再替换，其他进程读到的总是完整文件）"""
+        with self._lock:
+            if self._index is None or not self._dirty:
+                return
+            temp_path = self.index_path.with_name(f"{self.index_path.name}.{os.getpid()}.tmp")
+            faiss.write_index(self._index, str(temp_path))
+            os.replace(temp_path, self.index_path)
+            self._dirty = False
+            self._saved_at = time.monotonic()
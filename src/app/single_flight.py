@@ -0,0 +1,153 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+请求合并模块（single-flight）
+相同键的并发调用只执行一次，其余调用等待并共享同一结果
+"""
+
+import copy
+import asyncio
+import logging
+import threading
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+from src.app.deadline import Deadline
+
+# 配置日志
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+# 等待者检查自身截止时间与取消状态的间隔（秒）
+WAIT_SLICE = 0.05
+
+
+class _Call:
+    """进行中的同步调用"""
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result: Any = None
+        self.error: Optional[BaseException] = None
+
+
+class SingleFlight:
+    """
+    合并相同键的并发调用
+
+    首个调用者执行计算，执行期间到达的相同键调用等待其完成，
+    获得结果的深拷贝（计算出错时抛出同一异常）。计算完成后键即释放，
+    不缓存结果。同步调用与协程调用分别合并。
+    """
+
+    def __init__(self):
+        self._calls: Dict[str, _Call] = {}
+        self._tasks: Dict[str, asyncio.Future] = {}
+        self._waiters: Dict[asyncio.Future, int] = {}
+        self._lock = threading.Lock()
+
+        self.executions = 0
+        self.collapsed = 0
+
+    def do(self, key: str, fn: Callable[[], Any], deadline: Optional[Deadline] = None) -> Any:
+        """
+        执行或加入相同键的同步调用
+
+        Args:
+            key: 请求键
+            fn: 计算函数
+            deadline: 调用者的截止时间与取消状态，等待其他调用者的计算时超时或取消
+                则抛出 DeadlineExceeded / RequestCancelled（进行中的计算不受影响）
+
+        Returns:
+            计算结果
+        """
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+                self.executions += 1
+            else:
+                self.collapsed += 1
+
+        if not leader:
+            self._wait(call, deadline)
+            if call.error is not None:
+                raise call.error
+            return copy.deepcopy(call.result)
+
+        try:
+            call.result = fn()
+            return call.result
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+
+    @staticmethod
+    def _wait(call: _Call, deadline: Optional[Deadline]):
+        """等待进行中的计算完成，按时间片检查调用者自身的截止时间与取消状态"""
+        if deadline is None or not deadline.bounded:
+            call.done.wait()
+            return
+        while not call.done.is_set():
+            deadline.check("等待合并的请求")
+            remaining = deadline.remaining()
+            call.done.wait(WAIT_SLICE if remaining is None else min(WAIT_SLICE, max(0.0, remaining)))
+
+    async def do_async(self, key: str, fn: Callable[[], Awaitable[Any]]) -> Any:
+        """
+        执行或加入相同键的协程调用
+
+        计算在独立任务中运行，单个调用者被取消不会中断其他调用者共享的计算；
+        所有调用者都已取消时计算随之取消（中止进行中的LLM调用）
+
+        Args:
+            key: 请求键
+            fn: 返回协程的计算函数
+
+        Returns:
+            计算结果
+        """
+        task = self._tasks.get(key)
+        leader = task is None
+        if leader:
+            task = self._tasks[key] = asyncio.ensure_future(fn())
+            task.add_done_callback(lambda t: self._release(key, t))
+            with self._lock:
+                self.executions += 1
+        else:
+            with self._lock:
+                self.collapsed += 1
+
+        self._waiters[task] = self._waiters.get(task, 0) + 1
+        try:
+            result = await asyncio.shield(task)
+        finally:
+            self._waiters[task] -= 1
+            if not self._waiters[task]:
+                del self._waiters[task]
+                if not task.done():
+                    task.cancel()
+        return result if leader else copy.deepcopy(result)
+
+    def _release(self, key: str, task: asyncio.Future):
+        if self._tasks.get(key) is task:
+            del self._tasks[key]
+        if not task.cancelled():
+            # 所有调用者都已取消时避免“异常未被获取”的警告
+            task.exception()
+
+    def stats(self) -> Dict[str, Any]:
+        """合并统计信息"""
+        with self._lock:
+            total = self.executions + self.collapsed
+            return {
+                "executions": self.executions,
+                "collapsed": self.collapsed,
+                "in_flight": len(self._calls) + len(self._tasks),
+                "collapse_rate": self.collapsed / total if total else 0.0
+            }
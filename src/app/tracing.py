@@ -0,0 +1,237 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+请求追踪模块
+为每个请求记录阶段耗时（由 metrics.observe_stage 写入当前请求），
+用于慢请求日志与按采样率导出OpenTelemetry兼容的JSON追踪数据（OTLP/JSON，每行一个 resourceSpans）
+"""
+
+import os
+import json
+import time
+import uuid
+import random
+import logging
+import threading
+import contextvars
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from typing import Any, Dict, Iterator, List, Optional
+
+logger = logging.getLogger(__name__)
+
+# OTLP 状态码与 SpanKind
+STATUS_UNSET = 0
+STATUS_OK = 1
+STATUS_ERROR = 2
+SPAN_KIND_INTERNAL = 1
+SPAN_KIND_SERVER = 2
+
+
+@dataclass
+class StageRecord:
+    """请求中的一个阶段"""
+    operation: str
+    stage: str
+    start_ns: int
+    duration: float
+
+
+@dataclass
+class RequestTrace:
+    """一个请求的追踪信息"""
+    method: str
+    request_id: str = field(default_factory=lambda: uuid.uuid4().hex)
+    trace_id: str = field(default_factory=lambda: uuid.uuid4().hex)
+    span_id: str = field(default_factory=lambda: uuid.uuid4().hex[:16])
+    parent_span_id: str = ""
+    start_ns: int = field(default_factory=time.time_ns)
+    stages: List[StageRecord] = field(default_factory=list)
+    attributes: Dict[str, Any] = field(default_factory=dict)
+
+    @classmethod
+    def from_metadata(cls, method: str, metadata) -> "RequestTrace":
+        """根据请求元数据创建，沿用客户端传入的 x-request-id 与W3C traceparent"""
+        headers = {key.lower(): value for key, value in (metadata or ())}
+        trace = cls(method)
+        if headers.get("x-request-id"):
+            trace.request_id = str(headers["x-request-id"])[:128]
+        parts = str(headers.get("traceparent", "")).split("-")
+        if len(parts) == 4 and len(parts[1]) == 32 and len(parts[2]) == 16:
+            trace.trace_id, trace.parent_span_id = parts[1], parts[2]
+        return trace
+
+    def record(self, operation: str, stage: str, start_ns: int, duration: float):
+        """记录一个阶段（可在线程池中调用）"""
+        self.stages.append(StageRecord(operation, stage, start_ns, duration))
+
+    def breakdown(self) -> str:
+        """阶段耗时摘要，同名阶段合并"""
+        totals: Dict[str, float] = {}
+        for record in self.stages:
+            name = f"{record.operation}.{record.stage}"
+            totals[name] = totals.get(name, 0.0) + record.duration
+        return ", ".join(f"{name}={seconds * 1000:.0f}ms" for name, seconds in totals.items()) or "无阶段记录"
+
+    def to_otlp(self, end_ns: int, status_code: str, service_name: str) -> Dict[str, Any]:
+        """转换为OTLP/JSON格式的 resourceSpans：请求为SERVER span，各阶段为其子span"""
+        error = status_code != "OK"
+        spans = [{
+            "traceId": self.trace_id,
+            "spanId": self.span_id,
+            "parentSpanId": self.parent_span_id,
+            "name": self.method,
+            "kind": SPAN_KIND_SERVER,
+            "startTimeUnixNano": str(self.start_ns),
+            "endTimeUnixNano": str(end_ns),
+            "attributes": _attributes(dict(self.attributes, **{
+                "rpc.system": "grpc",
+                "rpc.method": self.method,
+                "rpc.grpc.status_code": status_code,
+                "request.id": self.request_id,
+            })),
+            "status": {"code": STATUS_ERROR if error else STATUS_OK, "message": status_code if error else ""},
+        }]
+        for record in list(self.stages):
+            spans.append({
+                "traceId": self.trace_id,
+                "spanId": uuid.uuid4().hex[:16],
+                "parentSpanId": self.span_id,
+                "name": f"{record.operation}.{record.stage}",
+                "kind": SPAN_KIND_INTERNAL,
+                "startTimeUnixNano": str(record.start_ns),
+                "endTimeUnixNano": str(record.start_ns + int(record.duration * 1e9)),
+                "attributes": _attributes({"kdb.operation": record.operation, "kdb.stage": record.stage}),
+                "status": {"code": STATUS_UNSET},
+            })
+        return {
+            "resource": {"attributes": _attributes({"service.name": service_name, "process.pid": os.getpid()})},
+            "scopeSpans": [{"scope": {"name": "kdb.tracing"}, "spans": spans}],
+        }
+
+
+def _attributes(values: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """转换为OTLP属性列表"""
+    attributes = []
+    for key, value in values.items():
+        if isinstance(value, bool):
+            typed = {"boolValue": value}
+        elif isinstance(value, int):
+            typed = {"intValue": str(value)}
+        elif isinstance(value, float):
+            typed = {"doubleValue": value}
+        else:
+            typed = {"stringValue": str(value)}
+        attributes.append({"key": key, "value": typed})
+    return attributes
+
+
+_current_trace: contextvars.ContextVar[Optional[RequestTrace]] = contextvars.ContextVar("kdb_request_trace", default=None)
+
+
+def current_trace() -> Optional[RequestTrace]:
+    """当前请求的追踪信息，不在请求中时返回None"""
+    return _current_trace.get()
+
+
+@contextmanager
+def use_trace(trace: RequestTrace) -> Iterator[RequestTrace]:
+    """在代码块内将 trace 设为当前请求"""
+    token = _current_trace.set(trace)
+    try:
+        yield trace
+    finally:
+        _current_trace.reset(token)
+
+
+def record_stage(operation: str, stage: str, start_ns: int, duration: float):
+    """将阶段耗时记录到当前请求（不在请求中时忽略）"""
+    trace = _current_trace.get()
+    if trace is not None:
+        trace.record(operation, stage, start_ns, duration)
+
+
+class FileSpanExporter:
+    """将追踪数据以OTLP/JSON行追加写入本地文件（与OpenTelemetry Collector的file exporter格式一致）"""
+
+    def __init__(self, path: str, service_name: str = "kdb-grpc"):
+        """
+        初始化导出器
+
+        Args:
+            path: 输出文件路径
+            service_name: 资源属性 service.name
+        """
+        self.path = path
+        self.service_name = service_name
+        self.exported = 0
+        self._lock = threading.Lock()
+        self._file = None
+
+    def export(self, trace: RequestTrace, end_ns: int, status_code: str):
+        """写入一个请求的全部span"""
+        line = json.dumps({"resourceSpans": [trace.to_otlp(end_ns, status_code, self.service_name)]},
+                          ensure_ascii=False)
+        try:
+            with self._lock:
+                if self._file is None:
+                    directory = os.path.dirname(self.path)
+                    if directory:
+                        os.makedirs(directory, exist_ok=True)
+                    self._file = open(self.path, "a", encoding="utf-8")
+                self._file.write(line + "\n")
+                self._file.flush()
+                self.exported += 1
+        except OSError as e:
+            logger.warning(f"写入追踪数据失败: {e}")
+
+    def close(self):
+        """关闭文件"""
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+
+
+class RequestTracer:
+    """请求结束时记录慢请求日志，并按采样率导出追踪数据（慢请求与失败请求总是导出）"""
+
+    def __init__(self, slow_threshold: float = 2.0, sample_rate: float = 0.01,
+                 exporter: Optional[FileSpanExporter] = None):
+        """
+        初始化追踪器
+
+        Args:
+            slow_threshold: 慢请求阈值（秒），0表示不记录慢请求日志
+            sample_rate: 普通请求的导出采样率（0-1）
+            exporter: 追踪数据导出器，None表示不导出
+        """
+        self.slow_threshold = slow_threshold
+        self.sample_rate = sample_rate
+        self.exporter = exporter
+
+    def is_slow(self, duration: float) -> bool:
+        return 0 < self.slow_threshold <= duration
+
+    def should_export(self, duration: float, status_code: str) -> bool:
+        if self.exporter is None:
+            return False
+        return status_code != "OK" or self.is_slow(duration) or random.random() < self.sample_rate
+
+    def finish(self, trace: RequestTrace, status_code: str):
+        """请求结束：记录慢请求日志并按需导出"""
+        end_ns = time.time_ns()
+        duration = (end_ns - trace.start_ns) / 1e9
+        if self.is_slow(duration):
+            logger.warning(
+                f"🐢 慢请求 {trace.method} [{trace.request_id}] 耗时 {duration:.2f}秒，状态 {status_code}，"
+                f"请求 {trace.attributes.get('rpc.request.size', 0)} 字节，"
+                f"响应 {trace.attributes.get('rpc.response.size', 0)} 字节；阶段: {trace.breakdown()}"
+            )
+        if self.should_export(duration, status_code):
+            self.exporter.export(trace, end_ns, status_code)
+
+    def close(self):
+        """关闭导出器"""
+        if self.exporter is not None:
+            self.exporter.close()
@@ -0,0 +1,412 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+向量索引模块
+根据配置创建FAISS索引（flat / ivf_flat / ivf_pq / hnsw），
+负责训练、检索参数设置以及召回率-延迟评估
+"""
+
+import time
+import logging
+from typing import List, Dict, Any, Optional
+
+import numpy as np
+import faiss
+
+# 配置日志
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+# 支持的索引类型
+INDEX_TYPES = ["flat", "ivf_flat", "ivf_pq", "hnsw"]
+
+# FAISS建议每个聚类中心至少有39个训练样本
+MIN_POINTS_PER_CENTROID = 39
+
+# 评估时分块计算精确检索真值，避免一次性载入全部向量
+EVAL_BLOCK_SIZE = 65536
+
+
+def _effective_nlist(nlist: int, num_vectors: int) -> int:
+    """根据向量数量调整聚类中心数量，避免训练样本不足"""
+    max_nlist = max(1, num_vectors // MIN_POINTS_PER_CENTROID)
+    if nlist > max_nlist:
+        logger.warning(f"向量数量({num_vectors})不足以训练 {nlist} 个聚类中心，nlist调整为 {max_nlist}")
+        return max_nlist
+    return nlist
+
+
+def create_index(index_type: str, dim: int, num_vectors: int, vector_config) -> faiss.Index:
+    """
+    创建未训练的FAISS索引
+
+    Args:
+        index_type: 索引类型
+        dim: 向量维度
+        num_vectors: 待入库向量数量（用于调整nlist等参数）
+        vector_config: VectorStoreConfig配置
+
+    Returns:
+        FAISS索引
+    """
+    if index_type not in INDEX_TYPES:
+        raise ValueError(f"不支持的索引类型: {index_type}")
+
+    if index_type == "ivf_pq":
+        if dim % vector_config.pq_m != 0:
+            raise ValueError(f"向量维度 {dim} 不能被 pq_m={vector_config.pq_m} 整除")
+        if num_vectors < 2 ** vector_config.pq_nbits:
+            logger.warning(
+                f"向量数量({num_vectors})少于PQ码本大小({2 ** vector_config.pq_nbits})，改用 ivf_flat 索引"
+            )
+            index_type = "ivf_flat"
+
+    if index_type == "flat":
+        if vector_config.mmap_index:
+            # FAISS只能内存映射IVF的倒排表，单聚类的IVF等价于精确检索
+            return faiss.IndexIVFFlat(faiss.IndexFlatL2(dim), dim, 1)
+        return faiss.IndexFlatL2(dim)
+
+    if index_type == "hnsw":
+        index = faiss.IndexHNSWFlat(dim, vector_config.hnsw_m)
+        index.hnsw.efConstruction = vector_config.ef_construction
+        return index
+
+    nlist = _effective_nlist(vector_config.nlist, num_vectors)
+    quantizer = faiss.IndexFlatL2(dim)
+    if index_type == "ivf_flat":
+        return faiss.IndexIVFFlat(quantizer, dim, nlist)
+    return faiss.IndexIVFPQ(quantizer, dim, nlist, vector_config.pq_m, vector_config.pq_nbits)
+
+
+def _unwrap(index: faiss.Index) -> faiss.Index:
+    """去掉IndexIDMap包装，返回底层索引"""
+    if isinstance(index, (faiss.IndexIDMap, faiss.IndexIDMap2)):
+        return faiss.downcast_index(index.index)
+    return index
+
+
+def apply_search_params(index: faiss.Index, nprobe: Optional[int] = None,
+                        ef_search: Optional[int] = None) -> Dict[str, Any]:
+    """
+    设置检索参数（IVF的nprobe、HNSW的efSearch）
+
+    Args:
+        index: FAISS索引
+        nprobe: IVF检索的聚类数量
+        ef_search: HNSW检索的候选列表大小
+
+    Returns:
+        实际生效的检索参数
+    """
+    params = {}
+
+    ivf = faiss.try_extract_index_ivf(index)
+    if ivf is not None and nprobe:
+        ivf.nprobe = min(nprobe, ivf.nlist)
+        params["nprobe"] = ivf.nprobe
+
+    base = _unwrap(index)
+    if isinstance(base, faiss.IndexHNSW) and ef_search:
+        base.hnsw.efSearch = ef_search
+        params["efSearch"] = ef_search
+
+    return params
+
+
+def describe_index(index: faiss.Index) -> Dict[str, Any]:
+    """获取索引的描述信息"""
+    base = _unwrap(index)
+    info = {
+        "index_class": type(base).__name__,
+        "dimension": index.d,
+        "ntotal": index.ntotal,
+    }
+    ivf = faiss.try_extract_index_ivf(index)
+    if ivf is not None:
+        info["nlist"] = ivf.nlist
+        info["nprobe"] = ivf.nprobe
+    if isinstance(base, faiss.IndexHNSW):
+        info["efSearch"] = base.hnsw.efSearch
+    return info
+
+
+def read_index(index_path: str, mmap: bool = False) -> faiss.Index:
+    """
+    读取索引文件
+
+    Args:
+        index_path: index.faiss文件路径
+        mmap: 是否以只读内存映射方式加载
+
+    Returns:
+        FAISS索引
+    """
+    if not mmap:
+        return faiss.read_index(str(index_path))
+
+    index = faiss.read_index(str(index_path), faiss.IO_FLAG_MMAP | faiss.IO_FLAG_READ_ONLY)
+    if faiss.try_extract_index_ivf(index) is None:
+        logger.warning(
+            f"{type(index).__name__} 不支持内存映射，已整体读入内存；"
+            f"如需共享内存，请使用 flat/ivf_flat/ivf_pq 索引并设置 VECTOR_STORE_MMAP=true 后重新构建知识库"
+        )
+    return index
+
+
+def default_train_size(vector_config) -> int:
+    """流式构建时训练索引所需缓冲的向量数量（非IVF索引无需训练）"""
+    if vector_config.index_type in ("ivf_flat", "ivf_pq"):
+        return vector_config.nlist * MIN_POINTS_PER_CENTROID
+    if vector_config.index_type == "flat" and vector_config.mmap_index:
+        return 1
+    return 0
+
+
+class StreamingIndexBuilder:
+    """
+    流式索引构建器
+
+    向量分批写入：需要训练的索引先缓冲训练样本，训练后直接写入后续批次，
+    内存占用不随语料规模增长。传入已有索引时直接追加。
+    """
+
+    def __init__(self, vector_config, train_size: Optional[int] = None,
+                 index: Optional[faiss.Index] = None):
+        """
+        Args:
+            vector_config: VectorStoreConfig配置
+            train_size: 训练样本数量，默认按索引类型计算
+            index: 已训练的索引（增量更新时使用）
+        """
+        self.vector_config = vector_config
+        self.train_size = default_train_size(vector_config) if train_size is None else train_size
+        self.index = index
+        self._buffer: List[np.ndarray] = []
+        self._buffer_ids: List[np.ndarray] = []
+        self._buffered = 0
+
+    def add(self, vectors: np.ndarray, ids: np.ndarray):
+        """写入一批向量"""
+        if self.index is not None:
+            add_vectors(self.index, vectors, ids)
+            return
+
+        self._buffer.append(np.ascontiguousarray(vectors, dtype=np.float32))
+        self._buffer_ids.append(np.ascontiguousarray(ids, dtype=np.int64))
+        self._buffered += len(vectors)
+        if self._buffered >= self.train_size:
+            self._create()
+
+    def _create(self):
+        """用缓冲的向量创建并训练索引"""
+        vectors = np.vstack(self._buffer)
+        ids = np.concatenate(self._buffer_ids)
+        self._buffer, self._buffer_ids, self._buffered = [], [], 0
+
+        num_vectors, dim = vectors.shape
+        index = create_index(self.vector_config.index_type, dim, num_vectors, self.vector_config)
+
+        if not index.is_trained:
+            start = time.time()
+            logger.info(f"开始训练索引: {type(index).__name__}，训练样本数: {num_vectors}")
+            index.train(vectors)
+            logger.info(f"索引训练完成，耗时 {time.time() - start:.2f}s")
+
+        if faiss.try_extract_index_ivf(index) is None:
+            index = faiss.IndexIDMap2(index)
+
+        add_vectors(index, vectors, ids)
+        apply_search_params(index, self.vector_config.nprobe, self.vector_config.ef_search)
+        self.index = index
+
+    def finish(self) -> faiss.Index:
+        """结束写入并返回索引"""
+        if self.index is None:
+            if not self._buffered:
+                raise ValueError("没有可写入索引的向量")
+            self._create()
+        logger.info(f"索引构建完成: {describe_index(self.index)}")
+        return self.index
+
+
+def add_vectors(index: faiss.Index, vectors: np.ndarray, ids: np.ndarray):
+    """按指定ID写入向量"""
+    if len(ids) == 0:
+        return
+    index.add_with_ids(
+        np.ascontiguousarray(vectors, dtype=np.float32),
+        np.ascontiguousarray(ids, dtype=np.int64)
+    )
+
+
+def index_ids(index: faiss.Index) -> np.ndarray:
+    """获取索引中全部向量ID"""
+    if isinstance(index, (faiss.IndexIDMap, faiss.IndexIDMap2)):
+        return faiss.vector_to_array(index.id_map).astype(np.int64)
+
+    ivf = faiss.try_extract_index_ivf(index)
+    if ivf is None:
+        return np.arange(index.ntotal, dtype=np.int64)
+
+    invlists = ivf.invlists
+    ids = []
+    for list_no in range(ivf.nlist):
+        size = invlists.list_size(list_no)
+        if size:
+            ids.append(faiss.rev_swig_ptr(invlists.get_ids(list_no), size).copy())
+    return np.concatenate(ids) if ids else np.empty(0, dtype=np.int64)
+
+
+def remove_vectors(index: faiss.Index, ids: np.ndarray, vector_config) -> faiss.Index:
+    """
+    删除指定ID的向量
+
+    HNSW不支持删除，此时用剩余向量重建索引
+
+    Returns:
+        删除后的索引（可能是新对象）
+    """
+    ids = np.ascontiguousarray(ids, dtype=np.int64)
+    if len(ids) == 0:
+        return index
+
+    try:
+        index.remove_ids(ids)
+        return index
+    except RuntimeError:
+        logger.info(f"{type(index).__name__} 不支持删除向量，使用剩余向量重建索引")
+
+    remaining = np.setdiff1d(index_ids(index), ids)
+    vectors = np.vstack([index.reconstruct(int(i)) for i in remaining]) if len(remaining) else \
+        np.empty((0, index.d), dtype=np.float32)
+    hnsw = faiss.IndexHNSWFlat(index.d, vector_config.hnsw_m)
+    hnsw.hnsw.efConstruction = vector_config.ef_construction
+    rebuilt = faiss.IndexIDMap2(hnsw)
+    add_vectors(rebuilt, vectors, remaining)
+    apply_search_params(rebuilt, vector_config.nprobe, vector_config.ef_search)
+    return rebuilt
+
+
+def enable_reconstruct(index: faiss.Index):
+    """为IVF索引建立ID到向量的直接映射，使MMR检索可以按ID取回向量"""
+    ivf = faiss.try_extract_index_ivf(index)
+    if ivf is not None and ivf.direct_map.type == faiss.DirectMap.NoMap:
+        ivf.set_direct_map_type(faiss.DirectMap.Hashtable)
+
+
+def _search_timed(index: faiss.Index, queries: np.ndarray, k: int):
+    """逐条检索并记录延迟（模拟在线单条查询）"""
+    labels = np.empty((len(queries), k), dtype=np.int64)
+    latencies = []
+    for i in range(len(queries)):
+        start = time.perf_counter()
+        _, result = index.search(queries[i:i + 1], k)
+        latencies.append((time.perf_counter() - start) * 1000)
+        labels[i] = result[0]
+    return labels, latencies
+
+
+def _exact_search(vectors: np.ndarray, queries: np.ndarray, k: int,
+                  block_size: int = EVAL_BLOCK_SIZE):
+    """
+    分块暴力检索，返回精确top-k（向量位置）及每条查询的累计延迟
+
+    vectors 可以是 np.memmap，每次只读入一个分块
+    """
+    num_vectors, dim = vectors.shape
+    best_distances = np.full((len(queries), k), np.inf, dtype=np.float32)
+    best_labels = np.full((len(queries), k), -1, dtype=np.int64)
+    latencies = np.zeros(len(queries))
+
+    for start in range(0, num_vectors, block_size):
+        exact = faiss.IndexFlatL2(dim)
+        exact.add(np.ascontiguousarray(vectors[start:start + block_size], dtype=np.float32))
+        for i in range(len(queries)):
+            begin = time.perf_counter()
+            distances, labels = exact.search(queries[i:i + 1], k)
+            latencies[i] += (time.perf_counter() - begin) * 1000
+
+            merged_distances = np.concatenate([best_distances[i], distances[0]])
+            merged_labels = np.concatenate([best_labels[i], labels[0] + start])
+            order = np.argsort(merged_distances, kind="stable")[:k]
+            best_distances[i] = merged_distances[order]
+            best_labels[i] = merged_labels[order]
+
+    return best_labels, latencies.tolist()
+
+
+def _recall_at_k(labels: np.ndarray, ground_truth: np.ndarray) -> float:
+    """计算 recall@k"""
+    hits = 0
+    for row, truth in zip(labels, ground_truth):
+        hits += len(set(row.tolist()) & set(truth.tolist()))
+    return hits / max(1, ground_truth.size)
+
+
+def _sweep_values(index: faiss.Index) -> List[Dict[str, Any]]:
+    """确定评估时需要扫描的检索参数"""
+    ivf = faiss.try_extract_index_ivf(index)
+    if ivf is not None:
+        values = sorted({v for v in [1, 2, 4, 8, 16, 32, 64, 128, 256] if v <= ivf.nlist} | {ivf.nprobe})
+        return [{"nprobe": v} for v in values]
+
+    base = _unwrap(index)
+    if isinstance(base, faiss.IndexHNSW):
+        values = sorted({16, 32, 64, 128, 256} | {base.hnsw.efSearch})
+        return [{"ef_search": v} for v in values]
+
+    return [{}]
+
+
+def evaluate_index(index: faiss.Index, vectors: np.ndarray, num_queries: int = 100,
+                   k: int = 4, seed: int = 0) -> Dict[str, Any]:
+    """
+    生成召回率-延迟报告
+
+    以库内向量为查询，以精确暴力检索结果为真值，
+    扫描nprobe/efSearch取值，记录每组参数的recall@k与单条查询延迟
+
+    Args:
+        index: 待评估的索引
+        vectors: 库内全部向量（行号即向量ID，可为np.memmap）
+        num_queries: 抽样查询数量
+        k: 每次检索返回的数量
+        seed: 抽样随机种子
+
+    Returns:
+        评估报告字典
+    """
+    num_vectors = len(vectors)
+    k = min(k, num_vectors)
+
+    rng = np.random.default_rng(seed)
+    sample = np.sort(rng.choice(num_vectors, size=min(num_queries, num_vectors), replace=False))
+    queries = np.ascontiguousarray(vectors[sample], dtype=np.float32)
+
+    ground_truth, exact_latencies = _exact_search(vectors, queries, k)
+
+    # 记录当前参数，评估结束后恢复
+    original_params = describe_index(index)
+
+    curve = []
+    for params in _sweep_values(index):
+        apply_search_params(index, params.get("nprobe"), params.get("ef_search"))
+        labels, latencies = _search_timed(index, queries, k)
+        curve.append({
+            **params,
+            f"recall@{k}": round(_recall_at_k(labels, ground_truth), 4),
+            "avg_latency_ms": round(float(np.mean(latencies)), 4),
+            "p95_latency_ms": round(float(np.percentile(latencies, 95)), 4),
+        })
+
+    apply_search_params(index, original_params.get("nprobe"), original_params.get("efSearch"))
+
+    return {
+        "index": describe_index(index),
+        "num_queries": len(queries),
+        "k": k,
+        "exact_avg_latency_ms": round(float(np.mean(exact_latencies)), 4),
+        "exact_p95_latency_ms": round(float(np.percentile(exact_latencies, 95)), 4),
+        "curve": curve,
+    }
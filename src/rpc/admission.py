@@ -0,0 +1,299 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+gRPC准入控制
+按RPC方法限制并发数与排队数：并发与排队均已满时立即以 RESOURCE_EXHAUSTED 拒绝，
+截止时间已过（或在排队中到期）的请求在检索与LLM调用之前丢弃。
+以服务器拦截器的形式同时支持同步服务器与grpc.aio异步服务器；同步服务器中排队会占用工作线程，
+因此不排队（并发已满时立即拒绝），工作线程数按各方法并发数之和确定，见 AdmissionController.worker_threads。
+"""
+
+import asyncio
+import inspect
+import logging
+import threading
+from typing import Any, Dict, Iterable, Optional, Tuple
+
+import grpc
+
+from src.app.metrics import GRPC_REJECTED
+
+logger = logging.getLogger(__name__)
+
+# 准入结果
+ADMITTED = "admitted"
+REJECTED = "rejected"
+EXPIRED = "expired"
+TIMED_OUT = "timed_out"
+
+
+class ConcurrencyLimiter:
+    """单个方法的并发与排队限制（线程版）"""
+
+    def __init__(self, max_concurrency: int, max_queue: int):
+        self.max_concurrency = max_concurrency
+        self.max_queue = max_queue
+        self.active = 0
+        self.queued = 0
+        self.admitted = 0
+        self.rejected = 0
+        self.expired = 0
+        self._cond = threading.Condition()
+
+    def acquire(self) -> str:
+        """
+        获取执行名额（不等待）
+
+        Returns:
+            ADMITTED / REJECTED（并发已满）
+        """
+        with self._cond:
+            if self.active < self.max_concurrency:
+                return self._admit()
+            self.rejected += 1
+            return REJECTED
+
+    def release(self):
+        """归还执行名额"""
+        with self._cond:
+            self.active -= 1
+            self._cond.notify()
+
+    def _admit(self) -> str:
+        self.active += 1
+        self.admitted += 1
+        return ADMITTED
+
+    def stats(self) -> Dict[str, int]:
+        """限流统计信息"""
+        return {
+            "active": self.active,
+            "queued": self.queued,
+            "max_concurrency": self.max_concurrency,
+            "max_queue": self.max_queue,
+            "admitted": self.admitted,
+            "rejected": self.rejected,
+            "expired": self.expired
+        }
+
+
+class AsyncConcurrencyLimiter(ConcurrencyLimiter):
+    """单个方法的并发与排队限制（协程版，只在事件循环线程中使用）"""
+
+    def __init__(self, max_concurrency: int, max_queue: int):
+        super().__init__(max_concurrency, max_queue)
+        self._async_cond: Optional[asyncio.Condition] = None
+
+    async def acquire_async(self, timeout: Optional[float]) -> str:
+        """
+        获取执行名额，并发已满时排队等待
+
+        Args:
+            timeout: 最长排队时间（秒），None表示一直等待
+
+        Returns:
+            ADMITTED / REJECTED（队列已满）/ TIMED_OUT（排队超时）
+        """
+        if self.active < self.max_concurrency:
+            return self._admit()
+        if self.queued >= self.max_queue:
+            self.rejected += 1
+            return REJECTED
+
+        if self._async_cond is None:
+            self._async_cond = asyncio.Condition()
+        self.queued += 1
+        try:
+            async with self._async_cond:
+                await asyncio.wait_for(
+                    self._async_cond.wait_for(lambda: self.active < self.max_concurrency), timeout
+                )
+                return self._admit()
+        except asyncio.TimeoutError:
+            self.expired += 1
+            return TIMED_OUT
+        finally:
+            self.queued -= 1
+
+    async def release_async(self):
+        """归还执行名额"""
+        self.active -= 1
+        if self._async_cond is not None:
+            async with self._async_cond:
+                self._async_cond.notify()
+
+
+class AdmissionController:
+    """按方法管理限流器"""
+
+    def __init__(self, config, asynchronous: bool = False):
+        """
+        初始化准入控制
+
+        Args:
+            config: 准入控制配置（AdmissionConfig）
+            asynchronous: 是否用于grpc.aio异步服务器
+        """
+        self.config = config
+        self.asynchronous = asynchronous
+        self._limiters: Dict[str, Optional[ConcurrencyLimiter]] = {}
+        self._lock = threading.Lock()
+        self.dropped_expired = 0
+
+    def limiter(self, method: str) -> Optional[ConcurrencyLimiter]:
+        """获取方法的限流器，未限制的方法返回None"""
+        with self._lock:
+            if method not in self._limiters:
+                max_concurrency, max_queue = self.config.limits_for(method)
+                limiter_class = AsyncConcurrencyLimiter if self.asynchronous else ConcurrencyLimiter
+                self._limiters[method] = limiter_class(max_concurrency, max_queue) if max_concurrency > 0 else None
+            return self._limiters[method]
+
+    def worker_threads(self, methods: Iterable[str]) -> int:
+        """
+        同步服务器所需的工作线程数：各限流方法的最大并发数之和，加上为未限制方法预留的线程数
+
+        线程池与gRPC的 maximum_concurrent_rpcs 按此设置时，先达到的总是各方法自身的并发限制，
+        未限制的方法（如 HealthCheck）不会因其他方法占满线程而被拒绝
+        """
+        limited = sum(self.config.limits_for(method)[0] for method in methods)
+        return limited + self.config.reserved_workers
+
+    def queue_timeout(self, context) -> Tuple[Optional[float], bool]:
+        """
+        计算排队等待时间
+
+        Returns:
+            (等待时间, 是否由截止时间决定)；截止时间已过时等待时间 <= 0
+        """
+        remaining = context.time_remaining()
+        limit = self.config.queue_timeout or None
+        if remaining is None:
+            return limit, False
+        if limit is None or remaining <= limit:
+            return remaining, True
+        return limit, False
+
+    def stats(self) -> Dict[str, Any]:
+        """各方法的限流统计信息"""
+        with self._lock:
+            methods = {method: limiter.stats() for method, limiter in self._limiters.items() if limiter}
+        return {"dropped_expired": self.dropped_expired, "methods": methods}
+
+    def deny(self, method: str, outcome: str, by_deadline: bool) -> Tuple[grpc.StatusCode, str]:
+        """记录未准入的请求，返回 (状态码, 说明)"""
+        reason = "queue_full" if outcome == REJECTED else "deadline" if by_deadline else "queue_timeout"
+        GRPC_REJECTED.inc(method=method, reason=reason)
+        if outcome == REJECTED:
+            logger.warning(f"⛔ {method} 并发与排队已满，拒绝请求")
+            return grpc.StatusCode.RESOURCE_EXHAUSTED, f"服务繁忙：{method} 并发与排队已满，请稍后重试"
+        if by_deadline:
+            self.dropped_expired += 1
+            logger.warning(f"⌛ {method} 请求截止时间已过，丢弃请求")
+            return grpc.StatusCode.DEADLINE_EXCEEDED, "请求截止时间已过，未执行"
+        logger.warning(f"⛔ {method} 排队超时，拒绝请求")
+        return grpc.StatusCode.RESOURCE_EXHAUSTED, f"服务繁忙：{method} 排队超时，请稍后重试"
+
+
+def _method_name(handler_call_details) -> str:
+    return handler_call_details.method.rsplit('/', 1)[-1]
+
+
+def _replace_behavior(handler, wrap):
+    """用 wrap(behavior, streaming_response) 替换处理器的调用函数"""
+    if handler.request_streaming and handler.response_streaming:
+        return handler._replace(stream_stream=wrap(handler.stream_stream, True))
+    if handler.request_streaming:
+        return handler._replace(stream_unary=wrap(handler.stream_unary, False))
+    if handler.response_streaming:
+        return handler._replace(unary_stream=wrap(handler.unary_stream, True))
+    return handler._replace(unary_unary=wrap(handler.unary_unary, False))
+
+
+class AdmissionInterceptor(grpc.ServerInterceptor):
+    """同步服务器的准入控制拦截器"""
+
+    def __init__(self, controller: AdmissionController):
+        self.controller = controller
+
+    def intercept_service(self, continuation, handler_call_details):
+        handler = continuation(handler_call_details)
+        method = _method_name(handler_call_details)
+        limiter = self.controller.limiter(method)
+        if handler is None or limiter is None:
+            return handler
+        return _replace_behavior(handler, lambda behavior, streaming: self._wrap(method, limiter, behavior, streaming))
+
+    def _admit(self, method: str, limiter: ConcurrencyLimiter, context):
+        # 不排队：排队会占用工作线程，并发已满时立即拒绝
+        remaining = context.time_remaining()
+        outcome = EXPIRED if remaining is not None and remaining <= 0 else limiter.acquire()
+        if outcome != ADMITTED:
+            context.abort(*self.controller.deny(method, outcome, outcome == EXPIRED))
+
+    def _wrap(self, method, limiter, behavior, streaming):
+        if streaming:
+            def stream_behavior(request, context):
+                self._admit(method, limiter, context)
+                try:
+                    yield from behavior(request, context)
+                finally:
+                    limiter.release()
+            return stream_behavior
+
+        def unary_behavior(request, context):
+            self._admit(method, limiter, context)
+            try:
+                return behavior(request, context)
+            finally:
+                limiter.release()
+        return unary_behavior
+
+
+class AsyncAdmissionInterceptor(grpc.aio.ServerInterceptor):
+    """grpc.aio异步服务器的准入控制拦截器"""
+
+    def __init__(self, controller: AdmissionController):
+        self.controller = controller
+
+    async def intercept_service(self, continuation, handler_call_details):
+        handler = await continuation(handler_call_details)
+        method = _method_name(handler_call_details)
+        limiter = self.controller.limiter(method)
+        if handler is None or limiter is None:
+            return handler
+        return _replace_behavior(handler, lambda behavior, streaming: self._wrap(method, limiter, behavior, streaming))
+
+    async def _admit(self, method: str, limiter: AsyncConcurrencyLimiter, context):
+        timeout, by_deadline = self.controller.queue_timeout(context)
+        outcome = EXPIRED if timeout is not None and timeout <= 0 else await limiter.acquire_async(timeout)
+        if outcome != ADMITTED:
+            await context.abort(*self.controller.deny(method, outcome, by_deadline))
+        remaining = context.time_remaining()
+        if remaining is not None and remaining <= 0:
+            await limiter.release_async()
+            await context.abort(*self.controller.deny(method, EXPIRED, True))
+
+    def _wrap(self, method, limiter, behavior, streaming):
+        if streaming:
+            async def stream_behavior(request, context):
+                await self._admit(method, limiter, context)
+                try:
+                    if inspect.isasyncgenfunction(behavior):
+                        async for response in behavior(request, context):
+                            yield response
+                    else:
+                        for response in behavior(request, context):
+                            yield response
+                finally:
+                    await limiter.release_async()
+            return stream_behavior
+
+        async def unary_behavior(request, context):
+            await self._admit(method, limiter, context)
+            try:
+                response = behavior(request, context)
+                return await response if inspect.isawaitable(response) else response
+            finally:
+                await limiter.release_async()
+        return unary_behavior
@@ -6,6 +6,8 @@ from typing import List, Dict, Any, Optional
 
 from src.db.conversation_manager import ConversationManager
 from src.app.knowledge_base import KnowledgeBase
+from src.app.deadline import Deadline, DeadlineExceeded, RequestCancelled
+from src.app.metrics import observe_stage
 from src.rpc.generated.knowledge_service_pb2 import (
     ConversationChatRequest, ChatResponse, SourceDocument,FeedbackInfo,SimilarQuestion,
     CreateConversationRequest, ConversationResponse,
@@ -25,84 +27,95 @@ logger = logging.getLogger(__name__)
 class ConversationServiceImpl:
     """对话服务实现"""
 
-    def __init__(self, knowledge_base: KnowledgeBase):
+    def __init__(self, knowledge_base: KnowledgeBase, conversation_manager: Optional[ConversationManager] = None):
         """初始化对话服务
 
         Args:
             knowledge_base: 知识库实例
+            conversation_manager: 共享的对话管理器，默认新建（连接对话数据库）
         """
         self.kb = knowledge_base
-        self.conversation_manager = ConversationManager()
+        self.conversation_manager = conversation_manager or ConversationManager()
         logger.info("对话服务初始化完成")
         
 
-    def chat_conversation(self, request: ConversationChatRequest) -> ChatResponse:
+    def chat_conversation(self, request: ConversationChatRequest, deadline: Optional[Deadline] = None) -> ChatResponse:
         """多轮对话聊天
 
         Args:
             request: 聊天请求
+            deadline: 请求截止时间与取消状态，超时或取消时中止检索与LLM调用，不写入对话消息
 
         Returns:
             ChatResponse: 聊天响应
         """
         try:
-            # 获取对话上下文
+            with observe_stage("conversation", "total"):
+                return self._chat_conversation(request, deadline)
+        except Exception as e:
+            logger.error(f"多轮对话聊天失败: {e}")
+            raise
+
+    def _chat_conversation(self, request: ConversationChatRequest, deadline: Optional[Deadline]) -> ChatResponse:
+        # 获取对话上下文
+        with observe_stage("conversation", "history_read"):
             context = self.conversation_manager.get_conversation_context(
                 request.conversation_id, 
                 request.max_history_turns
             )
-            context_str = ""
-            for msg in context:
-                prefix = "用户: " if msg['role'] == 'user' else "助手: "
-                context_str += f"{prefix}{msg['content']}\n"
-            
-            # 添加用户问题到对话
+        context_str = ""
+        for msg in context:
+            prefix = "用户: " if msg['role'] == 'user' else "助手: "
+            context_str += f"{prefix}{msg['content']}\n"
+        
+        # 调用知识库回答问题
+        deadline = deadline or Deadline()
+        with observe_stage("conversation", "answer"):
+            result = self.kb.ask_question_with_feedback(
+                question=request.question,
+                use_feedback=request.use_feedback,
+                deadline=deadline
+            )
+        
+        # 回答完成后再写入用户问题与助手回复，超时或取消的请求不留下没有回复的问题
+        deadline.check("保存对话消息")
+        with observe_stage("conversation", "message_write"):
             self.conversation_manager.add_message(
                 request.conversation_id,
                 request.question,
                 'user'
             )
-            
-            # 调用知识库回答问题
-            result = self.kb.ask_question_with_feedback(
-                question=request.question,
-                use_feedback=request.use_feedback
-            )
-            # 添加助手回复到对话
             self.conversation_manager.add_message(
                 request.conversation_id,
                 result["final_answer"],
                 'assistant',
                 [doc["metadata"].get('source', '') for doc in result["source_documents"]]
             )
-            
-            # 构建响应
-            # 转换反馈信息
-            feedback_info_data = result.get("feedback_info", {})
-            similar_questions = []
-            for sq in feedback_info_data.get("similar_questions", []):
-                similar_q = SimilarQuestion(
-                    question=sq.get("question", ""),
-                    similarity_score=sq.get("similarity_score", 0.0),
-                    feedback_type=sq.get("feedback_type", "")
-                )
-                similar_questions.append(similar_q)
-            
-            response = ChatResponse(
-                final_answer=result["final_answer"],
-                source_documents=[SourceDocument(source=doc["metadata"].get('source', '')) for doc in result["source_documents"]],
-                feedback_info= FeedbackInfo(
-                    is_improved=feedback_info_data.get("is_improved", False),
-                    confidence_score=feedback_info_data.get("confidence_score", 0.0),
-                    feedback_count=feedback_info_data.get("feedback_count", 0),
-                    similar_questions=similar_questions
-                )
+        
+        # 构建响应
+        # 转换反馈信息
+        feedback_info_data = result.get("feedback_info", {})
+        similar_questions = []
+        for sq in feedback_info_data.get("similar_questions", []):
+            similar_q = SimilarQuestion(
+                question=sq.get("question", ""),
+                similarity_score=sq.get("similarity_score", 0.0),
+                feedback_type=sq.get("feedback_type", "")
             )
-            
-            return response
-        except Exception as e:
-            logger.error(f"多轮对话聊天失败: {e}")
-            raise
+            similar_questions.append(similar_q)
+        
+        response = ChatResponse(
+            final_answer=result["final_answer"],
+            source_documents=[SourceDocument(source=doc["metadata"].get('source', '')) for doc in result["source_documents"]],
+            feedback_info= FeedbackInfo(
+                is_improved=feedback_info_data.get("is_improved", False),
+                confidence_score=feedback_info_data.get("confidence_score", 0.0),
+                feedback_count=feedback_info_data.get("feedback_count", 0),
+                similar_questions=similar_questions
+            )
+        )
+        
+        return response
 
     def create_conversation(self, request: CreateConversationRequest) -> ConversationResponse:
         """创建对话
@@ -317,11 +330,12 @@ class ConversationServiceImpl:
                 error_message=f"邮箱验证失败: {str(e)}"
             )
 
-    def chat_with_email_verification(self, request: EmailChatRequest) -> ChatResponse:
+    def chat_with_email_verification(self, request: EmailChatRequest, deadline: Optional[Deadline] = None) -> ChatResponse:
         """带邮箱验证的对话聊天
 
         Args:
             request: 带邮箱验证的聊天请求
+            deadline: 请求截止时间与取消状态，超时或取消时抛出 DeadlineExceeded / RequestCancelled
 
         Returns:
             ChatResponse: 聊天响应
@@ -395,9 +409,11 @@ class ConversationServiceImpl:
                 chat_request.system_config.CopyFrom(request.system_config)
             
             # 执行对话聊天
-            response = self.chat_conversation(chat_request)
+            response = self.chat_conversation(chat_request, deadline)
             return response
             
+        except (DeadlineExceeded, RequestCancelled):
+            raise
         except Exception as e:
             logger.error(f"带邮箱验证的对话聊天失败: {e}")
             return ChatResponse(
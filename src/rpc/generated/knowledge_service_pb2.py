@@ -24,7 +24,7 @@ _sym_db = _symbol_database.Default()
 
 
 
-DESCRIPTOR = _descriptor_pool.Default().AddSerializedFile(b'\n\x17knowledge_service.proto\x12\x11knowledge_service\"5\n\x0b\x43hatRequest\x12\x10\n\x08question\x18\x01 \x01(\t\x12\x14\n\x0cuse_feedback\x18\x02 \x01(\x08\"\xf1\x01\n\x17\x43onversationChatRequest\x12\x10\n\x08question\x18\x01 \x01(\t\x12\x17\n\x0f\x63onversation_id\x18\x02 \x01(\t\x12\x14\n\x0cuse_feedback\x18\x03 \x01(\x08\x12\x15\n\ruse_reranking\x18\x04 \x01(\x08\x12\r\n\x05top_k\x18\x05 \x01(\x05\x12\x1c\n\x14similarity_threshold\x18\x06 \x01(\x02\x12\x36\n\rsystem_config\x18\x07 \x01(\x0b\x32\x1f.knowledge_service.SystemConfig\x12\x19\n\x11max_history_turns\x18\x08 \x01(\x05\";\n\x19\x43reateConversationRequest\x12\r\n\x05title\x18\x01 \x01(\t\x12\x0f\n\x07user_id\x18\x02 \x01(\t\"\x8c\x01\n\x14\x43onversationResponse\x12\x17\n\x0f\x63onversation_id\x18\x01 \x01(\t\x12\r\n\x05title\x18\x02 \x01(\t\x12\x0f\n\x07user_id\x18\x03 \x01(\t\x12\x12\n\ncreated_at\x18\x04 \x01(\t\x12\x12\n\nupdated_at\x18\x05 \x01(\t\x12\x13\n\x0bis_archived\x18\x06 \x01(\x08\"T\n\x1a\x43onversationHistoryRequest\x12\x17\n\x0f\x63onversation_id\x18\x01 \x01(\t\x12\r\n\x05limit\x18\x02 \x01(\x05\x12\x0e\n\x06offset\x18\x03 \x01(\x05\"\x83\x01\n\x07Message\x12\x12\n\nmessage_id\x18\x01 \x01(\t\x12\x17\n\x0f\x63onversation_id\x18\x02 \x01(\t\x12\x0f\n\x07\x63ontent\x18\x03 \x01(\t\x12\x0c\n\x04role\x18\x04 \x01(\t\x12\x12\n\ncreated_at\x18\x05 \x01(\t\x12\x18\n\x10source_documents\x18\x06 \x03(\t\"\x88\x01\n\x1b\x43onversationHistoryResponse\x12\x17\n\x0f\x63onversation_id\x18\x01 \x01(\t\x12\r\n\x05title\x18\x02 \x01(\t\x12,\n\x08messages\x18\x03 \x03(\x0b\x32\x1a.knowledge_service.Message\x12\x13\n\x0btotal_count\x18\x04 \x01(\x05\"d\n\x18ListConversationsRequest\x12\x0f\n\x07user_id\x18\x01 \x01(\t\x12\r\n\x05limit\x18\x02 \x01(\x05\x12\x0e\n\x06offset\x18\x03 \x01(\x05\x12\x18\n\x10include_archived\x18\x04 \x01(\x08\"p\n\x19ListConversationsResponse\x12>\n\rconversations\x18\x01 \x03(\x0b\x32\'.knowledge_service.ConversationResponse\x12\x13\n\x0btotal_count\x18\x02 \x01(\x05\"X\n\x19UpdateConversationRequest\x12\x17\n\x0f\x63onversation_id\x18\x01 \x01(\t\x12\r\n\x05title\x18\x02 \x01(\t\x12\x13\n\x0bis_archived\x18\x03 \x01(\x08\"4\n\x19\x44\x65leteConversationRequest\x12\x17\n\x0f\x63onversation_id\x18\x01 \x01(\t\"-\n\x1a\x44\x65leteConversationResponse\x12\x0f\n\x07success\x18\x01 \x01(\x08\"\xec\x01\n\x0c\x43hatResponse\x12\x10\n\x08question\x18\x01 \x01(\t\x12\x17\n\x0foriginal_answer\x18\x02 \x01(\t\x12\x14\n\x0c\x66inal_answer\x18\x03 \x01(\t\x12;\n\x10source_documents\x18\x04 \x03(\x0b\x32!.knowledge_service.SourceDocument\x12\x36\n\rfeedback_info\x18\x05 \x01(\x0b\x32\x1f.knowledge_service.FeedbackInfo\x12\x0f\n\x07success\x18\x06 \x01(\x08\x12\x15\n\rerror_message\x18\x07 \x01(\t\"\xa5\x01\n\x0eSourceDocument\x12\x0f\n\x07\x63ontent\x18\x01 \x01(\t\x12\x0e\n\x06source\x18\x02 \x01(\t\x12\x41\n\x08metadata\x18\x03 \x03(\x0b\x32/.knowledge_service.SourceDocument.MetadataEntry\x1a/\n\rMetadataEntry\x12\x0b\n\x03key\x18\x01 \x01(\t\x12\r\n\x05value\x18\x02 \x01(\t:\x02\x38\x01\"\x94\x01\n\x0c\x46\x65\x65\x64\x62\x61\x63kInfo\x12\x13\n\x0bis_improved\x18\x01 \x01(\x08\x12\x18\n\x10\x63onfidence_score\x18\x02 \x01(\x01\x12\x16\n\x0e\x66\x65\x65\x64\x62\x61\x63k_count\x18\x03 \x01(\x05\x12=\n\x11similar_questions\x18\x04 \x03(\x0b\x32\".knowledge_service.SimilarQuestion\"T\n\x0fSimilarQuestion\x12\x10\n\x08question\x18\x01 \x01(\t\x12\x18\n\x10similarity_score\x18\x02 \x01(\x01\x12\x15\n\rfeedback_type\x18\x03 \x01(\t\"\xc1\x01\n\x0f\x46\x65\x65\x64\x62\x61\x63kRequest\x12\x10\n\x08question\x18\x01 \x01(\t\x12\x17\n\x0foriginal_answer\x18\x02 \x01(\t\x12\x15\n\rfeedback_type\x18\x03 \x01(\t\x12\x18\n\x10\x63orrected_answer\x18\x04 \x01(\t\x12\x15\n\rfeedback_text\x18\x05 \x01(\t\x12;\n\x10source_documents\x18\x06 \x03(\x0b\x32!.knowledge_service.SourceDocument\"O\n\x10\x46\x65\x65\x64\x62\x61\x63kResponse\x12\x13\n\x0b\x66\x65\x65\x64\x62\x61\x63k_id\x18\x01 \x01(\x05\x12\x0f\n\x07success\x18\x02 \x01(\x08\x12\x15\n\rerror_message\x18\x03 \x01(\t\"*\n\x16\x46\x65\x65\x64\x62\x61\x63kHistoryRequest\x12\x10\n\x08question\x18\x01 \x01(\t\"u\n\x17\x46\x65\x65\x64\x62\x61\x63kHistoryResponse\x12\x32\n\x07records\x18\x01 \x03(\x0b\x32!.knowledge_service.FeedbackRecord\x12\x0f\n\x07success\x18\x02 \x01(\x08\x12\x15\n\rerror_message\x18\x03 \x01(\t\"\xf6\x01\n\x0e\x46\x65\x65\x64\x62\x61\x63kRecord\x12\n\n\x02id\x18\x01 \x01(\x05\x12\x10\n\x08question\x18\x02 \x01(\t\x12\x17\n\x0foriginal_answer\x18\x03 \x01(\t\x12\x15\n\ruser_feedback\x18\x04 \x01(\t\x12\x18\n\x10\x63orrected_answer\x18\x05 \x01(\t\x12\x15\n\rfeedback_text\x18\x06 \x01(\t\x12\x11\n\ttimestamp\x18\x07 \x01(\t\x12\x15\n\rquestion_hash\x18\x08 \x01(\t\x12;\n\x10source_documents\x18\t \x03(\x0b\x32!.knowledge_service.SourceDocument\"\x0e\n\x0cStatsRequest\"\xe9\x01\n\rStatsResponse\x12=\n\x0eknowledge_base\x18\x01 \x01(\x0b\x32%.knowledge_service.KnowledgeBaseStats\x12\x39\n\x0f\x66\x65\x65\x64\x62\x61\x63k_system\x18\x02 \x01(\x0b\x32 .knowledge_service.FeedbackStats\x12\x36\n\rsystem_config\x18\x03 \x01(\x0b\x32\x1f.knowledge_service.SystemConfig\x12\x0f\n\x07success\x18\x04 \x01(\x08\x12\x15\n\rerror_message\x18\x05 \x01(\t\"^\n\x12KnowledgeBaseStats\x12\x17\n\x0ftotal_documents\x18\x01 \x01(\x05\x12\x14\n\x0ctotal_chunks\x18\x02 \x01(\x05\x12\x19\n\x11vector_store_path\x18\x03 \x01(\t\"\xae\x01\n\rFeedbackStats\x12\x16\n\x0etotal_feedback\x18\x01 \x01(\x05\x12\x19\n\x11positive_feedback\x18\x02 \x01(\x05\x12\x19\n\x11negative_feedback\x18\x03 \x01(\x05\x12\x1a\n\x12\x63orrected_feedback\x18\x04 \x01(\x05\x12\x18\n\x10improved_answers\x18\x05 \x01(\x05\x12\x19\n\x11satisfaction_rate\x18\x06 \x01(\x01\"\x87\x01\n\x0cSystemConfig\x12!\n\x19\x66\x65\x65\x64\x62\x61\x63k_learning_enabled\x18\x01 \x01(\x08\x12\x1c\n\x14\x63onfidence_threshold\x18\x02 \x01(\x01\x12\x1c\n\x14similarity_threshold\x18\x03 \x01(\x01\x12\x18\n\x10\x66\x65\x65\x64\x62\x61\x63k_db_path\x18\x04 \x01(\t\")\n\rSearchRequest\x12\r\n\x05query\x18\x01 \x01(\t\x12\t\n\x01k\x18\x02 \x01(\x05\"j\n\x0eSearchResponse\x12\x30\n\x07results\x18\x01 \x03(\x0b\x32\x1f.knowledge_service.SearchResult\x12\x0f\n\x07success\x18\x02 \x01(\x08\x12\x15\n\rerror_message\x18\x03 \x01(\t\"\xa0\x01\n\x0cSearchResult\x12\x0f\n\x07\x63ontent\x18\x01 \x01(\t\x12\r\n\x05score\x18\x02 \x01(\x01\x12?\n\x08metadata\x18\x03 \x03(\x0b\x32-.knowledge_service.SearchResult.MetadataEntry\x1a/\n\rMetadataEntry\x12\x0b\n\x03key\x18\x01 \x01(\t\x12\r\n\x05value\x18\x02 \x01(\t:\x02\x38\x01\"\x14\n\x12HealthCheckRequest\"G\n\x13HealthCheckResponse\x12\x0f\n\x07healthy\x18\x01 \x01(\x08\x12\x0e\n\x06status\x18\x02 \x01(\t\x12\x0f\n\x07version\x18\x03 \x01(\t\")\n\x18\x45mailVerificationRequest\x12\r\n\x05\x65mail\x18\x01 \x01(\t\"f\n\x19\x45mailVerificationResponse\x12\x10\n\x08is_valid\x18\x01 \x01(\x08\x12\x0f\n\x07user_id\x18\x02 \x01(\t\x12\x0f\n\x07success\x18\x03 \x01(\x08\x12\x15\n\rerror_message\x18\x04 \x01(\t\"\x95\x02\n\x10\x45mailChatRequest\x12\r\n\x05\x65mail\x18\x01 \x01(\t\x12\x10\n\x08question\x18\x02 \x01(\t\x12\x17\n\x0f\x63onversation_id\x18\x03 \x01(\t\x12\x14\n\x0cuse_feedback\x18\x04 \x01(\x08\x12\x15\n\ruse_reranking\x18\x05 \x01(\x08\x12\r\n\x05top_k\x18\x06 \x01(\x05\x12\x1c\n\x14similarity_threshold\x18\x07 \x01(\x02\x12\x36\n\rsystem_config\x18\x08 \x01(\x0b\x32\x1f.knowledge_service.SystemConfig\x12\x19\n\x11max_history_turns\x18\t \x01(\x05\x12\x1a\n\x12\x63onversation_title\x18\n \x01(\t2\x8c\x0b\n\x10KnowledgeService\x12G\n\x04\x43hat\x12\x1e.knowledge_service.ChatRequest\x1a\x1f.knowledge_service.ChatResponse\x12_\n\x10\x43hatConversation\x12*.knowledge_service.ConversationChatRequest\x1a\x1f.knowledge_service.ChatResponse\x12k\n\x12\x43reateConversation\x12,.knowledge_service.CreateConversationRequest\x1a\'.knowledge_service.ConversationResponse\x12w\n\x16GetConversationHistory\x12-.knowledge_service.ConversationHistoryRequest\x1a..knowledge_service.ConversationHistoryResponse\x12n\n\x11ListConversations\x12+.knowledge_service.ListConversationsRequest\x1a,.knowledge_service.ListConversationsResponse\x12k\n\x12UpdateConversation\x12,.knowledge_service.UpdateConversationRequest\x1a\'.knowledge_service.ConversationResponse\x12q\n\x12\x44\x65leteConversation\x12,.knowledge_service.DeleteConversationRequest\x1a-.knowledge_service.DeleteConversationResponse\x12Y\n\x0eSubmitFeedback\x12\".knowledge_service.FeedbackRequest\x1a#.knowledge_service.FeedbackResponse\x12k\n\x12GetFeedbackHistory\x12).knowledge_service.FeedbackHistoryRequest\x1a*.knowledge_service.FeedbackHistoryResponse\x12M\n\x08GetStats\x12\x1f.knowledge_service.StatsRequest\x1a .knowledge_service.StatsResponse\x12V\n\x0fSearchDocuments\x12 .knowledge_service.SearchRequest\x1a!.knowledge_service.SearchResponse\x12\\\n\x0bHealthCheck\x12%.knowledge_service.HealthCheckRequest\x1a&.knowledge_service.HealthCheckResponse\x12h\n\x0bVerifyEmail\x12+.knowledge_service.EmailVerificationRequest\x1a,.knowledge_service.EmailVerificationResponse\x12\x61\n\x19\x43hatWithEmailVerification\x12#.knowledge_service.EmailChatRequest\x1a\x1f.knowledge_service.ChatResponseb\x06proto3')
+DESCRIPTOR = _descriptor_pool.Default().AddSerializedFile(b'\n\x17knowledge_service.proto\x12\x11knowledge_service\"5\n\x0b\x43hatRequest\x12\x10\n\x08question\x18\x01 \x01(\t\x12\x14\n\x0cuse_feedback\x18\x02 \x01(\x08\"\xf1\x01\n\x17\x43onversationChatRequest\x12\x10\n\x08question\x18\x01 \x01(\t\x12\x17\n\x0f\x63onversation_id\x18\x02 \x01(\t\x12\x14\n\x0cuse_feedback\x18\x03 \x01(\x08\x12\x15\n\ruse_reranking\x18\x04 \x01(\x08\x12\r\n\x05top_k\x18\x05 \x01(\x05\x12\x1c\n\x14similarity_threshold\x18\x06 \x01(\x02\x12\x36\n\rsystem_config\x18\x07 \x01(\x0b\x32\x1f.knowledge_service.SystemConfig\x12\x19\n\x11max_history_turns\x18\x08 \x01(\x05\";\n\x19\x43reateConversationRequest\x12\r\n\x05title\x18\x01 \x01(\t\x12\x0f\n\x07user_id\x18\x02 \x01(\t\"\x8c\x01\n\x14\x43onversationResponse\x12\x17\n\x0f\x63onversation_id\x18\x01 \x01(\t\x12\r\n\x05title\x18\x02 \x01(\t\x12\x0f\n\x07user_id\x18\x03 \x01(\t\x12\x12\n\ncreated_at\x18\x04 \x01(\t\x12\x12\n\nupdated_at\x18\x05 \x01(\t\x12\x13\n\x0bis_archived\x18\x06 \x01(\x08\"T\n\x1a\x43onversationHistoryRequest\x12\x17\n\x0f\x63onversation_id\x18\x01 \x01(\t\x12\r\n\x05limit\x18\x02 \x01(\x05\x12\x0e\n\x06offset\x18\x03 \x01(\x05\"\x83\x01\n\x07Message\x12\x12\n\nmessage_id\x18\x01 \x01(\t\x12\x17\n\x0f\x63onversation_id\x18\x02 \x01(\t\x12\x0f\n\x07\x63ontent\x18\x03 \x01(\t\x12\x0c\n\x04role\x18\x04 \x01(\t\x12\x12\n\ncreated_at\x18\x05 \x01(\t\x12\x18\n\x10source_documents\x18\x06 \x03(\t\"\x88\x01\n\x1b\x43onversationHistoryResponse\x12\x17\n\x0f\x63onversation_id\x18\x01 \x01(\t\x12\r\n\x05title\x18\x02 \x01(\t\x12,\n\x08messages\x18\x03 \x03(\x0b\x32\x1a.knowledge_service.Message\x12\x13\n\x0btotal_count\x18\x04 \x01(\x05\"d\n\x18ListConversationsRequest\x12\x0f\n\x07user_id\x18\x01 \x01(\t\x12\r\n\x05limit\x18\x02 \x01(\x05\x12\x0e\n\x06offset\x18\x03 \x01(\x05\x12\x18\n\x10include_archived\x18\x04 \x01(\x08\"p\n\x19ListConversationsResponse\x12>\n\rconversations\x18\x01 \x03(\x0b\x32\'.knowledge_service.ConversationResponse\x12\x13\n\x0btotal_count\x18\x02 \x01(\x05\"X\n\x19UpdateConversationRequest\x12\x17\n\x0f\x63onversation_id\x18\x01 \x01(\t\x12\r\n\x05title\x18\x02 \x01(\t\x12\x13\n\x0bis_archived\x18\x03 \x01(\x08\"4\n\x19\x44\x65leteConversationRequest\x12\x17\n\x0f\x63onversation_id\x18\x01 \x01(\t\"-\n\x1a\x44\x65leteConversationResponse\x12\x0f\n\x07success\x18\x01 \x01(\x08\"\xec\x01\n\x0c\x43hatResponse\x12\x10\n\x08question\x18\x01 \x01(\t\x12\x17\n\x0foriginal_answer\x18\x02 \x01(\t\x12\x14\n\x0c\x66inal_answer\x18\x03 \x01(\t\x12;\n\x10source_documents\x18\x04 \x03(\x0b\x32!.knowledge_service.SourceDocument\x12\x36\n\rfeedback_info\x18\x05 \x01(\x0b\x32\x1f.knowledge_service.FeedbackInfo\x12\x0f\n\x07success\x18\x06 \x01(\x08\x12\x15\n\rerror_message\x18\x07 \x01(\t\"\x9f\x01\n\x12\x43hatStreamResponse\x12\x37\n\x07sources\x18\x01 \x01(\x0b\x32$.knowledge_service.ChatStreamSourcesH\x00\x12\x16\n\x0c\x61nswer_delta\x18\x02 \x01(\tH\x00\x12/\n\x03\x65nd\x18\x03 \x01(\x0b\x32 .knowledge_service.ChatStreamEndH\x00\x42\x07\n\x05\x65vent\"P\n\x11\x43hatStreamSources\x12;\n\x10source_documents\x18\x01 \x03(\x0b\x32!.knowledge_service.SourceDocument\"\xb0\x01\n\rChatStreamEnd\x12\x10\n\x08question\x18\x01 \x01(\t\x12\x17\n\x0foriginal_answer\x18\x02 \x01(\t\x12\x14\n\x0c\x66inal_answer\x18\x03 \x01(\t\x12\x36\n\rfeedback_info\x18\x04 \x01(\x0b\x32\x1f.knowledge_service.FeedbackInfo\x12\x0f\n\x07success\x18\x05 \x01(\x08\x12\x15\n\rerror_message\x18\x06 \x01(\t\"\xa5\x01\n\x0eSourceDocument\x12\x0f\n\x07\x63ontent\x18\x01 \x01(\t\x12\x0e\n\x06source\x18\x02 \x01(\t\x12\x41\n\x08metadata\x18\x03 \x03(\x0b\x32/.knowledge_service.SourceDocument.MetadataEntry\x1a/\n\rMetadataEntry\x12\x0b\n\x03key\x18\x01 \x01(\t\x12\r\n\x05value\x18\x02 \x01(\t:\x02\x38\x01\"\x94\x01\n\x0c\x46\x65\x65\x64\x62\x61\x63kInfo\x12\x13\n\x0bis_improved\x18\x01 \x01(\x08\x12\x18\n\x10\x63onfidence_score\x18\x02 \x01(\x01\x12\x16\n\x0e\x66\x65\x65\x64\x62\x61\x63k_count\x18\x03 \x01(\x05\x12=\n\x11similar_questions\x18\x04 \x03(\x0b\x32\".knowledge_service.SimilarQuestion\"T\n\x0fSimilarQuestion\x12\x10\n\x08question\x18\x01 \x01(\t\x12\x18\n\x10similarity_score\x18\x02 \x01(\x01\x12\x15\n\rfeedback_type\x18\x03 \x01(\t\"\xc1\x01\n\x0f\x46\x65\x65\x64\x62\x61\x63kRequest\x12\x10\n\x08question\x18\x01 \x01(\t\x12\x17\n\x0foriginal_answer\x18\x02 \x01(\t\x12\x15\n\rfeedback_type\x18\x03 \x01(\t\x12\x18\n\x10\x63orrected_answer\x18\x04 \x01(\t\x12\x15\n\rfeedback_text\x18\x05 \x01(\t\x12;\n\x10source_documents\x18\x06 \x03(\x0b\x32!.knowledge_service.SourceDocument\"O\n\x10\x46\x65\x65\x64\x62\x61\x63kResponse\x12\x13\n\x0b\x66\x65\x65\x64\x62\x61\x63k_id\x18\x01 \x01(\x05\x12\x0f\n\x07success\x18\x02 \x01(\x08\x12\x15\n\rerror_message\x18\x03 \x01(\t\"*\n\x16\x46\x65\x65\x64\x62\x61\x63kHistoryRequest\x12\x10\n\x08question\x18\x01 \x01(\t\"u\n\x17\x46\x65\x65\x64\x62\x61\x63kHistoryResponse\x12\x32\n\x07records\x18\x01 \x03(\x0b\x32!.knowledge_service.FeedbackRecord\x12\x0f\n\x07success\x18\x02 \x01(\x08\x12\x15\n\rerror_message\x18\x03 \x01(\t\"\xf6\x01\n\x0e\x46\x65\x65\x64\x62\x61\x63kRecord\x12\n\n\x02id\x18\x01 \x01(\x05\x12\x10\n\x08question\x18\x02 \x01(\t\x12\x17\n\x0foriginal_answer\x18\x03 \x01(\t\x12\x15\n\ruser_feedback\x18\x04 \x01(\t\x12\x18\n\x10\x63orrected_answer\x18\x05 \x01(\t\x12\x15\n\rfeedback_text\x18\x06 \x01(\t\x12\x11\n\ttimestamp\x18\x07 \x01(\t\x12\x15\n\rquestion_hash\x18\x08 \x01(\t\x12;\n\x10source_documents\x18\t \x03(\x0b\x32!.knowledge_service.SourceDocument\"\x0e\n\x0cStatsRequest\"\xa0\x03\n\rStatsResponse\x12=\n\x0eknowledge_base\x18\x01 \x01(\x0b\x32%.knowledge_service.KnowledgeBaseStats\x12\x39\n\x0f\x66\x65\x65\x64\x62\x61\x63k_system\x18\x02 \x01(\x0b\x32 .knowledge_service.FeedbackStats\x12\x36\n\rsystem_config\x18\x03 \x01(\x0b\x32\x1f.knowledge_service.SystemConfig\x12\x0f\n\x07success\x18\x04 \x01(\x08\x12\x15\n\rerror_message\x18\x05 \x01(\t\x12\x39\n\x0c\x61nswer_cache\x18\x06 \x01(\x0b\x32#.knowledge_service.AnswerCacheStats\x12=\n\x0esemantic_cache\x18\x07 \x01(\x0b\x32%.knowledge_service.SemanticCacheStats\x12;\n\rsingle_flight\x18\x08 \x01(\x0b\x32$.knowledge_service.SingleFlightStats\"^\n\x12KnowledgeBaseStats\x12\x17\n\x0ftotal_documents\x18\x01 \x01(\x05\x12\x14\n\x0ctotal_chunks\x18\x02 \x01(\x05\x12\x19\n\x11vector_store_path\x18\x03 \x01(\t\"\xae\x01\n\rFeedbackStats\x12\x16\n\x0etotal_feedback\x18\x01 \x01(\x05\x12\x19\n\x11positive_feedback\x18\x02 \x01(\x05\x12\x19\n\x11negative_feedback\x18\x03 \x01(\x05\x12\x1a\n\x12\x63orrected_feedback\x18\x04 \x01(\x05\x12\x18\n\x10improved_answers\x18\x05 \x01(\x05\x12\x19\n\x11satisfaction_rate\x18\x06 \x01(\x01\"\x8b\x01\n\x10\x41nswerCacheStats\x12\x0f\n\x07\x65nabled\x18\x01 \x01(\x08\x12\x0c\n\x04size\x18\x02 \x01(\x05\x12\x0c\n\x04hits\x18\x03 \x01(\x03\x12\x0e\n\x06misses\x18\x04 \x01(\x03\x12\x10\n\x08hit_rate\x18\x05 \x01(\x01\x12\x11\n\tevictions\x18\x06 \x01(\x03\x12\x15\n\rinvalidations\x18\x07 \x01(\x03\"\x89\x01\n\x12SemanticCacheStats\x12\x0f\n\x07\x65nabled\x18\x01 \x01(\x08\x12\x0c\n\x04size\x18\x02 \x01(\x05\x12\x0c\n\x04hits\x18\x03 \x01(\x03\x12\x0e\n\x06misses\x18\x04 \x01(\x03\x12\x10\n\x08hit_rate\x18\x05 \x01(\x01\x12\x11\n\tevictions\x18\x06 \x01(\x03\x12\x11\n\tthreshold\x18\x07 \x01(\x01\"d\n\x11SingleFlightStats\x12\x12\n\nexecutions\x18\x01 \x01(\x03\x12\x11\n\tcollapsed\x18\x02 \x01(\x03\x12\x11\n\tin_flight\x18\x03 \x01(\x05\x12\x15\n\rcollapse_rate\x18\x04 \x01(\x01\"\x87\x01\n\x0cSystemConfig\x12!\n\x19\x66\x65\x65\x64\x62\x61\x63k_learning_enabled\x18\x01 \x01(\x08\x12\x1c\n\x14\x63onfidence_threshold\x18\x02 \x01(\x01\x12\x1c\n\x14similarity_threshold\x18\x03 \x01(\x01\x12\x18\n\x10\x66\x65\x65\x64\x62\x61\x63k_db_path\x18\x04 \x01(\t\")\n\rSearchRequest\x12\r\n\x05query\x18\x01 \x01(\t\x12\t\n\x01k\x18\x02 \x01(\x05\"j\n\x0eSearchResponse\x12\x30\n\x07results\x18\x01 \x03(\x0b\x32\x1f.knowledge_service.SearchResult\x12\x0f\n\x07success\x18\x02 \x01(\x08\x12\x15\n\rerror_message\x18\x03 \x01(\t\"0\n\x12\x42\x61tchSearchRequest\x12\x0f\n\x07queries\x18\x01 \x03(\t\x12\t\n\x01k\x18\x02 \x01(\x05\"q\n\x13\x42\x61tchSearchResponse\x12\x32\n\x07results\x18\x01 \x03(\x0b\x32!.knowledge_service.SearchResponse\x12\x0f\n\x07success\x18\x02 \x01(\x08\x12\x15\n\rerror_message\x18\x03 \x01(\t\"T\n\x10\x42\x61tchChatRequest\x12\x11\n\tquestions\x18\x01 \x03(\t\x12\x14\n\x0cuse_feedback\x18\x02 \x01(\x08\x12\x17\n\x0fmax_parallelism\x18\x03 \x01(\x05\"m\n\x11\x42\x61tchChatResponse\x12\x30\n\x07results\x18\x01 \x03(\x0b\x32\x1f.knowledge_service.ChatResponse\x12\x0f\n\x07success\x18\x02 \x01(\x08\x12\x15\n\rerror_message\x18\x03 \x01(\t\"\xa0\x01\n\x0cSearchResult\x12\x0f\n\x07\x63ontent\x18\x01 \x01(\t\x12\r\n\x05score\x18\x02 \x01(\x01\x12?\n\x08metadata\x18\x03 \x03(\x0b\x32-.knowledge_service.SearchResult.MetadataEntry\x1a/\n\rMetadataEntry\x12\x0b\n\x03key\x18\x01 \x01(\t\x12\r\n\x05value\x18\x02 \x01(\t:\x02\x38\x01\"\x14\n\x12HealthCheckRequest\"G\n\x13HealthCheckResponse\x12\x0f\n\x07healthy\x18\x01 \x01(\x08\x12\x0e\n\x06status\x18\x02 \x01(\t\x12\x0f\n\x07version\x18\x03 \x01(\t\")\n\x18\x45mailVerificationRequest\x12\r\n\x05\x65mail\x18\x01 \x01(\t\"f\n\x19\x45mailVerificationResponse\x12\x10\n\x08is_valid\x18\x01 \x01(\x08\x12\x0f\n\x07user_id\x18\x02 \x01(\t\x12\x0f\n\x07success\x18\x03 \x01(\x08\x12\x15\n\rerror_message\x18\x04 \x01(\t\"\x95\x02\n\x10\x45mailChatRequest\x12\r\n\x05\x65mail\x18\x01 \x01(\t\x12\x10\n\x08question\x18\x02 \x01(\t\x12\x17\n\x0f\x63onversation_id\x18\x03 \x01(\t\x12\x14\n\x0cuse_feedback\x18\x04 \x01(\x08\x12\x15\n\ruse_reranking\x18\x05 \x01(\x08\x12\r\n\x05top_k\x18\x06 \x01(\x05\x12\x1c\n\x14similarity_threshold\x18\x07 \x01(\x02\x12\x36\n\rsystem_config\x18\x08 \x01(\x0b\x32\x1f.knowledge_service.SystemConfig\x12\x19\n\x11max_history_turns\x18\t \x01(\x05\x12\x1a\n\x12\x63onversation_title\x18\n \x01(\t2\xa2\r\n\x10KnowledgeService\x12G\n\x04\x43hat\x12\x1e.knowledge_service.ChatRequest\x1a\x1f.knowledge_service.ChatResponse\x12U\n\nChatStream\x12\x1e.knowledge_service.ChatRequest\x1a%.knowledge_service.ChatStreamResponse0\x01\x12_\n\x10\x43hatConversation\x12*.knowledge_service.ConversationChatRequest\x1a\x1f.knowledge_service.ChatResponse\x12k\n\x12\x43reateConversation\x12,.knowledge_service.CreateConversationRequest\x1a\'.knowledge_service.ConversationResponse\x12w\n\x16GetConversationHistory\x12-.knowledge_service.ConversationHistoryRequest\x1a..knowledge_service.ConversationHistoryResponse\x12n\n\x11ListConversations\x12+.knowledge_service.ListConversationsRequest\x1a,.knowledge_service.ListConversationsResponse\x12k\n\x12UpdateConversation\x12,.knowledge_service.UpdateConversationRequest\x1a\'.knowledge_service.ConversationResponse\x12q\n\x12\x44\x65leteConversation\x12,.knowledge_service.DeleteConversationRequest\x1a-.knowledge_service.DeleteConversationResponse\x12Y\n\x0eSubmitFeedback\x12\".knowledge_service.FeedbackRequest\x1a#.knowledge_service.FeedbackResponse\x12k\n\x12GetFeedbackHistory\x12).knowledge_service.FeedbackHistoryRequest\x1a*.knowledge_service.FeedbackHistoryResponse\x12M\n\x08GetStats\x12\x1f.knowledge_service.StatsRequest\x1a .knowledge_service.StatsResponse\x12V\n\x0fSearchDocuments\x12 .knowledge_service.SearchRequest\x1a!.knowledge_service.SearchResponse\x12\x65\n\x14\x42\x61tchSearchDocuments\x12%.knowledge_service.BatchSearchRequest\x1a&.knowledge_service.BatchSearchResponse\x12V\n\tBatchChat\x12#.knowledge_service.BatchChatRequest\x1a$.knowledge_service.BatchChatResponse\x12\\\n\x0bHealthCheck\x12%.knowledge_service.HealthCheckRequest\x1a&.knowledge_service.HealthCheckResponse\x12h\n\x0bVerifyEmail\x12+.knowledge_service.EmailVerificationRequest\x1a,.knowledge_service.EmailVerificationResponse\x12\x61\n\x19\x43hatWithEmailVerification\x12#.knowledge_service.EmailChatRequest\x1a\x1f.knowledge_service.ChatResponseb\x06proto3')
 
 _globals = globals()
 _builder.BuildMessageAndEnumDescriptors(DESCRIPTOR, _globals)
@@ -61,52 +61,72 @@ if not _descriptor._USE_C_DESCRIPTORS:
   _globals['_DELETECONVERSATIONRESPONSE']._serialized_end=1313
   _globals['_CHATRESPONSE']._serialized_start=1316
   _globals['_CHATRESPONSE']._serialized_end=1552
-  _globals['_SOURCEDOCUMENT']._serialized_start=1555
-  _globals['_SOURCEDOCUMENT']._serialized_end=1720
-  _globals['_SOURCEDOCUMENT_METADATAENTRY']._serialized_start=1673
-  _globals['_SOURCEDOCUMENT_METADATAENTRY']._serialized_end=1720
-  _globals['_FEEDBACKINFO']._serialized_start=1723
-  _globals['_FEEDBACKINFO']._serialized_end=1871
-  _globals['_SIMILARQUESTION']._serialized_start=1873
-  _globals['_SIMILARQUESTION']._serialized_end=1957
-  _globals['_FEEDBACKREQUEST']._serialized_start=1960
-  _globals['_FEEDBACKREQUEST']._serialized_end=2153
-  _globals['_FEEDBACKRESPONSE']._serialized_start=2155
-  _globals['_FEEDBACKRESPONSE']._serialized_end=2234
-  _globals['_FEEDBACKHISTORYREQUEST']._serialized_start=2236
-  _globals['_FEEDBACKHISTORYREQUEST']._serialized_end=2278
-  _globals['_FEEDBACKHISTORYRESPONSE']._serialized_start=2280
-  _globals['_FEEDBACKHISTORYRESPONSE']._serialized_end=2397
-  _globals['_FEEDBACKRECORD']._serialized_start=2400
-  _globals['_FEEDBACKRECORD']._serialized_end=2646
-  _globals['_STATSREQUEST']._serialized_start=2648
-  _globals['_STATSREQUEST']._serialized_end=2662
-  _globals['_STATSRESPONSE']._serialized_start=2665
-  _globals['_STATSRESPONSE']._serialized_end=2898
-  _globals['_KNOWLEDGEBASESTATS']._serialized_start=2900
-  _globals['_KNOWLEDGEBASESTATS']._serialized_end=2994
-  _globals['_FEEDBACKSTATS']._serialized_start=2997
-  _globals['_FEEDBACKSTATS']._serialized_end=3171
-  _globals['_SYSTEMCONFIG']._serialized_start=3174
-  _globals['_SYSTEMCONFIG']._serialized_end=3309
-  _globals['_SEARCHREQUEST']._serialized_start=3311
-  _globals['_SEARCHREQUEST']._serialized_end=3352
-  _globals['_SEARCHRESPONSE']._serialized_start=3354
-  _globals['_SEARCHRESPONSE']._serialized_end=3460
-  _globals['_SEARCHRESULT']._serialized_start=3463
-  _globals['_SEARCHRESULT']._serialized_end=3623
-  _globals['_SEARCHRESULT_METADATAENTRY']._serialized_start=1673
-  _globals['_SEARCHRESULT_METADATAENTRY']._serialized_end=1720
-  _globals['_HEALTHCHECKREQUEST']._serialized_start=3625
-  _globals['_HEALTHCHECKREQUEST']._serialized_end=3645
-  _globals['_HEALTHCHECKRESPONSE']._serialized_start=3647
-  _globals['_HEALTHCHECKRESPONSE']._serialized_end=3718
-  _globals['_EMAILVERIFICATIONREQUEST']._serialized_start=3720
-  _globals['_EMAILVERIFICATIONREQUEST']._serialized_end=3761
-  _globals['_EMAILVERIFICATIONRESPONSE']._serialized_start=3763
-  _globals['_EMAILVERIFICATIONRESPONSE']._serialized_end=3865
-  _globals['_EMAILCHATREQUEST']._serialized_start=3868
-  _globals['_EMAILCHATREQUEST']._serialized_end=4145
-  _globals['_KNOWLEDGESERVICE']._serialized_start=4148
-  _globals['_KNOWLEDGESERVICE']._serialized_end=5568
+  _globals['_CHATSTREAMRESPONSE']._serialized_start=1555
+  _globals['_CHATSTREAMRESPONSE']._serialized_end=1714
+  _globals['_CHATSTREAMSOURCES']._serialized_start=1716
+  _globals['_CHATSTREAMSOURCES']._serialized_end=1796
+  _globals['_CHATSTREAMEND']._serialized_start=1799
+  _globals['_CHATSTREAMEND']._serialized_end=1975
+  _globals['_SOURCEDOCUMENT']._serialized_start=1978
+  _globals['_SOURCEDOCUMENT']._serialized_end=2143
+  _globals['_SOURCEDOCUMENT_METADATAENTRY']._serialized_start=2096
+  _globals['_SOURCEDOCUMENT_METADATAENTRY']._serialized_end=2143
+  _globals['_FEEDBACKINFO']._serialized_start=2146
+  _globals['_FEEDBACKINFO']._serialized_end=2294
+  _globals['_SIMILARQUESTION']._serialized_start=2296
+  _globals['_SIMILARQUESTION']._serialized_end=2380
+  _globals['_FEEDBACKREQUEST']._serialized_start=2383
+  _globals['_FEEDBACKREQUEST']._serialized_end=2576
+  _globals['_FEEDBACKRESPONSE']._serialized_start=2578
+  _globals['_FEEDBACKRESPONSE']._serialized_end=2657
+  _globals['_FEEDBACKHISTORYREQUEST']._serialized_start=2659
+  _globals['_FEEDBACKHISTORYREQUEST']._serialized_end=2701
+  _globals['_FEEDBACKHISTORYRESPONSE']._serialized_start=2703
+  _globals['_FEEDBACKHISTORYRESPONSE']._serialized_end=2820
+  _globals['_FEEDBACKRECORD']._serialized_start=2823
+  _globals['_FEEDBACKRECORD']._serialized_end=3069
+  _globals['_STATSREQUEST']._serialized_start=3071
+  _globals['_STATSREQUEST']._serialized_end=3085
+  _globals['_STATSRESPONSE']._serialized_start=3088
+  _globals['_STATSRESPONSE']._serialized_end=3504
+  _globals['_KNOWLEDGEBASESTATS']._serialized_start=3506
+  _globals['_KNOWLEDGEBASESTATS']._serialized_end=3600
+  _globals['_FEEDBACKSTATS']._serialized_start=3603
+  _globals['_FEEDBACKSTATS']._serialized_end=3777
+  _globals['_ANSWERCACHESTATS']._serialized_start=3780
+  _globals['_ANSWERCACHESTATS']._serialized_end=3919
+  _globals['_SEMANTICCACHESTATS']._serialized_start=3922
+  _globals['_SEMANTICCACHESTATS']._serialized_end=4059
+  _globals['_SINGLEFLIGHTSTATS']._serialized_start=4061
+  _globals['_SINGLEFLIGHTSTATS']._serialized_end=4161
+  _globals['_SYSTEMCONFIG']._serialized_start=4164
+  _globals['_SYSTEMCONFIG']._serialized_end=4299
+  _globals['_SEARCHREQUEST']._serialized_start=4301
+  _globals['_SEARCHREQUEST']._serialized_end=4342
+  _globals['_SEARCHRESPONSE']._serialized_start=4344
+  _globals['_SEARCHRESPONSE']._serialized_end=4450
+  _globals['_BATCHSEARCHREQUEST']._serialized_start=4452
+  _globals['_BATCHSEARCHREQUEST']._serialized_end=4500
+  _globals['_BATCHSEARCHRESPONSE']._serialized_start=4502
+  _globals['_BATCHSEARCHRESPONSE']._serialized_end=4615
+  _globals['_BATCHCHATREQUEST']._serialized_start=4617
+  _globals['_BATCHCHATREQUEST']._serialized_end=4701
+  _globals['_BATCHCHATRESPONSE']._serialized_start=4703
+  _globals['_BATCHCHATRESPONSE']._serialized_end=4812
+  _globals['_SEARCHRESULT']._serialized_start=4815
+  _globals['_SEARCHRESULT']._serialized_end=4975
+  _globals['_SEARCHRESULT_METADATAENTRY']._serialized_start=2096
+  _globals['_SEARCHRESULT_METADATAENTRY']._serialized_end=2143
+  _globals['_HEALTHCHECKREQUEST']._serialized_start=4977
+  _globals['_HEALTHCHECKREQUEST']._serialized_end=4997
+  _globals['_HEALTHCHECKRESPONSE']._serialized_start=4999
+  _globals['_HEALTHCHECKRESPONSE']._serialized_end=5070
+  _globals['_EMAILVERIFICATIONREQUEST']._serialized_start=5072
+  _globals['_EMAILVERIFICATIONREQUEST']._serialized_end=5113
+  _globals['_EMAILVERIFICATIONRESPONSE']._serialized_start=5115
+  _globals['_EMAILVERIFICATIONRESPONSE']._serialized_end=5217
+  _globals['_EMAILCHATREQUEST']._serialized_start=5220
+  _globals['_EMAILCHATREQUEST']._serialized_end=5497
+  _globals['_KNOWLEDGESERVICE']._serialized_start=5500
+  _globals['_KNOWLEDGESERVICE']._serialized_end=7198
 # @@protoc_insertion_point(module_scope)
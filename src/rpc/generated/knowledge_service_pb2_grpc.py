@@ -40,6 +40,11 @@ class KnowledgeServiceStub(object):
                 request_serializer=knowledge__service__pb2.ChatRequest.SerializeToString,
                 response_deserializer=knowledge__service__pb2.ChatResponse.FromString,
                 _registered_method=True)
+        self.ChatStream = channel.unary_stream(
+                '/knowledge_service.KnowledgeService/ChatStream',
+                request_serializer=knowledge__service__pb2.ChatRequest.SerializeToString,
+                response_deserializer=knowledge__service__pb2.ChatStreamResponse.FromString,
+                _registered_method=True)
         self.ChatConversation = channel.unary_unary(
                 '/knowledge_service.KnowledgeService/ChatConversation',
                 request_serializer=knowledge__service__pb2.ConversationChatRequest.SerializeToString,
@@ -90,6 +95,16 @@ class KnowledgeServiceStub(object):
                 request_serializer=knowledge__service__pb2.SearchRequest.SerializeToString,
                 response_deserializer=knowledge__service__pb2.SearchResponse.FromString,
                 _registered_method=True)
+        self.BatchSearchDocuments = channel.unary_unary(
+                '/knowledge_service.KnowledgeService/BatchSearchDocuments',
+                request_serializer=knowledge__service__pb2.BatchSearchRequest.SerializeToString,
+                response_deserializer=knowledge__service__pb2.BatchSearchResponse.FromString,
+                _registered_method=True)
+        self.BatchChat = channel.unary_unary(
+                '/knowledge_service.KnowledgeService/BatchChat',
+                request_serializer=knowledge__service__pb2.BatchChatRequest.SerializeToString,
+                response_deserializer=knowledge__service__pb2.BatchChatResponse.FromString,
+                _registered_method=True)
         self.HealthCheck = channel.unary_unary(
                 '/knowledge_service.KnowledgeService/HealthCheck',
                 request_serializer=knowledge__service__pb2.HealthCheckRequest.SerializeToString,
@@ -118,6 +133,13 @@ class KnowledgeServiceServicer(object):
         context.set_details('Method not implemented!')
         raise NotImplementedError('Method not implemented!')
 
+    def ChatStream(self, request, context):
+        """流式聊天接口：先返回来源文档，再逐段返回答案，最后返回反馈信息
+        """
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
+
     def ChatConversation(self, request, context):
         """多轮对话聊天接口
         """
@@ -188,6 +210,20 @@ class KnowledgeServiceServicer(object):
         context.set_details('Method not implemented!')
         raise NotImplementedError('Method not implemented!')
 
+    def BatchSearchDocuments(self, request, context):
+        """批量搜索文档：查询批量嵌入后一次检索，结果与请求顺序一致
+        """
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
+
+    def BatchChat(self, request, context):
+        """批量聊天：按并发上限并行回答，结果与请求顺序一致
+        """
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
+
     def HealthCheck(self, request, context):
         """健康检查
         """
@@ -217,6 +253,11 @@ def add_KnowledgeServiceServicer_to_server(servicer, server):
                     request_deserializer=knowledge__service__pb2.ChatRequest.FromString,
                     response_serializer=knowledge__service__pb2.ChatResponse.SerializeToString,
             ),
+            'ChatStream': grpc.unary_stream_rpc_method_handler(
+                    servicer.ChatStream,
+                    request_deserializer=knowledge__service__pb2.ChatRequest.FromString,
+                    response_serializer=knowledge__service__pb2.ChatStreamResponse.SerializeToString,
+            ),
             'ChatConversation': grpc.unary_unary_rpc_method_handler(
                     servicer.ChatConversation,
                     request_deserializer=knowledge__service__pb2.ConversationChatRequest.FromString,
@@ -267,6 +308,16 @@ def add_KnowledgeServiceServicer_to_server(servicer, server):
                     request_deserializer=knowledge__service__pb2.SearchRequest.FromString,
                     response_serializer=knowledge__service__pb2.SearchResponse.SerializeToString,
             ),
+            'BatchSearchDocuments': grpc.unary_unary_rpc_method_handler(
+                    servicer.BatchSearchDocuments,
+                    request_deserializer=knowledge__service__pb2.BatchSearchRequest.FromString,
+                    response_serializer=knowledge__service__pb2.BatchSearchResponse.SerializeToString,
+            ),
+            'BatchChat': grpc.unary_unary_rpc_method_handler(
+                    servicer.BatchChat,
+                    request_deserializer=knowledge__service__pb2.BatchChatRequest.FromString,
+                    response_serializer=knowledge__service__pb2.BatchChatResponse.SerializeToString,
+            ),
             'HealthCheck': grpc.unary_unary_rpc_method_handler(
                     servicer.HealthCheck,
                     request_deserializer=knowledge__service__pb2.HealthCheckRequest.FromString,
@@ -321,6 +372,33 @@ class KnowledgeService(object):
             metadata,
             _registered_method=True)
 
+    @staticmethod
+    def ChatStream(request,
+            target,
+            options=(),
+            channel_credentials=None,
+            call_credentials=None,
+            insecure=False,
+            compression=None,
+            wait_for_ready=None,
+            timeout=None,
+            metadata=None):
+        return grpc.experimental.unary_stream(
+            request,
+            target,
+            '/knowledge_service.KnowledgeService/ChatStream',
+            knowledge__service__pb2.ChatRequest.SerializeToString,
+            knowledge__service__pb2.ChatStreamResponse.FromString,
+            options,
+            channel_credentials,
+            insecure,
+            call_credentials,
+            compression,
+            wait_for_ready,
+            timeout,
+            metadata,
+            _registered_method=True)
+
     @staticmethod
     def ChatConversation(request,
             target,
@@ -591,6 +669,60 @@ class KnowledgeService(object):
             metadata,
             _registered_method=True)
 
+    @staticmethod
+    def BatchSearchDocuments(request,
+            target,
+            options=(),
+            channel_credentials=None,
+            call_credentials=None,
+            insecure=False,
+            compression=None,
+            wait_for_ready=None,
+            timeout=None,
+            metadata=None):
+        return grpc.experimental.unary_unary(
+            request,
+            target,
+            '/knowledge_service.KnowledgeService/BatchSearchDocuments',
+            knowledge__service__pb2.BatchSearchRequest.SerializeToString,
+            knowledge__service__pb2.BatchSearchResponse.FromString,
+            options,
+            channel_credentials,
+            insecure,
+            call_credentials,
+            compression,
+            wait_for_ready,
+            timeout,
+            metadata,
+            _registered_method=True)
+
+    @staticmethod
+    def BatchChat(request,
+            target,
+            options=(),
+            channel_credentials=None,
+            call_credentials=None,
+            insecure=False,
+            compression=None,
+            wait_for_ready=None,
+            timeout=None,
+            metadata=None):
+        return grpc.experimental.unary_unary(
+            request,
+            target,
+            '/knowledge_service.KnowledgeService/BatchChat',
+            knowledge__service__pb2.BatchChatRequest.SerializeToString,
+            knowledge__service__pb2.BatchChatResponse.FromString,
+            options,
+            channel_credentials,
+            insecure,
+            call_credentials,
+            compression,
+            wait_for_ready,
+            timeout,
+            metadata,
+            _registered_method=True)
+
     @staticmethod
     def HealthCheck(request,
             target,
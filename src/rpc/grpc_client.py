@@ -103,6 +103,49 @@ class KnowledgeServiceClient:
             logger.error(f"聊天请求失败: {e}")
             return None
     
+    def chat_stream(self, question, use_feedback=True):
+        """流式聊天对话，边生成边打印答案"""
+        try:
+            request = knowledge_service_pb2.ChatRequest(
+                question=question,
+                use_feedback=use_feedback
+            )
+            
+            end = None
+            print(f"\n💬 问题: {question}")
+            for message in self.stub.ChatStream(request):
+                event = message.WhichOneof("event")
+                if event == "sources":
+                    documents = message.sources.source_documents
+                    if documents:
+                        print(f"📚 参考文档 ({len(documents)} 个):")
+                        for i, doc in enumerate(documents[:3], 1):
+                            print(f"  {i}. {doc.source}: {doc.content[:100]}...")
+                    print("📝 答案: ", end="", flush=True)
+                elif event == "answer_delta":
+                    print(message.answer_delta, end="", flush=True)
+                elif event == "end":
+                    end = message.end
+            print()
+            
+            if end is None or not end.success:
+                print(f"❌ 聊天失败: {end.error_message if end else '流意外结束'}")
+                return None
+            
+            if end.feedback_info.is_improved:
+                print(f"🎯 优化后的答案 (置信度: {end.feedback_info.confidence_score:.2%}): {end.final_answer}")
+            
+            if end.feedback_info.similar_questions:
+                print(f"\n🔍 相似问题:")
+                for sq in end.feedback_info.similar_questions:
+                    print(f"  - {sq.question} (相似度: {sq.similarity_score:.2%})")
+            
+            return end
+                
+        except grpc.RpcError as e:
+            logger.error(f"流式聊天请求失败: {e}")
+            return None
+    
     def submit_feedback(self, question, original_answer, feedback_type, 
                        corrected_answer=None, feedback_text=None):
         """提交反馈"""
@@ -176,6 +219,24 @@ class KnowledgeServiceClient:
                 print(f"  改进答案: {response.feedback_system.improved_answers}")
                 print(f"  满意度: {response.feedback_system.satisfaction_rate:.2%}")
                 
+                if response.answer_cache.enabled:
+                    print(f"\n⚡ 答案缓存:")
+                    print(f"  缓存条目: {response.answer_cache.size}")
+                    print(f"  命中/未命中: {response.answer_cache.hits}/{response.answer_cache.misses}")
+                    print(f"  命中率: {response.answer_cache.hit_rate:.2%}")
+                
+                if response.semantic_cache.enabled:
+                    print(f"\n🧠 语义缓存:")
+                    print(f"  缓存条目: {response.semantic_cache.size}")
+                    print(f"  命中/未命中: {response.semantic_cache.hits}/{response.semantic_cache.misses}")
+                    print(f"  命中率: {response.semantic_cache.hit_rate:.2%}")
+                    print(f"  相似度阈值: {response.semantic_cache.threshold:.2f}")
+                
+                if response.single_flight.collapsed:
+                    print(f"\n🔗 请求合并:")
+                    print(f"  执行/合并: {response.single_flight.executions}/{response.single_flight.collapsed}")
+                    print(f"  合并率: {response.single_flight.collapse_rate:.2%}")
+                
                 print(f"\n⚙️ 系统配置:")
                 print(f"  反馈学习: {'启用' if response.system_config.feedback_learning_enabled else '禁用'}")
                 print(f"  置信阈值: {response.system_config.confidence_threshold:.2f}")
@@ -280,6 +341,62 @@ class KnowledgeServiceClient:
         except grpc.RpcError as e:
             logger.error(f"搜索请求失败: {e}")
             return None
+    
+    def batch_search_documents(self, queries, k=5):
+        """批量搜索文档"""
+        try:
+            request = knowledge_service_pb2.BatchSearchRequest(
+                queries=queries,
+                k=k
+            )
+            
+            response = self.stub.BatchSearchDocuments(request)
+            
+            if response.success:
+                for query, item in zip(queries, response.results):
+                    if not item.success:
+                        print(f"\n❌ [{query}] 搜索失败: {item.error_message}")
+                        continue
+                    print(f"\n🔍 [{query}] 搜索结果 ({len(item.results)} 个):")
+                    for i, result in enumerate(item.results, 1):
+                        print(f"  {i}. [评分: {result.score:.3f}] {result.content[:100]}...")
+                
+                return response.results
+            else:
+                print(f"❌ 批量搜索失败: {response.error_message}")
+                return None
+                
+        except grpc.RpcError as e:
+            logger.error(f"批量搜索文档失败: {e}")
+            return None
+    
+    def batch_chat(self, questions, use_feedback=True, max_parallelism=0):
+        """批量聊天"""
+        try:
+            request = knowledge_service_pb2.BatchChatRequest(
+                questions=questions,
+                use_feedback=use_feedback,
+                max_parallelism=max_parallelism
+            )
+            
+            response = self.stub.BatchChat(request)
+            
+            if response.success:
+                for item in response.results:
+                    print(f"\n🤖 问题: {item.question}")
+                    if item.success:
+                        print(f"📝 答案: {item.final_answer}")
+                    else:
+                        print(f"❌ 失败: {item.error_message}")
+                
+                return response.results
+            else:
+                print(f"❌ 批量聊天失败: {response.error_message}")
+                return None
+                
+        except grpc.RpcError as e:
+            logger.error(f"批量聊天请求失败: {e}")
+            return None
 
 def interactive_demo():
     """交互式演示"""
@@ -355,8 +472,8 @@ def interactive_demo():
                     if response and response.feedback_info and 'conversation_id' in response.feedback_info:
                         conversation_id = response.feedback_info['conversation_id']
                 else:
-                    # 普通聊天
-                    response = client.chat(question)
+                    # 普通聊天（流式输出）
+                    response = client.chat_stream(question)
                 
                 if response:
                     # 询问反馈
@@ -402,6 +519,8 @@ def main():
     parser.add_argument('--health', action='store_true', help='仅进行健康检查')
     parser.add_argument('--stats', action='store_true', help='仅获取统计信息')
     parser.add_argument('--question', help='发送单个问题')
+    parser.add_argument('--stream', action='store_true', help='流式输出答案')
+    parser.add_argument('--batch', nargs='+', metavar='QUESTION', help='批量发送多个问题')
     parser.add_argument('--email', help='邮箱地址 (用于验证和保存对话)')
     parser.add_argument('--verify-email', help='验证指定邮箱地址')
     
@@ -416,10 +535,15 @@ def main():
             client.get_stats()
         elif args.verify_email:
             client.verify_email(args.verify_email)
+        elif args.batch:
+            client.batch_chat(args.batch)
         elif args.question:
             if args.email:
                 # 带邮箱验证的聊天
                 client.chat_with_email(args.email, args.question)
+            elif args.stream:
+                # 流式聊天
+                client.chat_stream(args.question)
             else:
                 # 普通聊天
                 client.chat(args.question)
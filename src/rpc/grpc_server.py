@@ -10,6 +10,7 @@ import sys
 import logging
 import json
 import uuid
+import asyncio
 from concurrent import futures
 from pathlib import Path
 from typing import Dict, Any, List
@@ -37,13 +38,28 @@ except ImportError:
 
 # 导入业务逻辑模块
 try:
-    from enhanced_knowledge_base import EnhancedKnowledgeBase
+    from async_knowledge_base import AsyncKnowledgeBase
     from feedback_system import FeedbackRecord
-    from conversation_service_impl import ConversationServiceImpl
 except ImportError:
-    from src.app.enhanced_knowledge_base import EnhancedKnowledgeBase
+    from src.app.async_knowledge_base import AsyncKnowledgeBase
     from src.app.feedback_system import FeedbackRecord
-    from src.rpc.conversation_service_impl import ConversationServiceImpl
+
+# 截止时间异常须与知识库抛出的异常来自同一模块
+from src.app.deadline import Deadline, DeadlineExceeded, RequestCancelled
+
+from src.app.metrics import REGISTRY, MetricsServer
+from src.app.tracing import FileSpanExporter, RequestTracer
+
+try:
+    from admission import AdmissionController, AdmissionInterceptor, AsyncAdmissionInterceptor
+    from interceptors import (MetricsInterceptor, AsyncMetricsInterceptor,
+                              TracingInterceptor, AsyncTracingInterceptor)
+except ImportError:
+    from src.rpc.admission import AdmissionController, AdmissionInterceptor, AsyncAdmissionInterceptor
+    from src.rpc.interceptors import (MetricsInterceptor, AsyncMetricsInterceptor,
+                                      TracingInterceptor, AsyncTracingInterceptor)
+
+from src.rpc.service_container import ServiceContainer, CORE_COMPONENTS, DEFERRED_COMPONENTS
 
 try:
     from config.config import get_config
@@ -61,36 +77,26 @@ logger = logging.getLogger('kdb')
 class KnowledgeServiceImpl(knowledge_service_pb2_grpc.KnowledgeServiceServicer):
     """知识库服务实现"""
     
-    def __init__(self, knowledge_base=None):
-        """初始化服务"""
-        self.kb = knowledge_base
-        self.config = None
+    def __init__(self, knowledge_base=None, container=None, load_index=True):
+        """
+        初始化服务
+        
+        Args:
+            knowledge_base: 已创建的知识库，未传入容器时使用
+            container: 服务依赖容器，默认新建；对话数据库在首次使用时连接
+            load_index: 是否在此加载向量索引，False 时由调用方在服务器启动后加载
+        """
+        self.container = container or ServiceContainer(knowledge_base=knowledge_base)
+        self.config = self.container.config
         self.version = "1.0.0"
-        self._initialize_knowledge_base()
-        logger.info(f"QAchain: {self.kb.qa_chain}")
-        self.conversation_service = ConversationServiceImpl(self.kb)
-        logger.info(f"chats,QAchain: {self.conversation_service.kb.qa_chain}")
+        self.kb = self.container.knowledge_base
+        if load_index:
+            self.container.warm_up(("index",))
     
-    def _initialize_knowledge_base(self):
-        """初始化知识库"""
-        try:
-            # 加载配置
-            self.config = get_config()
-            
-            # 初始化增强知识库
-            self.kb = EnhancedKnowledgeBase()
-            
-            # 加载向量存储
-            vector_store_path = Path(self.config.vector_store.store_path)
-            if vector_store_path.exists():
-                self.kb.load_vector_store()
-                logger.info("知识库加载成功")
-            else:
-                logger.warning(f"向量存储不存在: {vector_store_path}")
-                
-        except Exception as e:
-            logger.error(f"初始化知识库失败: {e}")
-            raise
+    @property
+    def conversation_service(self):
+        """对话服务（由容器在首次使用时创建）"""
+        return self.container.conversation_service
     
     def Chat(self, request, context):
         """聊天接口"""
@@ -103,53 +109,21 @@ class KnowledgeServiceImpl(knowledge_service_pb2_grpc.KnowledgeServiceServicer):
                     error_message="知识库未初始化或向量存储不存在"
                 )
             
-            # 调用增强知识库进行问答
+            # 调用增强知识库进行问答（超时或客户端取消时中止检索与LLM调用）
             result = self.kb.ask_question_with_feedback(
                 question=request.question,
-                use_feedback=request.use_feedback
-            )
-            
-            # 转换来源文档
-            source_documents = []
-            for doc in result.get("source_documents", []):
-                source_doc = knowledge_service_pb2.SourceDocument(
-                    content=doc["content"],
-                    source=doc["source"],
-                    metadata=doc["metadata"]
-                )
-                source_documents.append(source_doc)
-            
-            # 转换反馈信息
-            feedback_info_data = result.get("feedback_info", {})
-            similar_questions = []
-            for sq in feedback_info_data.get("similar_questions", []):
-                similar_q = knowledge_service_pb2.SimilarQuestion(
-                    question=sq.get("question", ""),
-                    similarity_score=sq.get("similarity_score", 0.0),
-                    feedback_type=sq.get("feedback_type", "")
-                )
-                similar_questions.append(similar_q)
-            
-            feedback_info = knowledge_service_pb2.FeedbackInfo(
-                is_improved=feedback_info_data.get("is_improved", False),
-                confidence_score=feedback_info_data.get("confidence_score", 0.0),
-                feedback_count=feedback_info_data.get("feedback_count", 0),
-                similar_questions=similar_questions
+                use_feedback=request.use_feedback,
+                deadline=Deadline.from_grpc_context(context)
             )
             
-            # 构建响应
-            response = knowledge_service_pb2.ChatResponse(
-                question=result["question"],
-                original_answer=result["original_answer"],
-                final_answer=result["final_answer"],
-                source_documents=source_documents,
-                feedback_info=feedback_info,
-                success=True
-            )
+            response = self._to_chat_response(result)
             
             logger.info(f"聊天请求处理成功: {request.question[:50]}...")
             return response
             
+        except (DeadlineExceeded, RequestCancelled) as e:
+            logger.info(f"聊天请求中止: {e}")
+            context.abort(self._interrupted_status(e), str(e))
         except Exception as e:
             logger.error(f"聊天请求处理失败: {e}")
             return knowledge_service_pb2.ChatResponse(
@@ -157,6 +131,118 @@ class KnowledgeServiceImpl(knowledge_service_pb2_grpc.KnowledgeServiceServicer):
                 error_message=str(e)
             )
     
+    def ChatStream(self, request, context):
+        """流式聊天接口"""
+        try:
+            logger.info(f"收到流式聊天请求: {request.question}")
+            
+            if not self.kb or not self.kb.qa_chain:
+                yield knowledge_service_pb2.ChatStreamResponse(
+                    end=knowledge_service_pb2.ChatStreamEnd(
+                        success=False,
+                        error_message="知识库未初始化或向量存储不存在"
+                    )
+                )
+                return
+            
+            events = self.kb.ask_question_with_feedback_stream(
+                question=request.question,
+                use_feedback=request.use_feedback,
+                deadline=Deadline.from_grpc_context(context)
+            )
+            for event in events:
+                if not context.is_active():
+                    # 客户端已断开，关闭生成器以停止LLM生成
+                    events.close()
+                    logger.info(f"客户端取消流式聊天: {request.question[:50]}...")
+                    return
+                
+                yield self._to_stream_message(event)
+            
+            logger.info(f"流式聊天请求处理成功: {request.question[:50]}...")
+            
+        except (DeadlineExceeded, RequestCancelled) as e:
+            logger.info(f"流式聊天请求中止: {e}")
+            context.abort(self._interrupted_status(e), str(e))
+        except Exception as e:
+            logger.error(f"流式聊天请求处理失败: {e}")
+            yield knowledge_service_pb2.ChatStreamResponse(
+                end=knowledge_service_pb2.ChatStreamEnd(
+                    success=False,
+                    error_message=str(e)
+                )
+            )
+    
+    @staticmethod
+    def _interrupted_status(error: Exception) -> grpc.StatusCode:
+        """请求中止原因对应的状态码"""
+        return grpc.StatusCode.CANCELLED if isinstance(error, RequestCancelled) else grpc.StatusCode.DEADLINE_EXCEEDED
+    
+    @classmethod
+    def _to_chat_response(cls, result: Dict[str, Any]) -> Any:
+        """转换问答结果为聊天响应"""
+        return knowledge_service_pb2.ChatResponse(
+            question=result["question"],
+            original_answer=result["original_answer"],
+            final_answer=result["final_answer"],
+            source_documents=cls._to_source_documents(result.get("source_documents", [])),
+            feedback_info=cls._to_feedback_info(result.get("feedback_info", {})),
+            success=True
+        )
+    
+    @classmethod
+    def _to_stream_message(cls, event: Dict[str, Any]) -> Any:
+        """转换流式问答事件为流式聊天消息"""
+        if event["type"] == "sources":
+            return knowledge_service_pb2.ChatStreamResponse(
+                sources=knowledge_service_pb2.ChatStreamSources(
+                    source_documents=cls._to_source_documents(event["source_documents"])
+                )
+            )
+        if event["type"] == "delta":
+            return knowledge_service_pb2.ChatStreamResponse(answer_delta=event["text"])
+        
+        result = event["response"]
+        return knowledge_service_pb2.ChatStreamResponse(
+            end=knowledge_service_pb2.ChatStreamEnd(
+                question=result["question"],
+                original_answer=result["original_answer"],
+                final_answer=result["final_answer"],
+                feedback_info=cls._to_feedback_info(result.get("feedback_info", {})),
+                success=True
+            )
+        )
+    
+    @staticmethod
+    def _to_source_documents(documents: List[Dict[str, Any]]) -> List[Any]:
+        """转换来源文档"""
+        return [
+            knowledge_service_pb2.SourceDocument(
+                content=doc["content"],
+                source=doc["source"],
+                metadata=doc["metadata"]
+            )
+            for doc in documents
+        ]
+    
+    @staticmethod
+    def _to_feedback_info(feedback_info_data: Dict[str, Any]) -> Any:
+        """转换反馈信息"""
+        similar_questions = [
+            knowledge_service_pb2.SimilarQuestion(
+                question=sq.get("question", ""),
+                similarity_score=sq.get("similarity_score", 0.0),
+                feedback_type=sq.get("feedback_type", "")
+            )
+            for sq in feedback_info_data.get("similar_questions", [])
+        ]
+        return knowledge_service_pb2.FeedbackInfo(
+            is_improved=feedback_info_data.get("is_improved", False),
+            confidence_score=feedback_info_data.get("confidence_score", 0.0),
+            feedback_count=feedback_info_data.get("feedback_count", 0),
+            similar_questions=similar_questions
+        )
+    
     def SubmitFeedback(self, request, context):
         """提交反馈"""
         try:
@@ -304,10 +390,42 @@ class KnowledgeServiceImpl(knowledge_service_pb2_grpc.KnowledgeServiceServicer):
                 feedback_db_path=config_data.get("feedback_db_path", "")
             )
             
+            # 转换答案缓存统计
+            cache_data = stats.get("answer_cache") or {}
+            answer_cache = knowledge_service_pb2.AnswerCacheStats(
+                enabled=bool(cache_data),
+                size=cache_data.get("size", 0),
+                hits=cache_data.get("hits", 0),
+                misses=cache_data.get("misses", 0),
+                hit_rate=cache_data.get("hit_rate", 0.0),
+                evictions=cache_data.get("evictions", 0),
+                invalidations=cache_data.get("invalidations", 0)
+            )
+            semantic_data = stats.get("semantic_cache") or {}
+            semantic_cache = knowledge_service_pb2.SemanticCacheStats(
+                enabled=bool(semantic_data),
+                size=semantic_data.get("size", 0),
+                hits=semantic_data.get("hits", 0),
+                misses=semantic_data.get("misses", 0),
+                hit_rate=semantic_data.get("hit_rate", 0.0),
+                evictions=semantic_data.get("evictions", 0),
+                threshold=semantic_data.get("threshold", 0.0)
+            )
+            single_flight_data = stats.get("single_flight") or {}
+            single_flight = knowledge_service_pb2.SingleFlightStats(
+                executions=single_flight_data.get("executions", 0),
+                collapsed=single_flight_data.get("collapsed", 0),
+                in_flight=single_flight_data.get("in_flight", 0),
+                collapse_rate=single_flight_data.get("collapse_rate", 0.0)
+            )
+            
             response = knowledge_service_pb2.StatsResponse(
                 knowledge_base=kb_stats,
                 feedback_system=feedback_stats,
                 system_config=system_config,
+                answer_cache=answer_cache,
+                semantic_cache=semantic_cache,
+                single_flight=single_flight,
                 success=True
             )
             
@@ -336,22 +454,9 @@ class KnowledgeServiceImpl(knowledge_service_pb2_grpc.KnowledgeServiceServicer):
             k = request.k if request.k > 0 else 5
             search_results = self.kb.search_documents(request.query, k=k)
             
-            # 转换搜索结果
-            results = []
-            for result in search_results:
-                search_result = knowledge_service_pb2.SearchResult(
-                    content=result.get("content", ""),
-                    score=result.get("score", 0.0),
-                    metadata=result.get("metadata", {})
-                )
-                results.append(search_result)
-            
-            response = knowledge_service_pb2.SearchResponse(
-                results=results,
-                success=True
-            )
+            response = self._to_search_response(search_results)
             
-            logger.info(f"搜索完成: 返回 {len(results)} 个结果")
+            logger.info(f"搜索完成: 返回 {len(response.results)} 个结果")
             return response
             
         except Exception as e:
@@ -361,14 +466,120 @@ class KnowledgeServiceImpl(knowledge_service_pb2_grpc.KnowledgeServiceServicer):
                 error_message=str(e)
             )
     
+    def BatchSearchDocuments(self, request, context):
+        """批量搜索文档"""
+        try:
+            queries = list(request.queries)
+            logger.info(f"批量搜索文档: {len(queries)} 个查询")
+            
+            error = self._check_batch(queries, need_qa_chain=False)
+            if error:
+                return knowledge_service_pb2.BatchSearchResponse(success=False, error_message=error)
+            
+            k = request.k if request.k > 0 else 5
+            valid = [i for i, query in enumerate(queries) if query.strip()]
+            search_results = self.kb.search_documents_batch([queries[i] for i in valid], k=k)
+            
+            response = self._to_batch_search_response(queries, valid, search_results)
+            logger.info(f"批量搜索完成: {len(valid)}/{len(queries)} 个有效查询")
+            return response
+            
+        except Exception as e:
+            logger.error(f"批量搜索文档失败: {e}")
+            return knowledge_service_pb2.BatchSearchResponse(
+                success=False,
+                error_message=str(e)
+            )
+    
+    def BatchChat(self, request, context):
+        """批量聊天"""
+        try:
+            questions = list(request.questions)
+            logger.info(f"收到批量聊天请求: {len(questions)} 个问题")
+            
+            error = self._check_batch(questions, need_qa_chain=True)
+            if error:
+                return knowledge_service_pb2.BatchChatResponse(success=False, error_message=error)
+            
+            results = self.kb.ask_questions_batch(
+                questions,
+                use_feedback=request.use_feedback,
+                max_parallelism=self._batch_parallelism(request),
+                deadline=Deadline.from_grpc_context(context)
+            )
+            
+            response = self._to_batch_chat_response(questions, results)
+            logger.info(f"批量聊天完成: {len(questions)} 个问题")
+            return response
+            
+        except Exception as e:
+            logger.error(f"批量聊天请求处理失败: {e}")
+            return knowledge_service_pb2.BatchChatResponse(
+                success=False,
+                error_message=str(e)
+            )
+    
+    def _check_batch(self, items: List[str], need_qa_chain: bool) -> str:
+        """检查批量请求，返回错误信息（无错误时为空字符串）"""
+        if not self.kb or not self.kb.vector_store or (need_qa_chain and not self.kb.qa_chain):
+            return "知识库未初始化或向量存储不存在"
+        max_items = self.config.batch.max_items
+        if len(items) > max_items:
+            return f"批量请求条目数 {len(items)} 超过上限 {max_items}"
+        return ""
+    
+    def _batch_parallelism(self, request) -> int:
+        """批量聊天并发数：客户端可调低，但不超过服务端配置"""
+        limit = self.config.batch.chat_parallelism
+        return min(request.max_parallelism, limit) if request.max_parallelism > 0 else limit
+    
+    @staticmethod
+    def _to_search_response(search_results: List[Dict[str, Any]]) -> Any:
+        """转换搜索结果"""
+        return knowledge_service_pb2.SearchResponse(
+            results=[
+                knowledge_service_pb2.SearchResult(
+                    content=result.get("content", ""),
+                    score=result.get("score", 0.0),
+                    metadata=result.get("metadata", {})
+                )
+                for result in search_results
+            ],
+            success=True
+        )
+    
+    @classmethod
+    def _to_batch_search_response(cls, queries: List[str], valid: List[int],
+                                  search_results: List[List[Dict[str, Any]]]) -> Any:
+        """转换批量搜索结果，空查询对应位置为错误项"""
+        results = [
+            knowledge_service_pb2.SearchResponse(success=False, error_message="查询不能为空")
+            for _ in queries
+        ]
+        for i, items in zip(valid, search_results):
+            results[i] = cls._to_search_response(items)
+        return knowledge_service_pb2.BatchSearchResponse(results=results, success=True)
+    
+    @classmethod
+    def _to_batch_chat_response(cls, questions: List[str], results: List[Any]) -> Any:
+        """转换批量问答结果，失败的问题对应位置为错误项"""
+        return knowledge_service_pb2.BatchChatResponse(
+            results=[
+                knowledge_service_pb2.ChatResponse(question=question, success=False, error_message=str(result))
+                if isinstance(result, Exception) else cls._to_chat_response(result)
+                for question, result in zip(questions, results)
+            ],
+            success=True
+        )
+    
     def HealthCheck(self, request, context):
         """健康检查"""
         try:
-            # 检查知识库状态
+            # 检查知识库状态（向量索引加载完成前报告 initializing）
             healthy = self.kb is not None
             status = "healthy" if healthy else "unhealthy"
             
-            if healthy and self.kb.qa_chain:
+            if healthy and self.container.is_initialized("index") and self.kb.qa_chain:
                 status = "ready"
             elif healthy:
                 status = "initializing"
@@ -392,7 +603,15 @@ class KnowledgeServiceImpl(knowledge_service_pb2_grpc.KnowledgeServiceServicer):
     # 多轮对话相关接口
     def ChatConversation(self, request, context):
         """多轮对话聊天接口"""
-        return self.conversation_service.chat_conversation(request)
+        return self._conversation_chat("chat_conversation", request, context)
+    
+    def _conversation_chat(self, method, request, context):
+        """执行对话聊天，超时或客户端取消时以对应状态码结束请求"""
+        try:
+            return getattr(self.conversation_service, method)(request, Deadline.from_grpc_context(context))
+        except (DeadlineExceeded, RequestCancelled) as e:
+            logger.info(f"对话聊天请求中止: {e}")
+            context.abort(self._interrupted_status(e), str(e))
         
     def CreateConversation(self, request, context):
         """创建对话接口"""
@@ -420,17 +639,262 @@ class KnowledgeServiceImpl(knowledge_service_pb2_grpc.KnowledgeServiceServicer):
         
     def ChatWithEmailVerification(self, request, context):
         """带邮箱验证的对话聊天接口"""
-        return self.conversation_service.chat_with_email_verification(request)
+        return self._conversation_chat("chat_with_email_verification", request, context)
+
+def _run_blocking(name):
+    """将同步接口包装为在阻塞线程池中执行的异步接口"""
+    sync_method = getattr(KnowledgeServiceImpl, name)
+    
+    async def handler(self, request, context):
+        return await self.async_kb.run_blocking(sync_method, self, request, context)
+    
+    handler.__name__ = name
+    handler.__doc__ = f"{sync_method.__doc__}（在阻塞线程池中执行）"
+    return handler
+
+class AsyncKnowledgeServiceImpl(KnowledgeServiceImpl):
+    """
+    基于grpc.aio的知识库服务实现
+    
+    问答接口使用异步LLM调用，等待中的请求只占用协程；
+    其余接口的数据库与检索操作在有界线程池中执行，不阻塞事件循环
+    """
+    
+    def __init__(self, knowledge_base=None, max_blocking_workers=10, container=None, load_index=True):
+        """初始化服务"""
+        super().__init__(knowledge_base, container, load_index)
+        self.async_kb = AsyncKnowledgeBase(self.kb, max_blocking_workers)
+    
+    async def Chat(self, request, context):
+        """聊天接口"""
+        try:
+            logger.info(f"收到聊天请求: {request.question}")
+            
+            if not self.kb or not self.kb.qa_chain:
+                return knowledge_service_pb2.ChatResponse(
+                    success=False,
+                    error_message="知识库未初始化或向量存储不存在"
+                )
+            
+            result = await self.async_kb.ask_question_with_feedback(
+                question=request.question,
+                use_feedback=request.use_feedback,
+                deadline=Deadline.from_grpc_context(context)
+            )
+            response = self._to_chat_response(result)
+            
+            logger.info(f"聊天请求处理成功: {request.question[:50]}...")
+            return response
+            
+        except (DeadlineExceeded, RequestCancelled) as e:
+            logger.info(f"聊天请求中止: {e}")
+            await context.abort(self._interrupted_status(e), str(e))
+        except Exception as e:
+            logger.error(f"聊天请求处理失败: {e}")
+            return knowledge_service_pb2.ChatResponse(
+                success=False,
+                error_message=str(e)
+            )
+    
+    async def ChatStream(self, request, context):
+        """流式聊天接口（客户端取消时协程被取消，LLM流随之关闭）"""
+        try:
+            logger.info(f"收到流式聊天请求: {request.question}")
+            
+            if not self.kb or not self.kb.qa_chain:
+                yield knowledge_service_pb2.ChatStreamResponse(
+                    end=knowledge_service_pb2.ChatStreamEnd(
+                        success=False,
+                        error_message="知识库未初始化或向量存储不存在"
+                    )
+                )
+                return
+            
+            async for event in self.async_kb.ask_question_with_feedback_stream(
+                question=request.question,
+                use_feedback=request.use_feedback,
+                deadline=Deadline.from_grpc_context(context)
+            ):
+                yield self._to_stream_message(event)
+            
+            logger.info(f"流式聊天请求处理成功: {request.question[:50]}...")
+            
+        except (DeadlineExceeded, RequestCancelled) as e:
+            logger.info(f"流式聊天请求中止: {e}")
+            await context.abort(self._interrupted_status(e), str(e))
+        except Exception as e:
+            logger.error(f"流式聊天请求处理失败: {e}")
+            yield knowledge_service_pb2.ChatStreamResponse(
+                end=knowledge_service_pb2.ChatStreamEnd(
+                    success=False,
+                    error_message=str(e)
+                )
+            )
+    
+    async def BatchSearchDocuments(self, request, context):
+        """批量搜索文档"""
+        try:
+            queries = list(request.queries)
+            logger.info(f"批量搜索文档: {len(queries)} 个查询")
+            
+            error = self._check_batch(queries, need_qa_chain=False)
+            if error:
+                return knowledge_service_pb2.BatchSearchResponse(success=False, error_message=error)
+            
+            k = request.k if request.k > 0 else 5
+            valid = [i for i, query in enumerate(queries) if query.strip()]
+            search_results = await self.async_kb.search_documents_batch([queries[i] for i in valid], k=k)
+            
+            response = self._to_batch_search_response(queries, valid, search_results)
+            logger.info(f"批量搜索完成: {len(valid)}/{len(queries)} 个有效查询")
+            return response
+            
+        except Exception as e:
+            logger.error(f"批量搜索文档失败: {e}")
+            return knowledge_service_pb2.BatchSearchResponse(
+                success=False,
+                error_message=str(e)
+            )
+    
+    async def BatchChat(self, request, context):
+        """批量聊天"""
+        try:
+            questions = list(request.questions)
+            logger.info(f"收到批量聊天请求: {len(questions)} 个问题")
+            
+            error = self._check_batch(questions, need_qa_chain=True)
+            if error:
+                return knowledge_service_pb2.BatchChatResponse(success=False, error_message=error)
+            
+            results = await self.async_kb.ask_questions_batch(
+                questions,
+                use_feedback=request.use_feedback,
+                max_parallelism=self._batch_parallelism(request),
+                deadline=Deadline.from_grpc_context(context)
+            )
+            
+            response = self._to_batch_chat_response(questions, results)
+            logger.info(f"批量聊天完成: {len(questions)} 个问题")
+            return response
+            
+        except Exception as e:
+            logger.error(f"批量聊天请求处理失败: {e}")
+            return knowledge_service_pb2.BatchChatResponse(
+                success=False,
+                error_message=str(e)
+            )
+    
+    async def HealthCheck(self, request, context):
+        """健康检查（只读取内存状态，直接在事件循环中执行，不在阻塞线程池中排队）"""
+        return super().HealthCheck(request, context)
+    
+    async def ChatConversation(self, request, context):
+        """多轮对话聊天接口（在阻塞线程池中执行）"""
+        return await self._conversation_chat("chat_conversation", request, context)
+    
+    async def ChatWithEmailVerification(self, request, context):
+        """带邮箱验证的对话聊天接口（在阻塞线程池中执行）"""
+        return await self._conversation_chat("chat_with_email_verification", request, context)
+    
+    async def _conversation_chat(self, method, request, context):
+        """在阻塞线程池中执行对话聊天，超时或客户端取消时以对应状态码结束请求"""
+        deadline = Deadline.from_grpc_context(context)
+        try:
+            return await self.async_kb.run_blocking(
+                lambda: getattr(self.conversation_service, method)(request, deadline)
+            )
+        except (DeadlineExceeded, RequestCancelled) as e:
+            logger.info(f"对话聊天请求中止: {e}")
+            await context.abort(self._interrupted_status(e), str(e))
+    
+    SubmitFeedback = _run_blocking("SubmitFeedback")
+    GetFeedbackHistory = _run_blocking("GetFeedbackHistory")
+    GetStats = _run_blocking("GetStats")
+    SearchDocuments = _run_blocking("SearchDocuments")
+    CreateConversation = _run_blocking("CreateConversation")
+    GetConversationHistory = _run_blocking("GetConversationHistory")
+    ListConversations = _run_blocking("ListConversations")
+    UpdateConversation = _run_blocking("UpdateConversation")
+    DeleteConversation = _run_blocking("DeleteConversation")
+    VerifyEmail = _run_blocking("VerifyEmail")
+
+def _server_options(reuse_port):
+    """服务器选项：多进程共享端口时显式开启SO_REUSEPORT"""
+    return [("grpc.so_reuseport", 1)] if reuse_port else None
+
+def _admission_controller(asynchronous):
+    """按配置创建准入控制，未启用时返回None"""
+    config = get_config().admission
+    return AdmissionController(config, asynchronous=asynchronous) if config.enabled else None
+
+def _request_tracer():
+    """按配置创建请求追踪器，未启用时返回None"""
+    config = get_config().tracing
+    if not config.enabled:
+        return None
+    exporter = FileSpanExporter(config.spans_path, config.service_name) if config.spans_path else None
+    return RequestTracer(config.slow_request_seconds, config.sample_rate, exporter)
+
+def _interceptors(admission, tracer, asynchronous):
+    """服务器拦截器链：追踪与指标在外层，被准入控制拒绝的请求同样计入"""
+    if asynchronous:
+        chain = [AsyncTracingInterceptor(tracer)] if tracer else []
+        chain.append(AsyncMetricsInterceptor())
+        return chain + ([AsyncAdmissionInterceptor(admission)] if admission else [])
+    chain = [TracingInterceptor(tracer)] if tracer else []
+    chain.append(MetricsInterceptor())
+    return chain + ([AdmissionInterceptor(admission)] if admission else [])
+
+def _start_metrics(kb):
+    """注册知识库指标并按配置启动指标端点，未启用时返回None"""
+    config = get_config().metrics
+    REGISTRY.register_collector(kb.collect_metrics)
+    if not config.enabled:
+        return None
+    try:
+        return MetricsServer(config.host, config.port).start()
+    except OSError as e:
+        logger.warning(f"指标端点启动失败: {e}")
+        return None
 
-def serve(port=50051, max_workers=10):
-    """启动gRPC服务器"""
-    server = grpc.server(futures.ThreadPoolExecutor(max_workers=max_workers))
+def serve(port=50051, max_workers=10, async_mode=None, reuse_port=False):
+    """
+    启动gRPC服务器
+    
+    Args:
+        port: 服务端口
+        max_workers: 同步模式为工作线程数，异步模式为阻塞操作线程数
+        async_mode: 是否使用grpc.aio异步服务器，默认读取配置 GRPC_ASYNC
+        reuse_port: 是否以SO_REUSEPORT监听（多进程模式下由各工作进程共享端口）
+    """
+    if async_mode is None:
+        async_mode = get_config().grpc.async_mode
+    if async_mode:
+        try:
+            asyncio.run(serve_async(port=port, max_workers=max_workers, reuse_port=reuse_port))
+        except KeyboardInterrupt:
+            logger.info("👋 服务器停止")
+        return
     
-    # 初始化知识库
-    kb = EnhancedKnowledgeBase()
+    # 启用准入控制时，工作线程数覆盖各方法的并发限制之和（另为未限制的方法预留线程），
+    # 先达到的总是各方法自身的限制；超出线程数的请求由gRPC立即拒绝，而不是在线程池队列中等待
+    admission = _admission_controller(asynchronous=False)
+    tracer = _request_tracer()
+    if admission:
+        methods = knowledge_service_pb2.DESCRIPTOR.services_by_name['KnowledgeService'].methods_by_name
+        max_workers = max(max_workers, admission.worker_threads(methods))
+    server = grpc.server(futures.ThreadPoolExecutor(max_workers=max_workers),
+                         interceptors=_interceptors(admission, tracer, asynchronous=False),
+                         options=_server_options(reuse_port),
+                         maximum_concurrent_rpcs=max_workers if admission else None)
+    
+    # 初始化共享组件（每个组件只初始化一次），向量索引在服务器启动后加载
+    container = ServiceContainer()
+    container.warm_up(CORE_COMPONENTS)
     
     # 注册知识库服务
-    knowledge_service = KnowledgeServiceImpl(kb)
+    knowledge_service = KnowledgeServiceImpl(container=container, load_index=False)
+    metrics_server = _start_metrics(knowledge_service.kb)
     # 初始化对话服务
     knowledge_service_pb2_grpc.add_KnowledgeServiceServicer_to_server(
         knowledge_service, server
@@ -447,10 +911,58 @@ def serve(port=50051, max_workers=10):
     logger.info(f"🔧 最大工作线程: {max_workers}")
     
     try:
+        # 健康检查已可响应，索引加载完成前报告 initializing
+        container.warm_up(DEFERRED_COMPONENTS)
         server.wait_for_termination()
     except KeyboardInterrupt:
         logger.info("👋 服务器停止")
+    finally:
         server.stop(0)
+        container.close()
+        if metrics_server:
+            metrics_server.stop()
+        if tracer:
+            tracer.close()
+
+async def serve_async(port=50051, max_workers=10, reuse_port=False):
+    """启动grpc.aio异步服务器"""
+    admission = _admission_controller(asynchronous=True)
+    tracer = _request_tracer()
+    server = grpc.aio.server(interceptors=_interceptors(admission, tracer, asynchronous=True),
+                             options=_server_options(reuse_port))
+    
+    # 注册知识库服务，向量索引在服务器启动后加载
+    container = ServiceContainer()
+    container.warm_up(CORE_COMPONENTS)
+    knowledge_service = AsyncKnowledgeServiceImpl(max_blocking_workers=max_workers, container=container,
+                                                  load_index=False)
+    metrics_server = _start_metrics(knowledge_service.kb)
+    knowledge_service_pb2_grpc.add_KnowledgeServiceServicer_to_server(
+        knowledge_service, server
+    )
+    
+    # 监听端口
+    listen_addr = f'[::]:{port}'
+    server.add_insecure_port(listen_addr)
+    
+    # 启动服务器
+    await server.start()
+    logger.info(f"🚀 gRPC异步服务器启动成功")
+    logger.info(f"📡 监听地址: {listen_addr}")
+    logger.info(f"🔧 阻塞操作线程: {max_workers}")
+    
+    try:
+        # 在阻塞线程池中加载，事件循环仍可响应健康检查（加载完成前报告 initializing）
+        await knowledge_service.async_kb.run_blocking(container.warm_up, DEFERRED_COMPONENTS)
+        await server.wait_for_termination()
+    finally:
+        await server.stop(5)
+        knowledge_service.async_kb.shutdown()
+        container.close()
+        if metrics_server:
+            metrics_server.stop()
+        if tracer:
+            tracer.close()
 
 if __name__ == '__main__':
     import argparse
@@ -458,7 +970,8 @@ if __name__ == '__main__':
     parser = argparse.ArgumentParser(description='知识库gRPC服务器')
     parser.add_argument('--port', type=int, default=50051, help='服务端口')
     parser.add_argument('--workers', type=int, default=10, help='最大工作线程数')
+    parser.add_argument('--async', dest='use_async', action='store_true', help='使用grpc.aio异步服务器')
     
     args = parser.parse_args()
     
-    serve(port=args.port, max_workers=args.workers)
\ No newline at end of file
+    serve(port=args.port, max_workers=args.workers, async_mode=True if args.use_async else None)
\ No newline at end of file
@@ -132,6 +132,79 @@ def chat():
         logger.error(f"聊天请求失败: {e}")
         return jsonify({"error": str(e)}), 500
 
+def _sse(event, data):
+    """格式化Server-Sent Events消息"""
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+@app.route('/api/chat/stream', methods=['POST'])
+def chat_stream():
+    """流式聊天接口（Server-Sent Events）"""
+    data = request.json or {}
+    question = data.get('question', '')
+    use_feedback = data.get('use_feedback', True)
+    
+    if not question:
+        return jsonify({"error": "问题不能为空"}), 400
+    
+    try:
+        stub = get_grpc_stub()
+        call = stub.ChatStream(knowledge_service_pb2.ChatRequest(
+            question=question,
+            use_feedback=use_feedback
+        ))
+    except Exception as e:
+        logger.error(f"流式聊天请求失败: {e}")
+        return jsonify({"error": str(e)}), 500
+    
+    def generate():
+        try:
+            for message in call:
+                event = message.WhichOneof("event")
+                if event == "sources":
+                    yield _sse("sources", [
+                        {
+                            "content": doc.content,
+                            "source": doc.source,
+                            "metadata": {k: v for k, v in doc.metadata.items()}
+                        }
+                        for doc in message.sources.source_documents
+                    ])
+                elif event == "answer_delta":
+                    yield _sse("delta", {"text": message.answer_delta})
+                elif event == "end":
+                    end = message.end
+                    yield _sse("end", {
+                        "question": end.question,
+                        "original_answer": end.original_answer,
+                        "final_answer": end.final_answer,
+                        "feedback_info": {
+                            "is_improved": end.feedback_info.is_improved,
+                            "confidence_score": end.feedback_info.confidence_score,
+                            "feedback_count": end.feedback_info.feedback_count,
+                            "similar_questions": [
+                                {
+                                    "question": sq.question,
+                                    "similarity_score": sq.similarity_score,
+                                    "feedback_type": sq.feedback_type
+                                }
+                                for sq in end.feedback_info.similar_questions
+                            ]
+                        },
+                        "success": end.success,
+                        "error_message": end.error_message
+                    })
+        except grpc.RpcError as e:
+            logger.error(f"流式聊天请求失败: {e}")
+            yield _sse("end", {"success": False, "error_message": str(e)})
+        finally:
+            # 浏览器断开时取消上游调用，停止LLM生成
+            call.cancel()
+    
+    return Response(generate(), mimetype='text/event-stream', headers={
+        'Cache-Control': 'no-cache',
+        'X-Accel-Buffering': 'no'
+    })
+
 @app.route('/api/feedback', methods=['POST'])
 def submit_feedback():
     """提交反馈"""
@@ -0,0 +1,304 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+gRPC服务器拦截器
+- 追踪：分配请求ID（响应的 x-request-id 尾部元数据），按方法记录耗时、请求与响应字节数和状态码，
+  慢请求附带阶段耗时记录日志，并按采样率导出追踪数据
+- 指标：按方法统计进行中的请求数与失败数（异常、中止或响应 success=false）
+以服务器拦截器的形式同时支持同步服务器与grpc.aio异步服务器。
+"""
+
+import time
+import asyncio
+import inspect
+import logging
+from typing import Optional
+
+import grpc
+
+# 指标与追踪须与知识库记录阶段耗时的模块为同一模块对象
+from src.app.metrics import (GRPC_ERRORS, GRPC_IN_FLIGHT, GRPC_REQUESTS, GRPC_REQUEST_BYTES,
+                             GRPC_REQUEST_SECONDS, GRPC_RESPONSE_BYTES)
+from src.app.tracing import RequestTrace, RequestTracer, use_trace
+
+try:
+    from admission import _method_name, _replace_behavior
+except ImportError:
+    from src.rpc.admission import _method_name, _replace_behavior
+
+logger = logging.getLogger(__name__)
+
+
+def _failed(response) -> bool:
+    """响应是否表示失败（success=false，流式结束消息同样适用）"""
+    if response is None:
+        return False
+    try:
+        if response.DESCRIPTOR.oneofs_by_name.get("event") and response.HasField("end"):
+            response = response.end
+    except (AttributeError, ValueError):
+        pass
+    try:
+        return response.DESCRIPTOR.fields_by_name.get("success") is not None and not response.success
+    except AttributeError:
+        return False
+
+
+def _message_size(message) -> int:
+    try:
+        return message.ByteSize()
+    except AttributeError:
+        return 0
+
+
+def _status_code(context, error: Optional[BaseException]) -> str:
+    """请求结束时的状态码名称"""
+    if isinstance(error, (asyncio.CancelledError, GeneratorExit)):
+        return "CANCELLED"
+    try:
+        code = context.code() if context is not None else None
+    except (AttributeError, NotImplementedError):
+        code = None
+    if isinstance(code, grpc.StatusCode):
+        return code.name
+    if code is not None:
+        # grpc.aio 的上下文可能返回整数状态码
+        return next((status.name for status in grpc.StatusCode if status.value[0] == code), "UNKNOWN")
+    return "UNKNOWN" if error is not None else "OK"
+
+
+class _TracingMixin:
+    """追踪拦截器的公共逻辑"""
+
+    def __init__(self, tracer: RequestTracer):
+        self.tracer = tracer
+
+    def _start(self, method, handler_call_details, request, context) -> RequestTrace:
+        trace = RequestTrace.from_metadata(method, handler_call_details.invocation_metadata)
+        trace.attributes["rpc.request.size"] = _message_size(request)
+        trace.attributes["rpc.response.size"] = 0
+        if context is not None:
+            try:
+                context.set_trailing_metadata((("x-request-id", trace.request_id),))
+            except (AttributeError, ValueError):
+                pass
+        return trace
+
+    def _finish(self, trace: RequestTrace, context, error: Optional[BaseException]):
+        method = trace.method
+        code = _status_code(context, error)
+        GRPC_REQUESTS.inc(method=method, code=code)
+        GRPC_REQUEST_SECONDS.observe((time.time_ns() - trace.start_ns) / 1e9, method=method)
+        GRPC_REQUEST_BYTES.observe(trace.attributes["rpc.request.size"], method=method)
+        GRPC_RESPONSE_BYTES.observe(trace.attributes["rpc.response.size"], method=method)
+        self.tracer.finish(trace, code)
+
+
+class TracingInterceptor(_TracingMixin, grpc.ServerInterceptor):
+    """同步服务器的请求追踪拦截器"""
+
+    def intercept_service(self, continuation, handler_call_details):
+        handler = continuation(handler_call_details)
+        if handler is None:
+            return handler
+        method = _method_name(handler_call_details)
+        return _replace_behavior(
+            handler, lambda behavior, streaming: self._wrap(method, handler_call_details, behavior, streaming)
+        )
+
+    def _wrap(self, method, handler_call_details, behavior, streaming):
+        if streaming:
+            def stream_behavior(request, context):
+                trace = self._start(method, handler_call_details, request, context)
+                error = None
+                responses = None
+                try:
+                    responses = behavior(request, context)
+                    while True:
+                        # 只在处理器执行期间设为当前请求，流在两条消息之间挂起时不占用线程上下文
+                        with use_trace(trace):
+                            try:
+                                response = next(responses)
+                            except StopIteration:
+                                break
+                        trace.attributes["rpc.response.size"] += _message_size(response)
+                        yield response
+                except BaseException as e:
+                    error = e
+                    raise
+                finally:
+                    # 客户端取消时立即关闭处理器的生成器（中止进行中的LLM流）
+                    if hasattr(responses, "close"):
+                        responses.close()
+                    self._finish(trace, context, error)
+            return stream_behavior
+
+        def unary_behavior(request, context):
+            trace = self._start(method, handler_call_details, request, context)
+            error = None
+            try:
+                with use_trace(trace):
+                    response = behavior(request, context)
+                trace.attributes["rpc.response.size"] = _message_size(response)
+                return response
+            except BaseException as e:
+                error = e
+                raise
+            finally:
+                self._finish(trace, context, error)
+        return unary_behavior
+
+
+class AsyncTracingInterceptor(_TracingMixin, grpc.aio.ServerInterceptor):
+    """grpc.aio异步服务器的请求追踪拦截器"""
+
+    async def intercept_service(self, continuation, handler_call_details):
+        handler = await continuation(handler_call_details)
+        if handler is None:
+            return handler
+        method = _method_name(handler_call_details)
+        return _replace_behavior(
+            handler, lambda behavior, streaming: self._wrap(method, handler_call_details, behavior, streaming)
+        )
+
+    def _wrap(self, method, handler_call_details, behavior, streaming):
+        if streaming:
+            async def stream_behavior(request, context):
+                trace = self._start(method, handler_call_details, request, context)
+                error = None
+                responses = None
+                try:
+                    responses = behavior(request, context)
+                    while True:
+                        with use_trace(trace):
+                            try:
+                                if inspect.isasyncgen(responses):
+                                    response = await responses.__anext__()
+                                else:
+                                    response = next(responses)
+                            except (StopAsyncIteration, StopIteration):
+                                break
+                        trace.attributes["rpc.response.size"] += _message_size(response)
+                        yield response
+                except BaseException as e:
+                    error = e
+                    raise
+                finally:
+                    if inspect.isasyncgen(responses):
+                        await responses.aclose()
+                    elif hasattr(responses, "close"):
+                        responses.close()
+                    self._finish(trace, context, error)
+            return stream_behavior
+
+        async def unary_behavior(request, context):
+            trace = self._start(method, handler_call_details, request, context)
+            error = None
+            try:
+                with use_trace(trace):
+                    response = behavior(request, context)
+                    response = await response if inspect.isawaitable(response) else response
+                trace.attributes["rpc.response.size"] = _message_size(response)
+                return response
+            except BaseException as e:
+                error = e
+                raise
+            finally:
+                self._finish(trace, context, error)
+        return unary_behavior
+
+
+class MetricsInterceptor(grpc.ServerInterceptor):
+    """同步服务器的请求指标拦截器"""
+
+    def intercept_service(self, continuation, handler_call_details):
+        handler = continuation(handler_call_details)
+        if handler is None:
+            return handler
+        method = _method_name(handler_call_details)
+        return _replace_behavior(handler, lambda behavior, streaming: self._wrap(method, behavior, streaming))
+
+    def _wrap(self, method, behavior, streaming):
+        if streaming:
+            def stream_behavior(request, context):
+                GRPC_IN_FLIGHT.inc(method=method)
+                failed = False
+                try:
+                    for response in behavior(request, context):
+                        failed = _failed(response)
+                        yield response
+                except BaseException:
+                    failed = True
+                    raise
+                finally:
+                    GRPC_IN_FLIGHT.dec(method=method)
+                    if failed:
+                        GRPC_ERRORS.inc(method=method)
+            return stream_behavior
+
+        def unary_behavior(request, context):
+            GRPC_IN_FLIGHT.inc(method=method)
+            failed = False
+            try:
+                response = behavior(request, context)
+                failed = _failed(response)
+                return response
+            except BaseException:
+                failed = True
+                raise
+            finally:
+                GRPC_IN_FLIGHT.dec(method=method)
+                if failed:
+                    GRPC_ERRORS.inc(method=method)
+        return unary_behavior
+
+
+class AsyncMetricsInterceptor(grpc.aio.ServerInterceptor):
+    """grpc.aio异步服务器的请求指标拦截器"""
+
+    async def intercept_service(self, continuation, handler_call_details):
+        handler = await continuation(handler_call_details)
+        if handler is None:
+            return handler
+        method = _method_name(handler_call_details)
+        return _replace_behavior(handler, lambda behavior, streaming: self._wrap(method, behavior, streaming))
+
+    def _wrap(self, method, behavior, streaming):
+        if streaming:
+            async def stream_behavior(request, context):
+                GRPC_IN_FLIGHT.inc(method=method)
+                failed = False
+                try:
+                    if inspect.isasyncgenfunction(behavior):
+                        async for response in behavior(request, context):
+                            failed = _failed(response)
+                            yield response
+                    else:
+                        for response in behavior(request, context):
+                            failed = _failed(response)
+                            yield response
+                except BaseException:
+                    failed = True
+                    raise
+                finally:
+                    GRPC_IN_FLIGHT.dec(method=method)
+                    if failed:
+                        GRPC_ERRORS.inc(method=method)
+            return stream_behavior
+
+        async def unary_behavior(request, context):
+            GRPC_IN_FLIGHT.inc(method=method)
+            failed = False
+            try:
+                response = behavior(request, context)
+                response = await response if inspect.isawaitable(response) else response
+                failed = _failed(response)
+                return response
+            except BaseException:
+                failed = True
+                raise
+            finally:
+                GRPC_IN_FLIGHT.dec(method=method)
+                if failed:
+                    GRPC_ERRORS.inc(method=method)
+        return unary_behavior
@@ -0,0 +1,153 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+服务依赖容器
+gRPC服务共享的组件（LLM客户端、反馈数据库、知识库、向量索引、对话数据库）在首次使用时初始化，
+且每个组件只初始化一次；记录各组件的初始化耗时，便于分析启动时间
+"""
+
+import time
+import logging
+import threading
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, Optional
+
+from src.app.knowledge_base import create_llm
+from src.app.enhanced_knowledge_base import EnhancedKnowledgeBase
+from src.app.feedback_system import FeedbackLearningSystem
+from src.db.conversation_manager import ConversationManager
+from src.rpc.conversation_service_impl import ConversationServiceImpl
+from config.config import get_config
+
+logger = logging.getLogger(__name__)
+
+# 启动时按依赖顺序预热的组件（各组件的耗时不含其依赖）：核心组件在服务器启动前初始化，
+# 耗时较长的向量索引与对话数据库在服务器启动后加载（加载期间健康检查报告 initializing）
+CORE_COMPONENTS = ("llm", "feedback_system", "knowledge_base")
+DEFERRED_COMPONENTS = ("index", "conversation_manager")
+STARTUP_COMPONENTS = CORE_COMPONENTS + DEFERRED_COMPONENTS
+# 启动时初始化失败不影响服务启动、在首次使用时重试的组件
+OPTIONAL_COMPONENTS = ("conversation_manager",)
+
+
+class ServiceContainer:
+    """服务依赖容器"""
+
+    def __init__(self, config=None, feedback_db_path: str = "./feedback.db",
+                 knowledge_base: Optional[EnhancedKnowledgeBase] = None):
+        """
+        初始化容器（不创建任何组件）
+
+        Args:
+            config: 全局配置，默认读取 get_config()
+            feedback_db_path: 反馈数据库路径
+            knowledge_base: 已创建的知识库，传入时直接使用
+        """
+        self.config = config or get_config()
+        self.feedback_db_path = feedback_db_path
+        self.startup_timings: Dict[str, float] = {}
+        self._instances: Dict[str, Any] = {}
+        self._locks: Dict[str, threading.Lock] = {}
+        self._lock = threading.Lock()
+        if knowledge_base is not None:
+            self._instances["knowledge_base"] = knowledge_base
+            self._instances["feedback_system"] = knowledge_base.feedback_system
+            self._instances["llm"] = knowledge_base.llm
+
+    def _get(self, name: str, factory: Callable[[], Any]) -> Any:
+        """获取组件，首次获取时创建（并发获取时只创建一次，创建失败时下次重试）"""
+        if name in self._instances:
+            return self._instances[name]
+        with self._lock:
+            lock = self._locks.setdefault(name, threading.Lock())
+        with lock:
+            if name not in self._instances:
+                start = time.perf_counter()
+                try:
+                    instance = factory()
+                except Exception as e:
+                    logger.error(f"初始化组件 {name} 失败: {e}")
+                    raise
+                self.startup_timings[name] = (time.perf_counter() - start) * 1000
+                logger.info(f"⏱️ 组件 {name} 初始化完成，耗时 {self.startup_timings[name]:.0f}ms")
+                self._instances[name] = instance
+            return self._instances[name]
+
+    def is_initialized(self, name: str) -> bool:
+        """组件是否已初始化"""
+        return name in self._instances
+
+    @property
+    def llm(self):
+        """LLM客户端"""
+        return self._get("llm", lambda: create_llm(self.config))
+
+    @property
+    def feedback_system(self) -> FeedbackLearningSystem:
+        """反馈学习系统（反馈数据库）"""
+        return self._get("feedback_system", lambda: FeedbackLearningSystem(
+            self.feedback_db_path, write_behind=self.config.feedback.write_behind
+        ))
+
+    @property
+    def knowledge_base(self) -> EnhancedKnowledgeBase:
+        """增强知识库（共享LLM客户端与反馈学习系统，不加载向量索引）"""
+        return self._get("knowledge_base", lambda: EnhancedKnowledgeBase(
+            llm=self.llm, feedback_system=self.feedback_system
+        ))
+
+    @property
+    def index(self):
+        """加载到知识库中的向量索引，向量存储不存在时为None"""
+        return self._get("index", self._load_index)
+
+    def _load_index(self):
+        kb = self.knowledge_base
+        if kb.vector_store is None:
+            if Path(kb.vector_store_path).exists():
+                kb.load_vector_store()
+                logger.info("知识库加载成功")
+            else:
+                logger.warning(f"向量存储不存在: {kb.vector_store_path}")
+        return kb.vector_store
+
+    @property
+    def conversation_manager(self) -> ConversationManager:
+        """对话管理器（对话数据库连接）"""
+        return self._get("conversation_manager", ConversationManager)
+
+    @property
+    def conversation_service(self) -> ConversationServiceImpl:
+        """对话服务"""
+        return self._get("conversation_service", lambda: ConversationServiceImpl(
+            self.knowledge_base, self.conversation_manager
+        ))
+
+    def warm_up(self, components: Iterable[str] = STARTUP_COMPONENTS) -> Dict[str, float]:
+        """
+        按顺序初始化组件并汇总耗时
+
+        Returns:
+            组件名 -> 初始化耗时（毫秒），已初始化的组件不计入
+        """
+        start = time.perf_counter()
+        for name in components:
+            try:
+                getattr(self, name)
+            except Exception as e:
+                if name not in OPTIONAL_COMPONENTS:
+                    raise
+                logger.warning(f"组件 {name} 初始化失败，将在首次使用时重试: {e}")
+        total = (time.perf_counter() - start) * 1000
+        timings = {name: self.startup_timings[name] for name in components if name in self.startup_timings}
+        summary = ", ".join(f"{name}={ms:.0f}ms" for name, ms in timings.items())
+        logger.info(f"🧩 启动耗时 {total:.0f}ms: {summary or '无新初始化的组件'}")
+        return timings
+
+    def close(self):
+        """服务停止时释放组件资源（写完排队的反馈，写回反馈问题向量索引）"""
+        if self.is_initialized("feedback_system"):
+            try:
+                self.feedback_system.close()
+            except Exception as e:
+                logger.warning(f"关闭反馈学习系统失败: {e}")
@@ -0,0 +1,177 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+多进程gRPC服务
+主进程作为守护进程启动N个工作进程，各工作进程以SO_REUSEPORT监听同一端口，
+由内核分摊连接；向量索引以只读内存映射方式加载，各进程共享同一份页缓存。
+工作进程异常退出后自动重启（连续崩溃时退避）。
+"""
+
+import os
+import sys
+import time
+import signal
+import logging
+import threading
+import multiprocessing
+from pathlib import Path
+from typing import Callable, Dict, Optional
+
+# 添加项目路径
+project_root = Path(__file__).parent.parent.parent
+if str(project_root) not in sys.path:
+    sys.path.insert(0, str(project_root))
+
+logger = logging.getLogger('kdb')
+
+# 工作进程连续运行超过该时长（秒）后，重启退避时间复位
+STABLE_SECONDS = 60
+
+
+def _interrupt(signum, frame):
+    raise KeyboardInterrupt
+
+
+def _worker_main(worker_id: int, port: int, max_workers: int, async_mode: Optional[bool]):
+    """工作进程入口"""
+    # 终端的Ctrl+C由守护进程统一处理；守护进程发出的SIGTERM按KeyboardInterrupt优雅停止
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    signal.signal(signal.SIGTERM, _interrupt)
+
+    # 以只读内存映射方式加载索引，多个工作进程共享页缓存而非各持一份副本（须在读取配置前设置）
+    os.environ["VECTOR_STORE_MMAP"] = "true"
+    # 各工作进程的指标端点依次错开端口
+    os.environ["METRICS_PORT"] = str(int(os.getenv("METRICS_PORT", "9095")) + worker_id)
+
+    from src.rpc.grpc_server import serve
+
+    logger.info(f"工作进程 {worker_id} (PID {os.getpid()}) 启动")
+    serve(port=port, max_workers=max_workers, async_mode=async_mode, reuse_port=True)
+
+
+class WorkerSupervisor:
+    """gRPC工作进程守护"""
+
+    def __init__(self, processes: int, port: int = 50051, max_workers: int = 10,
+                 async_mode: Optional[bool] = None, restart_delay: float = 1.0,
+                 max_restart_delay: float = 30.0, target: Callable = _worker_main):
+        """
+        初始化守护进程
+
+        Args:
+            processes: 工作进程数
+            port: 服务端口
+            max_workers: 每个工作进程的线程数（同步模式为工作线程，异步模式为阻塞操作线程）
+            async_mode: 是否使用异步服务器，默认读取配置
+            restart_delay: 首次重启前的等待时间（秒）
+            max_restart_delay: 连续崩溃时的最大重启等待时间（秒）
+            target: 工作进程入口，参数为 (worker_id, port, max_workers, async_mode)
+        """
+        if processes < 1:
+            raise ValueError("工作进程数必须大于 0")
+
+        self.processes = processes
+        self.port = port
+        self.max_workers = max_workers
+        self.async_mode = async_mode
+        self.restart_delay = restart_delay
+        self.max_restart_delay = max_restart_delay
+        self.target = target
+
+        # gRPC不支持在fork后的子进程中继续使用，工作进程一律以spawn方式启动
+        self._context = multiprocessing.get_context("spawn")
+        self._workers: Dict[int, multiprocessing.Process] = {}
+        self._started_at: Dict[int, float] = {}
+        self._delays: Dict[int, float] = {}
+        self._restart_at: Dict[int, float] = {}
+        self._stop = threading.Event()
+        self.restarts = 0
+
+    def _spawn(self, worker_id: int):
+        process = self._context.Process(
+            target=self.target,
+            args=(worker_id, self.port, self.max_workers, self.async_mode),
+            name=f"kdb-grpc-{worker_id}",
+            daemon=True
+        )
+        process.start()
+        self._workers[worker_id] = process
+        self._started_at[worker_id] = time.monotonic()
+
+    def start(self):
+        """启动全部工作进程"""
+        for worker_id in range(self.processes):
+            self._spawn(worker_id)
+        logger.info(f"🚀 已启动 {self.processes} 个gRPC工作进程，共享端口 {self.port}")
+
+    def check(self):
+        """检查工作进程状态，重启已退出的进程"""
+        now = time.monotonic()
+        for worker_id, process in list(self._workers.items()):
+            if process.is_alive() or self._stop.is_set():
+                continue
+
+            if worker_id not in self._restart_at:
+                # 稳定运行一段时间后崩溃，退避时间复位
+                uptime = now - self._started_at[worker_id]
+                delay = self.restart_delay if uptime >= STABLE_SECONDS else min(
+                    self._delays.get(worker_id, self.restart_delay / 2) * 2, self.max_restart_delay
+                )
+                self._delays[worker_id] = delay
+                self._restart_at[worker_id] = now + delay
+                logger.warning(
+                    f"工作进程 {worker_id} (PID {process.pid}) 退出，退出码 {process.exitcode}，"
+                    f"{delay:.1f}秒后重启"
+                )
+            elif now >= self._restart_at[worker_id]:
+                del self._restart_at[worker_id]
+                self.restarts += 1
+                self._spawn(worker_id)
+
+    def run(self, poll_interval: float = 0.5):
+        """启动并持续监控工作进程，直到 stop() 被调用"""
+        self.start()
+        try:
+            while not self._stop.wait(poll_interval):
+                self.check()
+        finally:
+            self.shutdown()
+
+    def stop(self):
+        """请求停止（可在信号处理函数或其他线程中调用）"""
+        self._stop.set()
+
+    def shutdown(self, timeout: float = 10.0):
+        """终止全部工作进程（先SIGTERM，超时后SIGKILL）"""
+        self._stop.set()
+        for process in self._workers.values():
+            if process.is_alive():
+                process.terminate()
+        deadline = time.monotonic() + timeout
+        for process in self._workers.values():
+            process.join(max(0.0, deadline - time.monotonic()))
+            if process.is_alive():
+                process.kill()
+                process.join()
+        logger.info("👋 全部gRPC工作进程已停止")
+
+
+def serve_multiprocess(processes: int, port: int = 50051, max_workers: int = 10,
+                       async_mode: Optional[bool] = None):
+    """
+    以多进程方式启动gRPC服务（阻塞直到收到终止信号）
+
+    Args:
+        processes: 工作进程数
+        port: 服务端口
+        max_workers: 每个工作进程的线程数
+        async_mode: 是否使用异步服务器，默认读取配置
+    """
+    supervisor = WorkerSupervisor(processes, port=port, max_workers=max_workers, async_mode=async_mode)
+
+    # 信号处理函数只能在主线程中注册
+    if threading.current_thread() is threading.main_thread():
+        for signum in (signal.SIGINT, signal.SIGTERM):
+            signal.signal(signum, lambda *_: supervisor.stop())
+
+    supervisor.run()
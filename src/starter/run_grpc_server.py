@@ -30,6 +30,9 @@ def main():
     parser.add_argument('--port', type=int, default=50051, help='服务端口 (默认: 50051)')
     parser.add_argument('--workers', type=int, default=10, help='最大工作线程数 (默认: 10)')
     parser.add_argument('--host', default='0.0.0.0', help='监听地址 (默认: 0.0.0.0)')
+    parser.add_argument('--async', dest='use_async', action='store_true',
+                        help='使用grpc.aio异步服务器 (默认读取 GRPC_ASYNC，未设置时使用同步线程池服务器)')
+    parser.add_argument('--processes', type=int, default=1, help='工作进程数，大于1时多进程共享端口 (默认: 1)')
     
     args = parser.parse_args()
     
@@ -37,6 +40,8 @@ def main():
     print(f"📂 工作目录: {current_dir}")
     print(f"🌐 监听地址: {args.host}:{args.port}")
     print(f"🔧 工作线程: {args.workers}")
+    print(f"⚙️ 服务器模式: {'异步' if args.use_async else '按配置 GRPC_ASYNC (默认同步)'}")
+    print(f"🧩 工作进程: {args.processes}")
     print("\n" + "="*60)
     print("🧠 智能知识库RPC服务")
     print("="*60)
@@ -54,11 +59,17 @@ def main():
         project_root = current_dir.parent.parent
         sys.path.insert(0, str(project_root))
         
-        # 导入并启动服务器
-        from src.rpc.grpc_server import serve
-        
-        # 启动服务器
-        serve(port=args.port, max_workers=args.workers)
+        async_mode = True if args.use_async else None
+        if args.processes > 1:
+            # 多进程模式：守护进程启动并监控工作进程
+            from src.rpc.supervisor import serve_multiprocess
+            serve_multiprocess(args.processes, port=args.port, max_workers=args.workers, async_mode=async_mode)
+        else:
+            # 导入并启动服务器
+            from src.rpc.grpc_server import serve
+            
+            # 启动服务器
+            serve(port=args.port, max_workers=args.workers, async_mode=async_mode)
         
     except KeyboardInterrupt:
         print("\n👋 服务器已停止")
@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+增强知识库测试共用的假组件与创建函数
+知识库使用临时反馈数据库，测试结束时关闭数据库连接、恢复配置并删除临时目录
+"""
+
+import time
+import tempfile
+import unittest
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+from unittest.mock import patch
+
+from langchain.schema import Document
+from config.config import get_config
+from src.app.enhanced_knowledge_base import EnhancedKnowledgeBase
+
+# 测试默认关闭向量缓存（不写入磁盘）与语义缓存（不复用相近问题的答案）
+DEFAULT_CONFIG = {
+    "embedding_cache.enabled": False,
+    "answer_cache.semantic_enabled": False,
+}
+
+class FakeRetriever:
+    """返回固定文档的假检索器"""
+
+    def __init__(self, delay: float = 0.0):
+        self.delay = delay
+
+    def invoke(self, question):
+        time.sleep(self.delay)
+        return [Document(page_content="API是应用程序接口", metadata={"source": "api.md"})]
+
+class FakeQAChain:
+    """记录调用次数的假QA链，检索与生成可分别设置耗时"""
+
+    def __init__(self, retrieval_delay: float = 0.0, answer_delay: float = 0.0):
+        self.retriever = FakeRetriever(retrieval_delay)
+        self.answer_delay = answer_delay
+        self.calls = 0
+
+    def __call__(self, inputs):
+        self.calls += 1
+        time.sleep(self.answer_delay)
+        return {
+            "result": f"答案{self.calls}",
+            "source_documents": [Document(page_content="内容", metadata={"source": "a.md"})]
+        }
+
+class FakeEmbeddings:
+    """按关键词映射到固定向量的假嵌入模型，记录查询嵌入次数"""
+
+    VECTORS = {"API": [1.0, 0.0, 0.0], "接口": [0.95, 0.3, 0.0], "部署": [0.0, 0.0, 1.0]}
+    DEFAULT = [0.0, 1.0, 0.0]
+
+    def __init__(self):
+        self.query_calls = 0
+
+    def embed_query(self, text) -> List[float]:
+        self.query_calls += 1
+        for keyword, vector in self.VECTORS.items():
+            if keyword in text:
+                return vector
+        return self.DEFAULT
+
+    def embed_documents(self, texts) -> List[List[float]]:
+        return [self.embed_query(text) for text in texts]
+
+    def __call__(self, text):
+        return self.embed_query(text)
+
+def patch_config(test: unittest.TestCase, settings: Dict[str, Any]):
+    """
+    在测试期间覆盖全局配置，测试结束时恢复
+
+    Args:
+        test: 当前测试用例
+        settings: "配置段.字段" -> 值，如 {"answer_cache.enabled": False}
+    """
+    for name, value in settings.items():
+        section, field = name.split(".")
+        patcher = patch.object(getattr(get_config(), section), field, value)
+        patcher.start()
+        test.addCleanup(patcher.stop)
+
+def create_knowledge_base(test: unittest.TestCase, config: Optional[Dict[str, Any]] = None) -> EnhancedKnowledgeBase:
+    """
+    创建使用临时反馈数据库的增强知识库（索引版本为 v1），测试结束时自动清理
+
+    Args:
+        test: 当前测试用例
+        config: 在 DEFAULT_CONFIG 之上覆盖的配置，格式同 patch_config
+    """
+    temp_dir = tempfile.TemporaryDirectory()
+    test.addCleanup(temp_dir.cleanup)
+    patch_config(test, {**DEFAULT_CONFIG, **(config or {})})
+
+    kb = EnhancedKnowledgeBase(feedback_db_path=str(Path(temp_dir.name) / "feedback.db"))
+    test.addCleanup(kb.feedback_system.close)
+    kb.store_version = "v1"
+    return kb
@@ -0,0 +1,162 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+准入控制测试脚本
+验证并发与排队限制、队列满时快速拒绝、截止时间已过的请求被丢弃，以及同步服务器工作线程数的确定
+"""
+
+import sys
+import time
+import asyncio
+import threading
+import unittest
+from pathlib import Path
+
+import grpc
+
+# 添加项目路径
+project_root = Path(__file__).parent.parent
+if str(project_root) not in sys.path:
+    sys.path.insert(0, str(project_root))
+
+from config.config import AdmissionConfig
+from src.rpc.admission import AdmissionController, AdmissionInterceptor, AsyncAdmissionInterceptor
+
+class Aborted(Exception):
+    """模拟 context.abort 抛出的异常"""
+
+    def __init__(self, code, details):
+        super().__init__(details)
+        self.code = code
+
+class FakeContext:
+    """可设置剩余时间的假gRPC上下文"""
+
+    def __init__(self, remaining=None):
+        self.remaining = remaining
+
+    def time_remaining(self):
+        return self.remaining
+
+    def abort(self, code, details):
+        raise Aborted(code, details)
+
+class FakeAsyncContext(FakeContext):
+    """异步假gRPC上下文"""
+
+    async def abort(self, code, details):
+        raise Aborted(code, details)
+
+class FakeCallDetails:
+    """假调用信息"""
+
+    def __init__(self, method):
+        self.method = f"/knowledge_service.KnowledgeService/{method}"
+
+class TestAdmission(unittest.TestCase):
+    """准入控制测试类"""
+
+    def setUp(self):
+        """测试前准备"""
+        self.config = AdmissionConfig(max_concurrency=1, max_queue=1, queue_timeout=5,
+                                      method_limits={"HealthCheck": (0, 0)})
+
+    def test_sync_limits(self):
+        """测试同步服务器并发满时立即拒绝（不占用工作线程排队）、未限制的方法直接放行"""
+        release = threading.Event()
+        calls = []
+
+        def chat(request, context):
+            calls.append(request)
+            release.wait(5)
+            return request
+
+        interceptor = AdmissionInterceptor(AdmissionController(self.config))
+        handler = interceptor.intercept_service(
+            lambda details: grpc.unary_unary_rpc_method_handler(chat), FakeCallDetails("Chat")
+        )
+        health = grpc.unary_unary_rpc_method_handler(chat)
+        self.assertIs(interceptor.intercept_service(lambda details: health, FakeCallDetails("HealthCheck")), health)
+
+        results = {}
+        thread = threading.Thread(target=lambda: results.__setitem__(0, handler.unary_unary(0, FakeContext())))
+        thread.start()
+        time.sleep(0.1)
+
+        # 一个执行中，第二个立即被拒绝
+        start = time.perf_counter()
+        with self.assertRaises(Aborted) as cm:
+            handler.unary_unary(1, FakeContext())
+        self.assertEqual(cm.exception.code, grpc.StatusCode.RESOURCE_EXHAUSTED)
+        self.assertLess(time.perf_counter() - start, 0.5)
+
+        release.set()
+        thread.join()
+        self.assertEqual(results, {0: 0})
+        self.assertEqual(handler.unary_unary(2, FakeContext()), 2)
+
+        stats = interceptor.controller.stats()["methods"]["Chat"]
+        self.assertEqual((stats["admitted"], stats["rejected"], stats["active"], stats["queued"]), (2, 1, 0, 0))
+
+    def test_worker_threads_cover_limits(self):
+        """测试同步服务器工作线程数为各方法并发限制之和加预留线程（未限制的方法不计入）"""
+        config = AdmissionConfig(max_concurrency=16, method_limits={"BatchChat": (2, 4), "HealthCheck": (0, 0)},
+                                 reserved_workers=4)
+        controller = AdmissionController(config)
+        self.assertEqual(controller.worker_threads(["Chat", "ChatStream", "BatchChat", "HealthCheck"]), 16 * 2 + 2 + 4)
+        with self.assertRaises(ValueError):
+            AdmissionConfig(reserved_workers=0)
+
+    def test_sync_expired_deadline_dropped(self):
+        """测试截止时间已过的请求不执行"""
+        calls = []
+        interceptor = AdmissionInterceptor(AdmissionController(self.config))
+        handler = interceptor.intercept_service(
+            lambda details: grpc.unary_stream_rpc_method_handler(lambda request, context: iter(calls.append(request) or [1])),
+            FakeCallDetails("ChatStream")
+        )
+
+        with self.assertRaises(Aborted) as cm:
+            list(handler.unary_stream("x", FakeContext(remaining=-0.1)))
+        self.assertEqual(cm.exception.code, grpc.StatusCode.DEADLINE_EXCEEDED)
+        self.assertEqual(calls, [])
+        self.assertEqual(interceptor.controller.dropped_expired, 1)
+
+        self.assertEqual(list(handler.unary_stream("y", FakeContext(remaining=10))), [1])
+        self.assertEqual(calls, ["y"])
+
+    def test_async_limits_and_queue_deadline(self):
+        """测试异步限流：排队中截止时间到期的请求被丢弃，其余请求依次执行"""
+        async def chat(request, context):
+            await asyncio.sleep(0.3)
+            return request
+
+        async def run():
+            interceptor = AsyncAdmissionInterceptor(AdmissionController(self.config, asynchronous=True))
+
+            async def continuation(details):
+                return grpc.unary_unary_rpc_method_handler(chat)
+
+            handler = await interceptor.intercept_service(continuation, FakeCallDetails("Chat"))
+            return await asyncio.gather(
+                handler.unary_unary(1, FakeAsyncContext()),
+                handler.unary_unary(2, FakeAsyncContext(remaining=0.1)),
+                return_exceptions=True
+            ), await handler.unary_unary(3, FakeAsyncContext())
+
+        (first, second), third = asyncio.run(run())
+        self.assertEqual(first, 1)
+        self.assertIsInstance(second, Aborted)
+        self.assertEqual(second.code, grpc.StatusCode.DEADLINE_EXCEEDED)
+        self.assertEqual(third, 3)
+
+    def test_method_limits_parsing(self):
+        """测试按方法覆盖的限制解析"""
+        limits = AdmissionConfig.parse_method_limits("Chat=8:16, BatchChat=2:4")
+        self.assertEqual(limits, {"Chat": (8, 16), "BatchChat": (2, 4)})
+        self.assertEqual(AdmissionConfig(method_limits=limits).limits_for("GetStats"), (16, 32))
+        with self.assertRaises(ValueError):
+            AdmissionConfig.parse_method_limits("Chat=8")
+
+if __name__ == '__main__':
+    unittest.main()
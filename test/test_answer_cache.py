@@ -0,0 +1,141 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+答案缓存测试脚本
+验证LRU淘汰、TTL过期、按问题失效、语义缓存以及增强知识库的缓存接入
+"""
+
+import sys
+import time
+import unittest
+from pathlib import Path
+
+# 添加项目路径
+project_root = Path(__file__).parent.parent
+if str(project_root) not in sys.path:
+    sys.path.insert(0, str(project_root))
+
+from src.app.answer_cache import AnswerCache, SemanticAnswerCache
+from test.knowledge_base_fixtures import FakeEmbeddings, FakeQAChain, create_knowledge_base
+
+class TestAnswerCache(unittest.TestCase):
+    """答案缓存测试类"""
+
+    def test_normalized_key_and_lru(self):
+        """测试问题规范化与LRU淘汰"""
+        cache = AnswerCache(max_entries=2, ttl_seconds=0)
+        key = AnswerCache.make_key("什么是 API？", "v1", "p1")
+        self.assertEqual(key, AnswerCache.make_key("  什么是   API？ ", "v1", "p1"))
+        self.assertNotEqual(key, AnswerCache.make_key("什么是 API？", "v2", "p1"))
+
+        cache.put("a", "问题A", {"answer": 1})
+        cache.put("b", "问题B", {"answer": 2})
+        cache.get("a")
+        cache.put("c", "问题C", {"answer": 3})
+
+        self.assertIsNone(cache.get("b"))
+        self.assertEqual(cache.get("a"), {"answer": 1})
+        self.assertEqual(cache.stats()["evictions"], 1)
+
+    def test_ttl_expiry(self):
+        """测试过期条目不再返回"""
+        cache = AnswerCache(max_entries=10, ttl_seconds=0.05)
+        cache.put("a", "问题A", {"answer": 1})
+        self.assertIsNotNone(cache.get("a"))
+        time.sleep(0.1)
+        self.assertIsNone(cache.get("a"))
+
+    def test_invalidate_question(self):
+        """测试按问题失效所有版本的缓存"""
+        cache = AnswerCache()
+        cache.put("k1", "问题A", {"answer": 1})
+        cache.put("k2", " 问题A", {"answer": 2})
+        cache.put("k3", "问题B", {"answer": 3})
+
+        self.assertEqual(cache.invalidate_question("问题A"), 2)
+        self.assertIsNone(cache.get("k1"))
+        self.assertIsNotNone(cache.get("k3"))
+
+class TestSemanticAnswerCache(unittest.TestCase):
+    """语义缓存测试类"""
+
+    def test_threshold_and_version(self):
+        """测试相似度阈值与版本隔离"""
+        cache = SemanticAnswerCache(max_entries=10, ttl_seconds=0)
+        cache.put("什么是API？", [1.0, 0.0], "v1", {"answer": 1})
+
+        hit = cache.lookup([0.9, 0.1], "v1", threshold=0.9)
+        self.assertEqual(hit[0], "什么是API？")
+        self.assertEqual(hit[2], {"answer": 1})
+        self.assertIsNone(cache.lookup([0.5, 0.5], "v1", threshold=0.9))
+        self.assertIsNone(cache.lookup([1.0, 0.0], "v2", threshold=0.9))
+
+        stats = cache.stats()
+        self.assertEqual((stats["hits"], stats["misses"]), (1, 2))
+
+    def test_eviction_and_invalidate(self):
+        """测试LRU淘汰与按问题失效"""
+        cache = SemanticAnswerCache(max_entries=2, ttl_seconds=0)
+        cache.put("问题A", [1.0, 0.0, 0.0], "v1", {"answer": 1})
+        cache.put("问题B", [0.0, 1.0, 0.0], "v1", {"answer": 2})
+        cache.lookup([1.0, 0.0, 0.0], "v1", threshold=0.9)
+        cache.put("问题C", [0.0, 0.0, 1.0], "v1", {"answer": 3})
+
+        self.assertIsNone(cache.lookup([0.0, 1.0, 0.0], "v1", threshold=0.9))
+        self.assertEqual(cache.invalidate_question("问题A"), 1)
+        self.assertIsNone(cache.lookup([1.0, 0.0, 0.0], "v1", threshold=0.9))
+        self.assertEqual(cache.stats()["size"], 1)
+
+class TestEnhancedKnowledgeBaseCache(unittest.TestCase):
+    """增强知识库缓存接入测试类"""
+
+    def setUp(self):
+        """测试前准备"""
+        self.kb = create_knowledge_base(self, {"answer_cache.semantic_enabled": True})
+        self.kb.qa_chain = FakeQAChain()
+        self.kb.embeddings = FakeEmbeddings()
+
+    def test_repeated_question_hits_cache(self):
+        """测试重复问题直接返回缓存"""
+        first = self.kb.ask_question_with_feedback("什么是API？")
+        second = self.kb.ask_question_with_feedback("什么是API？ ")
+        self.assertEqual(self.kb.qa_chain.calls, 1)
+        self.assertEqual(first["final_answer"], second["final_answer"])
+
+        stats = self.kb.get_enhanced_stats()["answer_cache"]
+        self.assertEqual((stats["hits"], stats["misses"]), (1, 1))
+
+        # 索引版本变化后重新计算
+        self.kb.store_version = "v2"
+        self.kb.ask_question_with_feedback("什么是API？")
+        self.assertEqual(self.kb.qa_chain.calls, 2)
+
+    def test_corrected_feedback_invalidates(self):
+        """测试纠正反馈使该问题的缓存失效"""
+        self.kb.feedback_system.confidence_threshold = 0.5
+        result = self.kb.ask_question_with_feedback("什么是API？")
+        self.kb.collect_user_feedback(
+            "什么是API？", result["original_answer"], "corrected", corrected_answer="纠正后的答案"
+        )
+
+        result = self.kb.ask_question_with_feedback("什么是API？")
+        self.assertEqual(self.kb.qa_chain.calls, 2)
+        self.assertEqual(result["final_answer"], "纠正后的答案")
+
+    def test_similar_question_hits_semantic_cache(self):
+        """测试相近问题复用答案，不相近的问题重新生成"""
+        first = self.kb.ask_question_with_feedback("什么是API？")
+        second = self.kb.ask_question_with_feedback("API接口是什么意思")
+        self.assertEqual(self.kb.qa_chain.calls, 1)
+        self.assertEqual(second["final_answer"], first["final_answer"])
+        self.assertEqual(second["question"], "API接口是什么意思")
+
+        self.kb.ask_question_with_feedback("如何部署？")
+        self.assertEqual(self.kb.qa_chain.calls, 2)
+
+        stats = self.kb.get_enhanced_stats()["semantic_cache"]
+        self.assertEqual((stats["hits"], stats["misses"]), (1, 2))
+        self.assertEqual(stats["threshold"], 0.95)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,132 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+批量接口测试脚本
+验证批量搜索与逐个搜索结果一致、批量问答的顺序与单项失败，以及BatchSearchDocuments/BatchChat接口
+"""
+
+import sys
+import copy
+import asyncio
+import unittest
+from pathlib import Path
+
+# 添加项目路径
+project_root = Path(__file__).parent.parent
+if str(project_root) not in sys.path:
+    sys.path.insert(0, str(project_root))
+
+from langchain.schema import Document
+from langchain_community.vectorstores import FAISS
+from config.config import get_config
+from src.app.enhanced_knowledge_base import EnhancedKnowledgeBase
+from src.app.async_knowledge_base import AsyncKnowledgeBase
+from src.rpc.grpc_server import AsyncKnowledgeServiceImpl, KnowledgeServiceImpl
+from src.rpc.generated import knowledge_service_pb2
+from test.knowledge_base_fixtures import FakeEmbeddings, create_knowledge_base
+
+class FakeKnowledgeBase:
+    """逐个问答的假知识库，问题含“失败”时抛出异常"""
+
+    def ask_question_with_feedback(self, question, use_feedback=True, deadline=None):
+        if "失败" in question:
+            raise RuntimeError("LLM调用失败")
+        return {"question": question, "original_answer": f"答:{question}", "final_answer": f"答:{question}",
+                "source_documents": [], "feedback_info": {}}
+
+class FakeContext:
+    """无截止时间的假gRPC上下文"""
+
+    def cancelled(self):
+        return False
+
+    def time_remaining(self):
+        return None
+
+class TestBatch(unittest.TestCase):
+    """批量接口测试类"""
+
+    def setUp(self):
+        """测试前准备"""
+        self.kb = create_knowledge_base(self)
+        self.kb.embeddings = FakeEmbeddings()
+        self.kb.vector_store = FAISS.from_documents([
+            Document(page_content="API是应用程序接口", metadata={"source": "api.md"}),
+            Document(page_content="接口文档说明", metadata={"source": "doc.md"}),
+            Document(page_content="部署到生产环境", metadata={"source": "deploy.md"}),
+        ], self.kb.embeddings)
+
+    def test_batch_search_matches_single(self):
+        """测试批量搜索与逐个搜索结果一致"""
+        queries = ["什么是API", "如何部署", "其他问题"]
+        batch = self.kb.search_documents_batch(queries, k=2)
+        self.assertEqual(len(batch), 3)
+        for query, results in zip(queries, batch):
+            single = self.kb._search_documents(query, 2)
+            self.assertEqual([r["content"] for r in results], [r["content"] for r in single])
+            for a, b in zip(results, single):
+                self.assertAlmostEqual(a["score"], b["score"], places=5)
+        self.assertEqual(batch[1][0]["metadata"]["source"], "deploy.md")
+        self.assertEqual(self.kb.search_documents_batch([]), [])
+
+    def test_batch_chat_order_and_errors(self):
+        """测试批量问答保持顺序，单个问题失败不影响其他问题"""
+        kb = FakeKnowledgeBase()
+        questions = ["问题1", "会失败的问题", "问题3"]
+        kb.prefetch_query_embeddings = lambda questions: None
+        kb.config = get_config()
+        results = EnhancedKnowledgeBase.ask_questions_batch(kb, questions, max_parallelism=2)
+        self.assertEqual(results[0]["question"], "问题1")
+        self.assertIsInstance(results[1], RuntimeError)
+        self.assertEqual(results[2]["final_answer"], "答:问题3")
+
+    def test_grpc_batch_handlers(self):
+        """测试同步与异步服务的批量接口（批量限制读取服务自身的配置）"""
+        config = copy.deepcopy(get_config())
+        service = KnowledgeServiceImpl.__new__(KnowledgeServiceImpl)
+        service.kb = self.kb
+        service.config = config
+
+        response = service.BatchSearchDocuments(
+            knowledge_service_pb2.BatchSearchRequest(queries=["什么是API", " ", "如何部署"], k=1), None
+        )
+        self.assertTrue(response.success)
+        self.assertEqual(len(response.results), 3)
+        self.assertEqual(response.results[0].results[0].metadata["source"], "api.md")
+        self.assertFalse(response.results[1].success)
+        self.assertEqual(response.results[2].results[0].metadata["source"], "deploy.md")
+
+        config.batch.max_items = 2
+        response = service.BatchSearchDocuments(
+            knowledge_service_pb2.BatchSearchRequest(queries=["a", "b", "c"]), None
+        )
+        self.assertFalse(response.success)
+        self.assertEqual(service._batch_parallelism(knowledge_service_pb2.BatchChatRequest(max_parallelism=8)),
+                         config.batch.chat_parallelism)
+        config.batch.max_items = get_config().batch.max_items
+
+        async_service = AsyncKnowledgeServiceImpl.__new__(AsyncKnowledgeServiceImpl)
+        async_service.kb = self.kb
+        async_service.config = config
+        async_service.async_kb = AsyncKnowledgeBase(self.kb)
+        self.kb.qa_chain = object()
+
+        async def ask(question, use_feedback=True, deadline=None):
+            if "失败" in question:
+                raise RuntimeError("LLM调用失败")
+            return FakeKnowledgeBase().ask_question_with_feedback(question)
+
+        async_service.async_kb.ask_question_with_feedback = ask
+        response = asyncio.run(async_service.BatchChat(
+            knowledge_service_pb2.BatchChatRequest(questions=["问题1", "会失败的问题"], max_parallelism=8), FakeContext()
+        ))
+        async_service.async_kb.shutdown()
+        self.assertTrue(response.success)
+        self.assertTrue(response.results[0].success)
+        self.assertEqual(response.results[0].final_answer, "答:问题1")
+        self.assertFalse(response.results[1].success)
+        self.assertEqual(response.results[1].question, "会失败的问题")
+        self.assertIn("LLM调用失败", response.results[1].error_message)
+
+if __name__ == '__main__':
+    unittest.main()
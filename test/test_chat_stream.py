@@ -0,0 +1,131 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+流式聊天测试脚本
+验证增强知识库的流式问答事件顺序、缓存回放、异步问答以及ChatStream接口
+"""
+
+import sys
+import time
+import asyncio
+import unittest
+from pathlib import Path
+from unittest.mock import patch
+
+# 添加项目路径
+project_root = Path(__file__).parent.parent
+if str(project_root) not in sys.path:
+    sys.path.insert(0, str(project_root))
+
+from src.app.async_knowledge_base import AsyncKnowledgeBase
+from src.rpc.grpc_server import AsyncKnowledgeServiceImpl, KnowledgeServiceImpl
+from src.rpc.generated import knowledge_service_pb2
+from src.rpc.service_container import ServiceContainer
+from test.knowledge_base_fixtures import FakeQAChain, create_knowledge_base
+
+class FakeLLM:
+    """逐段返回答案的假LLM"""
+
+    def __init__(self):
+        self.prompts = []
+
+    def stream(self, prompt):
+        self.prompts.append(prompt)
+        yield from ["API", "是", "接口"]
+
+    async def astream(self, prompt):
+        self.prompts.append(prompt)
+        for text in ["API", "是", "接口"]:
+            await asyncio.sleep(0.1)
+            yield text
+
+class FakeContext:
+    """始终活跃、无截止时间的假gRPC上下文"""
+
+    def is_active(self):
+        return True
+
+    def time_remaining(self):
+        return None
+
+class TestChatStream(unittest.TestCase):
+    """流式聊天测试类"""
+
+    def setUp(self):
+        """测试前准备"""
+        self.kb = create_knowledge_base(self)
+        self.kb.qa_chain = FakeQAChain()
+        self.kb.llm = FakeLLM()
+
+    def test_event_order_and_cache_replay(self):
+        """测试先来源、再片段、最后结果，重复问题从缓存回放"""
+        events = list(self.kb.ask_question_with_feedback_stream("什么是API？"))
+        self.assertEqual([e["type"] for e in events], ["sources", "delta", "delta", "delta", "final"])
+        self.assertEqual(events[0]["source_documents"][0]["source"], "api.md")
+        self.assertIn("API是应用程序接口", self.kb.llm.prompts[0])
+        self.assertEqual(events[-1]["response"]["original_answer"], "API是接口")
+
+        events = list(self.kb.ask_question_with_feedback_stream("什么是API？"))
+        self.assertEqual(len(self.kb.llm.prompts), 1)
+        self.assertEqual([e["type"] for e in events], ["sources", "delta", "final"])
+        self.assertEqual(events[1]["text"], "API是接口")
+
+    def test_grpc_chat_stream(self):
+        """测试ChatStream接口的消息序列"""
+        service = KnowledgeServiceImpl.__new__(KnowledgeServiceImpl)
+        service.kb = self.kb
+
+        messages = list(service.ChatStream(
+            knowledge_service_pb2.ChatRequest(question="什么是API？", use_feedback=True), FakeContext()
+        ))
+        kinds = [m.WhichOneof("event") for m in messages]
+        self.assertEqual(kinds, ["sources", "answer_delta", "answer_delta", "answer_delta", "end"])
+        self.assertTrue(messages[-1].end.success)
+        self.assertEqual(messages[-1].end.final_answer, "API是接口")
+
+        service.kb = None
+        messages = list(service.ChatStream(knowledge_service_pb2.ChatRequest(question="x"), FakeContext()))
+        self.assertFalse(messages[0].end.success)
+
+    def test_async_concurrent_questions(self):
+        """测试并发异步问答只占用协程，且事件与同步流式一致"""
+        async_kb = AsyncKnowledgeBase(self.kb, max_blocking_workers=2)
+
+        async def ask_all():
+            return await asyncio.gather(*[
+                async_kb.ask_question_with_feedback(f"问题{i}") for i in range(20)
+            ])
+
+        start = time.perf_counter()
+        results = asyncio.run(ask_all())
+        elapsed = time.perf_counter() - start
+        async_kb.shutdown()
+
+        # 20个请求各需约0.3秒LLM等待，而阻塞线程只有2个
+        self.assertLess(elapsed, 2.0)
+        self.assertEqual(results[5]["question"], "问题5")
+        self.assertEqual(results[5]["original_answer"], "API是接口")
+        self.assertEqual(results[5]["source_documents"][0]["source"], "api.md")
+
+    def test_async_grpc_handlers(self):
+        """测试异步服务的流式聊天与线程池包装的接口"""
+        # 向量存储由测试直接设置，加载索引时不读取磁盘（索引加载完成后健康检查才报告 ready）
+        with patch.object(ServiceContainer, "_load_index", lambda container: container.knowledge_base.vector_store):
+            service = AsyncKnowledgeServiceImpl(self.kb)
+
+        async def run():
+            request = knowledge_service_pb2.ChatRequest(question="什么是API？", use_feedback=True)
+            messages = [m async for m in service.ChatStream(request, FakeContext())]
+            health = await service.HealthCheck(knowledge_service_pb2.HealthCheckRequest(), FakeContext())
+            return messages, health
+
+        messages, health = asyncio.run(run())
+        service.async_kb.shutdown()
+
+        kinds = [m.WhichOneof("event") for m in messages]
+        self.assertEqual(kinds, ["sources", "answer_delta", "answer_delta", "answer_delta", "end"])
+        self.assertEqual(messages[-1].end.final_answer, "API是接口")
+        self.assertEqual(health.status, "ready")
+
+if __name__ == "__main__":
+    unittest.main()
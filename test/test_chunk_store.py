@@ -0,0 +1,82 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+分块存储测试脚本
+验证按行号写入、按需读取以及旧版index.pkl迁移
+"""
+
+import sys
+import pickle
+import tempfile
+import unittest
+from pathlib import Path
+
+# 添加项目路径
+project_root = Path(__file__).parent.parent
+if str(project_root) not in sys.path:
+    sys.path.insert(0, str(project_root))
+
+from langchain.schema import Document
+from langchain_community.docstore.in_memory import InMemoryDocstore
+from src.app.chunk_store import (
+    CHUNK_STORE_FILE, ChunkStore, ChunkDocstore, RowIdMapping,
+    write_chunk_store, migrate_pickle_docstore
+)
+
+class TestChunkStore(unittest.TestCase):
+    """分块存储测试类"""
+
+    def setUp(self):
+        """测试前准备"""
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.db_path = Path(self.temp_dir.name) / CHUNK_STORE_FILE
+        self.docs = [
+            Document(page_content=f"文本块{i}", metadata={"source": f"doc{i % 3}.md", "type": "markdown"})
+            for i in range(10)
+        ]
+
+    def tearDown(self):
+        """测试后清理"""
+        self.temp_dir.cleanup()
+
+    def test_write_and_lookup(self):
+        """测试写入与按行号读取"""
+        count = write_chunk_store(self.db_path, enumerate(self.docs))
+        self.assertEqual(count, 10)
+
+        store = ChunkStore(self.db_path)
+        self.assertEqual(store.get(3).page_content, "文本块3")
+        self.assertEqual(store.get(3).metadata["source"], "doc0.md")
+        self.assertIsNone(store.get(99))
+        self.assertEqual(sorted(store.get_many([1, 5, 99])), [1, 5])
+
+        docstore = ChunkDocstore(store)
+        mapping = RowIdMapping(store)
+        self.assertEqual(len(mapping), 10)
+        self.assertEqual(docstore.search(mapping[7]).page_content, "文本块7")
+        self.assertIsInstance(docstore.search("99"), str)
+        store.close()
+
+    def test_store_is_read_only(self):
+        """测试默认只读打开"""
+        write_chunk_store(self.db_path, enumerate(self.docs))
+        store = ChunkStore(self.db_path)
+        with self.assertRaises(Exception):
+            store.delete_rows([1])
+        store.close()
+
+    def test_migrate_pickle_docstore(self):
+        """测试旧版index.pkl迁移"""
+        ids = [f"uuid-{i}" for i in range(len(self.docs))]
+        docstore = InMemoryDocstore(dict(zip(ids, self.docs)))
+        with open(Path(self.temp_dir.name) / "index.pkl", "wb") as f:
+            pickle.dump((docstore, dict(enumerate(ids))), f)
+
+        self.assertEqual(migrate_pickle_docstore(self.temp_dir.name), 10)
+
+        store = ChunkStore(self.db_path)
+        self.assertEqual(store.get(4).page_content, "文本块4")
+        store.close()
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,240 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+截止时间与取消测试脚本
+验证超时或取消时中止LLM调用、时间不足或阶段超出预算时跳过可选步骤、多轮对话超时返回对应状态码且不写入消息，以及异步请求合并在调用者全部取消时取消计算
+"""
+
+import sys
+import time
+import asyncio
+import unittest
+from pathlib import Path
+from types import SimpleNamespace
+from unittest.mock import patch
+
+import grpc
+
+# 添加项目路径
+project_root = Path(__file__).parent.parent
+if str(project_root) not in sys.path:
+    sys.path.insert(0, str(project_root))
+
+from config.config import get_config
+from src.app.deadline import Deadline, DeadlineExceeded, RequestCancelled
+from src.app.async_knowledge_base import AsyncKnowledgeBase
+from src.app.single_flight import SingleFlight
+from src.rpc.conversation_service_impl import ConversationServiceImpl
+from src.rpc.grpc_server import AsyncKnowledgeServiceImpl, KnowledgeServiceImpl
+from src.rpc.generated import knowledge_service_pb2
+from test.knowledge_base_fixtures import FakeQAChain, create_knowledge_base
+
+class SlowLLM:
+    """每个片段间隔0.1秒的假LLM，记录生成的片段数与流是否被关闭"""
+
+    def __init__(self, chunks=10):
+        self.chunks = chunks
+        self.produced = 0
+        self.closed = False
+
+    def stream(self, prompt):
+        try:
+            for _ in range(self.chunks):
+                time.sleep(0.1)
+                self.produced += 1
+                yield "片段"
+        finally:
+            self.closed = True
+
+    async def astream(self, prompt):
+        try:
+            for _ in range(self.chunks):
+                await asyncio.sleep(0.1)
+                self.produced += 1
+                yield "片段"
+        finally:
+            self.closed = True
+
+class FakeConversationManager:
+    """记录写入消息的假对话管理器"""
+
+    def __init__(self):
+        self.messages = []
+
+    def get_conversation_context(self, conversation_id, max_turns):
+        return []
+
+    def add_message(self, conversation_id, content, role, sources=None):
+        self.messages.append((role, content))
+
+class Aborted(Exception):
+    """模拟 context.abort 抛出的异常"""
+
+    def __init__(self, code):
+        super().__init__(code)
+        self.code = code
+
+class FakeContext:
+    """剩余时间固定的假gRPC上下文（同步）"""
+
+    def __init__(self, remaining):
+        self.remaining = remaining
+
+    def time_remaining(self):
+        return self.remaining
+
+    def is_active(self):
+        return True
+
+    def abort(self, code, details):
+        raise Aborted(code)
+
+class FakeAsyncContext(FakeContext):
+    """grpc.aio 假上下文"""
+
+    def cancelled(self):
+        return False
+
+    async def abort(self, code, details):
+        raise Aborted(code)
+
+class TestDeadline(unittest.TestCase):
+    """截止时间与取消测试类"""
+
+    def setUp(self):
+        """测试前准备"""
+        self.kb = create_knowledge_base(self)
+        self.kb.qa_chain = FakeQAChain()
+        self.kb.llm = SlowLLM()
+
+    def test_deadline_basics(self):
+        """测试剩余时间、可选步骤判断与阶段预算"""
+        self.assertIsNone(Deadline().remaining())
+        self.assertFalse(Deadline().bounded)
+        self.assertTrue(Deadline(10).allows(2))
+        self.assertFalse(Deadline(1).allows(2))
+
+        with self.assertRaises(DeadlineExceeded):
+            Deadline(-1).check("检索")
+        with self.assertRaises(RequestCancelled):
+            Deadline(is_cancelled=lambda: True).check("检索")
+
+        # 阶段超出预算不中止（结果已可用），只跳过之后的可选步骤
+        deadline = Deadline(10)
+        with deadline.stage("检索", 0.01):
+            time.sleep(0.15)
+        self.assertTrue(deadline.over_budget)
+        self.assertFalse(deadline.allows(2))
+
+    def test_sync_deadline_aborts_llm(self):
+        """测试截止时间到期时中止LLM流，结果不写入缓存"""
+        start = time.perf_counter()
+        with self.assertRaises(DeadlineExceeded):
+            self.kb.ask_question_with_feedback("什么是API？", deadline=Deadline(0.35))
+        self.assertLess(time.perf_counter() - start, 0.6)
+        self.assertTrue(self.kb.llm.closed)
+        self.assertLess(self.kb.llm.produced, 5)
+        self.assertEqual(self.kb.answer_cache.stats()["size"], 0)
+
+    def test_sync_cancel_aborts_llm(self):
+        """测试客户端取消时中止LLM流"""
+        cancelled = []
+        deadline = Deadline(is_cancelled=lambda: bool(cancelled))
+        events = self.kb.ask_question_with_feedback_stream("什么是API？", deadline=deadline)
+        self.assertEqual(next(events)["type"], "sources")
+        self.assertEqual(next(events)["type"], "delta")
+        cancelled.append(True)
+        with self.assertRaises(RequestCancelled):
+            next(events)
+        self.assertTrue(self.kb.llm.closed)
+        self.assertEqual(self.kb.llm.produced, 2)
+
+    def test_retrieval_past_deadline_skips_llm(self):
+        """测试检索完成时截止时间已过则不再调用LLM"""
+        self.kb.qa_chain = FakeQAChain(retrieval_delay=0.4)
+        with self.assertRaises(DeadlineExceeded):
+            self.kb.ask_question_with_feedback("什么是API？", deadline=Deadline(0.3))
+        self.assertEqual(self.kb.llm.produced, 0)
+
+    def test_retrieval_over_budget_keeps_answer(self):
+        """测试检索超出阶段预算但仍有剩余时间时照常生成答案，只跳过相似问题查找"""
+        self.kb.qa_chain = FakeQAChain(retrieval_delay=0.4)
+        self.kb.llm = SlowLLM(chunks=1)
+        with patch.object(get_config().request_budget, "retrieval_fraction", 0.01), \
+                patch.object(self.kb.feedback_system, "get_similar_questions_feedback", return_value=[]) as lookup:
+            response = self.kb.ask_question_with_feedback("什么是API？", deadline=Deadline(30))
+        self.assertEqual(response["original_answer"], "片段")
+        lookup.assert_not_called()
+
+    def test_short_budget_skips_optional_steps(self):
+        """测试剩余时间不足时跳过相似问题查找"""
+        self.kb.llm = SlowLLM(chunks=1)
+        with patch.object(self.kb.feedback_system, "get_similar_questions_feedback", return_value=[]) as lookup:
+            self.kb.ask_question_with_feedback("什么是API？", deadline=Deadline(1.0))
+            lookup.assert_not_called()
+            self.kb.ask_question_with_feedback("什么是部署？", deadline=Deadline(30))
+            lookup.assert_called_once()
+
+    def test_async_deadline_aborts_llm(self):
+        """测试异步问答截止时间到期时取消进行中的LLM调用"""
+        async_kb = AsyncKnowledgeBase(self.kb, max_blocking_workers=2)
+        with self.assertRaises(DeadlineExceeded):
+            asyncio.run(async_kb.ask_question_with_feedback("什么是API？", deadline=Deadline(0.35)))
+        async_kb.shutdown()
+        self.assertTrue(self.kb.llm.closed)
+        self.assertLess(self.kb.llm.produced, 5)
+
+    def test_conversation_deadline_aborts_without_messages(self):
+        """测试多轮对话超时时返回 DEADLINE_EXCEEDED（同步与异步服务），且不写入没有回复的用户问题"""
+        manager = FakeConversationManager()
+        container = SimpleNamespace(conversation_service=ConversationServiceImpl(self.kb, manager))
+        request = knowledge_service_pb2.ConversationChatRequest(question="什么是API？", conversation_id="c1")
+
+        service = KnowledgeServiceImpl.__new__(KnowledgeServiceImpl)
+        service.container = container
+        with self.assertRaises(Aborted) as cm:
+            service.ChatConversation(request, FakeContext(0.35))
+        self.assertEqual(cm.exception.code, grpc.StatusCode.DEADLINE_EXCEEDED)
+
+        async_service = AsyncKnowledgeServiceImpl.__new__(AsyncKnowledgeServiceImpl)
+        async_service.container = container
+        async_service.async_kb = AsyncKnowledgeBase(self.kb, max_blocking_workers=2)
+        with self.assertRaises(Aborted) as cm:
+            asyncio.run(async_service.ChatConversation(request, FakeAsyncContext(0.35)))
+        async_service.async_kb.shutdown()
+        self.assertEqual(cm.exception.code, grpc.StatusCode.DEADLINE_EXCEEDED)
+        self.assertEqual(manager.messages, [])
+
+        self.kb.llm = SlowLLM(chunks=1)
+        service.ChatConversation(request, FakeContext(30))
+        self.assertEqual(manager.messages, [("user", "什么是API？"), ("assistant", "片段")])
+
+    def test_single_flight_cancels_when_all_callers_cancel(self):
+        """测试所有调用者都取消时共享计算被取消"""
+        flight = SingleFlight()
+        state = {}
+
+        async def compute():
+            try:
+                await asyncio.sleep(1)
+                state["finished"] = True
+            except asyncio.CancelledError:
+                state["cancelled"] = True
+                raise
+
+        async def run():
+            callers = [asyncio.ensure_future(flight.do_async("k", compute)) for _ in range(3)]
+            await asyncio.sleep(0.05)
+            callers[0].cancel()
+            await asyncio.sleep(0.05)
+            self.assertNotIn("cancelled", state)
+            for caller in callers[1:]:
+                caller.cancel()
+            await asyncio.sleep(0.05)
+
+        asyncio.run(run())
+        self.assertEqual(state, {"cancelled": True})
+        self.assertEqual(flight.stats()["in_flight"], 0)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,110 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+文档提取测试脚本
+验证文本/Word/PDF提取、大PDF分段并行（调用方线程不解析PDF）与错误隔离
+"""
+
+import io
+import sys
+import unittest
+from pathlib import Path
+from unittest.mock import patch
+
+# 添加项目路径
+project_root = Path(__file__).parent.parent
+if str(project_root) not in sys.path:
+    sys.path.insert(0, str(project_root))
+
+import PyPDF2
+from docx import Document as DocxDocument
+from src.app.document_extraction import DocumentExtractor, document_type
+
+def make_pdf(pages):
+    """生成每页包含一行文本的PDF"""
+    objects = ["<< /Type /Catalog /Pages 2 0 R >>", None,
+               "<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>"]
+    kids = []
+    for text in pages:
+        stream = f"BT /F1 12 Tf 72 720 Td ({text}) Tj ET"
+        objects.append(f"<< /Length {len(stream)} >>\nstream\n{stream}\nendstream")
+        objects.append(
+            f"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] "
+            f"/Contents {len(objects)} 0 R /Resources << /Font << /F1 3 0 R >> >> >>"
+        )
+        kids.append(f"{len(objects)} 0 R")
+    objects[1] = f"<< /Type /Pages /Kids [{' '.join(kids)}] /Count {len(kids)} >>"
+
+    out = io.BytesIO()
+    out.write(b"%PDF-1.4\n")
+    offsets = []
+    for i, body in enumerate(objects, start=1):
+        offsets.append(out.tell())
+        out.write(f"{i} 0 obj\n{body}\nendobj\n".encode("latin-1"))
+    xref = out.tell()
+    out.write(f"xref\n0 {len(objects) + 1}\n0000000000 65535 f \n".encode())
+    for offset in offsets:
+        out.write(f"{offset:010d} 00000 n \n".encode())
+    out.write(f"trailer\n<< /Size {len(objects) + 1} /Root 1 0 R >>\nstartxref\n{xref}\n%%EOF".encode())
+    return out.getvalue()
+
+class TestDocumentExtraction(unittest.TestCase):
+    """文档提取测试类"""
+
+    @classmethod
+    def setUpClass(cls):
+        """测试前准备"""
+        cls.extractor = DocumentExtractor(max_workers=2, pdf_pages_per_task=3)
+        # 预先启动工作进程，之后在当前进程中替换PyPDF2不会影响工作进程
+        cls.extractor.extract("warm.pdf", make_pdf(["Page"] * 6))
+
+    @classmethod
+    def tearDownClass(cls):
+        """测试后清理"""
+        cls.extractor.shutdown()
+
+    def test_text_and_docx(self):
+        """测试纯文本与Word提取"""
+        self.assertEqual(self.extractor.extract("a.md", "# 标题".encode("utf-8")), "# 标题")
+
+        doc = DocxDocument()
+        doc.add_paragraph("第一段")
+        doc.add_paragraph("第二段")
+        buffer = io.BytesIO()
+        doc.save(buffer)
+        self.assertEqual(self.extractor.extract("b.docx", buffer.getvalue()), "第一段\n第二段\n")
+
+    def test_large_pdf_split_into_page_ranges(self):
+        """测试大PDF按页段并行提取且顺序不变"""
+        pages = [f"Page {i}" for i in range(10)]
+        text = self.extractor.extract("big.pdf", make_pdf(pages))
+        self.assertEqual([line.strip() for line in text.splitlines()], pages)
+
+    def test_pdf_not_parsed_in_caller(self):
+        """测试PDF页数统计与提取都在工作进程中完成，调用方线程不解析PDF"""
+        with patch.object(PyPDF2, "PdfReader", side_effect=AssertionError("调用方线程解析了PDF")):
+            for count in (7, 2):
+                pages = [f"Page {i}" for i in range(count)]
+                text = self.extractor.extract("doc.pdf", make_pdf(pages))
+                self.assertEqual([line.strip() for line in text.splitlines()], pages)
+
+    def test_errors_are_isolated(self):
+        """测试单个文件失败不影响其他文件，且保留原始异常类型"""
+        results = list(self.extractor.extract_many([
+            ("bad.pdf", b"not a pdf"),
+            ("x.exe", b""),
+            ("ok.txt", "正常".encode("utf-8")),
+        ]))
+        self.assertIsInstance(results[0][1], PyPDF2.errors.PdfReadError)
+        self.assertIsInstance(results[1][1], ValueError)
+        self.assertEqual(results[2], ("ok.txt", "正常"))
+
+    def test_document_type(self):
+        """测试文档类型识别"""
+        self.assertEqual(document_type("docs/a.MD"), "markdown")
+        self.assertEqual(document_type("a.pdf"), "pdf")
+        with self.assertRaises(ValueError):
+            document_type("a.exe")
+
+if __name__ == "__main__":
+    unittest.main()
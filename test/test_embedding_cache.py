@@ -0,0 +1,131 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+向量缓存测试脚本
+验证缓存命中、文本规范化、查询/文档区分、容量淘汰、重复写入不重复计入容量，以及命中时不写数据库
+"""
+
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+from typing import List
+
+# 添加项目路径
+project_root = Path(__file__).parent.parent
+if str(project_root) not in sys.path:
+    sys.path.insert(0, str(project_root))
+
+from langchain_core.embeddings import Embeddings
+from src.app.embedding_cache import EmbeddingCache, CachedEmbeddings, cache_key
+
+class CountingEmbeddings(Embeddings):
+    """记录调用次数的假嵌入模型"""
+
+    def __init__(self):
+        self.embedded = []
+
+    def _vector(self, text: str) -> List[float]:
+        return [float(len(text)), float(sum(map(ord, text)) % 997), 1.0, 0.5]
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        self.embedded.extend(texts)
+        return [self._vector(t) for t in texts]
+
+    def embed_query(self, text: str) -> List[float]:
+        self.embedded.append(text)
+        return [-v for v in self._vector(text)]
+
+class TestEmbeddingCache(unittest.TestCase):
+    """向量缓存测试类"""
+
+    def setUp(self):
+        """测试前准备"""
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.db_path = Path(self.temp_dir.name) / "embedding_cache.db"
+        self.model = CountingEmbeddings()
+
+    def tearDown(self):
+        """测试后清理"""
+        self.temp_dir.cleanup()
+
+    def _embeddings(self, max_size_mb: int = 16) -> CachedEmbeddings:
+        return CachedEmbeddings(self.model, EmbeddingCache(self.db_path, max_size_mb), "test-model")
+
+    def test_only_misses_are_embedded(self):
+        """测试仅未命中的文本调用底层模型"""
+        embeddings = self._embeddings()
+        first = embeddings.embed_documents(["文本A", "文本B", "文本A"])
+        self.assertEqual(self.model.embedded, ["文本A", "文本B"])
+        self.assertEqual(first[0], first[2])
+
+        second = embeddings.embed_documents(["文本B", "文本C"])
+        self.assertEqual(self.model.embedded, ["文本A", "文本B", "文本C"])
+        self.assertEqual(second[0], first[1])
+
+    def test_cache_persists_across_instances(self):
+        """测试缓存跨实例持久化"""
+        self._embeddings().embed_documents(["持久化文本"])
+        self.model.embedded.clear()
+
+        reopened = self._embeddings()
+        reopened.embed_documents(["  持久化文本 "])
+        self.assertEqual(self.model.embedded, [])
+        self.assertEqual(reopened.cache.stats()["hits"], 1)
+
+    def test_query_and_document_keys_differ(self):
+        """测试查询向量与文档向量分别缓存"""
+        embeddings = self._embeddings()
+        doc_vector = embeddings.embed_documents(["问题"])[0]
+        query_vector = embeddings.embed_query("问题")
+        self.assertNotEqual(doc_vector, query_vector)
+        self.assertEqual(embeddings.embed_query("问题"), query_vector)
+        self.assertEqual(len(self.model.embedded), 2)
+
+        self.assertNotEqual(cache_key("m", "query", "x"), cache_key("m", "document", "x"))
+        self.assertNotEqual(cache_key("m1", "query", "x"), cache_key("m2", "query", "x"))
+
+    def test_eviction_keeps_size_bounded(self):
+        """测试超出容量后淘汰最久未使用的条目"""
+        cache = EmbeddingCache(self.db_path, max_size_mb=1)
+        vector = [0.0] * 1024  # 4KB
+        for batch in range(10):
+            cache.put_many({f"key-{batch}-{i}": vector for i in range(50)})
+
+        stats = cache.stats()
+        self.assertLessEqual(stats["size_mb"], 1.0)
+        self.assertEqual(cache.get_many(["key-0-0"]), {})
+        self.assertIn("key-9-49", cache.get_many(["key-9-49"]))
+
+    def test_replaced_entries_not_double_counted(self):
+        """测试重复写入同一键时容量只计入大小差，不提前触发淘汰"""
+        cache = EmbeddingCache(self.db_path, max_size_mb=1)
+        for _ in range(10):
+            cache.put_many({f"key-{i}": [0.0] * 1024 for i in range(50)})
+        self.assertEqual(cache._total_bytes, 50 * 4096)
+        self.assertEqual(cache._total_bytes, cache._measure_bytes())
+
+        cache.put_many({"key-0": [0.0] * 512})
+        self.assertEqual(cache._total_bytes, cache._measure_bytes())
+        self.assertIn("key-1", cache.get_many(["key-1"]))
+
+    def test_hits_do_not_write(self):
+        """测试命中只在内存中记录最近使用时间，淘汰前写回，最近读取过的条目不被淘汰"""
+        cache = EmbeddingCache(self.db_path, max_size_mb=1)
+        vector = [0.0] * 1024  # 4KB
+        for batch in range(5):
+            cache.put_many({f"key-{batch}-{i}": vector for i in range(50)})
+
+        statements = []
+        cache._connection().set_trace_callback(statements.append)
+        self.assertIn("key-0-0", cache.get_many(["key-0-0"]))
+        cache._connection().set_trace_callback(None)
+        self.assertFalse([s for s in statements if not s.startswith("SELECT")])
+
+        # 第6批超出1MB触发淘汰
+        cache.put_many({f"key-5-{i}": vector for i in range(50)})
+        self.assertIn("key-0-0", cache.get_many(["key-0-0"]))
+        self.assertEqual(cache.get_many(["key-0-1"]), {})
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,123 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+嵌入流水线测试脚本
+验证批次顺序、失败重试、检查点续建与令牌桶限速
+"""
+
+import sys
+import time
+import tempfile
+import unittest
+import threading
+from pathlib import Path
+from types import SimpleNamespace
+from typing import List
+from unittest.mock import patch
+
+import numpy as np
+
+# 添加项目路径
+project_root = Path(__file__).parent.parent
+if str(project_root) not in sys.path:
+    sys.path.insert(0, str(project_root))
+
+from langchain_core.embeddings import Embeddings
+from src.app.embedding_pipeline import EmbeddingPipeline, TokenBucket
+
+class FlakyEmbeddings(Embeddings):
+    """可按文本注入失败的假嵌入模型"""
+
+    def __init__(self, failures: int = 0, fail_text: str = None):
+        self.failures = failures
+        self.fail_text = fail_text
+        self.calls = []
+        self._lock = threading.Lock()
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        with self._lock:
+            self.calls.append(list(texts))
+            if self.fail_text in texts:
+                raise RuntimeError("永久失败")
+            if self.failures > 0:
+                self.failures -= 1
+                raise RuntimeError("暂时失败")
+        return [[float(text.split("-")[1]), 1.0] for text in texts]
+
+    def embed_query(self, text: str) -> List[float]:
+        return self.embed_documents([text])[0]
+
+class TestEmbeddingPipeline(unittest.TestCase):
+    """嵌入流水线测试类"""
+
+    def setUp(self):
+        """测试前准备"""
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.checkpoint_dir = Path(self.temp_dir.name) / "checkpoint"
+        self.texts = [f"text-{i}" for i in range(100)]
+
+    def tearDown(self):
+        """测试后清理"""
+        self.temp_dir.cleanup()
+
+    def _pipeline(self, embeddings: Embeddings, **kwargs) -> EmbeddingPipeline:
+        params = dict(batch_size=10, max_workers=4, requests_per_second=0,
+                      retry_base_delay=0.001, checkpoint_dir=self.checkpoint_dir)
+        params.update(kwargs)
+        return EmbeddingPipeline(embeddings, **params)
+
+    def _embed(self, pipeline: EmbeddingPipeline) -> np.ndarray:
+        batches = (self.texts[i:i + pipeline.batch_size] for i in range(0, len(self.texts), pipeline.batch_size))
+        return np.vstack(list(pipeline.embed_stream(batches)))
+
+    def test_results_keep_input_order(self):
+        """测试并发嵌入结果与输入顺序一致"""
+        embeddings = FlakyEmbeddings()
+        vectors = self._embed(self._pipeline(embeddings))
+        self.assertEqual(vectors.shape, (100, 2))
+        self.assertEqual(vectors[:, 0].tolist(), list(range(100)))
+        self.assertEqual(len(embeddings.calls), 10)
+
+    def test_transient_errors_are_retried(self):
+        """测试暂时性错误自动重试"""
+        embeddings = FlakyEmbeddings(failures=3)
+        vectors = self._embed(self._pipeline(embeddings))
+        self.assertEqual(len(vectors), 100)
+        self.assertEqual(len(embeddings.calls), 13)
+
+    def test_resume_from_checkpoint(self):
+        """测试中断后从检查点继续：只请求没有检查点的批次"""
+        batches = [self.texts[i:i + 10] for i in range(0, 100, 10)]
+        failing = FlakyEmbeddings(fail_text="text-95")
+        with self.assertRaises(RuntimeError):
+            self._embed(self._pipeline(failing, max_workers=1, max_retries=0))
+
+        # 按检查点确定需要重新请求的批次，不依赖中断时各批次的完成顺序
+        resumed = FlakyEmbeddings()
+        pipeline = self._pipeline(resumed, max_workers=1)
+        pending = [batch for batch in batches if pipeline._load_checkpoint(batch) is None]
+        self.assertIn(batches[-1], pending)
+        self.assertLess(len(pending), len(batches))
+
+        vectors = self._embed(pipeline)
+        self.assertEqual(vectors[:, 0].tolist(), list(range(100)))
+        self.assertEqual(resumed.calls, pending)
+
+        pipeline.clear_checkpoints()
+        self.assertFalse(self.checkpoint_dir.exists())
+
+    def test_token_bucket_limits_rate(self):
+        """测试令牌桶限速（使用模拟时钟）"""
+        clock = SimpleNamespace(now=0.0)
+        fake_time = SimpleNamespace(monotonic=lambda: clock.now,
+                                    sleep=lambda seconds: setattr(clock, "now", clock.now + seconds))
+        with patch("src.app.embedding_pipeline.time", fake_time):
+            # 速率取2的幂，模拟时钟的累加没有浮点误差
+            bucket = TokenBucket(rate=64, capacity=1)
+            for _ in range(11):
+                bucket.acquire()
+        # 第一个令牌来自初始容量，其余10个每个等待 1/64 秒
+        self.assertEqual(clock.now, 10 / 64)
+
+if __name__ == "__main__":
+    unittest.main()
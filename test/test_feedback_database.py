@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+反馈数据库连接管理测试脚本
+验证WAL模式与连接参数、每个线程复用一个连接、纠正性反馈在一次事务内写入，以及并发读写不报数据库锁定
+"""
+
+import sys
+import sqlite3
+import tempfile
+import threading
+import unittest
+from pathlib import Path
+from unittest.mock import patch
+
+# 添加项目路径
+project_root = Path(__file__).parent.parent
+if str(project_root) not in sys.path:
+    sys.path.insert(0, str(project_root))
+
+from src.app.feedback_system import FeedbackLearningSystem
+
+class TestFeedbackDatabase(unittest.TestCase):
+    """反馈数据库连接管理测试类"""
+
+    def setUp(self):
+        """测试前准备"""
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.feedback_system = FeedbackLearningSystem(str(Path(self.temp_dir.name) / "feedback.db"))
+        self.db = self.feedback_system.db
+
+    def tearDown(self):
+        """测试后清理"""
+        self.feedback_system.close()
+        self.temp_dir.cleanup()
+
+    def test_connection_settings_and_reuse(self):
+        """测试连接使用WAL模式与配置的参数，同一线程的多次操作复用连接"""
+        conn = self.db._connection()
+        self.assertEqual(conn.execute("PRAGMA journal_mode").fetchone()[0], "wal")
+        self.assertEqual(conn.execute("PRAGMA synchronous").fetchone()[0], 1)  # NORMAL
+        self.assertEqual(conn.execute("PRAGMA busy_timeout").fetchone()[0],
+                         int(self.db.settings.db_busy_timeout * 1000))
+
+        with patch("sqlite3.connect", wraps=sqlite3.connect) as connect:
+            self.feedback_system.collect_feedback("问题", "原答案", "corrected", corrected_answer="新答案")
+            self.feedback_system.get_optimized_answer("问题", "原答案")
+            self.feedback_system.get_system_stats()
+        connect.assert_not_called()
+
+    def test_corrected_feedback_is_atomic(self):
+        """测试改进答案写入失败时反馈记录一并回滚"""
+        with patch.object(self.db, "_update_improved_answer", side_effect=sqlite3.OperationalError("失败")):
+            with self.assertRaises(sqlite3.OperationalError):
+                self.feedback_system.collect_feedback("问题", "原答案", "corrected", corrected_answer="新答案")
+        self.assertEqual(self.feedback_system.get_system_stats()["total_feedback"], 0)
+
+        # 回滚后连接仍可继续写入
+        self.feedback_system.collect_feedback("问题", "原答案", "corrected", corrected_answer="新答案")
+        self.assertEqual(self.db.get_improved_answer("问题")["improved_answer"], "新答案")
+
+    def test_concurrent_reads_and_writes(self):
+        """测试多线程并发读写不报数据库锁定，且每个线程只创建一个连接"""
+        errors = []
+
+        def write(worker):
+            try:
+                for i in range(25):
+                    self.feedback_system.collect_feedback(
+                        f"问题{worker}-{i}", "原答案", "corrected", corrected_answer=f"答案{i}"
+                    )
+            except Exception as e:
+                errors.append(e)
+
+        def read():
+            try:
+                for _ in range(50):
+                    self.feedback_system.get_system_stats()
+                    self.feedback_system.get_similar_questions_feedback("问题1-1", 0.5)
+            except Exception as e:
+                errors.append(e)
+
+        threads = [threading.Thread(target=write, args=(i,)) for i in range(4)]
+        threads += [threading.Thread(target=read) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(errors, [])
+        stats = self.feedback_system.get_system_stats()
+        self.assertEqual(stats["total_feedback"], 100)
+        self.assertEqual(stats["improved_answers"], 100)
+        # 8个工作线程与主线程（初始化与统计）各一个连接
+        self.assertEqual(len(self.db._connections), 9)
+
+if __name__ == '__main__':
+    unittest.main()
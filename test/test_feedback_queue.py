@@ -0,0 +1,118 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+反馈异步写入队列测试脚本
+验证提交即返回的ID与写入后的记录一致、按批合并为一个事务、关闭时写完排队的反馈、
+多个实例共用数据库时预留的ID不冲突，以及持续写入失败时只丢弃失败的反馈
+"""
+
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+from unittest.mock import patch
+
+# 添加项目路径
+project_root = Path(__file__).parent.parent
+if str(project_root) not in sys.path:
+    sys.path.insert(0, str(project_root))
+
+from config.config import get_config
+from src.app.feedback_system import FeedbackLearningSystem, FeedbackRecord
+
+class TestFeedbackQueue(unittest.TestCase):
+    """反馈异步写入队列测试类"""
+
+    def setUp(self):
+        """测试前准备"""
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.db_path = str(Path(self.temp_dir.name) / "feedback.db")
+        self.patchers = [
+            patch.object(get_config().feedback, "write_batch_size", 50),
+            patch.object(get_config().feedback, "write_flush_interval", 60.0),
+        ]
+        for patcher in self.patchers:
+            patcher.start()
+        self.systems = []
+
+    def tearDown(self):
+        """测试后清理"""
+        for system in self.systems:
+            system.close()
+        for patcher in self.patchers:
+            patcher.stop()
+        self.temp_dir.cleanup()
+
+    def _open(self, write_behind=True):
+        system = FeedbackLearningSystem(self.db_path, write_behind=write_behind)
+        self.systems.append(system)
+        return system
+
+    def _submit(self, system, i):
+        return system.collect_feedback(f"问题{i}", "原答案", "corrected", corrected_answer=f"答案{i}")
+
+    def test_ids_and_batches(self):
+        """测试提交即返回ID，满批立即写入、其余在 flush 时写入，每批一个事务"""
+        system = self._open()
+        ids = [self._submit(system, i) for i in range(120)]
+        self.assertEqual(len(set(ids)), 120)
+
+        self.assertTrue(system.flush(timeout=10))
+        self.assertEqual(system.write_queue.stats()["batches"], 3)
+        self.assertEqual(system.write_queue.stats()["pending"], 0)
+        for i in (0, 77, 119):
+            self.assertEqual(system.get_feedback_history(f"问题{i}")[0].id, ids[i])
+        self.assertEqual(system.db.get_improved_answer("问题77")["improved_answer"], "答案77")
+
+    def test_close_flushes_and_notifies(self):
+        """测试关闭时写完排队的反馈，写入后才通知（用于清除答案缓存）"""
+        system = self._open()
+        committed = []
+        system.add_committed_listener(lambda records: committed.extend(r.question for r in records))
+        for i in range(10):
+            self._submit(system, i)
+        self.assertEqual(committed, [])
+
+        system.close()
+        self.assertEqual(committed, [f"问题{i}" for i in range(10)])
+        with self.assertRaises(RuntimeError):
+            self._submit(system, 10)
+
+        reopened = self._open(write_behind=False)
+        self.assertEqual(reopened.get_system_stats()["total_feedback"], 10)
+
+    def test_reserved_ids_do_not_collide(self):
+        """测试多个实例（如多个工作进程）共用数据库时ID不冲突，同步写入的ID也不与预留段重复"""
+        first, second = self._open(), self._open()
+        ids = []
+        for i in range(60):
+            ids.append(self._submit(first if i % 2 else second, i))
+        ids.append(self._open(write_behind=False).collect_feedback("同步问题", "原答案", "positive"))
+        for system in (first, second):
+            system.flush(timeout=10)
+
+        self.assertEqual(len(set(ids)), 61)
+        self.assertEqual(first.get_system_stats()["total_feedback"], 61)
+
+    def test_failing_record_is_dropped(self):
+        """测试批量写入持续失败时逐条写入，只丢弃写入失败的反馈，后续反馈不受影响"""
+        system = self._open()
+        committed = []
+        system.add_committed_listener(lambda records: committed.extend(r.question for r in records))
+        self._submit(system, 0)
+        # 原答案为空违反 NOT NULL 约束，每次写入都会失败
+        system.write_queue.submit(FeedbackRecord(question="坏问题", original_answer=None, user_feedback="positive"))
+        self._submit(system, 1)
+
+        with patch("src.app.feedback_queue.MAX_WRITE_ATTEMPTS", 1), self.assertLogs("src.app.feedback_queue", "ERROR") as logs:
+            self.assertTrue(system.flush(timeout=10))
+        self.assertTrue(any("坏问题" in line for line in logs.output))
+        self.assertEqual(committed, ["问题0", "问题1"])
+        self.assertEqual(system.write_queue.stats()["dropped"], 1)
+
+        self._submit(system, 2)
+        self.assertTrue(system.flush(timeout=10))
+        self.assertEqual(system.get_system_stats()["total_feedback"], 3)
+
+if __name__ == '__main__':
+    unittest.main()
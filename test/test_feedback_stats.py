@@ -0,0 +1,111 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+反馈统计汇总表测试脚本
+验证触发器维护的计数与 GROUP BY 重新统计一致、统计查询不扫描反馈表、旧数据库补建与不一致时修复，
+以及按时间段的满意度趋势
+"""
+
+import sys
+import sqlite3
+import tempfile
+import unittest
+from datetime import datetime, timedelta
+from pathlib import Path
+
+# 添加项目路径
+project_root = Path(__file__).parent.parent
+if str(project_root) not in sys.path:
+    sys.path.insert(0, str(project_root))
+
+from src.app.feedback_system import FeedbackDatabase, FeedbackLearningSystem, FeedbackRecord
+
+class TestFeedbackStats(unittest.TestCase):
+    """反馈统计汇总表测试类"""
+
+    def setUp(self):
+        """测试前准备"""
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.db_path = str(Path(self.temp_dir.name) / "feedback.db")
+        self.feedback_system = FeedbackLearningSystem(self.db_path)
+        self.db = self.feedback_system.db
+
+    def tearDown(self):
+        """测试后清理"""
+        self.feedback_system.close()
+        self.temp_dir.cleanup()
+
+    def _record(self, question, feedback_type, timestamp=None):
+        return FeedbackRecord(
+            question=question, original_answer="原答案", user_feedback=feedback_type,
+            corrected_answer="新答案" if feedback_type == "corrected" else None,
+            timestamp=timestamp.isoformat() if timestamp else None
+        )
+
+    def test_counters_match_recount(self):
+        """测试单条与批量写入后计数与重新统计一致，统计只读取汇总表"""
+        for feedback_type in ("positive", "positive", "negative", "corrected", "corrected"):
+            self.feedback_system.collect_feedback("问题", "原答案", feedback_type, corrected_answer="新答案")
+        self.db.add_feedback_batch([self._record(f"问题{i}", "corrected") for i in range(3)])
+
+        statements = []
+        self.db._connection().set_trace_callback(statements.append)
+        stats = self.feedback_system.get_system_stats()
+        self.db._connection().set_trace_callback(None)
+
+        self.assertEqual(statements, ["SELECT name, value FROM feedback_counters"])
+        self.assertEqual(stats, {
+            "total_feedback": 8, "positive_feedback": 2, "negative_feedback": 1,
+            "corrected_feedback": 5, "improved_answers": 4, "satisfaction_rate": 25.0
+        })
+        self.assertTrue(self.db.verify_feedback_stats())
+
+    def test_backfill_and_repair(self):
+        """测试建立汇总表前的已有数据在打开时补建，计数不一致时校验并修复"""
+        legacy_path = str(Path(self.temp_dir.name) / "legacy.db")
+        FeedbackDatabase(legacy_path).close()
+        with sqlite3.connect(legacy_path) as conn:
+            for (trigger,) in conn.execute("SELECT name FROM sqlite_master WHERE type = 'trigger'").fetchall():
+                conn.execute(f"DROP TRIGGER {trigger}")
+            conn.execute("DROP TABLE feedback_counters")
+            conn.execute("DROP TABLE feedback_rollup")
+            conn.executemany("""
+                INSERT INTO feedback (question, original_answer, user_feedback, timestamp, question_hash)
+                VALUES ('旧问题', '旧答案', ?, '2024-01-01T08:00:00', 'h1')
+            """, [("positive",), ("negative",)])
+
+        legacy = FeedbackDatabase(legacy_path)
+        self.assertEqual(legacy.get_feedback_stats()["total_feedback"], 2)
+        self.assertEqual(legacy.get_feedback_stats()["satisfaction_rate"], 50.0)
+
+        legacy._connection().execute("UPDATE feedback_counters SET value = 7 WHERE name = 'feedback:positive'")
+        self.assertFalse(legacy.verify_feedback_stats())
+        self.assertTrue(legacy.verify_feedback_stats())
+        self.assertEqual(legacy.get_feedback_stats()["positive_feedback"], 1)
+        legacy.close()
+
+    def test_satisfaction_trend(self):
+        """测试按天与按小时的满意度趋势（超出时间范围的数据不计入）"""
+        today = datetime.now().replace(hour=9, minute=0, second=0, microsecond=0)
+        yesterday = today - timedelta(days=1)
+        records = [
+            self._record("问题", "positive", yesterday),
+            self._record("问题", "negative", yesterday),
+            self._record("问题", "positive", today),
+            self._record("问题", "positive", today + timedelta(hours=1)),
+            self._record("问题", "negative", today - timedelta(days=30)),
+        ]
+        self.db.add_feedback_batch(records)
+
+        trend = self.feedback_system.get_satisfaction_trend(days=2)
+        self.assertEqual([item["period"] for item in trend],
+                         [yesterday.date().isoformat(), today.date().isoformat()])
+        self.assertEqual([item["satisfaction_rate"] for item in trend], [50.0, 100.0])
+
+        hourly = self.feedback_system.get_satisfaction_trend(days=1, period="hour")
+        self.assertEqual([item["total_feedback"] for item in hourly], [1, 1])
+        with self.assertRaises(ValueError):
+            self.feedback_system.get_satisfaction_trend(period="week")
+
+if __name__ == '__main__':
+    unittest.main()
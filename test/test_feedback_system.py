@@ -43,9 +43,11 @@ class TestFeedbackSystem(unittest.TestCase):
         try:
             if hasattr(self, 'feedback_system'):
                 # 确保数据库连接关闭
+                self.feedback_system.close()
                 del self.feedback_system
-            if os.path.exists(self.temp_db.name):
-                os.unlink(self.temp_db.name)
+            for suffix in ("", "-wal", "-shm"):
+                if os.path.exists(self.temp_db.name + suffix):
+                    os.unlink(self.temp_db.name + suffix)
         except (PermissionError, OSError):
             # Windows文件锁定问题，忽略
             pass
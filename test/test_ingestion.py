@@ -0,0 +1,175 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+流式导入测试脚本
+验证有界队列的背压与异常传递，以及构建器的流式全量/增量构建（增量构建只提取变化的文件，构建结果通过符号链接切换）
+"""
+
+import sys
+import time
+import tempfile
+import unittest
+import threading
+from pathlib import Path
+from typing import List
+from unittest.mock import patch
+
+import faiss
+
+# 添加项目路径
+project_root = Path(__file__).parent.parent
+if str(project_root) not in sys.path:
+    sys.path.insert(0, str(project_root))
+
+from langchain_core.embeddings import Embeddings
+from config.config import get_config
+from src.app.ingestion import bounded, discover_files
+from src.app.chunk_store import CHUNK_STORE_FILE, ChunkStore
+from src.app.build_knowledge_base import KnowledgeBaseBuilder
+
+class HashEmbeddings(Embeddings):
+    """按文本内容生成确定性向量的假嵌入模型"""
+
+    def __init__(self):
+        self.embedded = []
+        self._lock = threading.Lock()
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        with self._lock:
+            self.embedded.extend(texts)
+        return [[float(ord(c)) for c in (text + " " * 8)[:8]] for text in texts]
+
+    def embed_query(self, text: str) -> List[float]:
+        return self.embed_documents([text])[0]
+
+class TestBounded(unittest.TestCase):
+    """有界队列测试类"""
+
+    def test_preserves_order(self):
+        """测试顺序保持不变"""
+        self.assertEqual(list(bounded(range(100), maxsize=3)), list(range(100)))
+
+    def test_backpressure(self):
+        """测试下游未消费时上游不会无限读取"""
+        produced = []
+
+        def source():
+            for i in range(100):
+                produced.append(i)
+                yield i
+
+        stream = bounded(source(), maxsize=4)
+        next(stream)
+        time.sleep(0.2)
+        # 已取出1个 + 队列4个 + 阻塞在put上的1个
+        self.assertLessEqual(len(produced), 6)
+        stream.close()
+
+    def test_propagates_errors(self):
+        """测试上游异常在下游重新抛出"""
+        def source():
+            yield 1
+            raise IOError("读取失败")
+
+        with self.assertRaises(IOError):
+            list(bounded(source(), maxsize=2))
+
+class TestStreamingBuild(unittest.TestCase):
+    """流式构建测试类"""
+
+    def setUp(self):
+        """测试前准备"""
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.docs_path = Path(self.temp_dir.name) / "docs"
+        self.store_path = Path(self.temp_dir.name) / "vector_store"
+        (self.docs_path / "sub").mkdir(parents=True)
+        for i in range(20):
+            folder = self.docs_path / "sub" if i % 2 else self.docs_path
+            (folder / f"doc{i}.md").write_text(f"# 文档{i}\n\n" + f"段落{i}。" * 400, encoding="utf-8")
+
+        config = get_config()
+        self.patches = [
+            patch.object(config.embedding_cache, "enabled", False),
+            patch.object(config.vector_store, "eval_queries", 10),
+            patch.object(config.embedding_pipeline, "queue_size", 2),
+            patch.object(config.embedding_pipeline, "requests_per_second", 0),
+        ]
+        for p in self.patches:
+            p.start()
+
+    def tearDown(self):
+        """测试后清理"""
+        for p in self.patches:
+            p.stop()
+        self.temp_dir.cleanup()
+
+    def _builder(self) -> KnowledgeBaseBuilder:
+        builder = KnowledgeBaseBuilder(str(self.docs_path), str(self.store_path))
+        builder.embedding_pipeline.embeddings = HashEmbeddings()
+        return builder
+
+    def _chunk_count(self) -> int:
+        store = ChunkStore(self.store_path / CHUNK_STORE_FILE)
+        try:
+            return store.count()
+        finally:
+            store.close()
+
+    def _assert_versions(self, count: int):
+        """向量存储路径是指向最新版本目录的符号链接，保留当前与上一个版本"""
+        self.assertTrue(self.store_path.is_symlink())
+        versions = sorted(Path(self.temp_dir.name).glob(".vector_store.v-*"))
+        self.assertEqual(len(versions), count)
+        self.assertEqual(self.store_path.resolve(), versions[-1].resolve())
+
+    def test_discover_files(self):
+        """测试递归发现文件"""
+        self.assertEqual(len(discover_files(self.docs_path, "*.md")), 20)
+        self.assertEqual(len(discover_files(self.docs_path, "*.md", recursive=False)), 10)
+
+    def test_switch_from_plain_directory(self):
+        """测试旧版普通目录的向量存储在重建后改为符号链接，第三次构建删除最早的版本"""
+        self.store_path.mkdir()
+        (self.store_path / "index.faiss").write_bytes(b"old")
+        for _ in range(3):
+            self._builder().build(incremental=False)
+        self._assert_versions(2)
+        self.assertEqual(faiss.read_index(str(self.store_path / "index.faiss")).ntotal, self._chunk_count())
+
+    def test_full_then_incremental_build(self):
+        """测试流式全量构建与增量构建"""
+        builder = self._builder()
+        builder.build()
+
+        index = faiss.read_index(str(self.store_path / "index.faiss"))
+        chunk_count = self._chunk_count()
+        self.assertEqual(index.ntotal, chunk_count)
+        self.assertEqual(len(builder.embedding_pipeline.embeddings.embedded), chunk_count)
+        self.assertTrue((self.store_path / "index_report.json").exists())
+        self.assertFalse((self.store_path / "vectors.tmp").exists())
+        self._assert_versions(1)
+
+        # 修改一个文件、删除一个文件、重写一个文件但内容不变（修改时间变化）
+        (self.docs_path / "doc0.md").write_text("# 文档0\n\n只剩一段。", encoding="utf-8")
+        (self.docs_path / "sub" / "doc1.md").unlink()
+        (self.docs_path / "doc2.md").write_text("# 文档2\n\n" + "段落2。" * 400, encoding="utf-8")
+
+        builder = self._builder()
+        with patch.object(builder.extractor, "extract", wraps=builder.extractor.extract) as extract:
+            builder.build()
+        # 只提取变化的文件，其余文件只计算字节哈希
+        self.assertEqual([call.args[0] for call in extract.call_args_list], ["doc0.md"])
+        self.assertEqual(builder.embedding_pipeline.embeddings.embedded, ["# 文档0\n\n只剩一段。"])
+
+        index = faiss.read_index(str(self.store_path / "index.faiss"))
+        self.assertEqual(index.ntotal, self._chunk_count())
+        self._assert_versions(2)
+
+        # 大小与修改时间未变的文件不再读取
+        builder = self._builder()
+        with patch("src.app.build_knowledge_base.file_hash") as hash_file:
+            builder.build()
+        hash_file.assert_not_called()
+
+if __name__ == "__main__":
+    unittest.main()
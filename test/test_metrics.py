@@ -0,0 +1,116 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+指标测试脚本
+验证直方图与文本格式导出、搜索各阶段耗时记录、知识库指标采集、gRPC指标拦截器与HTTP指标端点
+"""
+
+import sys
+import unittest
+import urllib.request
+from pathlib import Path
+
+# 添加项目路径
+project_root = Path(__file__).parent.parent
+if str(project_root) not in sys.path:
+    sys.path.insert(0, str(project_root))
+
+from langchain.schema import Document
+from langchain_community.vectorstores import FAISS
+from src.app.metrics import (GRPC_ERRORS, GRPC_IN_FLIGHT, STAGE_SECONDS, Counter, Histogram,
+                             MetricsRegistry, MetricsServer)
+from src.rpc.interceptors import MetricsInterceptor
+from src.rpc.generated import knowledge_service_pb2
+from test.knowledge_base_fixtures import FakeEmbeddings, create_knowledge_base
+
+class FakeHandler:
+    """只含一元调用函数的假处理器"""
+
+    request_streaming = False
+    response_streaming = False
+
+    def __init__(self, behavior):
+        self.unary_unary = behavior
+
+    def _replace(self, unary_unary):
+        return FakeHandler(unary_unary)
+
+class FakeCallDetails:
+    """假调用信息"""
+
+    method = "/knowledge.KnowledgeService/SearchDocuments"
+
+class TestMetrics(unittest.TestCase):
+    """指标测试类"""
+
+    def test_histogram_render(self):
+        """测试直方图累积分桶与Prometheus文本格式"""
+        registry = MetricsRegistry()
+        histogram = registry.register(Histogram("demo_seconds", "示例耗时", ["stage"], buckets=(0.1, 1.0)))
+        counter = registry.register(Counter("demo_total", "示例计数"))
+        histogram.observe(0.05, stage="a")
+        histogram.observe(0.5, stage="a")
+        counter.inc()
+        registry.register_collector(lambda: [("demo_size", "gauge", "示例大小", [({"cache": "x"}, 3)])])
+
+        text = registry.render()
+        self.assertIn('demo_seconds_bucket{stage="a",le="0.1"} 1', text)
+        self.assertIn('demo_seconds_bucket{stage="a",le="+Inf"} 2', text)
+        self.assertIn('demo_seconds_count{stage="a"} 2', text)
+        self.assertIn("# TYPE demo_seconds histogram", text)
+        self.assertIn("demo_total 1", text)
+        self.assertIn('demo_size{cache="x"} 3', text)
+        with self.assertRaises(ValueError):
+            histogram.observe(1.0, other="a")
+
+    def test_search_stages_and_collector(self):
+        """测试搜索分别记录查询嵌入与向量检索耗时，知识库指标可采集"""
+        kb = create_knowledge_base(self)
+        kb.embeddings = FakeEmbeddings()
+        kb.vector_store = FAISS.from_documents([
+            Document(page_content="API是应用程序接口", metadata={"source": "api.md"}),
+            Document(page_content="部署到生产环境", metadata={"source": "deploy.md"}),
+        ], kb.embeddings)
+
+        before = {stage: STAGE_SECONDS.count(operation="search", stage=stage)
+                  for stage in ("query_embedding", "vector_search", "total")}
+        results = kb.search_documents("什么是API", k=1)
+        self.assertEqual(results[0]["metadata"]["source"], "api.md")
+        for stage, count in before.items():
+            self.assertEqual(STAGE_SECONDS.count(operation="search", stage=stage), count + 1)
+
+        families = {name: samples for name, _, _, samples in kb.collect_metrics()}
+        self.assertEqual(families["kdb_index_vectors"], [({}, 2)])
+        self.assertIn(({"cache": "answer", "result": "miss"}, 0), families["kdb_cache_requests_total"])
+
+    def test_interceptor_counts_errors(self):
+        """测试拦截器统计进行中请求与失败响应"""
+        method = "SearchDocuments"
+        errors = GRPC_ERRORS.value(method=method)
+        seen = []
+
+        def behavior(request, context):
+            seen.append(GRPC_IN_FLIGHT.value(method=method))
+            return knowledge_service_pb2.SearchResponse(success=request)
+
+        handler = MetricsInterceptor().intercept_service(lambda details: FakeHandler(behavior), FakeCallDetails())
+        handler.unary_unary(True, None)
+        handler.unary_unary(False, None)
+        self.assertEqual(seen, [1, 1])
+        self.assertEqual(GRPC_IN_FLIGHT.value(method=method), 0)
+        self.assertEqual(GRPC_ERRORS.value(method=method), errors + 1)
+
+    def test_metrics_endpoint(self):
+        """测试HTTP指标端点"""
+        registry = MetricsRegistry()
+        registry.register(Counter("demo_requests_total", "示例请求数")).inc(2)
+        server = MetricsServer(port=0, registry=registry).start()
+        try:
+            with urllib.request.urlopen(f"http://127.0.0.1:{server.port}/metrics", timeout=5) as response:
+                body = response.read().decode("utf-8")
+            self.assertIn("demo_requests_total 2", body)
+        finally:
+            server.stop()
+
+if __name__ == '__main__':
+    unittest.main()
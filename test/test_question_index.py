@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+反馈问题倒排索引测试脚本
+验证中英文切分、索引查找与逐条计算Jaccard相似度结果一致、旧数据库补建索引，以及查找不再逐条查询改进答案
+"""
+
+import sys
+import random
+import sqlite3
+import tempfile
+import unittest
+from pathlib import Path
+from unittest.mock import patch
+
+# 添加项目路径
+project_root = Path(__file__).parent.parent
+if str(project_root) not in sys.path:
+    sys.path.insert(0, str(project_root))
+
+from src.app.feedback_system import FeedbackDatabase, FeedbackLearningSystem
+from src.app.question_index import tokenize_question
+
+class TestQuestionIndex(unittest.TestCase):
+    """反馈问题倒排索引测试类"""
+
+    def setUp(self):
+        """测试前准备"""
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.db_path = str(Path(self.temp_dir.name) / "feedback.db")
+        self.feedback_system = FeedbackLearningSystem(self.db_path)
+
+    def tearDown(self):
+        """测试后清理"""
+        self.feedback_system.close()
+        self.temp_dir.cleanup()
+
+    def test_tokenize(self):
+        """测试中文按相邻二字、英文按词切分并忽略标点"""
+        self.assertEqual(tokenize_question("什么是API？"), {"什么", "么是", "api"})
+        self.assertEqual(tokenize_question("How to deploy, 部署"), {"how", "to", "deploy", "部署"})
+        self.assertEqual(tokenize_question("？！"), set())
+
+    def test_matches_brute_force(self):
+        """测试索引查找与逐条计算Jaccard相似度的结果一致"""
+        rng = random.Random(7)
+        words = ["什么", "如何", "部署", "接口", "模型", "训练", "api", "server", "数据"]
+        questions = list({" ".join(rng.sample(words, rng.randint(1, 5))) for _ in range(80)})
+        for i, question in enumerate(questions):
+            corrected = i % 2 == 0
+            self.feedback_system.collect_feedback(
+                question, "原答案", "corrected" if corrected else "negative",
+                corrected_answer=f"改进:{question}" if corrected else None
+            )
+
+        improved = set(questions[::2])
+        for query in questions[:10] + ["如何 部署 模型", "完全无关"]:
+            for threshold in (0.3, 0.6, 1.0):
+                terms = tokenize_question(query)
+                expected = {q for q in improved
+                            if len(terms & tokenize_question(q)) / len(terms | tokenize_question(q)) >= threshold}
+                results = self.feedback_system.get_similar_questions_feedback(query, threshold)
+                self.assertEqual({r["question"] for r in results}, expected, (query, threshold))
+                self.assertEqual([r["similarity"] for r in results],
+                                 sorted((r["similarity"] for r in results), reverse=True))
+                for result in results:
+                    self.assertEqual(result["improved_answer"], f"改进:{result['question']}")
+
+    def test_backfill_and_no_per_match_queries(self):
+        """测试建立索引前的已有数据在打开时补建索引，查找不再逐条查询改进答案"""
+        legacy_path = str(Path(self.temp_dir.name) / "legacy.db")
+        FeedbackDatabase(legacy_path)
+        with sqlite3.connect(legacy_path) as conn:
+            conn.execute("DROP TABLE feedback_questions")
+            conn.execute("DELETE FROM feedback_question_terms")
+            conn.execute("DELETE FROM feedback_terms")
+            conn.execute("""
+                INSERT INTO feedback (question, original_answer, user_feedback, corrected_answer, timestamp, question_hash)
+                VALUES ('人工智能是什么？', '旧答案', 'corrected', '新答案', '2024-01-01', 'h1')
+            """)
+            conn.execute("""
+                INSERT INTO answer_improvements (question_hash, improved_answer, confidence_score, last_updated)
+                VALUES ('h1', '新答案', 0.5, '2024-01-01')
+            """)
+
+        system = FeedbackLearningSystem(legacy_path)
+        with patch.object(system.db, "get_improved_answer") as per_match_lookup:
+            results = system.get_similar_questions_feedback("什么是人工智能？", 0.5)
+        per_match_lookup.assert_not_called()
+        self.assertEqual(results[0]["question"], "人工智能是什么？")
+        self.assertEqual(results[0]["improved_answer"], "新答案")
+        self.assertAlmostEqual(results[0]["similarity"], 0.5)
+
+if __name__ == '__main__':
+    unittest.main()
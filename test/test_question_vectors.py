@@ -0,0 +1,142 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+反馈问题向量索引测试脚本
+验证只嵌入有改进答案的问题且每个问题只嵌入一次、没有改进答案的问题不占用近邻名额、
+索引保存在数据库旁并可重新加载、其他实例写入的改进答案在启用时由后台补嵌入、嵌入模型维度变化时重新构建，以及相似问题按近邻一次取回改进答案
+"""
+
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+from unittest.mock import patch
+
+# 添加项目路径
+project_root = Path(__file__).parent.parent
+if str(project_root) not in sys.path:
+    sys.path.insert(0, str(project_root))
+
+from langchain_core.embeddings import Embeddings
+
+from src.app.feedback_system import FeedbackLearningSystem
+from src.app.question_vectors import INDEX_SUFFIX
+
+VOCABULARY = ["部署", "模型", "接口", "训练", "数据", "什么"]
+
+class KeywordEmbeddings(Embeddings):
+    """按关键词计数的假嵌入模型，记录嵌入过的文本"""
+
+    def __init__(self):
+        self.embedded = []
+
+    def _embed(self, text):
+        self.embedded.append(text)
+        return [float(text.count(word)) + 0.01 for word in VOCABULARY]
+
+    def embed_documents(self, texts):
+        return [self._embed(text) for text in texts]
+
+    def embed_query(self, text):
+        return self._embed(text)
+
+class WideKeywordEmbeddings(KeywordEmbeddings):
+    """维度不同的假嵌入模型（模拟更换嵌入模型）"""
+
+    def _embed(self, text):
+        return super()._embed(text) + [0.01, 0.01]
+
+class TestQuestionVectors(unittest.TestCase):
+    """反馈问题向量索引测试类"""
+
+    def setUp(self):
+        """测试前准备"""
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.db_path = str(Path(self.temp_dir.name) / "feedback.db")
+        self.embeddings = KeywordEmbeddings()
+        self.feedback_system = self._open()
+
+    def tearDown(self):
+        """测试后清理"""
+        self.feedback_system.close()
+        self.temp_dir.cleanup()
+
+    def _open(self, embeddings=None, top_k=2):
+        system = FeedbackLearningSystem(self.db_path)
+        system.enable_embedding_similarity(embeddings or self.embeddings, top_k=top_k)
+        self.assertTrue(system.db.question_vectors.wait_ready(timeout=10))
+        return system
+
+    def test_embeds_each_question_once(self):
+        """测试只嵌入有改进答案的问题且同一问题只嵌入一次，查找返回近邻的改进答案且不逐条查询"""
+        for _ in range(3):
+            self.feedback_system.collect_feedback("如何部署模型", "原答案", "corrected", corrected_answer="部署步骤")
+        self.feedback_system.collect_feedback("接口数据格式", "原答案", "corrected", corrected_answer="数据格式说明")
+        self.feedback_system.collect_feedback("训练需要多久", "原答案", "negative")
+        self.assertEqual(self.embeddings.embedded, ["如何部署模型", "接口数据格式"])
+
+        with patch.object(self.feedback_system.db, "get_improved_answer") as per_match_lookup:
+            results = self.feedback_system.get_similar_questions_feedback("模型怎么部署", 0.9)
+        per_match_lookup.assert_not_called()
+        self.assertEqual([r["question"] for r in results], ["如何部署模型"])
+        self.assertEqual(results[0]["improved_answer"], "部署步骤")
+        self.assertGreater(results[0]["similarity"], 0.99)
+
+        # 没有改进答案的问题不返回
+        self.assertEqual(self.feedback_system.get_similar_questions_feedback("训练多久", 0.9), [])
+
+    def test_unimproved_questions_do_not_fill_top_k(self):
+        """测试大量只有正/负面反馈的相似问题不会挤掉有改进答案的问题"""
+        self.feedback_system.close()
+        self.feedback_system = self._open(top_k=5)
+        for i in range(10):
+            self.feedback_system.collect_feedback(f"接口{i}是什么", "原答案", "positive")
+        self.feedback_system.collect_feedback("接口x是什么", "原答案", "corrected", corrected_answer="接口说明")
+
+        results = self.feedback_system.get_similar_questions_feedback("接口是什么", 0.9)
+        self.assertEqual([r["question"] for r in results], ["接口x是什么"])
+        self.assertEqual(self.feedback_system.db.question_vectors.size, 1)
+
+    def test_persisted_and_catches_up(self):
+        """测试索引保存在数据库旁，重新打开时加载并在后台只补嵌入其他实例新写入的问题，查找不再补嵌入"""
+        self.feedback_system.collect_feedback("如何部署模型", "原答案", "corrected", corrected_answer="部署步骤")
+        self.feedback_system.close()
+        self.assertTrue((Path(self.temp_dir.name) / f"feedback{INDEX_SUFFIX}").exists())
+
+        # 其他实例（未启用向量索引）写入新问题
+        FeedbackLearningSystem(self.db_path).collect_feedback(
+            "接口数据格式", "原答案", "corrected", corrected_answer="数据格式说明"
+        )
+
+        embeddings = KeywordEmbeddings()
+        reopened = self._open(embeddings)
+        self.assertEqual(reopened.db.question_vectors.size, 2)
+        self.assertEqual(embeddings.embedded, ["接口数据格式"])
+        results = reopened.get_similar_questions_feedback("数据接口", 0.9)
+        self.assertEqual([r["question"] for r in results], ["接口数据格式"])
+        self.assertEqual(embeddings.embedded, ["接口数据格式", "数据接口"])
+        reopened.close()
+
+    def test_dimension_change_rebuilds(self):
+        """测试嵌入模型维度变化时在同一次补嵌入中重新构建索引（不死锁）"""
+        self.feedback_system.collect_feedback("如何部署模型", "原答案", "corrected", corrected_answer="部署步骤")
+        self.feedback_system.close()
+        FeedbackLearningSystem(self.db_path).collect_feedback(
+            "接口数据格式", "原答案", "corrected", corrected_answer="数据格式说明"
+        )
+
+        embeddings = WideKeywordEmbeddings()
+        self.feedback_system = self._open(embeddings)
+        question_vectors = self.feedback_system.db.question_vectors
+        self.assertEqual(question_vectors.size, 2)
+        self.assertEqual(question_vectors._index.d, len(VOCABULARY) + 2)
+        self.assertEqual(embeddings.embedded, ["接口数据格式", "如何部署模型", "接口数据格式"])
+
+        # 之后写入的改进答案照常嵌入
+        self.feedback_system.collect_feedback("训练需要多久", "原答案", "corrected", corrected_answer="一小时")
+        self.assertEqual(question_vectors.size, 3)
+        results = self.feedback_system.get_similar_questions_feedback("模型怎么部署", 0.9)
+        self.assertEqual([r["question"] for r in results], ["如何部署模型"])
+
+if __name__ == '__main__':
+    unittest.main()
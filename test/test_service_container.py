@@ -0,0 +1,133 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+服务依赖容器测试脚本
+验证各组件只初始化一次并共享给知识库与gRPC服务、启动耗时记录、对话数据库失败时延后重试，
+以及服务器启动后加载向量索引期间健康检查报告 initializing（异步服务的健康检查不在阻塞线程池中排队）
+"""
+
+import sys
+import asyncio
+import tempfile
+import threading
+import unittest
+from pathlib import Path
+from unittest.mock import patch
+
+# 添加项目路径
+project_root = Path(__file__).parent.parent
+if str(project_root) not in sys.path:
+    sys.path.insert(0, str(project_root))
+
+from config.config import get_config
+from src.rpc import service_container
+from src.rpc.service_container import ServiceContainer
+from src.rpc.grpc_server import AsyncKnowledgeServiceImpl, KnowledgeServiceImpl
+
+class FakeConversationManager:
+    """第一次创建失败（数据库不可用）、之后成功的假对话管理器"""
+
+    created = 0
+
+    def __init__(self):
+        FakeConversationManager.created += 1
+        if FakeConversationManager.created == 1:
+            raise ConnectionError("数据库连接失败")
+
+class TestServiceContainer(unittest.TestCase):
+    """服务依赖容器测试类"""
+
+    def setUp(self):
+        """测试前准备"""
+        self.temp_dir = tempfile.TemporaryDirectory()
+        FakeConversationManager.created = 0
+        self.patchers = [
+            patch.object(get_config().embedding_cache, "enabled", False),
+            patch.object(get_config().answer_cache, "semantic_enabled", False),
+            patch.object(get_config().vector_store, "store_path", str(Path(self.temp_dir.name) / "missing")),
+            patch.object(service_container, "ConversationManager", FakeConversationManager),
+        ]
+        for patcher in self.patchers:
+            patcher.start()
+        self.container = ServiceContainer(feedback_db_path=str(Path(self.temp_dir.name) / "feedback.db"))
+
+    def tearDown(self):
+        """测试后清理"""
+        for patcher in self.patchers:
+            patcher.stop()
+        self.container.close()
+        self.temp_dir.cleanup()
+
+    def test_components_created_once_and_shared(self):
+        """测试并发获取时知识库只创建一次，并共享LLM客户端与反馈学习系统"""
+        with patch.object(service_container, "EnhancedKnowledgeBase",
+                          wraps=service_container.EnhancedKnowledgeBase) as factory:
+            results = []
+            threads = [threading.Thread(target=lambda: results.append(self.container.knowledge_base))
+                       for _ in range(4)]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+        factory.assert_called_once()
+        kb = results[0]
+        self.assertTrue(all(result is kb for result in results))
+        self.assertIs(kb.llm, self.container.llm)
+        self.assertIs(kb.feedback_system, self.container.feedback_system)
+
+    def test_warm_up_timings_and_optional_retry(self):
+        """测试启动耗时按组件记录，对话数据库失败不影响启动并在首次使用时重试"""
+        timings = self.container.warm_up()
+        self.assertEqual(list(timings), ["llm", "feedback_system", "knowledge_base", "index"])
+        self.assertIsNone(self.container.index)
+        self.assertFalse(self.container.is_initialized("conversation_manager"))
+
+        self.assertIsInstance(self.container.conversation_manager, FakeConversationManager)
+        self.assertIs(self.container.conversation_manager, self.container.conversation_manager)
+        self.assertEqual(FakeConversationManager.created, 2)
+
+    def test_service_uses_container(self):
+        """测试gRPC服务使用容器中的知识库，不再重复创建"""
+        self.container.warm_up()
+        with patch.object(service_container, "EnhancedKnowledgeBase") as factory:
+            service = KnowledgeServiceImpl(container=self.container)
+        factory.assert_not_called()
+        self.assertIs(service.kb, self.container.knowledge_base)
+
+        kb = self.container.knowledge_base
+        other = KnowledgeServiceImpl(kb)
+        self.assertIs(other.kb, kb)
+        self.assertIs(other.container.feedback_system, kb.feedback_system)
+
+    def test_health_check_before_index_loaded(self):
+        """测试服务先创建、向量索引后加载：加载完成前健康检查报告 initializing"""
+        self.container.warm_up(service_container.CORE_COMPONENTS)
+        service = KnowledgeServiceImpl(container=self.container, load_index=False)
+        self.assertFalse(self.container.is_initialized("index"))
+        self.assertEqual(service.HealthCheck(None, None).status, "initializing")
+
+        self.container.warm_up(service_container.DEFERRED_COMPONENTS)
+        with patch.object(service.kb, "qa_chain", object()):
+            response = service.HealthCheck(None, None)
+        self.assertEqual((response.healthy, response.status), (True, "ready"))
+
+    def test_async_health_check_not_blocked_by_pool(self):
+        """测试异步服务的健康检查不在阻塞线程池中排队（线程池占满时仍立即返回）"""
+        self.container.warm_up(service_container.CORE_COMPONENTS)
+        service = AsyncKnowledgeServiceImpl(max_blocking_workers=1, container=self.container, load_index=False)
+        release = threading.Event()
+
+        async def run():
+            busy = asyncio.ensure_future(service.async_kb.run_blocking(release.wait, 5))
+            await asyncio.sleep(0.05)
+            try:
+                return await asyncio.wait_for(service.HealthCheck(None, None), 0.5)
+            finally:
+                release.set()
+                await busy
+
+        self.assertEqual(asyncio.run(run()).status, "initializing")
+        service.async_kb.shutdown()
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,139 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+请求合并测试脚本
+验证相同键的并发同步/异步调用只执行一次、异常共享、等待者按自身截止时间与取消状态退出以及增强知识库的接入
+"""
+
+import sys
+import time
+import asyncio
+import threading
+import unittest
+from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor
+
+# 添加项目路径
+project_root = Path(__file__).parent.parent
+if str(project_root) not in sys.path:
+    sys.path.insert(0, str(project_root))
+
+from src.app.single_flight import SingleFlight
+from src.app.deadline import Deadline, DeadlineExceeded, RequestCancelled
+from test.knowledge_base_fixtures import FakeQAChain, create_knowledge_base
+
+class TestSingleFlight(unittest.TestCase):
+    """请求合并测试类"""
+
+    def test_concurrent_calls_share_result(self):
+        """测试并发同步调用只执行一次且各自获得独立副本"""
+        flight = SingleFlight()
+        calls = []
+
+        def compute():
+            calls.append(1)
+            time.sleep(0.2)
+            return {"value": 1}
+
+        with ThreadPoolExecutor(max_workers=8) as executor:
+            results = list(executor.map(lambda _: flight.do("k", compute), range(8)))
+
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(results[0], {"value": 1})
+        self.assertEqual(len({id(r) for r in results}), 8)
+        self.assertEqual(flight.stats()["collapsed"], 7)
+
+        # 完成后不保留结果
+        flight.do("k", compute)
+        self.assertEqual(len(calls), 2)
+
+    def test_error_is_shared(self):
+        """测试计算出错时所有等待者收到同一异常"""
+        flight = SingleFlight()
+        started = threading.Event()
+
+        def fail():
+            started.set()
+            time.sleep(0.2)
+            raise RuntimeError("失败")
+
+        with ThreadPoolExecutor(max_workers=2) as executor:
+            leader = executor.submit(flight.do, "k", fail)
+            started.wait()
+            follower = executor.submit(flight.do, "k", fail)
+            for future in (leader, follower):
+                with self.assertRaises(RuntimeError):
+                    future.result()
+        self.assertEqual(flight.stats()["in_flight"], 0)
+
+    def test_follower_respects_own_deadline(self):
+        """测试等待者超时或被取消时立即退出，不等待耗时更长的发起者"""
+        flight = SingleFlight()
+        started, release = threading.Event(), threading.Event()
+
+        def compute():
+            started.set()
+            release.wait(10)
+            return {"value": 1}
+
+        with ThreadPoolExecutor(max_workers=1) as executor:
+            leader = executor.submit(flight.do, "k", compute)
+            started.wait()
+
+            start = time.monotonic()
+            with self.assertRaises(DeadlineExceeded):
+                flight.do("k", compute, Deadline(0.2))
+            self.assertLess(time.monotonic() - start, 1.0)
+
+            cancelled = threading.Event()
+            threading.Timer(0.1, cancelled.set).start()
+            with self.assertRaises(RequestCancelled):
+                flight.do("k", compute, Deadline(is_cancelled=cancelled.is_set))
+
+            release.set()
+            self.assertEqual(leader.result(), {"value": 1})
+            self.assertEqual(flight.do("k", compute, Deadline(5)), {"value": 1})
+
+    def test_async_calls_and_cancellation(self):
+        """测试协程调用合并，且单个调用者取消不影响其他调用者"""
+        flight = SingleFlight()
+        calls = []
+
+        async def compute():
+            calls.append(1)
+            await asyncio.sleep(0.2)
+            return {"value": 1}
+
+        async def run():
+            first = asyncio.ensure_future(flight.do_async("k", compute))
+            await asyncio.sleep(0)
+            others = [asyncio.ensure_future(flight.do_async("k", compute)) for _ in range(5)]
+            await asyncio.sleep(0.05)
+            first.cancel()
+            return await asyncio.gather(*others)
+
+        results = asyncio.run(run())
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(results, [{"value": 1}] * 5)
+        self.assertEqual(flight.stats(), {"executions": 1, "collapsed": 5, "in_flight": 0, "collapse_rate": 5 / 6})
+
+class TestEnhancedKnowledgeBaseSingleFlight(unittest.TestCase):
+    """增强知识库请求合并测试类"""
+
+    def setUp(self):
+        """测试前准备"""
+        self.kb = create_knowledge_base(self, {"answer_cache.enabled": False})
+        self.kb.qa_chain = FakeQAChain(answer_delay=0.3)
+
+    def test_identical_questions_collapse(self):
+        """测试相同问题（规范化后）的并发请求只调用一次LLM"""
+        questions = ["什么是API？", " 什么是API？", "什么是API？ "] * 3 + ["如何部署？"]
+        with ThreadPoolExecutor(max_workers=len(questions)) as executor:
+            results = list(executor.map(self.kb.ask_question_with_feedback, questions))
+
+        self.assertEqual(self.kb.qa_chain.calls, 2)
+        self.assertEqual([r["question"] for r in results], questions)
+        self.assertEqual(self.kb.get_enhanced_stats()["single_flight"]["collapsed"], 8)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,63 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+多进程服务守护测试脚本
+验证工作进程崩溃后自动重启、连续崩溃退避以及停止时终止全部进程
+"""
+
+import sys
+import time
+import unittest
+from pathlib import Path
+
+# 添加项目路径
+project_root = Path(__file__).parent.parent
+if str(project_root) not in sys.path:
+    sys.path.insert(0, str(project_root))
+
+from src.rpc.supervisor import WorkerSupervisor
+
+def crash_worker(worker_id, port, max_workers, async_mode):
+    """启动后立即异常退出的工作进程"""
+    sys.exit(3)
+
+def idle_worker(worker_id, port, max_workers, async_mode):
+    """持续运行的工作进程"""
+    while True:
+        time.sleep(0.1)
+
+def wait_until(predicate, timeout=20.0):
+    """轮询直到条件满足"""
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if predicate():
+            return True
+        time.sleep(0.05)
+    return False
+
+class TestWorkerSupervisor(unittest.TestCase):
+    """工作进程守护测试类"""
+
+    def test_restart_with_backoff(self):
+        """测试崩溃的工作进程被重启且等待时间递增"""
+        supervisor = WorkerSupervisor(1, restart_delay=0.1, max_restart_delay=0.4, target=crash_worker)
+        supervisor.start()
+        try:
+            self.assertTrue(wait_until(lambda: supervisor.check() or supervisor.restarts >= 3))
+            self.assertEqual(supervisor._delays[0], 0.4)
+        finally:
+            supervisor.shutdown()
+
+    def test_shutdown_terminates_workers(self):
+        """测试停止时终止全部工作进程"""
+        supervisor = WorkerSupervisor(2, target=idle_worker)
+        supervisor.start()
+        processes = list(supervisor._workers.values())
+        self.assertTrue(wait_until(lambda: all(p.is_alive() for p in processes)))
+
+        supervisor.shutdown(timeout=5)
+        self.assertFalse(any(p.is_alive() for p in processes))
+        self.assertEqual(supervisor.restarts, 0)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,158 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+请求追踪测试脚本
+验证阶段耗时归入当前请求（含线程池）、OTLP/JSON导出格式、慢请求日志与采样，以及追踪拦截器
+"""
+
+import sys
+import json
+import asyncio
+import tempfile
+import unittest
+from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor
+
+# 添加项目路径
+project_root = Path(__file__).parent.parent
+if str(project_root) not in sys.path:
+    sys.path.insert(0, str(project_root))
+
+import grpc
+from src.app.async_knowledge_base import AsyncKnowledgeBase
+from src.app.metrics import GRPC_REQUESTS, observe_stage
+from src.app.tracing import FileSpanExporter, RequestTrace, RequestTracer, current_trace, use_trace
+from src.rpc.interceptors import TracingInterceptor
+from src.rpc.generated import knowledge_service_pb2
+
+class FakeHandler:
+    """只含一元调用函数的假处理器"""
+
+    request_streaming = False
+    response_streaming = False
+
+    def __init__(self, behavior):
+        self.unary_unary = behavior
+
+    def _replace(self, unary_unary):
+        return FakeHandler(unary_unary)
+
+class FakeCallDetails:
+    """带请求ID元数据的假调用信息"""
+
+    method = "/knowledge.KnowledgeService/SearchDocuments"
+    invocation_metadata = (("x-request-id", "req-1"),
+                           ("traceparent", "00-0af7651916cd43dd8448eb211c80319c-b7ad6b7169203331-01"))
+
+class FakeContext:
+    """记录尾部元数据与状态码的假gRPC上下文"""
+
+    def __init__(self):
+        self.trailing_metadata = None
+        self._code = None
+
+    def set_trailing_metadata(self, metadata):
+        self.trailing_metadata = metadata
+
+    def abort(self, code, details):
+        self._code = code
+        raise Exception(details)
+
+    def code(self):
+        return self._code
+
+class TestTracing(unittest.TestCase):
+    """请求追踪测试类"""
+
+    def setUp(self):
+        """测试前准备"""
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.path = str(Path(self.temp_dir.name) / "traces" / "spans.jsonl")
+
+    def tearDown(self):
+        """测试后清理"""
+        self.temp_dir.cleanup()
+
+    def read_spans(self):
+        with open(self.path, encoding="utf-8") as f:
+            return [json.loads(line)["resourceSpans"][0]["scopeSpans"][0]["spans"] for line in f]
+
+    def test_stages_recorded_in_current_trace(self):
+        """测试阶段耗时记入当前请求，包括阻塞线程池中执行的阶段"""
+        async_kb = AsyncKnowledgeBase.__new__(AsyncKnowledgeBase)
+        async_kb._executor = ThreadPoolExecutor(max_workers=1)
+
+        def blocking():
+            with observe_stage("ask", "retrieval"):
+                return current_trace()
+
+        async def run(trace):
+            with use_trace(trace):
+                with observe_stage("ask", "semantic_cache"):
+                    pass
+                return await async_kb.run_blocking(blocking)
+
+        trace = RequestTrace("Chat")
+        self.assertIs(asyncio.run(run(trace)), trace)
+        async_kb.shutdown()
+        self.assertEqual([(r.operation, r.stage) for r in trace.stages],
+                         [("ask", "semantic_cache"), ("ask", "retrieval")])
+        self.assertIn("ask.retrieval=", trace.breakdown())
+        self.assertIsNone(current_trace())
+
+    def test_export_sampling_and_slow_log(self):
+        """测试普通请求按采样率导出，慢请求与失败请求总是导出并记录日志"""
+        tracer = RequestTracer(slow_threshold=0.05, sample_rate=0.0, exporter=FileSpanExporter(self.path))
+        tracer.finish(RequestTrace("Chat"), "OK")
+        failed = RequestTrace("Chat")
+        tracer.finish(failed, "INTERNAL")
+
+        slow = RequestTrace("Chat")
+        slow.start_ns -= int(0.2 * 1e9)
+        slow.record("ask", "llm_generation", slow.start_ns, 0.15)
+        with self.assertLogs("src.app.tracing", level="WARNING") as logs:
+            tracer.finish(slow, "OK")
+        tracer.close()
+        self.assertIn("ask.llm_generation=150ms", logs.output[0])
+        self.assertEqual(tracer.exporter.exported, 2)
+
+        failed_spans, slow_spans = self.read_spans()
+        self.assertEqual(failed_spans[0]["status"]["code"], 2)
+        self.assertEqual(slow_spans[0]["kind"], 2)
+        self.assertEqual(slow_spans[1]["name"], "ask.llm_generation")
+        self.assertEqual(slow_spans[1]["parentSpanId"], slow_spans[0]["spanId"])
+        self.assertEqual(slow_spans[1]["traceId"], slow.trace_id)
+
+    def test_interceptor(self):
+        """测试拦截器沿用请求ID与traceparent、记录字节数与状态码"""
+        tracer = RequestTracer(slow_threshold=0, sample_rate=1.0, exporter=FileSpanExporter(self.path))
+        interceptor = TracingInterceptor(tracer)
+
+        def behavior(request, context):
+            with observe_stage("search", "vector_search"):
+                if request.query == "abort":
+                    context.abort(grpc.StatusCode.INVALID_ARGUMENT, "查询无效")
+            return knowledge_service_pb2.SearchResponse(success=True, error_message="ok")
+
+        handler = interceptor.intercept_service(lambda details: FakeHandler(behavior), FakeCallDetails())
+        invalid = GRPC_REQUESTS.value(method="SearchDocuments", code="INVALID_ARGUMENT")
+        context = FakeContext()
+        handler.unary_unary(knowledge_service_pb2.SearchRequest(query="API"), context)
+        with self.assertRaises(Exception):
+            handler.unary_unary(knowledge_service_pb2.SearchRequest(query="abort"), FakeContext())
+        tracer.close()
+
+        self.assertEqual(context.trailing_metadata, (("x-request-id", "req-1"),))
+        self.assertEqual(GRPC_REQUESTS.value(method="SearchDocuments", code="INVALID_ARGUMENT"), invalid + 1)
+        ok_spans, failed_spans = self.read_spans()
+        attributes = {a["key"]: a["value"] for a in ok_spans[0]["attributes"]}
+        self.assertEqual(ok_spans[0]["traceId"], "0af7651916cd43dd8448eb211c80319c")
+        self.assertEqual(ok_spans[0]["parentSpanId"], "b7ad6b7169203331")
+        self.assertEqual(attributes["request.id"], {"stringValue": "req-1"})
+        self.assertEqual(attributes["rpc.request.size"], {"intValue": "5"})
+        self.assertEqual(attributes["rpc.response.size"], {"intValue": "6"})
+        self.assertEqual(ok_spans[1]["name"], "search.vector_search")
+        self.assertEqual(failed_spans[0]["status"]["message"], "INVALID_ARGUMENT")
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,126 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+向量索引测试脚本
+验证不同索引类型的构建、检索参数设置与召回率评估
+"""
+
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+
+import faiss
+import numpy as np
+
+# 添加项目路径
+project_root = Path(__file__).parent.parent
+if str(project_root) not in sys.path:
+    sys.path.insert(0, str(project_root))
+
+from config.config import VectorStoreConfig
+from src.app.vector_index import (
+    StreamingIndexBuilder, apply_search_params, describe_index, evaluate_index, read_index,
+    add_vectors, remove_vectors, index_ids
+)
+
+def build_index(vectors: np.ndarray, config: VectorStoreConfig) -> faiss.Index:
+    """以全部向量作为训练样本分批流式构建索引，向量ID为 0..n-1"""
+    builder = StreamingIndexBuilder(config, train_size=len(vectors))
+    for start in range(0, len(vectors), 500):
+        batch = vectors[start:start + 500]
+        builder.add(batch, np.arange(start, start + len(batch), dtype=np.int64))
+    return builder.finish()
+
+class TestVectorIndex(unittest.TestCase):
+    """向量索引测试类"""
+
+    def setUp(self):
+        """测试前准备"""
+        rng = np.random.default_rng(42)
+        self.vectors = rng.random((2000, 32), dtype=np.float32)
+
+    def _config(self, index_type: str) -> VectorStoreConfig:
+        return VectorStoreConfig(index_type=index_type, nlist=32, nprobe=8, pq_m=8, eval_queries=50)
+
+    def test_build_all_index_types(self):
+        """测试构建所有类型的索引"""
+        for index_type in ["flat", "ivf_flat", "ivf_pq", "hnsw"]:
+            index = build_index(self.vectors, self._config(index_type))
+            self.assertEqual(index.ntotal, len(self.vectors))
+
+            _, labels = index.search(self.vectors[:1], 1)
+            self.assertEqual(labels[0][0], 0)
+
+    def test_nlist_clamped_for_small_corpus(self):
+        """测试小语料时nlist自动缩小"""
+        config = self._config("ivf_flat")
+        config.nlist = 4096
+        index = build_index(self.vectors[:390], config)
+        self.assertEqual(describe_index(index)["nlist"], 10)
+
+    def test_apply_search_params(self):
+        """测试检索参数设置"""
+        ivf = build_index(self.vectors, self._config("ivf_flat"))
+        self.assertEqual(apply_search_params(ivf, nprobe=1000), {"nprobe": 32})
+
+        hnsw = build_index(self.vectors, self._config("hnsw"))
+        self.assertEqual(apply_search_params(hnsw, ef_search=128), {"efSearch": 128})
+
+        flat = build_index(self.vectors, self._config("flat"))
+        self.assertEqual(apply_search_params(flat, nprobe=8, ef_search=128), {})
+
+    def test_recall_report(self):
+        """测试召回率-延迟报告"""
+        config = self._config("ivf_flat")
+        index = build_index(self.vectors, config)
+        report = evaluate_index(index, self.vectors, num_queries=50, k=4)
+
+        curve = report["curve"]
+        self.assertEqual([p["nprobe"] for p in curve], [1, 2, 4, 8, 16, 32])
+        # 扫描全部聚类时等价于精确检索
+        self.assertEqual(curve[-1]["recall@4"], 1.0)
+        # 评估后恢复原检索参数
+        self.assertEqual(describe_index(index)["nprobe"], config.nprobe)
+
+    def test_stable_ids_after_remove_and_add(self):
+        """测试增删向量后ID保持稳定"""
+        removed = np.arange(0, 2000, 2, dtype=np.int64)
+        for index_type in ["flat", "ivf_flat", "hnsw"]:
+            config = self._config(index_type)
+            index = build_index(self.vectors, config)
+            index = remove_vectors(index, removed, config)
+            self.assertEqual(index.ntotal, 1000)
+
+            add_vectors(index, self.vectors[:1], np.array([5000], dtype=np.int64))
+            self.assertEqual(sorted(index_ids(index).tolist())[-1], 5000)
+
+            apply_search_params(index, nprobe=32)
+            _, labels = index.search(self.vectors[[0, 1]], 1)
+            self.assertEqual(labels[:, 0].tolist(), [5000, 1])
+
+    def test_mmap_flat_index(self):
+        """测试内存映射模式下的精确索引"""
+        config = self._config("flat")
+        config.mmap_index = True
+        index = build_index(self.vectors, config)
+        self.assertEqual(describe_index(index)["nlist"], 1)
+
+        with tempfile.TemporaryDirectory() as temp_dir:
+            index_path = Path(temp_dir) / "index.faiss"
+            faiss.write_index(index, str(index_path))
+
+            mapped = read_index(index_path, mmap=True)
+            invlists = faiss.downcast_InvertedLists(mapped.invlists)
+            self.assertIsInstance(invlists, faiss.OnDiskInvertedLists)
+
+            # 单聚类IVF与暴力检索结果一致
+            exact = faiss.IndexFlatL2(self.vectors.shape[1])
+            exact.add(self.vectors)
+            _, expected = exact.search(self.vectors[:10], 4)
+            _, labels = mapped.search(self.vectors[:10], 4)
+            np.testing.assert_array_equal(labels, expected)
+            del mapped
+
+if __name__ == "__main__":
+    unittest.main()